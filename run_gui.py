@@ -15,6 +15,27 @@ import json
 import os
 import platform
 
+from src.utils.events import open_event_pipe, read_events
+
+# 输出区最多保留的行数，超出后删除最早的行
+MAX_LOG_LINES = 5000
+
+# 每次刷新界面最多处理的消息数（其余留到下一次刷新）
+MAX_MESSAGES_PER_TICK = 1000
+
+# 界面刷新间隔（毫秒）
+QUEUE_POLL_MS = 100
+
+# 进度事件中的阶段名称
+STAGE_LABELS = {
+    'download': '下载元数据',
+    'clean': '清洗数据',
+    'analyze': 'AI分析',
+    'split': 'MD切分',
+    'classify': '智能分类',
+    'summary': '生成汇总',
+}
+
 # 尝试导入日期选择器
 try:
     from tkcalendar import DateEntry
@@ -1025,34 +1046,40 @@ class PaperAnalysisGUI:
                 # Windows下设置UTF-8编码
                 env['PYTHONIOENCODING'] = 'utf-8'
 
-            self.current_process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                universal_newlines=True,
-                encoding='utf-8',
-                errors='replace',  # 遇到无法解码的字符时替换而不是报错
-                env=env
-            )
+            # 进度和结果通过单独的事件管道（NDJSON）传回，控制台输出只用于显示
+            read_fd, write_fd, events_arg, popen_kwargs = open_event_pipe()
+            try:
+                self.current_process = subprocess.Popen(
+                    cmd + ['--events-fd', events_arg],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                    bufsize=1,
+                    encoding='utf-8',
+                    errors='replace',  # 遇到无法解码的字符时替换而不是报错
+                    env=env,
+                    **popen_kwargs
+                )
+            except Exception:
+                os.close(read_fd)
+                raise
+            finally:
+                os.close(write_fd)
+
+            event_thread = threading.Thread(target=self.read_process_events, args=(read_fd,))
+            event_thread.daemon = True
+            event_thread.start()
 
             # 实时读取输出
+            silent = self.silent_mode.get()
             for line in iter(self.current_process.stdout.readline, ''):
                 if not self.is_running:
                     break
-                if not self.silent_mode.get():
-                    # 确保输出的字符串能够正确处理
-                    try:
-                        # 尝试处理可能的编码问题
-                        clean_line = line.encode('utf-8', errors='replace').decode('utf-8')
-                        self.output_queue.put(('output', clean_line))
-                    except Exception as encoding_error:
-                        # 如果还是有编码问题，使用安全的替换方式
-                        safe_line = repr(line)[1:-1]  # 移除引号
-                        self.output_queue.put(('output', f"[编码处理] {safe_line}\n"))
+                if not silent:
+                    self.output_queue.put(('output', line))
 
             self.current_process.wait()
+            event_thread.join(timeout=1)
 
             if self.is_running:
                 if self.current_process.returncode == 0:
@@ -1068,6 +1095,29 @@ class PaperAnalysisGUI:
         finally:
             self.output_queue.put(('finished', None))
     
+    def read_process_events(self, read_fd):
+        """在后台线程中读取子进程的进度事件"""
+        for event in read_events(read_fd):
+            self.output_queue.put(('event', event))
+
+    def handle_event(self, event):
+        """根据进度事件更新进度条和状态栏"""
+        event_type = event.get('event')
+        stage = STAGE_LABELS.get(event.get('stage'), event.get('stage'))
+
+        if event_type == 'stage_start':
+            self.progress.config(mode='indeterminate')
+            self.progress.start()
+            self.status_var.set(f"{stage}中...")
+        elif event_type == 'paper' and event.get('total'):
+            self.progress.stop()
+            self.progress.config(mode='determinate', maximum=event['total'], value=event.get('index', 0))
+            self.status_var.set(f"{stage}中... {event.get('index', 0)}/{event['total']}")
+        elif event_type == 'stage_end' and not event.get('success'):
+            error = event.get('error') or {}
+            message = f"：{error.get('message')}" if error.get('message') else ""
+            self.status_var.set(f"{stage}失败{message}")
+
     def stop_analysis(self):
         """停止分析"""
         self.is_running = False
@@ -1077,10 +1127,12 @@ class PaperAnalysisGUI:
         self.output_queue.put(('output', '\n⏹️ 分析已停止\n'))
     
     def log_output(self, text):
-        """输出日志到文本框"""
+        """输出日志到文本框（超过最大行数时删除最早的行）"""
         self.output_text.insert(tk.END, text)
+        line_count = int(self.output_text.index('end-1c').split('.')[0])
+        if line_count > MAX_LOG_LINES:
+            self.output_text.delete('1.0', f'{line_count - MAX_LOG_LINES + 1}.0')
         self.output_text.see(tk.END)
-        self.root.update_idletasks()
     
     def clear_output(self):
         """清空输出"""
@@ -1150,13 +1202,21 @@ class PaperAnalysisGUI:
             messagebox.showinfo("提示", "日志目录不存在")
     
     def check_queue(self):
-        """检查队列中的消息"""
+        """检查队列中的消息（每次刷新合并输出，只写一次文本框）"""
+        output_chunks = []
+        last_event = None
         try:
-            while True:
+            for _ in range(MAX_MESSAGES_PER_TICK):
                 msg_type, data = self.output_queue.get_nowait()
                 
                 if msg_type == 'output':
-                    self.log_output(data)
+                    output_chunks.append(data)
+                elif msg_type == 'event':
+                    # 进度事件只需要按最新状态更新界面；失败事件立即处理，避免被覆盖
+                    if data.get('event') == 'stage_end' and not data.get('success'):
+                        self.handle_event(data)
+                    else:
+                        last_event = data
                 elif msg_type == 'status':
                     self.status_var.set(data)
                 elif msg_type == 'finished':
@@ -1165,13 +1225,20 @@ class PaperAnalysisGUI:
                     self.start_button.config(state=tk.NORMAL)
                     self.stop_button.config(state=tk.DISABLED)
                     self.progress.stop()
+                    self.progress.config(mode='indeterminate', value=0)
+                    last_event = None
                     break
                     
         except queue.Empty:
             pass
         
+        if output_chunks:
+            self.log_output(''.join(output_chunks))
+        if last_event:
+            self.handle_event(last_event)
+        
         # 继续检查队列
-        self.root.after(100, self.check_queue)
+        self.root.after(QUEUE_POLL_MS, self.check_queue)
     
     def update_time(self):
         """更新时间显示"""
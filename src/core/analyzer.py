@@ -2,20 +2,26 @@
 AI分析器模块
 负责使用AI分析论文内容并生成结构化摘要
 """
-import asyncio
+import re
 import time
 from concurrent.futures import ThreadPoolExecutor
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
 from ..utils.console import ConsoleOutput
 from ..utils.logger import get_logger
-from ..utils.file_utils import FileManager
-from ..utils.progress import ProgressManager
-from ..utils.ai_client import create_retryable_client
+from ..utils.file_utils import FileManager, file_lock
+from ..utils.progress import get_dashboard, observe_item_duration
+from ..utils.ai_client import get_shared_stage_client, CascadeAIClient, get_coalescing_stats, is_replay_only
+from ..utils.metrics import get_metrics
+from ..utils.tracing import get_tracer
+from ..utils.events import get_events, EVENT_PAPER
+from ..utils.journal import open_journal, STATE_STARTED, STATE_RESULT, STATE_DONE, STATE_FAILED
+from ..utils.dead_letter import open_dead_letters
+from ..utils.prompt_packing import estimate_tokens, plan_pack, format_section, split_sections
 from ..models.paper import Paper
 from ..models.report import AnalysisResult, DailyReport
-from .parser import ContentParser
+from .parser import ContentParser, ANALYSIS_FIELD_LABELS
 
 
 class PaperAnalyzer:
@@ -45,26 +51,73 @@ class PaperAnalyzer:
         self.max_retries = config.get('max_retries', 3)
         self.retry_delay = config.get('retry_delay', 2)
         
-        # 初始化AI客户端
-        self.ai_client = None
-        if self.use_ai:
+        # 优先级/截止时间配置（"anytime"模式）
+        # 分析模式：ai（元数据辅助的AI分析）或 metadata（直接使用元数据，不调用AI）
+        self.analysis_mode = config.get('analysis_mode', 'ai')
+        
+        self.prioritize = config.get('prioritize', False)
+        self.deadline = config.get('analysis_deadline')
+        self.top_k = config.get('analysis_top_k')
+        self.github_bonus = config.get('priority_github_bonus', 10)
+        
+        # 模型级联：先用快速模型，输出不完整时升级
+        self.use_cascade = config.get('model_cascade', False)
+        
+        # 字段级补充：只追问缺失的字段，而不是重新分析整篇论文
+        self.field_repair = config.get('field_repair', True)
+        
+        # 多论文打包请求：按token预算把多篇论文放进同一个提示词
+        self.pack_prompts = config.get('pack_prompts', False)
+        self.pack_token_budget = config.get('pack_token_budget', 6000)
+        self.pack_max_papers = config.get('pack_max_papers', 8)
+        self._packed_results: Dict[str, AnalysisResult] = {}
+        
+        # 运行日志：逐篇记录AI结果，--resume 时已得到结果的论文不再请求AI
+        self.journal_dir = config.get('journal_dir', 'data/journal')
+        self.resume = config.get('resume', False)
+        
+        # 死信队列：失败的论文记入队列，退避时间内主流程跳过，到时间后由主流程或 retry-failed 重试
+        self.dead_letters = open_dead_letters(config)
+        self.inline_retries = max(int(config.get('inline_retries', 1)), 1)
+        self._failures: Dict[str, Tuple[str, str]] = {}
+        
+        # AI客户端在首次使用时才创建（并在各组件间共享），不需要AI的命令不会导入SDK
+        self._ai_client = None
+    
+    @property
+    def ai_client(self):
+        """AI客户端（延迟创建，创建失败时关闭AI功能）"""
+        if self._ai_client is None and self.use_ai:
             try:
-                self.ai_client = create_retryable_client(
+                self._ai_client = get_shared_stage_client(
                     self.ai_model,
+                    'analysis',
+                    use_cascade=self.use_cascade,
                     max_retries=self.max_retries
                 )
             except Exception as e:
                 self.logger.warning(f"AI客户端初始化失败: {e}")
                 self.use_ai = False
+        return self._ai_client
     
-    def analyze_batch(self, papers: List[Paper], date: str = None, silent: bool = False) -> List[AnalysisResult]:
+    @ai_client.setter
+    def ai_client(self, client):
+        self._ai_client = client
+    
+    def analyze_batch(self, papers: List[Paper], date: str = None, silent: bool = False,
+                      deadline: float = None, top_k: int = None) -> List[AnalysisResult]:
         """
         批量分析论文
         
+        设置了截止时间或top_k时按优先级（点赞数、GitHub仓库）排序，
+        优先处理高价值论文，到达截止时间后停止，已完成的结果照常保存
+        
         Args:
             papers: 论文列表
             date: 日期字符串（用于保存结果）
             silent: 是否静默模式
+            deadline: 墙钟时间预算（秒），None表示不限制
+            top_k: 只处理优先级最高的前K篇，None表示全部处理
             
         Returns:
             分析结果列表
@@ -74,14 +127,33 @@ class PaperAnalyzer:
                 self.console.print_warning("没有论文需要分析")
             return []
         
+        deadline = deadline if deadline is not None else self.deadline
+        top_k = top_k if top_k is not None else self.top_k
+        
+        # 按优先级排序并截取前K篇
+        deferred_papers = []
+        if self.prioritize or deadline or top_k:
+            papers = self._prioritize_papers(papers)
+            if top_k and top_k > 0:
+                deferred_papers = papers[top_k:]
+                papers = papers[:top_k]
+        total_count = len(papers) + len(deferred_papers)
+        
         if not silent:
             self.console.print_header("AI分析生成摘要", 3)
             self.console.print_info(f"开始顺序处理 {len(papers)} 篇论文")
+            if deadline:
+                self.console.print_info(f"时间预算: {deadline:.0f}秒，按优先级处理")
         
         self.logger.info(f"开始批量分析 {len(papers)} 篇论文")
         
-        # 初始化进度管理器
-        progress = ProgressManager(len(papers), "AI分析论文") if not silent else None
+        batch_start = time.time()
+        deadline_at = batch_start + deadline if deadline else None
+        paper_durations = []
+        
+        # 在进度面板中显示整体进度（剩余时间按实测的单篇耗时估算）
+        progress_desc = f"AI分析论文 {date}" if date else "AI分析论文"
+        progress = get_dashboard().add_task(progress_desc, len(papers), stage="analyze") if not silent else None
         results = []
         
         # 准备输出文件（如果提供了日期）
@@ -96,8 +168,22 @@ class PaperAnalyzer:
             existing_ids = {self._extract_paper_id_from_result(r) for r in existing_results}
         else:
             existing_ids = set()
+        journal = open_journal(self.journal_dir, date, 'analyze', self.resume) if date else None
+        
+        # 死信队列中还在退避时间内的论文跳过，已到重试时间的论文重新分析
+        dead_ids = self.dead_letters.pending_ids('analyze', date) if self.dead_letters and date else set()
+        retry_ids = self.dead_letters.due_ids('analyze', date) if self.dead_letters and date else set()
+        dead_count = 0
+        
+        # 延后处理的论文不包括已在报告中和在死信队列中的论文
+        def still_pending(candidates: List[Paper]) -> List[Paper]:
+            return [p for p in candidates if p.id not in existing_ids and p.id not in dead_ids]
+        
+        deferred_papers = still_pending(deferred_papers)
         
         # 统计变量
+        tracer = get_tracer()
+        events = get_events()
         processed_count = 0
         success_count = 0
         fail_count = 0
@@ -108,38 +194,100 @@ class PaperAnalyzer:
             # 检查是否已经处理过
             if date and paper.id in existing_ids:
                 skip_count += 1
+                if progress:
+                    progress.advance('skip')
+                events.emit(EVENT_PAPER, stage="analyze", paper_id=paper.id, status="skip",
+                            index=i + 1, total=len(papers))
                 if not silent:
                     self.console.print_skip(f"已处理的论文: {paper.id}")
                 continue
 
+            if paper.id in dead_ids:
+                dead_count += 1
+                if progress:
+                    progress.advance('skip')
+                events.emit(EVENT_PAPER, stage="analyze", paper_id=paper.id, status="deferred",
+                            index=i + 1, total=len(papers))
+                if not silent:
+                    self.console.print_skip(f"死信队列中的论文，未到重试时间或需人工处理: {paper.id}")
+                continue
+
+            # 检查截止时间：剩余时间不足以完成下一篇时停止
+            if deadline_at and self._deadline_reached(deadline_at, paper_durations):
+                remaining_papers = still_pending(papers[i:])
+                deferred_papers = remaining_papers + deferred_papers
+                if not silent:
+                    self.console.print_warning(f"⏰ 已到达时间预算，剩余 {len(remaining_papers)} 篇论文延后处理")
+                self.logger.info(f"到达截止时间，停止分析，剩余 {len(remaining_papers)} 篇")
+                break
+
             processed_count += 1
 
             if not silent:
                 # 显示当前处理的论文信息
                 self.console.print_info(f"🔍 处理第 {i+1}/{len(papers)} 项: {paper.translation}")
-
-                # 显示整体进度条
-                progress_bar = self._create_progress_bar(i, len(papers))
-                remaining_papers = len(papers) - i - 1
-                estimated_remaining = remaining_papers * 15  # 假设每篇15秒
-                print(f"📊 进度: {progress_bar} {i}/{len(papers)} (成功:{success_count}, 失败:{fail_count}, 跳过:{skip_count}) 预计剩余: {estimated_remaining}秒")
             
             self.logger.info(f"开始分析论文: {paper.id} - {paper.title}")
             
+            paper_start = time.time()
             try:
-                # 分析单篇论文（保持与批量分析相同的静默状态）
-                result = self.analyze_single(paper, silent=silent)
+                recorded = journal.recorded_result(paper.id) if journal else None
+                if recorded:
+                    # 上次运行已得到结果但可能未写入报告，直接使用记录的结果
+                    self._packed_results.pop(paper.id, None)
+                    result = AnalysisResult.from_dict(recorded)
+                    self.logger.info(f"使用运行日志中的分析结果: {paper.id}")
+                else:
+                    # 打包模式：一次请求分析后续多篇论文，结果暂存供逐篇取用
+                    if self._should_pack(paper):
+                        pending = [p for p in papers[i:]
+                                   if p.id not in existing_ids and p.id not in dead_ids and self._should_pack(p)
+                                   and not (journal and journal.recorded_result(p.id))]
+                        pack = self._plan_analysis_pack(pending)
+                        with tracer.span("analyze_pack", "paper", papers=len(pack)):
+                            self._analyze_packed(pack, silent, deadline_at)
+                        if journal:
+                            for packed in pack:
+                                if packed.id != paper.id and packed.id in self._packed_results:
+                                    journal.record(packed.id, STATE_RESULT,
+                                                   result=self._packed_results[packed.id].to_dict())
+
+                    # 分析单篇论文（保持与批量分析相同的静默状态）
+                    if journal:
+                        journal.record(paper.id, STATE_STARTED)
+                    with tracer.span("analyze_paper", "paper", paper_id=paper.id):
+                        result = self.analyze_single(paper, silent=silent, deadline_at=deadline_at)
+                    paper_durations.append(time.time() - paper_start)
+                    observe_item_duration("analyze", paper_durations[-1])
+                
+                if not result and deadline_at and time.time() >= deadline_at:
+                    # 因截止时间中断的论文不算失败，延后处理
+                    processed_count -= 1
+                    deferred_papers = still_pending(papers[i:]) + deferred_papers
+                    self.logger.info(f"论文分析因截止时间中断，延后处理: {paper.id}")
+                    break
+                
+                if journal and not recorded:
+                    if result:
+                        journal.record(paper.id, STATE_RESULT, result=result.to_dict())
+                    else:
+                        journal.record(paper.id, STATE_FAILED)
                 
                 if result:
                     # 立即保存结果（如果提供了文件路径）
-                    if final_file:
-                        self._save_single_result(result, final_file)
+                    if final_file and self._save_single_result(result, final_file) and journal:
+                        journal.record(paper.id, STATE_DONE)
+
+                    if paper.id in retry_ids:
+                        self.dead_letters.resolve('analyze', date, paper.id)
 
                     results.append(result)
                     success_count += 1
 
                     if progress:
-                        progress.update(True, f"{paper.id}")
+                        progress.advance('success')
+                    events.emit(EVENT_PAPER, stage="analyze", paper_id=paper.id, status="success",
+                                index=i + 1, total=len(papers))
 
                     if not silent:
                         self.console.print_success(f"✅ 完成: {paper.id} ({i+1}/{len(papers)})")
@@ -147,9 +295,12 @@ class PaperAnalyzer:
                     self.logger.info(f"论文分析完成: {paper.id}")
                 else:
                     fail_count += 1
+                    self._dead_letter(paper, date, self.pop_failure(paper.id))
 
                     if progress:
-                        progress.update(False, f"{paper.id}")
+                        progress.advance('fail')
+                    events.emit(EVENT_PAPER, stage="analyze", paper_id=paper.id, status="fail",
+                                index=i + 1, total=len(papers))
 
                     if not silent:
                         self.console.print_error(f"❌ 失败: {paper.id} ({i+1}/{len(papers)})")
@@ -158,67 +309,143 @@ class PaperAnalyzer:
                     
             except Exception as e:
                 fail_count += 1
+                self._failures.pop(paper.id, None)
+                self._dead_letter(paper, date, (type(e).__name__, str(e)))
 
                 if progress:
-                    progress.update(False, f"{paper.id} - {e}")
+                    progress.advance('fail')
+                events.emit(EVENT_PAPER, stage="analyze", paper_id=paper.id, status="fail",
+                            index=i + 1, total=len(papers),
+                            error={'type': type(e).__name__, 'message': str(e)})
 
                 if not silent:
                     self.console.print_error(f"❌ 异常: {paper.id} - {e}")
 
                 self.logger.error(f"论文分析异常: {paper.id} - {e}")
         
+        if journal:
+            journal.close()
+        
         # 显示最终统计
         if progress:
             progress.finish()
         
-        if not silent:
-            # 计算实际处理的论文数（排除跳过的）
-            actually_processed = processed_count
+        # 计算实际处理的论文数（排除跳过的）
+        actually_processed = processed_count
 
-            self.console.print_summary("分析完成统计", {
-                "总论文数": len(papers),
+        if not silent:
+            stats = {
+                "总论文数": total_count,
                 "跳过论文": skip_count,
                 "实际处理": actually_processed,
                 "成功分析": success_count,
                 "分析失败": fail_count,
                 "成功率": f"{success_count/max(actually_processed, 1)*100:.1f}%" if actually_processed > 0 else "0.0%"
-            })
+            }
+            if deferred_papers:
+                stats["延后处理"] = len(deferred_papers)
+            if dead_count:
+                stats["死信队列"] = dead_count
+            if deadline_at:
+                stats["总耗时"] = f"{time.time() - batch_start:.1f}秒"
+            if isinstance(self._ai_client, CascadeAIClient):
+                stats["模型升级率"] = f"{self._ai_client.get_stats()['escalation_rate']*100:.1f}%"
+            self.console.print_summary("分析完成统计", stats)
 
-        self.logger.info(f"批量分析完成，成功: {success_count}/{actually_processed}，跳过: {skip_count}")
+        if deferred_papers:
+            self.logger.info(f"延后处理的论文: {', '.join(p.id for p in deferred_papers)}")
+        papers_counter = get_metrics().counter('papers_processed_total', '各阶段处理的论文数')
+        papers_counter.inc(success_count, stage='analysis', status='success')
+        papers_counter.inc(fail_count, stage='analysis', status='failed')
+        papers_counter.inc(skip_count, stage='analysis', status='skipped')
+        papers_counter.inc(len(deferred_papers), stage='analysis', status='deferred')
+        papers_counter.inc(dead_count, stage='analysis', status='dead_letter')
+        if isinstance(self._ai_client, CascadeAIClient):
+            self._ai_client.log_stats()
+        coalescing = get_coalescing_stats()
+        if coalescing['coalesced_calls']:
+            self.logger.info(f"请求合并: 实际调用 {coalescing['leader_calls']} 次，合并 {coalescing['coalesced_calls']} 次")
+        self.logger.info(f"批量分析完成，成功: {success_count}/{actually_processed}，跳过: {skip_count}，延后: {len(deferred_papers)}")
         return results
+
+    def _prioritize_papers(self, papers: List[Paper]) -> List[Paper]:
+        """
+        按优先级排序论文（点赞数高、有GitHub仓库的优先）
+
+        Args:
+            papers: 论文列表
+
+        Returns:
+            排序后的新列表（优先级相同时保持原顺序）
+        """
+        return sorted(papers, key=lambda p: p.get_priority_score(self.github_bonus), reverse=True)
+
+    def _deadline_reached(self, deadline_at: float, paper_durations: List[float]) -> bool:
+        """
+        判断是否应在截止时间前停止
+
+        Args:
+            deadline_at: 截止时间戳
+            paper_durations: 已处理论文的耗时列表
+
+        Returns:
+            剩余时间不足以完成下一篇论文时返回True
+        """
+        remaining = deadline_at - time.time()
+        if remaining <= 0:
+            return True
+
+        # 使用已观测的平均耗时估计下一篇所需时间
+        if paper_durations:
+            expected = sum(paper_durations) / len(paper_durations)
+            return expected > remaining
+
+        return False
     
-    def analyze_single(self, paper: Paper, silent: bool = False) -> Optional[AnalysisResult]:
+    def analyze_single(self, paper: Paper, silent: bool = False,
+                       deadline_at: float = None, max_retries: int = None) -> Optional[AnalysisResult]:
         """
         分析单篇论文
         
         Args:
             paper: 论文对象
             silent: 是否静默模式
+            deadline_at: 截止时间戳，超过后不再发起或重试AI调用
+            max_retries: 最多尝试次数，默认取配置 inline_retries
             
         Returns:
-            分析结果，失败返回None
+            分析结果，失败返回None（失败原因可用 pop_failure() 获取）
         """
+        if self.analysis_mode == 'metadata':
+            # 元数据模式：直接使用元数据填充，不调用AI
+            return self._build_metadata_result(paper)
+        
+        # 打包请求中已得到完整结果的论文直接返回
+        packed_result = self._packed_results.pop(paper.id, None)
+        if packed_result:
+            return packed_result
+        
         if not self.use_ai or not self.ai_client:
             if not silent:
                 self.console.print_warning("AI分析未启用，返回基础结果")
             
-            # 返回基础结果
-            return AnalysisResult(
-                paper_id=paper.id,
-                paper_url=paper.url,
-                title=paper.title,
-                translation=paper.translation,
-                authors="",
-                publish_date="",
-                model_function="",
-                page_content=""
-            )
+            # 返回基础结果（尽量使用元数据填充）
+            return self._build_metadata_result(paper)
         
         # 添加重试机制
-        max_retries = 3
+        max_retries = max_retries or self.inline_retries
         retry_delay = 2
 
         for attempt in range(max_retries):
+            # 计算本次调用的超时时间（不超过截止时间）
+            call_timeout = 90
+            if deadline_at:
+                remaining = deadline_at - time.time()
+                if remaining <= 0:
+                    self.logger.warning(f"已到达截止时间，放弃分析: {paper.id}")
+                    return None
+                call_timeout = min(call_timeout, remaining)
+
             try:
                 if not silent and attempt > 0:
                     self.console.print_info(f"重试第 {attempt} 次...")
@@ -236,19 +463,10 @@ class PaperAnalyzer:
                     }
                 ]
 
-                # 调用AI进行分析（带进度显示）
-                import time
-                import threading
-
+                # 调用AI进行分析（在进度面板中显示已耗时）
                 if not silent:
-                    # 创建进度显示线程
-                    progress_stop = threading.Event()
-                    progress_thread = threading.Thread(
-                        target=self._show_analysis_progress,
-                        args=(progress_stop, f"分析论文: {paper.translation[:30]}...")
-                    )
-                    progress_thread.daemon = True
-                    progress_thread.start()
+                    activity = get_dashboard().start_activity(
+                        f"🧠 分析论文: {paper.translation[:30]}...", slow_after=75)
 
                 start_time = time.time()
 
@@ -256,24 +474,21 @@ class PaperAnalyzer:
                     # 使用线程超时处理（Windows兼容）
                     import concurrent.futures
 
-                    with concurrent.futures.ThreadPoolExecutor() as executor:
-                        future = executor.submit(self.ai_client.chat, messages)
-                        try:
-                            response = future.result(timeout=90)  # 90秒超时
-                        except concurrent.futures.TimeoutError:
-                            if not silent:
-                                progress_stop.set()
-                                progress_thread.join(timeout=1)
-                                print()  # 换行
-                            raise TimeoutError(f"AI调用超时（90秒）")
+                    # 超时后不等待工作线程结束，避免超时形同虚设
+                    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+                    future = executor.submit(get_tracer().bind(self._call_ai), messages, paper, call_timeout)
+                    try:
+                        response = future.result(timeout=call_timeout)  # 默认90秒超时
+                    except concurrent.futures.TimeoutError:
+                        raise TimeoutError(f"AI调用超时（{call_timeout:.0f}秒）")
+                    finally:
+                        executor.shutdown(wait=False)
 
                 except TimeoutError:
                     raise  # 重新抛出超时异常
                 finally:
                     if not silent:
-                        progress_stop.set()
-                        progress_thread.join(timeout=1)
-                        print()  # 换行
+                        activity.finish()
 
                 end_time = time.time()
                 if not silent:
@@ -286,10 +501,11 @@ class PaperAnalyzer:
                     if attempt < max_retries - 1:
                         if not silent:
                             self.console.print_warning(f"AI响应为空，{retry_delay}秒后重试...")
-                        time.sleep(retry_delay)
+                        get_tracer().sleep(retry_delay, "retry_sleep", paper_id=paper.id, attempt=attempt + 1)
                         continue
                     else:
                         self.logger.error(f"AI分析失败，所有重试都返回空响应: {paper.id}")
+                        self._failures[paper.id] = ('EmptyResponse', 'AI响应为空')
                         return None
 
             except Exception as e:
@@ -297,45 +513,402 @@ class PaperAnalyzer:
                     if not silent:
                         self.console.print_warning(f"AI调用异常: {e}，{retry_delay}秒后重试...")
                     self.logger.warning(f"AI调用异常，重试 {attempt + 1}/{max_retries}: {e}")
-                    time.sleep(retry_delay)
+                    get_tracer().sleep(retry_delay, "retry_sleep", paper_id=paper.id, attempt=attempt + 1)
                     continue
                 else:
                     self.logger.error(f"AI分析失败，所有重试都异常: {paper.id} - {e}")
+                    self._failures[paper.id] = (type(e).__name__, str(e))
                     return None
 
         # 处理AI响应
         try:
-            # 解析AI响应
-            parsed_fields = self.parser.parse_analysis_content(response)
+            # 解析AI响应（元数据中的作者和日期优先于AI输出）
+            fields = self._merge_analysis_fields(paper, self.parser.parse_analysis_content(response))
 
-            # 创建分析结果
-            result = AnalysisResult(
-                paper_id=paper.id,
-                paper_url=paper.url,
-                title=paper.title,
-                translation=paper.translation,
-                authors=parsed_fields['authors'],
-                publish_date=parsed_fields['publish_date'],
-                model_function=parsed_fields['model_function'],
-                page_content=response
-            )
+            # 只针对缺失或占位的字段追问，不重新分析整篇论文
+            missing = self.parser.find_missing_analysis_fields(fields)
+            if missing and self.field_repair:
+                response = self._repair_missing_fields(
+                    paper, messages, response, fields, missing, silent, deadline_at
+                )
 
-            return result
+            # 创建分析结果
+            return self._build_ai_result(paper, fields, response)
 
         except Exception as e:
             self.logger.error(f"解析AI响应异常: {paper.id} - {e}")
+            self._failures[paper.id] = (type(e).__name__, str(e))
             return None
+
+    def pop_failure(self, paper_id: str) -> Tuple[str, str]:
+        """
+        取出论文最近一次分析失败的原因
+        
+        Args:
+            paper_id: 论文ID
+            
+        Returns:
+            (错误类型, 错误说明)
+        """
+        return self._failures.pop(paper_id, ('NoResult', '分析未返回结果'))
+    
+    def _dead_letter(self, paper: Paper, date: Optional[str], error: Tuple[str, str]):
+        """把主流程中失败的论文记入死信队列（纯回放模式下未命中录制记录不是真实失败，不记录）"""
+        if self.dead_letters and date and not is_replay_only():
+            self.dead_letters.add_failure('analyze', date, paper.id, *error)
+
+    def _build_ai_result(self, paper: Paper, fields: Dict[str, str], response: str) -> AnalysisResult:
+        """
+        根据合并后的字段构建分析结果
+        
+        Args:
+            paper: 论文对象
+            fields: 合并后的字段字典
+            response: AI回复内容
+            
+        Returns:
+            分析结果
+        """
+        return AnalysisResult(
+            paper_id=paper.id,
+            paper_url=paper.url,
+            title=paper.title,
+            translation=paper.translation,
+            authors=fields['authors'],
+            publish_date=fields['publish_date'],
+            model_function=fields['model_function'],
+            page_content=response,
+            summary=self._get_short_summary(paper),
+            ai_keywords=list(paper.ai_keywords)
+        )
+    
+    def _should_pack(self, paper: Paper) -> bool:
+        """
+        判断论文是否参与打包请求（需要AI分析且有元数据摘要）
+        
+        Args:
+            paper: 论文对象
+            
+        Returns:
+            是否参与打包
+        """
+        return (self.pack_prompts and self.use_ai and self.ai_client is not None
+                and self.analysis_mode != 'metadata'
+                and paper.has_metadata()
+                and paper.id not in self._packed_results)
+    
+    def _plan_analysis_pack(self, papers: List[Paper]) -> List[Paper]:
+        """
+        按token预算选取一组打包分析的论文
+        
+        Args:
+            papers: 候选论文列表（按处理顺序）
+            
+        Returns:
+            本次打包的论文列表
+        """
+        overhead = estimate_tokens(self._build_packed_analysis_prompt([]))
+        return plan_pack(
+            papers,
+            # 每篇论文的输入加上约150个token的输出预留
+            lambda paper: estimate_tokens(self._format_paper_info(paper)) + 150,
+            self.pack_token_budget,
+            overhead,
+            self.pack_max_papers
+        )
+    
+    def _analyze_packed(self, papers: List[Paper], silent: bool = False,
+                        deadline_at: float = None):
+        """
+        在一次请求中分析多篇论文，完整的结果存入打包结果缓存
+        
+        响应中缺失分段或字段不完整的论文不会被缓存，之后按单篇流程重新处理
+        
+        Args:
+            papers: 打包的论文列表
+            silent: 是否静默模式
+            deadline_at: 截止时间戳
+        """
+        if len(papers) < 2:
+            return
+
+        call_timeout = 90 + 20 * len(papers)
+        if deadline_at:
+            call_timeout = min(call_timeout, deadline_at - time.time())
+            if call_timeout <= 0:
+                return
+
+        if not silent:
+            self.console.print_info(f"打包分析 {len(papers)} 篇论文...")
+
+        prompt = self._build_packed_analysis_prompt(papers)
+        messages = [{"role": "user", "content": [{"type": "text", "text": prompt}]}]
+
+        start_time = time.time()
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            response = executor.submit(get_tracer().bind(self.ai_client.chat), messages,
+                                       wait_timeout=call_timeout).result(timeout=call_timeout)
+        except Exception as e:
+            self.logger.warning(f"打包分析请求失败，改为逐篇分析: {e}")
+            return
+        finally:
+            executor.shutdown(wait=False)
+
+        sections = split_sections(response or "", [paper.id for paper in papers])
+
+        for paper in papers:
+            section = sections.get(paper.id)
+            if not section:
+                continue
+            fields = self._merge_analysis_fields(paper, self.parser.parse_analysis_content(section))
+            if self.parser.find_missing_analysis_fields(fields):
+                continue
+            self._packed_results[paper.id] = self._build_ai_result(paper, fields, section)
+
+        completed = sum(1 for paper in papers if paper.id in self._packed_results)
+        self.logger.info(
+            f"打包分析完成: {completed}/{len(papers)} 篇，耗时 {time.time() - start_time:.2f}秒，"
+            f"{len(papers) - completed} 篇重新排队逐篇分析"
+        )
+    
+    def _build_packed_analysis_prompt(self, papers: List[Paper]) -> str:
+        """
+        构建多论文打包分析提示词
+        
+        Args:
+            papers: 论文列表
+            
+        Returns:
+            提示词字符串
+        """
+        sections = "\n\n".join(format_section(paper.id, self._format_paper_info(paper)) for paper in papers)
+        example = format_section("论文ID", "**作者团队**：[论文作者姓名或所属机构团队]\n"
+                                           "**发表日期**：[论文的发表日期，格式：YYYY-MM-DD]\n"
+                                           "**模型功能**：[模型的主要功能和用途，50字以内]")
+
+        return f"""你是一个AI论文分析专家。下面有多篇论文，每篇论文用"=== PAPER 论文ID ==="和"=== END 论文ID ==="包裹。请根据提供的标题、摘要和关键词，分别为每篇论文输出分析结果。
+
+## 每篇论文的输出格式：
+{example}
+
+## 注意事项：
+- 每篇论文都必须输出一个分段，分段标记中的论文ID必须与输入完全一致
+- 分段内只输出上述三个字段，每行以对应标签开头，不要使用方括号
+- 仅基于提供的论文信息填写，无需访问外部链接，不要使用占位符
+- 如果某项信息无法从提供的内容中得出，写"未明确提及"
+
+【待分析的论文】：
+{sections}"""
+    
+    def _call_ai(self, messages: List[Dict[str, Any]], paper: Paper,
+                 call_timeout: float = None) -> Optional[str]:
+        """
+        调用AI（级联客户端时附带分析结果完整性校验）
+        
+        Args:
+            messages: 消息列表
+            paper: 论文对象
+            call_timeout: 本次调用的超时（秒），合并相同请求时最多等待这么久
+            
+        Returns:
+            AI回复内容
+        """
+        if isinstance(self.ai_client, CascadeAIClient):
+            return self.ai_client.chat(
+                messages,
+                validator=lambda response: self._is_analysis_complete(response, paper),
+                wait_timeout=call_timeout
+            )
+        return self.ai_client.chat(messages, wait_timeout=call_timeout)
+    
+    def _is_analysis_complete(self, response: str, paper: Paper) -> bool:
+        """
+        校验AI分析输出是否完整（合并元数据后三个字段都有实际内容）
+        
+        Args:
+            response: AI回复内容
+            paper: 论文对象
+            
+        Returns:
+            是否完整
+        """
+        fields = self._merge_analysis_fields(paper, self.parser.parse_analysis_content(response))
+        return not self.parser.find_missing_analysis_fields(fields)
+    
+    def _merge_analysis_fields(self, paper: Paper, parsed_fields: Dict[str, str]) -> Dict[str, str]:
+        """
+        合并元数据与AI解析出的字段（元数据优先）
+        
+        Args:
+            paper: 论文对象
+            parsed_fields: AI响应解析出的字段
+            
+        Returns:
+            合并后的字段字典
+        """
+        return {
+            'authors': paper.authors or parsed_fields['authors'],
+            'publish_date': paper.publish_date or parsed_fields['publish_date'],
+            'model_function': parsed_fields['model_function']
+        }
+    
+    def _repair_missing_fields(self, paper: Paper, messages: List[Dict[str, Any]], response: str,
+                               fields: Dict[str, str], missing: List[str], silent: bool = False,
+                               deadline_at: float = None) -> str:
+        """
+        追问缺失字段并合并到已有结果中
+        
+        复用原对话上下文，只要求模型输出缺失的字段，补全结果直接写入fields
+        
+        Args:
+            paper: 论文对象
+            messages: 原始请求消息
+            response: 原始AI回复
+            fields: 已合并的字段字典（会被原地更新）
+            missing: 缺失的字段名列表
+            silent: 是否静默模式
+            deadline_at: 截止时间戳，剩余时间不足时跳过追问
+            
+        Returns:
+            合并补全内容后的完整回复文本
+        """
+        call_timeout = 60
+        if deadline_at:
+            call_timeout = min(call_timeout, deadline_at - time.time())
+            if call_timeout <= 0:
+                return response
+
+        labels = [ANALYSIS_FIELD_LABELS[field] for field in missing]
+        self.logger.info(f"分析结果缺少字段，发起补充请求: {paper.id} - {', '.join(labels)}")
+        if not silent:
+            self.console.print_info(f"补充缺失字段: {', '.join(labels)}")
+
+        format_lines = "\n".join(f"**{label}**：[内容]" for label in labels)
+        followup_messages = list(messages) + [
+            {"role": "assistant", "content": response},
+            {
+                "role": "user",
+                "content": [{
+                    "type": "text",
+                    "text": f"""上面的回答中以下字段缺失或仍是占位内容：{'、'.join(labels)}。
+请只补充这些字段，严格按以下格式输出，不要重复其他内容：
+{format_lines}"""
+                }]
+            }
+        ]
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            with get_tracer().span("repair_fields", "ai", paper_id=paper.id, fields=len(missing)):
+                followup = executor.submit(get_tracer().bind(self.ai_client.chat), followup_messages,
+                                           wait_timeout=call_timeout).result(timeout=call_timeout)
+        except Exception as e:
+            self.logger.warning(f"补充字段请求失败: {paper.id} - {e}")
+            return response
+        finally:
+            executor.shutdown(wait=False)
+
+        if not followup:
+            return response
+
+        repaired = self.parser.parse_analysis_content(followup)
+        filled = []
+        for field in missing:
+            value = repaired.get(field, '').strip()
+            if value and field not in self.parser.find_missing_analysis_fields({field: value}):
+                fields[field] = value
+                filled.append(field)
+
+        self.logger.info(f"补充字段完成: {paper.id} - 补全 {len(filled)}/{len(missing)}")
+        if not filled:
+            return response
+
+        # 将补全的字段写回原始回复（替换占位行或追加），保证page_content与结构化字段一致
+        for field in filled:
+            line = f"**{ANALYSIS_FIELD_LABELS[field]}**：{fields[field]}"
+            pattern = rf'^.*{ANALYSIS_FIELD_LABELS[field]}.*[：:].*$'
+            if re.search(pattern, response, re.MULTILINE):
+                response = re.sub(pattern, lambda _: line, response, count=1, flags=re.MULTILINE)
+            else:
+                response = f"{response.rstrip()}\n{line}"
+        return response
+    
+    def _build_metadata_result(self, paper: Paper) -> AnalysisResult:
+        """
+        直接使用元数据构建分析结果（不调用AI）
+
+        Args:
+            paper: 论文对象
+
+        Returns:
+            分析结果
+        """
+        model_function = paper.model_function or paper.ai_summary or self._first_sentence(paper.summary)
+
+        page_content = ""
+        if paper.has_metadata():
+            page_content = (f"**作者团队**：{paper.authors or '未明确提及'}\n"
+                            f"**发表日期**：{paper.publish_date or '未明确提及'}\n"
+                            f"**模型功能**：{model_function}")
+
+        return AnalysisResult(
+            paper_id=paper.id,
+            paper_url=paper.url,
+            title=paper.title,
+            translation=paper.translation,
+            authors=paper.authors,
+            publish_date=paper.publish_date,
+            model_function=model_function,
+            page_content=page_content,
+            summary=self._get_short_summary(paper),
+            ai_keywords=list(paper.ai_keywords)
+        )
+
+    def _get_short_summary(self, paper: Paper) -> str:
+        """
+        获取用于后续阶段（分类）的简短摘要
+
+        Args:
+            paper: 论文对象
+
+        Returns:
+            优先返回HF简短摘要，否则返回截断的原始摘要
+        """
+        return paper.ai_summary or paper.summary[:500]
+
+    def _first_sentence(self, text: str) -> str:
+        """
+        提取文本的第一句话
+
+        Args:
+            text: 文本内容
+
+        Returns:
+            第一句话
+        """
+        text = ' '.join(text.split())
+        if not text:
+            return ""
+        end = text.find('. ')
+        return text[:end + 1] if end != -1 else text
     
     def _build_analysis_prompt(self, paper: Paper) -> str:
         """
         构建AI分析提示词
         
+        有元数据摘要时直接把摘要、关键词交给模型，并只请求元数据中缺失的字段；
+        没有元数据时回退为访问arXiv链接的旧提示词
+        
         Args:
             paper: 论文对象
             
         Returns:
             提示词字符串
         """
+        if paper.has_metadata():
+            return self._build_metadata_prompt(paper)
+        
         prompt = f"""你是一个AI论文分析专家。请访问以下arXiv论文链接，仔细阅读论文内容，然后严格按照指定格式输出分析结果。
 
 ## 信息获取策略：
@@ -364,59 +937,69 @@ class PaperAnalyzer:
         
         return prompt
 
-    def _show_analysis_progress(self, stop_event, task_name):
+    def _build_metadata_prompt(self, paper: Paper) -> str:
         """
-        显示AI分析进度动画
+        构建基于元数据的分析提示词（无需访问链接）
 
         Args:
-            stop_event: 停止事件
-            task_name: 任务名称
+            paper: 论文对象
+
+        Returns:
+            提示词字符串
         """
-        import sys
-        import time
+        # 只请求元数据中缺失的字段
+        format_lines = []
+        if not paper.authors:
+            format_lines.append("**作者团队**：[论文作者姓名或所属机构团队]")
+        if not paper.publish_date:
+            format_lines.append("**发表日期**：[论文的发表日期，格式：YYYY-MM-DD]")
+        format_lines.append("**模型功能**：[模型的主要功能和用途，50字以内]")
+        output_format = '\n'.join(format_lines)
 
-        spinner = ['⠋', '⠙', '⠹', '⠸', '⠼', '⠴', '⠦', '⠧', '⠇', '⠏']
-        start_time = time.time()
-        i = 0
-        warning_shown = False
-
-        while not stop_event.is_set():
-            elapsed = int(time.time() - start_time)
-            minutes, seconds = divmod(elapsed, 60)
-            time_str = f"{minutes:02d}:{seconds:02d}"
-
-            # 在75秒时显示警告
-            if elapsed >= 75 and not warning_shown:
-                sys.stdout.write(f'\r🧠 {task_name} {spinner[i % len(spinner)]} 已耗时: {time_str} ⚠️ 响应较慢...')
-                warning_shown = True
-            else:
-                sys.stdout.write(f'\r🧠 {task_name} {spinner[i % len(spinner)]} 已耗时: {time_str}')
+        paper_text = self._format_paper_info(paper)
 
-            sys.stdout.flush()
+        prompt = f"""你是一个AI论文分析专家。请根据下面提供的论文标题、摘要和关键词，严格按照指定格式输出分析结果。
 
-            time.sleep(0.1)
-            i += 1
+## 输出格式要求：
+{output_format}
 
-    def _create_progress_bar(self, current, total, width=50):
-        """
-        创建进度条
+## 注意事项：
+- 只输出上述字段，每行以对应标签开头，不要输出其他内容
+- 每个字段后面直接跟具体内容，不要使用方括号
+- 仅基于提供的论文信息填写，无需访问外部链接，不要使用占位符
+- 如果某项信息无法从提供的内容中得出，写"未明确提及"
 
-        Args:
-            current: 当前进度
-            total: 总数
-            width: 进度条宽度
+【待分析的论文信息】：
+{paper_text}"""
+
+        return prompt
 
+    def _format_paper_info(self, paper: Paper) -> str:
+        """
+        格式化提供给AI的论文元数据
+        
+        Args:
+            paper: 论文对象
+            
         Returns:
-            进度条字符串
+            论文信息文本
         """
-        if total == 0:
-            return "[" + "░" * width + "]"
+        paper_info = [
+            f"论文标题：{paper.title}",
+            f"中文标题：{paper.translation}"
+        ]
+        if paper.authors:
+            paper_info.append(f"作者团队：{paper.authors}")
+        if paper.publish_date:
+            paper_info.append(f"发表日期：{paper.publish_date}")
+        if paper.ai_summary:
+            paper_info.append(f"简短摘要：{paper.ai_summary}")
+        if paper.summary:
+            paper_info.append(f"论文摘要：{' '.join(paper.summary.split())}")
+        if paper.ai_keywords:
+            paper_info.append(f"关键词：{', '.join(paper.ai_keywords)}")
+        return '\n'.join(paper_info)
 
-        progress = current / total
-        filled = int(width * progress)
-        bar = "█" * filled + "░" * (width - filled)
-        return f"[{bar}]"
-    
     def _load_existing_results(self, file_path: Path) -> List[Dict[str, Any]]:
         """
         加载已存在的结果文件
@@ -436,32 +1019,66 @@ class PaperAnalyzer:
                 return []
         return []
     
-    def _save_single_result(self, result: AnalysisResult, file_path: Path):
+    def _save_single_result(self, result: AnalysisResult, file_path: Path) -> bool:
         """
-        保存单个分析结果到文件
+        保存单个分析结果到文件（持有跨进程文件锁读取、合并和写入，其他进程写入的结果不会丢失）
         
         Args:
             result: 分析结果
             file_path: 文件路径
+            
+        Returns:
+            是否保存成功
         """
         try:
-            # 加载现有结果
-            existing_results = self._load_existing_results(file_path)
-            
-            # 移除已存在的相同ID论文
-            existing_results = [
-                r for r in existing_results 
-                if self._extract_paper_id_from_result(r) != result.paper_id
-            ]
-            
-            # 添加新结果
-            existing_results.append(result.to_dict())
-            
-            # 保存到文件
-            self.file_manager.save_json(existing_results, file_path)
+            with file_lock(file_path):
+                # 加载现有结果
+                existing_results = self._load_existing_results(file_path)
+                
+                # 移除已存在的相同ID论文
+                existing_results = [
+                    r for r in existing_results 
+                    if self._extract_paper_id_from_result(r) != result.paper_id
+                ]
+                
+                # 添加新结果
+                existing_results.append(result.to_dict())
+                
+                # 保存到文件
+                return self.file_manager.save_json(existing_results, file_path)
             
         except Exception as e:
             self.logger.error(f"保存单个结果失败: {e}")
+            return False
+    
+    def save_results(self, results: List[AnalysisResult], date: str) -> bool:
+        """
+        把多篇论文的分析结果一次性合并到当日报告（相同ID的旧结果被替换，合并期间持有跨进程文件锁）
+        
+        Args:
+            results: 分析结果列表
+            date: 日期
+            
+        Returns:
+            是否保存成功
+        """
+        if not results:
+            return True
+        reports_dir = Path(self.output_dir) / 'reports'
+        self.file_manager.ensure_dir(reports_dir)
+        file_path = reports_dir / f"{date}_report.json"
+        
+        new_ids = {result.paper_id for result in results}
+        with file_lock(file_path):
+            merged = [r for r in self._load_existing_results(file_path)
+                      if self._extract_paper_id_from_result(r) not in new_ids]
+            merged.extend(result.to_dict() for result in results)
+            saved = self.file_manager.save_json(merged, file_path)
+        if not saved:
+            self.logger.error(f"合并分析结果失败: {file_path}")
+            return False
+        self.logger.info(f"已合并 {len(results)} 篇论文的分析结果: {file_path}")
+        return True
     
     def _extract_paper_id_from_result(self, result: Dict[str, Any]) -> str:
         """
@@ -0,0 +1,377 @@
+"""
+批量回填模块
+把一段日期内的分析/分类提示词写成一个离线批量任务，提交后轮询，
+并通过正常的解析器和写入逻辑把结果导入报告和分类目录
+"""
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..utils.console import ConsoleOutput
+from ..utils.logger import get_logger
+from ..utils.file_utils import FileManager, file_lock
+from ..utils.batch_jobs import (
+    BatchJobBackend, build_batch_request, write_batch_requests, read_batch_results,
+    STATUS_COMPLETED, STATUS_RUNNING
+)
+from ..models.paper import Paper
+from ..models.report import AnalysisResult, ClassificationResult
+from .cleaner import DataCleaner
+from .parser import ContentParser
+from .analyzer import PaperAnalyzer
+from .classifier import PaperClassifier
+
+
+# 支持的回填阶段
+BACKFILL_STAGES = ('analysis', 'classification')
+
+
+class BatchBackfill:
+    """
+    批量回填器
+
+    任务目录结构：
+        {jobs_dir}/{job_name}/requests.jsonl  提交的请求
+        {jobs_dir}/{job_name}/results.jsonl   下载的结果
+        {jobs_dir}/{job_name}/manifest.json   任务清单（日期、阶段、任务ID、状态）
+    """
+
+    def __init__(self, config: Dict[str, Any], backend: BatchJobBackend,
+                 jobs_dir: str = "data/batch_jobs", executor=None):
+        """
+        初始化批量回填器
+
+        Args:
+            config: 配置字典（与PaperAnalysisApp.app_config一致）
+            backend: 批量任务后端
+            jobs_dir: 任务目录
+            executor: PipelineExecutor实例，导入结果后记录阶段清单（为None时不记录）
+        """
+        self.config = config
+        self.backend = backend
+        self.jobs_dir = Path(jobs_dir)
+        self.executor = executor
+        self.console = ConsoleOutput()
+        self.logger = get_logger('backfill')
+        self.file_manager = FileManager('backfill')
+        self.parser = ContentParser()
+
+        self.output_dir = config.get('output_dir', 'data/daily_reports')
+        self.analysis_dir = config.get('analysis_dir', 'data/analysis_results')
+        self.model = config.get('batch_model') or self._get_default_model()
+
+        # 只用于构建提示词和写入结果，不创建AI客户端
+        offline_config = {**config, 'use_ai': False}
+        self.cleaner = DataCleaner(offline_config)
+        self.analyzer = PaperAnalyzer(offline_config)
+        self.classifier = PaperClassifier({**offline_config, 'output_dir': self.analysis_dir})
+
+    def _get_default_model(self) -> str:
+        """获取默认提供商的默认模型"""
+        from ..utils.config import get_config
+        config = get_config()
+        ai_config = config.get_ai_config(self.config.get('ai_model') or config.get_default_provider()) or {}
+        return ai_config.get('default_model', 'GLM-4.5-Air')
+
+    def prepare(self, dates: List[str], stage: str, silent: bool = False) -> Optional[Path]:
+        """
+        生成批量任务文件
+
+        Args:
+            dates: 日期列表
+            stage: 回填阶段（analysis 或 classification）
+            silent: 是否静默模式
+
+        Returns:
+            任务目录，没有需要处理的论文时返回None
+        """
+        if stage not in BACKFILL_STAGES:
+            raise ValueError(f"不支持的回填阶段: {stage}")
+
+        requests = []
+        date_counts = {}
+        for date in dates:
+            if stage == 'analysis':
+                date_requests = self._build_analysis_requests(date)
+            else:
+                date_requests = self._build_classification_requests(date)
+            date_counts[date] = len(date_requests)
+            requests.extend(date_requests)
+
+        if not requests:
+            if not silent:
+                self.console.print_warning("没有需要回填的论文")
+            return None
+
+        job_name = f"{stage}_{dates[0]}_{dates[-1]}_{datetime.now().strftime('%H%M%S')}"
+        job_dir = self.jobs_dir / job_name
+        write_batch_requests(requests, job_dir / 'requests.jsonl')
+
+        self._save_manifest(job_dir, {
+            'stage': stage,
+            'dates': dates,
+            'model': self.model,
+            'backend': self.backend.name,
+            'request_count': len(requests),
+            'date_counts': date_counts,
+            'status': 'prepared',
+            'created': datetime.now().isoformat()
+        })
+
+        if not silent:
+            self.console.print_success(f"已生成批量任务: {job_dir}（{len(requests)} 个请求）")
+        self.logger.info(f"批量任务文件已生成: {job_dir}，请求数: {len(requests)}")
+        return job_dir
+
+    def submit(self, job_dir: Path, silent: bool = False) -> str:
+        """
+        提交批量任务
+
+        Args:
+            job_dir: 任务目录
+            silent: 是否静默模式
+
+        Returns:
+            任务ID
+        """
+        manifest = self._load_manifest(job_dir)
+        job_id = self.backend.submit(job_dir / 'requests.jsonl', description=job_dir.name)
+
+        manifest.update({'job_id': job_id, 'status': STATUS_RUNNING, 'submitted': datetime.now().isoformat()})
+        self._save_manifest(job_dir, manifest)
+
+        if not silent:
+            self.console.print_info(f"批量任务已提交: {job_id}")
+        return job_id
+
+    def wait_and_ingest(self, job_dir: Path, poll_interval: float = 60,
+                        timeout: float = None, silent: bool = False) -> bool:
+        """
+        等待批量任务完成并导入结果
+
+        Args:
+            job_dir: 任务目录
+            poll_interval: 轮询间隔（秒）
+            timeout: 最长等待时间（秒）
+            silent: 是否静默模式
+
+        Returns:
+            bool: 是否完成导入
+        """
+        manifest = self._load_manifest(job_dir)
+        job_id = manifest.get('job_id')
+        if not job_id:
+            raise ValueError(f"任务尚未提交: {job_dir}")
+
+        if not silent:
+            self.console.print_info(f"等待批量任务完成: {job_id}")
+
+        status = self.backend.wait(job_id, poll_interval=poll_interval, timeout=timeout)
+        manifest['status'] = status
+        self._save_manifest(job_dir, manifest)
+
+        if status == STATUS_RUNNING:
+            if not silent:
+                self.console.print_warning("批量任务仍在运行，可稍后使用 --job 继续")
+            return False
+
+        if status != STATUS_COMPLETED:
+            if not silent:
+                self.console.print_error(f"批量任务失败: {job_id} ({status})")
+            return False
+
+        results_file = self.backend.download_results(job_id, job_dir / 'results.jsonl')
+        stats = self.ingest(job_dir, results_file, silent)
+
+        manifest.update({'status': 'ingested', 'ingested': datetime.now().isoformat(), 'ingest_stats': stats})
+        self._save_manifest(job_dir, manifest)
+        return True
+
+    def ingest(self, job_dir: Path, results_file: Path, silent: bool = False) -> Dict[str, int]:
+        """
+        导入批量任务结果
+
+        Args:
+            job_dir: 任务目录
+            results_file: 结果文件路径
+            silent: 是否静默模式
+
+        Returns:
+            导入统计（成功、失败数）
+        """
+        manifest = self._load_manifest(job_dir)
+        responses = read_batch_results(results_file)
+
+        # 按日期分组：custom_id 格式为 {stage}:{date}:{paper_id}
+        by_date: Dict[str, Dict[str, Optional[str]]] = {}
+        for custom_id, content in responses.items():
+            try:
+                _, date, paper_id = custom_id.split(':', 2)
+            except ValueError:
+                continue
+            by_date.setdefault(date, {})[paper_id] = content
+
+        stats = {'imported': 0, 'failed': 0}
+        for date in manifest.get('dates', []):
+            date_responses = by_date.get(date, {})
+            if manifest['stage'] == 'analysis':
+                imported, failed = self._ingest_analysis(date, date_responses)
+            else:
+                imported, failed = self._ingest_classification(date, date_responses, silent)
+            stats['imported'] += imported
+            stats['failed'] += failed
+
+            if not silent:
+                self.console.print_info(f"{date}: 导入 {imported} 篇，失败 {failed} 篇")
+
+        self.logger.info(f"批量结果导入完成: {stats}")
+        if not silent and stats['failed']:
+            self.console.print_warning(f"{stats['failed']} 篇论文未能导入，可用常规命令补跑")
+        return stats
+
+    def _build_analysis_requests(self, date: str) -> List[Dict[str, Any]]:
+        """构建指定日期未分析论文的请求"""
+        papers = self._load_papers(date)
+        existing_ids = self._load_report_ids(date)
+
+        requests = []
+        for paper in papers:
+            if paper.id in existing_ids:
+                continue
+            messages = [{"role": "user", "content": self.analyzer._build_analysis_prompt(paper)}]
+            requests.append(build_batch_request(f"analysis:{date}:{paper.id}", self.model, messages))
+        return requests
+
+    def _build_classification_requests(self, date: str) -> List[Dict[str, Any]]:
+        """构建指定日期未分类论文的请求"""
+        requests = []
+        for analysis_result in self._load_analysis_results(date):
+            if self.classifier._find_existing_category(analysis_result, date):
+                continue
+            messages = [{"role": "user", "content": self.classifier._build_classification_prompt(analysis_result)}]
+            requests.append(build_batch_request(
+                f"classification:{date}:{analysis_result.paper_id}", self.model, messages
+            ))
+        return requests
+
+    def _ingest_analysis(self, date: str, responses: Dict[str, Optional[str]]) -> tuple:
+        """导入分析结果到日报JSON（一次写入，合并期间持有跨进程文件锁）"""
+        papers = {paper.id: paper for paper in self._load_papers(date)}
+        report_file = Path(self.output_dir) / 'reports' / f"{date}_report.json"
+
+        new_results = []
+        failed = 0
+        for paper_id, content in responses.items():
+            paper = papers.get(paper_id)
+            if not paper or not content:
+                failed += 1
+                continue
+            fields = self.analyzer._merge_analysis_fields(paper, self.parser.parse_analysis_content(content))
+            new_results.append(self.analyzer._build_ai_result(paper, fields, content))
+
+        if new_results:
+            new_ids = {result.paper_id for result in new_results}
+            with file_lock(report_file):
+                merged = [r for r in self.analyzer._load_existing_results(report_file)
+                          if self.analyzer._extract_paper_id_from_result(r) not in new_ids]
+                merged.extend(result.to_dict() for result in new_results)
+                self.file_manager.save_json(merged, report_file)
+            self._record_stages(date, ('analyze',))
+
+        return len(new_results), failed
+
+    def _ingest_classification(self, date: str, responses: Dict[str, Optional[str]],
+                               silent: bool = False) -> tuple:
+        """导入分类结果，写入分类目录并生成汇总"""
+        analysis_results = {r.paper_id: r for r in self._load_analysis_results(date)}
+
+        # 与进阶分析一致：先切分MD文件
+        self.classifier.split_to_md(list(analysis_results.values()), date, silent=True)
+
+        classification_results = []
+        failed = 0
+        for paper_id, content in responses.items():
+            analysis_result = analysis_results.get(paper_id)
+            if not analysis_result or not content:
+                failed += 1
+                continue
+
+            category, confidence, md_content = self.classifier._parse_classification_response(content)
+            # 通过打包结果缓存复用单篇分类的保存逻辑
+            self.classifier._packed_results[paper_id] = ClassificationResult(
+                paper_id=paper_id, category=category, confidence=confidence, md_content=md_content
+            )
+            result = self.classifier.classify_and_save_single_paper(analysis_result, date, silent=True)
+            if result and result.md_content:
+                classification_results.append(result)
+
+        if classification_results:
+            self.classifier.save_classification_results(date, classification_results)
+        self.classifier.generate_summary_report(date, silent=True)
+        self._record_stages(date, ('split', 'classify', 'summary'))
+
+        return len(classification_results), failed
+
+    def _record_stages(self, date: str, stages: tuple):
+        """记录导入结果后的阶段清单，避免流水线把导入的输出当作被修改而重跑"""
+        if self.executor is None:
+            return
+        for stage in stages:
+            self.executor.record(date, stage)
+
+    def _load_papers(self, date: str) -> List[Paper]:
+        """加载指定日期的清洗数据并补充元数据"""
+        cleaned_data = self.cleaner.load_cleaned_data(date)
+        if not cleaned_data:
+            self.logger.warning(f"未找到 {date} 的清洗数据，跳过")
+            return []
+        papers = self.parser.parse_cleaned_data(cleaned_data)
+        self.cleaner.enrich_papers(papers, date)
+        return papers
+
+    def _load_report_ids(self, date: str) -> set:
+        """加载指定日期已分析的论文ID"""
+        report_file = Path(self.output_dir) / 'reports' / f"{date}_report.json"
+        return {self.analyzer._extract_paper_id_from_result(r)
+                for r in self.analyzer._load_existing_results(report_file)}
+
+    def _load_analysis_results(self, date: str) -> List[AnalysisResult]:
+        """加载指定日期的分析结果并补充摘要"""
+        report_file = Path(self.output_dir) / 'reports' / f"{date}_report.json"
+        results = []
+        for item in self.analyzer._load_existing_results(report_file):
+            if isinstance(item, dict):
+                if 'paper_id' in item:
+                    results.append(AnalysisResult.from_dict(item))
+                else:
+                    results.append(AnalysisResult.from_legacy_format(item))
+        self.cleaner.enrich_analysis_results(results, date)
+        return results
+
+    def _load_manifest(self, job_dir: Path) -> Dict[str, Any]:
+        """加载任务清单"""
+        with open(Path(job_dir) / 'manifest.json', 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_manifest(self, job_dir: Path, manifest: Dict[str, Any]):
+        """保存任务清单"""
+        self.file_manager.save_json(manifest, Path(job_dir) / 'manifest.json', indent=2)
+
+
+# 便捷函数
+def create_backfill(config: Dict[str, Any], backend: BatchJobBackend,
+                    jobs_dir: str = "data/batch_jobs", executor=None) -> BatchBackfill:
+    """
+    便捷函数：创建批量回填器
+
+    Args:
+        config: 配置字典
+        backend: 批量任务后端
+        jobs_dir: 任务目录
+        executor: PipelineExecutor实例（导入结果后记录阶段清单）
+
+    Returns:
+        BatchBackfill实例
+    """
+    return BatchBackfill(config, backend, jobs_dir, executor)
@@ -2,7 +2,6 @@
 智能分类器模块
 负责对论文进行智能分类并生成MD文件和汇总报告
 """
-import os
 import re
 import time
 from pathlib import Path
@@ -10,12 +9,26 @@ from typing import List, Dict, Any, Optional, Tuple
 
 from ..utils.console import ConsoleOutput
 from ..utils.logger import get_logger
-from ..utils.file_utils import FileManager
-from ..utils.progress import ProgressManager
-from ..utils.ai_client import create_retryable_client
+from ..utils.file_utils import FileManager, atomic_open
+from ..utils.progress import get_dashboard, observe_item_duration
+from ..utils.ai_client import get_shared_stage_client, CascadeAIClient, get_coalescing_stats, is_replay_only
+from ..utils.services import get_services
+from ..utils.metrics import get_metrics
+from ..utils.tracing import get_tracer
+from ..utils.events import get_events, EVENT_PAPER
+from ..utils.journal import open_journal, STATE_STARTED, STATE_RESULT, STATE_DONE, STATE_FAILED
+from ..utils.dead_letter import open_dead_letters
+from ..utils.prompt_packing import estimate_tokens, plan_pack, format_section, split_sections
 from ..models.report import AnalysisResult, ClassificationResult, AnalysisSummary
 
 
+# 分类体系（与知识库中的分类一致）
+CATEGORY_TAXONOMY = [
+    "文本生成", "音频生成", "图像生成", "视频生成", "多模态生成",
+    "3D生成", "游戏与策略生成", "科学计算与数据生成", "代码生成与数据增强", "跨模态生成"
+]
+
+
 class PaperClassifier:
     """
     论文智能分类器
@@ -42,36 +55,60 @@ class PaperClassifier:
         self.knowledge_file = config.get('knowledge_file', '模型分类.md')
         self.delay_between_requests = config.get('delay_between_requests', 1)
         
-        # 初始化AI客户端
-        self.ai_client = None
-        if self.use_ai:
+        # 无人值守模式：去掉只为展示进度的等待，限流等待只在真正请求AI后进行
+        self.headless = config.get('headless', False)
+        
+        # 运行日志：记录每篇论文的分类进度，--resume 时从中断处继续
+        self.journal_dir = config.get('journal_dir', 'data/journal')
+        self.resume = config.get('resume', False)
+        self.use_cascade = config.get('model_cascade', False)
+        
+        # 死信队列：分类失败的论文退避时间内跳过，到时间后由主流程或 retry-failed 重试
+        self.dead_letters = open_dead_letters(config)
+        self._failures: Dict[str, Tuple[str, str]] = {}
+        
+        # 多论文打包请求：知识库和指令每个请求只发送一次
+        self.pack_prompts = config.get('pack_prompts', False)
+        self.pack_token_budget = config.get('pack_token_budget', 6000)
+        self.pack_max_papers = config.get('pack_max_papers', 8)
+        self._packed_results: Dict[str, ClassificationResult] = {}
+        
+        # AI客户端延迟到第一次分类请求时创建，同配置的分类器共享同一个客户端
+        self._ai_client = None
+    
+    @property
+    def ai_client(self):
+        """AI客户端（延迟创建，创建失败时关闭AI功能）"""
+        if self._ai_client is None and self.use_ai:
             try:
-                self.ai_client = create_retryable_client(
+                self._ai_client = get_shared_stage_client(
                     self.ai_model,
+                    'classification',
+                    use_cascade=self.use_cascade,
                     max_retries=3
                 )
             except Exception as e:
                 self.logger.warning(f"AI客户端初始化失败: {e}")
                 self.use_ai = False
-        
-        # 加载知识库
-        self.knowledge_base = self._load_knowledge_base()
+        return self._ai_client
+    
+    @ai_client.setter
+    def ai_client(self, client):
+        self._ai_client = client
     
     def _load_knowledge_base(self) -> str:
         """
-        加载分类知识库
+        加载分类知识库（分类器实例由服务容器缓存，每次构建提示词时重新获取，知识库修改后立即生效）
         
         Returns:
             知识库内容
         """
-        if not os.path.exists(self.knowledge_file):
-            self.logger.warning(f"知识库文件不存在: {self.knowledge_file}")
-            return ""
-        
         try:
-            with open(self.knowledge_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            self.logger.info(f"成功加载知识库: {self.knowledge_file}")
+            # 知识库按进程缓存，文件修改时间变化后才重新读取
+            content = get_services().get_knowledge_base(self.knowledge_file)
+            if content is None:
+                self.logger.warning(f"知识库文件不存在: {self.knowledge_file}")
+                return ""
             return content
         except Exception as e:
             self.logger.error(f"加载知识库失败: {e}")
@@ -100,6 +137,8 @@ class PaperClassifier:
 
         self.logger.info(f"开始MD切分 {len(analysis_results)} 篇论文")
 
+        progress = get_dashboard().add_task(f"✂️ MD切分 {date}", len(analysis_results)) if not silent else None
+
         try:
             # 创建日期目录
             date_dir = Path(self.output_dir) / date
@@ -111,17 +150,8 @@ class PaperClassifier:
                     # 显示当前处理的论文信息（类似cleaner的体验）
                     self.console.print_info(f"🔍 切分第 {i+1}/{len(analysis_results)} 篇: {analysis_result.translation[:50]}...")
 
-                    # 显示整体进度条
-                    progress_bar = self._create_progress_bar(i, len(analysis_results))
-                    print(f"✂️ MD切分进度: {progress_bar} {i}/{len(analysis_results)}")
-
                 # 生成安全的文件名
-                safe_title = "".join(c for c in analysis_result.translation if c.isalnum() or c in (' ', '-', '_')).rstrip()
-                safe_title = safe_title[:50]  # 限制长度
-                if not safe_title:
-                    safe_title = f"paper_{analysis_result.paper_id}"
-
-                md_filename = f"{safe_title}.md"
+                md_filename = self._get_md_filename(analysis_result)
                 md_path = date_dir / md_filename
 
                 # 生成MD内容
@@ -137,18 +167,21 @@ class PaperClassifier:
 """
 
                 # 写入MD文件
-                with open(md_path, 'w', encoding='utf-8') as f:
+                with get_tracer().span("file_write", "io", path=str(md_path)), \
+                        atomic_open(md_path) as f:
                     f.write(content)
 
+                if progress:
+                    progress.advance('success')
+
                 if not silent:
                     self.console.print_success(f"✅ 切分完成: {md_filename}")
 
                 self.logger.info(f"MD文件创建成功: {md_path}")
 
                 # 添加延迟（类似cleaner的体验）
-                if i < len(analysis_results) - 1:  # 最后一个不需要延迟
-                    import time
-                    time.sleep(0.1)  # 短暂延迟，让用户看到进度
+                if i < len(analysis_results) - 1 and not self.headless:  # 最后一个不需要延迟
+                    get_tracer().sleep(0.1, "display_sleep")  # 短暂延迟，让用户看到进度
 
             if not silent:
                 self.console.print_success(f"📁 MD切分完成，输出目录: {date_dir}")
@@ -161,6 +194,10 @@ class PaperClassifier:
             self.logger.error(f"MD切分异常: {e}")
             return False
 
+        finally:
+            if progress:
+                progress.finish(show_summary=False)
+
     def classify_papers(self, analysis_results: List[AnalysisResult],
                        date: str = None, silent: bool = False) -> List[ClassificationResult]:
         """
@@ -184,11 +221,18 @@ class PaperClassifier:
         
         self.logger.info(f"开始批量分类 {len(analysis_results)} 篇论文")
         
-        # 初始化进度管理器
-        progress = ProgressManager(len(analysis_results), "智能分类论文") if not silent else None
+        # 在进度面板中显示整体进度（剩余时间按实测的单篇耗时估算）
+        progress_desc = f"智能分类论文 {date}" if date else "智能分类论文"
+        progress = get_dashboard().add_task(progress_desc, len(analysis_results), stage="classify") if not silent else None
         results = []
 
         # 统计变量
+        tracer = get_tracer()
+        events = get_events()
+        journal = open_journal(self.journal_dir, date, 'classify', self.resume) if date else None
+        dead_ids = self.dead_letters.pending_ids('classify', date) if self.dead_letters and date else set()
+        retry_ids = self.dead_letters.due_ids('classify', date) if self.dead_letters and date else set()
+        dead_count = 0
         processed_count = 0
         success_count = 0
         fail_count = 0
@@ -200,29 +244,61 @@ class PaperClassifier:
                 # 显示当前处理的论文信息（类似基础脚本）
                 self.console.print_info(f"🔍 处理第 {i+1}/{len(analysis_results)} 篇: {analysis_result.translation[:50]}...")
 
-                # 显示整体进度条（类似基础脚本）
-                progress_bar = self._create_progress_bar(i, len(analysis_results))
-                remaining_papers = len(analysis_results) - i - 1
-                estimated_remaining = remaining_papers * 20  # 假设每篇20秒
-                print(f"📊 进度: {progress_bar} {i}/{len(analysis_results)} (成功:{success_count}, 失败:{fail_count}, 跳过:{skip_count}) 预计剩余: {estimated_remaining}秒")
+            if analysis_result.paper_id in dead_ids:
+                dead_count += 1
+                if progress:
+                    progress.advance('skip')
+                events.emit(EVENT_PAPER, stage="classify", paper_id=analysis_result.paper_id,
+                            status="deferred", index=i + 1, total=len(analysis_results))
+                if not silent:
+                    self.console.print_skip(f"死信队列中的论文，未到重试时间或需人工处理: {analysis_result.paper_id}")
+                continue
 
             self.logger.info(f"开始分类论文: {analysis_result.paper_id}")
 
+            paper_start = time.time()
             try:
+                # 打包模式：一次请求分类后续多篇未分类的论文，结果暂存供逐篇保存
+                if date and self._should_pack(analysis_result):
+                    pending = [r for r in analysis_results[i:]
+                               if self._should_pack(r) and r.paper_id not in dead_ids
+                               and not self._find_existing_category(r, date)
+                               and not (journal and journal.recorded_result(r.paper_id))]
+                    pack = self._plan_classification_pack(pending)
+                    with tracer.span("classify_pack", "paper", papers=len(pack)):
+                        self._classify_packed(pack, silent)
+                    if journal:
+                        # 同一请求得到的其他论文的结果先记入日志，中断后不必重新请求
+                        for packed in pack:
+                            packed_result = self._packed_results.get(packed.paper_id)
+                            if packed is not analysis_result and packed_result:
+                                journal.record(packed.paper_id, STATE_RESULT, result=packed_result.to_dict())
+
                 # 分类单篇论文并立即保存MD文件（类似旧脚本）
-                result = self.classify_and_save_single_paper(analysis_result, date, silent=silent)
+                with tracer.span("classify_paper", "paper", paper_id=analysis_result.paper_id):
+                    result = self.classify_and_save_single_paper(analysis_result, date, silent=silent,
+                                                                 journal=journal)
 
                 if result:
-                    # 检查是否是跳过的论文（通过confidence和md_content判断）
-                    if result.confidence == 1.0 and result.md_content == "":
+                    if result.skipped:
                         skip_count += 1
+                        if progress:
+                            progress.advance('skip')
+                        events.emit(EVENT_PAPER, stage="classify", paper_id=analysis_result.paper_id,
+                                    status="skip", index=i + 1, total=len(analysis_results))
                     else:
+                        observe_item_duration("classify", time.time() - paper_start)
+                        if analysis_result.paper_id in retry_ids:
+                            self.dead_letters.resolve('classify', date, analysis_result.paper_id)
                         results.append(result)
                         success_count += 1
                         processed_count += 1
 
                         if progress:
-                            progress.update(True, f"{analysis_result.paper_id}")
+                            progress.advance('success')
+                        events.emit(EVENT_PAPER, stage="classify", paper_id=analysis_result.paper_id,
+                                    status="success", category=result.category,
+                                    index=i + 1, total=len(analysis_results))
 
                         if not silent:
                             # 显示成功信息（类似旧脚本）
@@ -232,9 +308,12 @@ class PaperClassifier:
                 else:
                     fail_count += 1
                     processed_count += 1
+                    self._dead_letter(analysis_result, date, self.pop_failure(analysis_result.paper_id))
 
                     if progress:
-                        progress.update(False, f"{analysis_result.paper_id}")
+                        progress.advance('fail')
+                    events.emit(EVENT_PAPER, stage="classify", paper_id=analysis_result.paper_id,
+                                status="fail", index=i + 1, total=len(analysis_results))
 
                     if not silent:
                         self.console.print_error(f"❌ 分类失败: {analysis_result.paper_id}")
@@ -242,38 +321,62 @@ class PaperClassifier:
                     self.logger.error(f"论文分类失败: {analysis_result.paper_id}")
 
                 # 添加延迟避免API限制（与旧脚本一致）
-                import time
-                time.sleep(1)
+                if not self.headless:
+                    tracer.sleep(1, "rate_limit_sleep", paper_id=analysis_result.paper_id)
+                elif self._requested_ai(result):
+                    tracer.sleep(self.delay_between_requests, "rate_limit_sleep",
+                                 paper_id=analysis_result.paper_id)
                     
             except Exception as e:
                 fail_count += 1
                 processed_count += 1
+                self._failures.pop(analysis_result.paper_id, None)
+                self._dead_letter(analysis_result, date, (type(e).__name__, str(e)))
 
                 if progress:
-                    progress.update(False, f"{analysis_result.paper_id} - {e}")
+                    progress.advance('fail')
+                events.emit(EVENT_PAPER, stage="classify", paper_id=analysis_result.paper_id,
+                            status="fail", index=i + 1, total=len(analysis_results),
+                            error={'type': type(e).__name__, 'message': str(e)})
 
                 if not silent:
                     self.console.print_error(f"❌ 异常: {analysis_result.paper_id} - {e}")
 
                 self.logger.error(f"论文分类异常: {analysis_result.paper_id} - {e}")
         
+        if journal:
+            journal.close()
+        
         # 显示最终统计
         if progress:
             progress.finish()
 
-        if not silent:
-            # 计算实际处理的论文数（排除跳过的）
-            actually_processed = processed_count
+        # 计算实际处理的论文数（排除跳过的）
+        actually_processed = processed_count
 
-            self.console.print_summary("分类完成统计", {
+        if not silent:
+            stats = {
                 "总论文数": len(analysis_results),
                 "跳过论文": skip_count,
                 "实际处理": actually_processed,
                 "成功分类": success_count,
                 "分类失败": fail_count,
                 "成功率": f"{success_count/max(actually_processed, 1)*100:.1f}%" if actually_processed > 0 else "0.0%"
-            })
-
+            }
+            if dead_count:
+                stats["死信队列"] = dead_count
+            self.console.print_summary("分类完成统计", stats)
+
+        papers_counter = get_metrics().counter('papers_processed_total', '各阶段处理的论文数')
+        papers_counter.inc(success_count, stage='classification', status='success')
+        papers_counter.inc(fail_count, stage='classification', status='failed')
+        papers_counter.inc(skip_count, stage='classification', status='skipped')
+        papers_counter.inc(dead_count, stage='classification', status='dead_letter')
+        if isinstance(self._ai_client, CascadeAIClient):
+            self._ai_client.log_stats()
+        coalescing = get_coalescing_stats()
+        if coalescing['coalesced_calls']:
+            self.logger.info(f"请求合并: 实际调用 {coalescing['leader_calls']} 次，合并 {coalescing['coalesced_calls']} 次")
         self.logger.info(f"批量分类完成，成功: {success_count}/{actually_processed}，跳过: {skip_count}")
         return results
     
@@ -289,6 +392,11 @@ class PaperClassifier:
         Returns:
             分类结果，失败返回None
         """
+        # 打包请求中已得到有效结果的论文直接返回
+        packed_result = self._packed_results.pop(analysis_result.paper_id, None)
+        if packed_result:
+            return packed_result
+
         if not self.use_ai or not self.ai_client:
             if not silent:
                 self.console.print_warning("AI分类未启用，返回默认分类")
@@ -315,30 +423,22 @@ class PaperClassifier:
                 }
             ]
 
-            # AI调用（带实时进度显示）
+            # AI调用（在进度面板中实时显示已耗时）
             if not silent:
-                import threading
-                import time
-
-                # 创建进度显示线程
-                progress_stop = threading.Event()
-                progress_thread = threading.Thread(
-                    target=self._show_classification_progress,
-                    args=(progress_stop, f"分类论文: {analysis_result.translation[:30]}...")
-                )
-                progress_thread.daemon = True
-                progress_thread.start()
+                activity = get_dashboard().start_activity(
+                    f"🏷️ 分类论文: {analysis_result.translation[:30]}...", slow_after=60)
 
             start_time = time.time()
 
             try:
-                # 直接调用AI
-                response = self.ai_client.chat(messages)
+                # 直接调用AI（级联客户端时校验分类是否在分类体系内）
+                if isinstance(self.ai_client, CascadeAIClient):
+                    response = self.ai_client.chat(messages, validator=self._is_valid_classification)
+                else:
+                    response = self.ai_client.chat(messages)
             finally:
                 if not silent:
-                    progress_stop.set()
-                    progress_thread.join(timeout=1)
-                    print()  # 换行
+                    activity.finish()
 
             if not silent:
                 end_time = time.time()
@@ -346,10 +446,12 @@ class PaperClassifier:
 
             if not response:
                 self.logger.error(f"AI分类失败，响应为空: {analysis_result.paper_id}")
+                self._failures[analysis_result.paper_id] = ('EmptyResponse', 'AI响应为空')
                 return None
 
         except Exception as e:
             self.logger.error(f"AI分类异常: {analysis_result.paper_id} - {e}")
+            self._failures[analysis_result.paper_id] = (type(e).__name__, str(e))
             return None
 
         # 处理AI响应
@@ -374,49 +476,78 @@ class PaperClassifier:
                 
         except Exception as e:
             self.logger.error(f"分类论文异常: {analysis_result.paper_id} - {e}")
+            self._failures[analysis_result.paper_id] = (type(e).__name__, str(e))
             return None
 
+    def pop_failure(self, paper_id: str) -> Tuple[str, str]:
+        """
+        取出论文最近一次分类失败的原因
+
+        Args:
+            paper_id: 论文ID
+
+        Returns:
+            (错误类型, 错误说明)
+        """
+        return self._failures.pop(paper_id, ('NoResult', '分类未返回结果'))
+
+    def _dead_letter(self, analysis_result: AnalysisResult, date: Optional[str], error: Tuple[str, str]):
+        """把主流程中失败的论文记入死信队列（纯回放模式下未命中录制记录不是真实失败，不记录）"""
+        if self.dead_letters and date and not is_replay_only():
+            self.dead_letters.add_failure('classify', date, analysis_result.paper_id, *error)
+
     def classify_and_save_single_paper(self, analysis_result: AnalysisResult,
-                                     date: str, silent: bool = False) -> Optional[ClassificationResult]:
+                                     date: str, silent: bool = False,
+                                     journal=None) -> Optional[ClassificationResult]:
         """
         分类单篇论文并立即保存MD文件（类似旧脚本）
 
+        运行日志中已有分类结果的论文（上次运行在写出MD前中断）直接用记录的结果写出，不再请求AI
+
         Args:
             analysis_result: 分析结果
             date: 日期字符串
             silent: 是否静默模式
+            journal: 运行日志（RunJournal），为None时不记录
 
         Returns:
             分类结果，失败返回None
         """
         # 生成原始MD文件名（与步骤1切分时一致）
-        safe_title = "".join(c for c in analysis_result.translation if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        safe_title = safe_title[:50]  # 限制长度
-        if not safe_title:
-            safe_title = f"paper_{analysis_result.paper_id}"
-
-        original_md_filename = f"{safe_title}.md"
+        original_md_filename = self._get_md_filename(analysis_result)
 
         # 查找是否已存在分类文件
         date_dir = Path(self.output_dir) / date
-        if date_dir.exists():
-            for category_dir in date_dir.iterdir():
-                if category_dir.is_dir():
-                    expected_file = category_dir / original_md_filename
-                    if expected_file.exists():
-                        if not silent:
-                            self.console.print_skip(f"已处理的论文: {analysis_result.paper_id}")
+        existing_category = self._find_existing_category(analysis_result, date)
+        if existing_category:
+            if not silent:
+                self.console.print_skip(f"已处理的论文: {analysis_result.paper_id}")
 
-                        # 返回已存在的分类结果
-                        return ClassificationResult(
-                            paper_id=analysis_result.paper_id,
-                            category=category_dir.name,
-                            confidence=1.0,
-                            md_content=""
-                        )
+            # 返回已存在的分类结果
+            return ClassificationResult(
+                paper_id=analysis_result.paper_id,
+                category=existing_category,
+                confidence=1.0,
+                md_content="",
+                skipped=True
+            )
 
-        # 执行分类
-        result = self.classify_single_paper(analysis_result, silent)
+        paper_id = analysis_result.paper_id
+        recorded = journal.recorded_result(paper_id) if journal else None
+        if recorded:
+            self._packed_results.pop(paper_id, None)
+            result = ClassificationResult.from_dict(recorded)
+            self.logger.info(f"使用运行日志中的分类结果: {paper_id} -> {result.category}")
+        else:
+            # 执行分类
+            if journal:
+                journal.record(paper_id, STATE_STARTED)
+            result = self.classify_single_paper(analysis_result, silent)
+            if journal:
+                if result:
+                    journal.record(paper_id, STATE_RESULT, result=result.to_dict())
+                else:
+                    journal.record(paper_id, STATE_FAILED)
 
         if result:
             # 立即保存MD文件到分类目录（类似旧脚本）
@@ -430,8 +561,10 @@ class PaperClassifier:
                 md_path = category_dir / md_filename
 
                 # 写入分类后的MD文件
-                with open(md_path, 'w', encoding='utf-8') as f:
+                with atomic_open(md_path) as f:
                     f.write(result.md_content)
+                if journal:
+                    journal.record(paper_id, STATE_DONE, output=str(md_path))
 
                 if not silent:
                     self.console.print_success(f"✅ 分类完成: {result.category} - {md_filename}")
@@ -445,6 +578,130 @@ class PaperClassifier:
 
         return result
 
+    def _requested_ai(self, result: Optional[ClassificationResult]) -> bool:
+        """分类过程中是否实际请求了AI（跳过已分类的论文和未启用AI时都不会请求）"""
+        if not self.use_ai:
+            return False
+        return not (result and result.skipped)
+    
+    def _get_md_filename(self, analysis_result: AnalysisResult) -> str:
+        """
+        生成论文的MD文件名（与步骤1切分时一致）
+        
+        Args:
+            analysis_result: 分析结果
+            
+        Returns:
+            MD文件名
+        """
+        safe_title = "".join(c for c in analysis_result.translation if c.isalnum() or c in (' ', '-', '_')).rstrip()
+        safe_title = safe_title[:50]  # 限制长度
+        if not safe_title:
+            safe_title = f"paper_{analysis_result.paper_id}"
+
+        return f"{safe_title}.md"
+
+    def _find_existing_category(self, analysis_result: AnalysisResult, date: str) -> Optional[str]:
+        """
+        查找论文已存在的分类目录
+        
+        Args:
+            analysis_result: 分析结果
+            date: 日期字符串
+            
+        Returns:
+            已存在的分类名称，未分类返回None
+        """
+        date_dir = Path(self.output_dir) / date
+        if not date_dir.exists():
+            return None
+
+        md_filename = self._get_md_filename(analysis_result)
+        for category_dir in date_dir.iterdir():
+            if category_dir.is_dir() and (category_dir / md_filename).exists():
+                return category_dir.name
+
+        return None
+
+    def _should_pack(self, analysis_result: AnalysisResult) -> bool:
+        """
+        判断论文是否参与打包分类请求
+        
+        Args:
+            analysis_result: 分析结果
+            
+        Returns:
+            是否参与打包
+        """
+        return (self.pack_prompts and self.use_ai and self.ai_client is not None
+                and analysis_result.paper_id not in self._packed_results)
+
+    def _plan_classification_pack(self, analysis_results: List[AnalysisResult]) -> List[AnalysisResult]:
+        """
+        按token预算选取一组打包分类的论文
+        
+        Args:
+            analysis_results: 候选分析结果（按处理顺序）
+            
+        Returns:
+            本次打包的分析结果列表
+        """
+        overhead = estimate_tokens(self._build_packed_classification_prompt([]))
+        return plan_pack(
+            analysis_results,
+            # 每篇论文的输入加上约400个token的输出预留（分类MD内容较长）
+            lambda result: estimate_tokens("".join(self._format_classification_input(result))) + 400,
+            self.pack_token_budget,
+            overhead,
+            self.pack_max_papers
+        )
+
+    def _classify_packed(self, analysis_results: List[AnalysisResult], silent: bool = False):
+        """
+        在一次请求中分类多篇论文，有效结果存入打包结果缓存
+        
+        响应中缺失分段或分类不在分类体系内的论文不会被缓存，之后按单篇流程重新分类
+        
+        Args:
+            analysis_results: 打包的分析结果列表
+            silent: 是否静默模式
+        """
+        if len(analysis_results) < 2:
+            return
+
+        if not silent:
+            self.console.print_info(f"打包分类 {len(analysis_results)} 篇论文...")
+
+        prompt = self._build_packed_classification_prompt(analysis_results)
+        messages = [{"role": "user", "content": [{"type": "text", "text": prompt}]}]
+
+        start_time = time.time()
+        try:
+            response = self.ai_client.chat(messages)
+        except Exception as e:
+            self.logger.warning(f"打包分类请求失败，改为逐篇分类: {e}")
+            return
+
+        sections = split_sections(response or "", [r.paper_id for r in analysis_results])
+
+        for analysis_result in analysis_results:
+            section = sections.get(analysis_result.paper_id)
+            if not section or not self._is_valid_classification(section):
+                continue
+            category, confidence, md_content = self._parse_classification_response(section)
+            self._packed_results[analysis_result.paper_id] = ClassificationResult(
+                paper_id=analysis_result.paper_id,
+                category=category,
+                confidence=confidence,
+                md_content=md_content
+            )
+
+        completed = sum(1 for r in analysis_results if r.paper_id in self._packed_results)
+        self.logger.info(
+            f"打包分类完成: {completed}/{len(analysis_results)} 篇，耗时 {time.time() - start_time:.2f}秒，"
+            f"{len(analysis_results) - completed} 篇重新排队逐篇分类"
+        )
+
     def _build_classification_prompt(self, analysis_result: AnalysisResult) -> str:
         """
         构建分类提示词
@@ -455,6 +712,31 @@ class PaperClassifier:
         Returns:
             提示词字符串
         """
+        md_content, paper_info = self._format_classification_input(analysis_result)
+
+        prompt = f"""{self._build_classification_instructions(bool(analysis_result.summary))}
+
+md文件内容：
+{md_content}"""
+
+        if paper_info:
+            prompt += f"""
+
+补充的论文信息：
+{paper_info}"""
+        
+        return prompt
+
+    def _format_classification_input(self, analysis_result: AnalysisResult) -> Tuple[str, str]:
+        """
+        生成用于分类的MD内容和补充的论文信息
+        
+        Args:
+            analysis_result: 分析结果
+            
+        Returns:
+            (MD内容, 补充的论文信息)，没有元数据摘要时补充信息为空
+        """
         # 生成MD内容用于分类
         md_content = f"""# {analysis_result.translation}
 
@@ -467,12 +749,42 @@ class PaperClassifier:
 **模型功能**：{analysis_result.model_function}
 """
         
-        prompt = f"""你是一个AI模型分类与总结专家。请根据下面的"模型分类知识库"，判断md文件描述的模型属于哪个分类，并按指定格式输出。
+        # 有元数据摘要时直接提供给模型，避免访问链接
+        paper_info = ""
+        if analysis_result.summary:
+            paper_info = f"论文摘要：{analysis_result.summary}"
+            if analysis_result.ai_keywords:
+                paper_info += f"\n关键词：{', '.join(analysis_result.ai_keywords)}"
 
-信息获取策略：
+        return md_content, paper_info
+
+    def _build_classification_instructions(self, has_summary: bool) -> str:
+        """
+        构建分类提示词中的指令部分（含输出格式、分类规则和知识库）
+        
+        Args:
+            has_summary: 是否提供了论文摘要
+            
+        Returns:
+            指令文本
+        """
+        knowledge_base = self._load_knowledge_base()
+        if has_summary:
+            lookup = "根据下方提供的论文摘要补充"
+            strategy = """信息获取策略：
+1. 优先使用md文件中已有的信息
+2. 如果md文件中某些字段缺失或标注为"[未在md文件中提供]"、"[未提及]"等，请根据下方提供的论文摘要和关键词补充
+3. 仅基于提供的信息填写，无需访问外部链接"""
+        else:
+            lookup = "访问arXiv链接获取"
+            strategy = """信息获取策略：
 1. 优先使用md文件中已有的信息
 2. 如果md文件中某些字段缺失或标注为"[未在md文件中提供]"、"[未提及]"等，请访问md文件中的arXiv链接获取完整信息
-3. 确保所有字段都有准确、完整的内容
+3. 确保所有字段都有准确、完整的内容"""
+
+        return f"""你是一个AI模型分类与总结专家。请根据下面的"模型分类知识库"，判断md文件描述的模型属于哪个分类，并按指定格式输出。
+
+{strategy}
 
 输出格式：
 # [分类名称]
@@ -481,30 +793,30 @@ class PaperClassifier:
 
 **arXiv 文章链接**：[论文链接，格式：https://arxiv.org/abs/XXXX.XXXXX]
 
-**作者/团队**：[作者姓名或机构名称。如果md文件中未提供，请访问arXiv链接获取作者信息]
+**作者/团队**：[作者姓名或机构名称。如果md文件中未提供，请{lookup}作者信息]
 
-**发表日期**：[YYYY-MM-DD格式。如果md文件中未提供，请访问arXiv链接获取论文提交日期]
+**发表日期**：[YYYY-MM-DD格式。如果md文件中未提供，请{lookup}论文提交日期]
 
-**模型功能**：[基于论文内容，用1-2句话简洁描述模型的核心功能。如果md文件描述不够详细，请访问arXiv链接获取准确信息直接使用md文件中的模型功能信息]
+**模型功能**：[基于论文内容，用1-2句话简洁描述模型的核心功能。如果md文件描述不够详细，请{lookup}准确信息直接使用md文件中的模型功能信息]
 
 **技术特点**：[用2-3句话总结模型的主要技术创新点，50字以内]
 
-**应用场景**：[列举2-3个具体的应用场景。如果md文件信息不足，请访问arXiv链接获取更准确的应用场景]
+**应用场景**：[列举2-3个具体的应用场景。如果md文件信息不足，请{lookup}更准确的应用场景]
 
 分类规则：
-- 必须从以下分类中选择：文本生成、音频生成、图像生成、视频生成、多模态生成、3D生成、游戏与策略生成、科学计算与数据生成、代码生成与数据增强、跨模态生成
+- 必须从以下分类中选择：{'、'.join(CATEGORY_TAXONOMY)}
 - 如果不确定，选择"多模态生成"
 - 如果模型涉及多个领域，选择最主要的功能分类
 
 注意事项：
 - 分类名称必须完全匹配知识库中的分类
 - 所有字段都必须填写完整，不能留空或使用"[未提供]"等占位符
-- 如果md文件信息不完整，务必访问arXiv链接补充信息
+- 如果md文件信息不完整，务必{lookup}信息
 - 技术创新要突出与现有方法的区别
 - 应用场景要具体可行
 
 信息补充要求：
-当遇到以下情况时，请访问arXiv链接获取信息：
+当遇到以下情况时，请{lookup}信息：
 - 作者/团队字段为空或标注"[未在md文件中提供]"
 - 发表日期字段为空或标注"[未在md文件中提供]"
 - 模型功能描述过于简单（少于20字）
@@ -512,67 +824,37 @@ class PaperClassifier:
 - 应用场景过于泛泛而谈
 
 模型分类知识库：
-{self.knowledge_base}
-
-md文件内容：
-{md_content}"""
-        
-        return prompt
+{knowledge_base}"""
 
-    def _create_progress_bar(self, current, total, width=50):
+    def _build_packed_classification_prompt(self, analysis_results: List[AnalysisResult]) -> str:
         """
-        创建进度条（类似旧脚本的tqdm风格）
-
+        构建多论文打包分类提示词（知识库和指令只发送一次）
+        
         Args:
-            current: 当前进度
-            total: 总数
-            width: 进度条宽度
-
+            analysis_results: 分析结果列表
+            
         Returns:
-            进度条字符串
-        """
-        if total == 0:
-            return "[" + "░" * width + "]"
-
-        progress = current / total
-        filled = int(width * progress)
-        bar = "█" * filled + "░" * (width - filled)
-        return f"[{bar}]"
-
-    def _show_classification_progress(self, stop_event, task_name):
-        """
-        显示AI分类进度动画（实时预览时间）
-
-        Args:
-            stop_event: 停止事件
-            task_name: 任务名称
+            提示词字符串
         """
-        import sys
-        import time
-
-        spinner = ['⠋', '⠙', '⠹', '⠸', '⠼', '⠴', '⠦', '⠧', '⠇', '⠏']
-        start_time = time.time()
-        i = 0
-        warning_shown = False
-
-        while not stop_event.is_set():
-            elapsed = int(time.time() - start_time)
-            minutes, seconds = divmod(elapsed, 60)
-            time_str = f"{minutes:02d}:{seconds:02d}"
-
-            # 在60秒时显示警告
-            if elapsed >= 60 and not warning_shown:
-                sys.stdout.write(f'\r🏷️ {task_name} {spinner[i % len(spinner)]} 已耗时: {time_str} ⚠️ 响应较慢...')
-                warning_shown = True
-            else:
-                sys.stdout.write(f'\r🏷️ {task_name} {spinner[i % len(spinner)]} 已耗时: {time_str}')
+        has_summary = bool(analysis_results) and all(r.summary for r in analysis_results)
 
-            sys.stdout.flush()
+        sections = []
+        for analysis_result in analysis_results:
+            md_content, paper_info = self._format_classification_input(analysis_result)
+            body = f"md文件内容：\n{md_content}"
+            if paper_info:
+                body += f"\n补充的论文信息：\n{paper_info}"
+            sections.append(format_section(analysis_result.paper_id, body))
+        sections_text = "\n\n".join(sections)
 
-            time.sleep(0.1)
-            i += 1
+        return f"""{self._build_classification_instructions(has_summary)}
 
+批量处理要求：
+- 下面有多个md文件，每个用"=== PAPER 论文ID ==="和"=== END 论文ID ==="包裹
+- 请分别对每个md文件按上述输出格式输出结果，并用相同的标记包裹，论文ID必须与输入完全一致
+- 每个分段的第一行必须是"# 分类名称"
 
+{sections_text}"""
 
     def generate_summary_report(self, date: str, silent: bool = False) -> bool:
         """
@@ -628,7 +910,7 @@ md文件内容：
             # 保存汇总报告
             summary_file = output_dir / "模型分类汇总.md"
 
-            with open(summary_file, 'w', encoding='utf-8') as f:
+            with atomic_open(summary_file) as f:
                 f.write(summary_content)
 
             if not silent:
@@ -687,6 +969,20 @@ md文件内容：
 
         return category, confidence, md_content
     
+    def _is_valid_classification(self, response: str) -> bool:
+        """
+        校验分类响应中的分类是否属于分类体系
+        
+        Args:
+            response: AI响应内容
+            
+        Returns:
+            是否有效
+        """
+        category, _, md_content = self._parse_classification_response(response)
+        normalized = category.replace(' ', '')
+        return normalized in CATEGORY_TAXONOMY and bool(md_content)
+    
     def _generate_default_md_content(self, analysis_result: AnalysisResult) -> str:
         """
         生成默认MD内容
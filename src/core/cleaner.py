@@ -9,7 +9,12 @@ from typing import Dict, Any, List, Optional
 from ..utils.console import ConsoleOutput
 from ..utils.logger import get_logger
 from ..utils.file_utils import FileManager
-from ..utils.ai_client import create_ai_client, create_retryable_client
+from ..utils.ai_client import get_shared_stage_client
+from ..utils.translation_cache import get_translation_cache
+from ..utils.tracing import get_tracer
+from ..utils.progress import get_dashboard
+from ..models.paper import Paper, CLEANED_DATA_SCHEMA_VERSION
+from ..models.report import AnalysisResult
 
 
 class DataCleaner:
@@ -35,18 +40,37 @@ class DataCleaner:
         self.output_dir = config.get('output_dir', 'data/daily_reports')
         self.ai_model = config.get('ai_model', 'zhipu')
         self.use_ai = config.get('use_ai', True)
+        self.translation_chunk_size = config.get('translation_chunk_size', 15)
         
-        # 初始化AI客户端
-        self.ai_client = None
-        if self.use_ai:
+        # 标题翻译缓存（跨日期、跨阶段共享）
+        self.translation_cache = None
+        if config.get('use_translation_cache', True):
+            self.translation_cache = get_translation_cache(
+                config.get('translation_cache_file', 'data/cache/translations.json')
+            )
+        
+        # AI客户端延迟到第一次翻译时创建，见 ai_client 属性
+        self._ai_client = None
+    
+    @property
+    def ai_client(self):
+        """AI客户端（延迟创建，创建失败时关闭AI功能）"""
+        if self._ai_client is None and self.use_ai:
             try:
-                self.ai_client = create_retryable_client(
+                self._ai_client = get_shared_stage_client(
                     self.ai_model,
+                    'cleaning',
+                    use_cascade=False,
                     max_retries=3
                 )
             except Exception as e:
                 self.logger.warning(f"AI客户端初始化失败: {e}")
                 self.use_ai = False
+        return self._ai_client
+    
+    @ai_client.setter
+    def ai_client(self, client):
+        self._ai_client = client
     
     def clean(self, date: str, silent: bool = False) -> bool:
         """
@@ -145,7 +169,7 @@ class DataCleaner:
         
         cleaned_data = []
         
-        if self.use_ai and self.ai_client:
+        if self.use_ai:
             # 使用AI清洗数据
             cleaned_data = self._clean_with_ai(raw_data, silent)
         else:
@@ -155,79 +179,103 @@ class DataCleaner:
         self.logger.info(f"数据清洗完成，原始数据: {len(raw_data)} 条，清洗后: {len(cleaned_data)} 条")
         return cleaned_data
     
-    def _clean_with_ai(self, raw_data: List[Dict[str, Any]], silent: bool = False) -> List[str]:
+    def _clean_with_ai(self, raw_data: List[Dict[str, Any]], silent: bool = False) -> List[Dict[str, Any]]:
         """
         使用AI清洗数据
         
+        结构化字段直接由规则从元数据提取，AI只负责生成中文标题翻译
+        
         Args:
             raw_data: 原始数据
             silent: 是否静默模式
             
         Returns:
-            清洗后的数据
+            清洗后的论文记录列表
         """
+        records = self._build_records(raw_data)
+        if not records:
+            return records
+
         if not silent:
             self.console.print_info("调用AI进行数据清洗...")
             self.console.print_info(f"原始数据量: {len(raw_data)} 条记录")
             self.console.print_info("正在预处理数据，精简内容...")
 
-        try:
-            # 构建AI提示词
-            prompt = self._build_cleaning_prompt(raw_data)
+        # 先查询翻译缓存，只把未翻译过的标题发送给AI
+        pending = self._apply_cached_translations(records)
+        if not silent and len(pending) < len(records):
+            self.console.print_info(f"翻译缓存命中 {len(records) - len(pending)} 篇，需翻译 {len(pending)} 篇")
 
-            if not silent:
-                self.console.print_info(f"提示词长度: {len(prompt)} 字符")
-                self.console.print_info("正在发送请求到AI服务...")
-
-            messages = [
-                {"role": "system", "content": "你是一个专业的数据清洗助手，负责从原始论文数据中提取结构化信息。"},
-                {"role": "user", "content": prompt}
-            ]
+        # 全部命中缓存时不会创建AI客户端
+        if pending and self.ai_client is None:
+            self.logger.warning("AI客户端不可用，未缓存的标题保留原文")
+            pending = []
 
-            # 调用AI（带进度显示）
-            if not silent:
-                import threading
-                import time
-
-                # 创建进度显示线程
-                progress_stop = threading.Event()
-                progress_thread = threading.Thread(
-                    target=self._show_ai_progress,
-                    args=(progress_stop, "AI数据清洗")
-                )
-                progress_thread.daemon = True
-                progress_thread.start()
+        translations = {}
+        chunks = [pending[i:i + self.translation_chunk_size]
+                  for i in range(0, len(pending), self.translation_chunk_size)]
 
+        for chunk_index, chunk in enumerate(chunks, 1):
             try:
-                response = self.ai_client.chat(messages)
-            finally:
+                # 构建AI提示词
+                prompt = self._build_cleaning_prompt(chunk)
+
                 if not silent:
-                    progress_stop.set()
-                    progress_thread.join(timeout=1)
-                    print()  # 换行
+                    self.console.print_info(f"提示词长度: {len(prompt)} 字符")
+                    self.console.print_info(f"正在发送请求到AI服务... ({chunk_index}/{len(chunks)})")
+
+                messages = [
+                    {"role": "system", "content": "你是一个专业的数据清洗助手，负责从原始论文数据中提取结构化信息。"},
+                    {"role": "user", "content": prompt}
+                ]
+
+                # 调用AI（在进度面板中显示已耗时）
+                if not silent:
+                    activity = get_dashboard().start_activity("🤖 AI数据清洗中")
+
+                try:
+                    with get_tracer().span("translate_chunk", "ai", papers=len(chunk)):
+                        response = self.ai_client.chat(messages)
+                finally:
+                    if not silent:
+                        activity.finish()
+
+                if not silent:
+                    if response:
+                        self.console.print_info(f"AI响应成功，长度: {len(response)} 字符")
+                    else:
+                        self.console.print_warning("AI响应为空")
 
-            if not silent:
                 if response:
-                    self.console.print_info(f"AI响应成功，长度: {len(response)} 字符")
+                    translations.update(self._parse_ai_response(response))
                 else:
-                    self.console.print_warning("AI响应为空")
-            
-            if response:
-                # 解析AI响应
-                cleaned_data = self._parse_ai_response(response)
-                self.logger.info(f"AI清洗成功，提取了 {len(cleaned_data)} 条记录")
-                return cleaned_data
-            else:
-                self.logger.warning("AI响应为空，回退到规则清洗")
-                return self._clean_with_rules(raw_data, silent)
-                
-        except Exception as e:
-            self.logger.error(f"AI清洗失败: {e}")
-            if not silent:
-                self.console.print_warning("AI清洗失败，使用规则清洗")
-            return self._clean_with_rules(raw_data, silent)
+                    self.logger.warning("AI响应为空，该批论文使用英文标题")
+
+            except Exception as e:
+                self.logger.error(f"AI清洗失败: {e}")
+                if not silent:
+                    self.console.print_warning("AI清洗失败，该批论文使用英文标题")
+
+        # 合并翻译结果，缺失的保持英文标题
+        new_translations = {}
+        for record in pending:
+            translation = translations.get(record['id'])
+            if translation:
+                record['translation'] = translation
+                new_translations[record['title']] = translation
+
+        # 写回翻译缓存
+        if self.translation_cache is not None and new_translations:
+            self.translation_cache.put_many(new_translations)
+            self.translation_cache.save()
+
+        self.logger.info(
+            f"AI清洗完成，缓存命中 {len(records) - len(pending)} 篇，"
+            f"新翻译 {len(new_translations)}/{len(pending)} 篇论文标题"
+        )
+        return records
     
-    def _clean_with_rules(self, raw_data: List[Dict[str, Any]], silent: bool = False) -> List[str]:
+    def _clean_with_rules(self, raw_data: List[Dict[str, Any]], silent: bool = False) -> List[Dict[str, Any]]:
         """
         使用规则清洗数据
         
@@ -236,68 +284,89 @@ class DataCleaner:
             silent: 是否静默模式
             
         Returns:
-            清洗后的数据
+            清洗后的论文记录列表（中文翻译默认使用英文标题）
         """
         if not silent:
             self.console.print_info("使用规则进行数据清洗...")
         
-        cleaned_strings = []
+        records = self._build_records(raw_data)
+
+        # 有缓存的标题直接使用已有的中文翻译
+        self._apply_cached_translations(records)
+
+        return records
+    
+    def _build_records(self, raw_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        将原始数据转换为论文记录列表
+        
+        Args:
+            raw_data: 原始数据
+            
+        Returns:
+            论文记录列表
+        """
+        records = []
 
-        for i, item in enumerate(raw_data, 1):
+        for item in self._preprocess_raw_data(raw_data):
             try:
-                cleaned_item = self._extract_paper_info(item)
-                if cleaned_item:
-                    # 转换为字符串格式，兼容原有解析器
-                    paper_string = f"""{i}. 论文题目：{cleaned_item['title']}
-   中文翻译：{cleaned_item['translation']}
-   论文ID：{cleaned_item['id']}
-   作者：{cleaned_item['authors']}
-   发表日期：{cleaned_item['publish_date']}"""
-                    cleaned_strings.append(paper_string)
+                records.append(self._build_paper_record(item))
             except Exception as e:
                 self.logger.warning(f"清洗单条数据失败: {e}")
                 continue
 
-        return cleaned_strings
+        return records
     
-    def _extract_paper_info(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def _apply_cached_translations(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
-        从单条原始数据中提取论文信息
+        用翻译缓存填充论文记录的中文翻译
         
         Args:
-            item: 原始数据项
+            records: 论文记录列表
             
         Returns:
-            提取的论文信息，失败返回None
+            缓存未命中、仍需翻译的记录列表
         """
-        try:
-            # 处理不同的数据结构
-            paper_data = item.get('paper', item)
-            
-            # 提取基本信息
-            paper_id = paper_data.get('id', '')
-            title = paper_data.get('title', '')
-            
-            # 如果缺少关键信息，跳过
-            if not paper_id or not title:
-                return None
-            
-            # 构建清洗后的数据
-            cleaned_item = {
-                'id': paper_id,
-                'title': title,
-                'translation': title,  # 默认使用英文标题，后续可以翻译
-                'url': f"https://arxiv.org/abs/{paper_id}",
-                'authors': paper_data.get('authors', ''),
-                'publish_date': paper_data.get('publishedDate', ''),
-                'model_function': ''  # 需要后续分析填充
-            }
-            
-            return cleaned_item
+        if self.translation_cache is None:
+            return list(records)
+
+        cached = self.translation_cache.get_many(record['title'] for record in records)
+
+        pending = []
+        for record in records:
+            translation = cached.get(record['title'])
+            if translation:
+                record['translation'] = translation
+            else:
+                pending.append(record)
+
+        self.logger.debug(f"翻译缓存命中 {len(records) - len(pending)}/{len(records)}")
+        return pending
+    
+    def _build_paper_record(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        将精简元数据转换为清洗后的论文记录（字段与Paper一致）
+        
+        Args:
+            item: 精简后的元数据项
             
-        except Exception as e:
-            self.logger.error(f"提取论文信息失败: {e}")
-            return None
+        Returns:
+            论文记录字典
+        """
+        paper = Paper(
+            id=item['id'],
+            title=item['title'],
+            translation=item['title'],  # 默认使用英文标题，AI清洗时替换为中文翻译
+            url=item.get('url') or f"https://arxiv.org/abs/{item['id']}",
+            authors=self._format_authors(item.get('authors', [])),
+            publish_date=self._format_publish_date(item.get('publishedAt', '')),
+            upvotes=item.get('upvotes', 0),
+            github_repo=item.get('githubRepo', '') or '',
+            summary=item.get('summary', ''),
+            ai_summary=item.get('ai_summary', ''),
+            ai_keywords=list(item.get('ai_keywords', []))
+        )
+        return paper.to_dict()
 
     def _preprocess_raw_data(self, raw_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
@@ -335,6 +404,7 @@ class DataCleaner:
                     'authors': authors[:8],  # 适当限制作者数量
                     'publishedAt': paper.get('publishedAt', ''),
                     'githubRepo': paper.get('githubRepo', ''),  # GitHub仓库
+                    'upvotes': paper.get('upvotes', 0) or 0,  # HF点赞数
                     'projectPage': paper.get('projectPage', ''),  # 项目页面
                     'url': paper.get('url', f"https://arxiv.org/abs/{paper.get('id', '')}")
                 }
@@ -350,98 +420,197 @@ class DataCleaner:
         self.logger.info(f"数据预处理完成: 原始 {len(raw_data)} 条 -> 精简 {len(processed_data)} 条")
         return processed_data
 
-    def _build_cleaning_prompt(self, raw_data: List[Dict[str, Any]]) -> str:
+    def load_paper_metadata(self, date: str) -> Dict[str, Dict[str, Any]]:
+        """
+        加载指定日期的精简元数据，按论文ID索引
+
+        Args:
+            date: 日期字符串
+
+        Returns:
+            论文ID到精简元数据的映射，失败返回空字典
+        """
+        raw_data = self._load_metadata(date)
+        if not raw_data:
+            return {}
+
+        return {item['id']: item for item in self._preprocess_raw_data(raw_data)}
+
+    def enrich_papers(self, papers: List[Paper], date: str) -> List[Paper]:
+        """
+        使用元数据补充论文信息（优先级信号、作者、发表日期、摘要和关键词）
+
+        只填充论文中缺失的字段，已有内容保持不变
+
+        Args:
+            papers: 论文列表
+            date: 日期字符串
+
+        Returns:
+            补充后的论文列表（原地修改）
+        """
+        metadata = self.load_paper_metadata(date)
+        if not metadata:
+            return papers
+
+        enriched_count = 0
+        for paper in papers:
+            item = metadata.get(paper.id)
+            if not item:
+                continue
+            if not paper.upvotes:
+                paper.upvotes = item.get('upvotes', 0)
+            if not paper.github_repo:
+                paper.github_repo = item.get('githubRepo', '') or ''
+            if not paper.authors:
+                paper.authors = self._format_authors(item.get('authors', []))
+            if not paper.publish_date:
+                paper.publish_date = self._format_publish_date(item.get('publishedAt', ''))
+            if not paper.summary:
+                paper.summary = item.get('summary', '')
+            if not paper.ai_summary:
+                paper.ai_summary = item.get('ai_summary', '')
+            if not paper.ai_keywords:
+                paper.ai_keywords = list(item.get('ai_keywords', []))
+            enriched_count += 1
+
+        self.logger.info(f"元数据补充完成: {enriched_count}/{len(papers)} 篇论文")
+        return papers
+
+    def enrich_analysis_results(self, analysis_results: List[AnalysisResult],
+                                date: str) -> List[AnalysisResult]:
+        """
+        使用元数据补充分析结果的摘要和关键词（兼容旧报告）
+
+        Args:
+            analysis_results: 分析结果列表
+            date: 日期字符串
+
+        Returns:
+            补充后的分析结果列表（原地修改）
+        """
+        if all(result.summary for result in analysis_results):
+            return analysis_results
+
+        metadata = self.load_paper_metadata(date)
+        for result in analysis_results:
+            item = metadata.get(result.paper_id)
+            if not item:
+                continue
+            if not result.summary:
+                result.summary = item.get('ai_summary', '') or item.get('summary', '')
+            if not result.ai_keywords:
+                result.ai_keywords = list(item.get('ai_keywords', []))
+
+        return analysis_results
+
+    def _format_authors(self, authors: List[str]) -> str:
+        """
+        格式化作者列表
+
+        Args:
+            authors: 作者姓名列表
+
+        Returns:
+            逗号分隔的作者字符串
         """
-        构建AI清洗提示词
+        return ', '.join(author for author in authors if author)
+
+    def _format_publish_date(self, published_at: str) -> str:
+        """
+        将元数据中的发布时间转换为 YYYY-MM-DD 格式
+
+        Args:
+            published_at: ISO格式时间字符串（如 2025-07-26T07:53:11.000Z）
+
+        Returns:
+            日期字符串，无法识别时返回空字符串
+        """
+        if published_at and re.match(r'^\d{4}-\d{2}-\d{2}', published_at):
+            return published_at[:10]
+        return ''
+
+    def _build_cleaning_prompt(self, records: List[Dict[str, Any]]) -> str:
+        """
+        构建AI清洗提示词（只请求标题翻译）
         
         Args:
-            raw_data: 原始数据
+            records: 需要翻译的论文记录
             
         Returns:
             提示词字符串
         """
-        # 预处理数据，精简内容
-        processed_data = self._preprocess_raw_data(raw_data)
-
-        # 限制数据量，避免提示词过长
-        sample_data = processed_data[:15] if len(processed_data) > 15 else processed_data
+        # 只提供翻译所需的精简字段
+        sample_data = [
+            {
+                'id': record['id'],
+                'title': record['title'],
+                'ai_summary': record.get('ai_summary', ''),
+                'ai_keywords': record.get('ai_keywords', [])
+            }
+            for record in records
+        ]
 
-        prompt = f"""请从以下论文数据中提取结构化信息。数据已经过预处理，包含了论文的核心信息：
+        prompt = f"""请为以下论文生成准确的中文标题翻译。数据已经过预处理，包含了论文的核心信息：
 
 论文数据：
 {json.dumps(sample_data, ensure_ascii=False, indent=2)}
 
-请按以下格式输出每篇论文的信息：
-1. 论文题目：[英文标题]
-   中文翻译：[基于标题、摘要和关键词生成准确的中文翻译]
-   论文ID：[arXiv ID]
-   作者：[作者姓名，用逗号分隔]
-   发表日期：[YYYY-MM-DD格式]
-
-2. 论文题目：[英文标题]
-   中文翻译：[基于标题、摘要和关键词生成准确的中文翻译]
-   论文ID：[arXiv ID]
-   作者：[作者姓名，用逗号分隔]
-   发表日期：[YYYY-MM-DD格式]
+请只输出一个JSON数组，每篇论文一项，格式如下：
+[
+  {{"id": "arXiv ID", "translation": "中文标题翻译"}}
+]
 
 注意事项：
-- 利用提供的summary、ai_summary和ai_keywords字段来更好地理解论文内容
-- 中文翻译要准确反映论文的核心内容和技术特点
-- 如果有GitHub仓库或项目页面，说明这是一个有实际代码实现的项目
-- 请确保提取所有论文的信息，按照上述格式逐一列出"""
+- 利用提供的ai_summary和ai_keywords字段来更好地理解论文内容
+- 中文翻译要准确反映论文标题，模型名称等专有名词保留英文
+- 不要输出JSON以外的任何内容
+- 请确保包含所有论文，id必须与输入完全一致"""
         
         return prompt
 
-    def _show_ai_progress(self, stop_event, task_name):
+    def _parse_ai_response(self, response: str) -> Dict[str, str]:
         """
-        显示AI处理进度动画
+        解析AI翻译响应
 
         Args:
-            stop_event: 停止事件
-            task_name: 任务名称
-        """
-        import sys
-        import time
+            response: AI响应文本（JSON数组）
 
-        spinner = ['⠋', '⠙', '⠹', '⠸', '⠼', '⠴', '⠦', '⠧', '⠇', '⠏']
-        start_time = time.time()
-        i = 0
+        Returns:
+            论文ID到中文翻译的映射，解析失败返回空字典
+        """
+        text = response.strip() if response else ""
 
-        while not stop_event.is_set():
-            elapsed = int(time.time() - start_time)
-            minutes, seconds = divmod(elapsed, 60)
-            time_str = f"{minutes:02d}:{seconds:02d}"
+        # 去除可能的Markdown代码块包裹
+        if text.startswith('```'):
+            text = text.split('\n', 1)[1] if '\n' in text else ''
+            text = text.rsplit('```', 1)[0]
 
-            sys.stdout.write(f'\r🤖 {task_name}中 {spinner[i % len(spinner)]} 已耗时: {time_str}')
-            sys.stdout.flush()
+        start, end = text.find('['), text.rfind(']')
+        if start == -1 or end <= start:
+            self.logger.warning("AI翻译响应中未找到JSON数组")
+            return {}
 
-            time.sleep(0.1)
-            i += 1
-    
-    def _parse_ai_response(self, response: str) -> List[str]:
-        """
-        解析AI响应，返回字符串列表（兼容原有解析器）
+        try:
+            items = json.loads(text[start:end + 1])
+        except json.JSONDecodeError as e:
+            self.logger.warning(f"AI翻译响应JSON解析失败: {e}")
+            return {}
 
-        Args:
-            response: AI响应文本
+        translations = {}
+        for item in items:
+            if isinstance(item, dict) and item.get('id') and item.get('translation'):
+                translations[str(item['id']).strip()] = str(item['translation']).strip()
 
-        Returns:
-            解析后的字符串列表
-        """
-        # 直接返回AI响应作为单个字符串，让解析器处理
-        # 这样保持与原有系统的兼容性
-        if response and response.strip():
-            return [response.strip()]
-        else:
-            return []
+        return translations
     
-    def _save_cleaned_data(self, date: str, data: List[str]) -> bool:
+    def _save_cleaned_data(self, date: str, data: List[Dict[str, Any]]) -> bool:
         """
-        保存清洗后的数据
+        保存清洗后的数据（结构化记录格式）
         
         Args:
             date: 日期字符串
-            data: 清洗后的数据
+            data: 清洗后的论文记录列表
             
         Returns:
             bool: 是否成功
@@ -454,8 +623,13 @@ class DataCleaner:
             # 构建文件路径
             file_path = cleaned_dir / f"{date}_clean.json"
             
-            # 保存数据
-            success = self.file_manager.save_json(data, file_path)
+            # 保存数据（带版本号，读取时兼容旧的文本格式）
+            cleaned_artifact = {
+                'schema_version': CLEANED_DATA_SCHEMA_VERSION,
+                'date': date,
+                'papers': data
+            }
+            success = self.file_manager.save_json(cleaned_artifact, file_path)
             
             if success:
                 self.logger.info(f"清洗数据保存成功: {file_path}")
@@ -480,7 +654,7 @@ class DataCleaner:
         """
         return str(Path(self.output_dir) / 'cleaned' / f"{date}_clean.json")
     
-    def load_cleaned_data(self, date: str) -> Optional[List[Dict[str, Any]]]:
+    def load_cleaned_data(self, date: str) -> Optional[Any]:
         """
         加载已清洗的数据
         
@@ -488,7 +662,7 @@ class DataCleaner:
             date: 日期字符串
             
         Returns:
-            清洗后的数据，失败返回None
+            清洗后的数据（结构化格式为带schema_version的字典，旧格式为字符串列表），失败返回None
         """
         file_path = self._get_cleaned_file_path(date)
         return self.file_manager.load_json(file_path)
@@ -0,0 +1,451 @@
+"""
+常驻服务模块
+进程常驻，保持AI客户端、HTTP连接池、知识库和翻译缓存等资源常驻内存；
+按配置的时间每天运行流水线，白天轮询HF论文列表的更新，并通过本地socket接受临时任务
+"""
+import json
+import time
+import itertools
+import threading
+import socketserver
+from dataclasses import dataclass, field
+from datetime import datetime
+from queue import Queue
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from ..utils.console import ConsoleOutput
+from ..utils.logger import get_logger
+from ..utils.metrics import get_metrics
+from .pipeline import PipelineExecutor, resolve_stages, STATUS_FAILED, STATUS_SKIPPED
+
+
+# 任务状态
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+# 任务来源
+SOURCE_SCHEDULE = "schedule"
+SOURCE_POLL = "poll"
+SOURCE_SOCKET = "socket"
+
+# 保留的已结束任务数（供 status 查询）
+MAX_FINISHED_JOBS = 100
+
+
+@dataclass
+class DaemonJob:
+    """流水线任务"""
+    job_id: int
+    dates: Tuple[str, ...]
+    stages: Tuple[str, ...]
+    force: Tuple[str, ...] = ()
+    incremental: bool = False
+    source: str = SOURCE_SOCKET
+    status: str = JOB_QUEUED
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    failed_nodes: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    finished: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def key(self) -> Tuple:
+        """相同内容的任务排队时只保留一个"""
+        return (self.dates, self.stages, self.force, self.incremental)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.job_id,
+            'dates': list(self.dates),
+            'stages': list(self.stages),
+            'force': list(self.force),
+            'incremental': self.incremental,
+            'source': self.source,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'failed_nodes': self.failed_nodes,
+            'error': self.error,
+        }
+
+
+def normalize_time(value: Any) -> str:
+    """
+    把配置中的时间统一为 HH:MM 格式（便于按字符串比较）
+
+    Args:
+        value: 时间（如 "9:30"、"09:30"）
+
+    Returns:
+        HH:MM 格式的时间
+    """
+    return datetime.strptime(str(value).strip(), '%H:%M').strftime('%H:%M')
+
+
+class PipelineDaemon:
+    """
+    流水线常驻服务
+
+    所有任务共用同一个应用实例和流水线执行器，AI阶段的并发上限对所有任务生效；
+    同时运行的任务数由 daemon_max_jobs 决定，涉及相同日期的任务依次执行
+    """
+
+    def __init__(self, app, host: str = None, port: int = None, schedule: bool = True, poll: bool = True):
+        """
+        初始化常驻服务
+
+        Args:
+            app: PaperAnalysisApp实例
+            host: 任务接口监听地址
+            port: 任务接口端口
+            schedule: 是否启用每日定时运行
+            poll: 是否启用HF论文列表轮询
+        """
+        self.app = app
+        config = app.config
+        self.host = host or config.get_app_config('daemon_host') or '127.0.0.1'
+        self.port = port if port is not None else (config.get_app_config('daemon_port') or 8766)
+        self.max_jobs = max(int(config.get_app_config('daemon_max_jobs') or 1), 1)
+        self.schedule = (config.get_app_config('daemon_schedule') or []) if schedule else []
+        self.poll_interval = (config.get_app_config('daemon_poll_interval') or 0) if poll else 0
+        self.poll_window = [normalize_time(value) for value in
+                            config.get_app_config('daemon_poll_window') or ['00:00', '23:59']]
+
+        self.console = ConsoleOutput()
+        self.logger = get_logger('daemon')
+        self.executor = PipelineExecutor(app)
+
+        self._queue: Queue = Queue()
+        self._jobs: Dict[int, DaemonJob] = {}
+        self._job_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._date_locks: Dict[str, threading.Lock] = {}
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._server = None
+        self._last_scheduled: Dict[int, str] = {}
+        self._last_poll = 0.0
+
+    # ------------------------------------------------------------------
+    # 启动与停止
+    # ------------------------------------------------------------------
+
+    def warm_up(self):
+        """预先创建各阶段组件（加载知识库、翻译缓存和HTTP连接池），首个任务不再付出初始化开销"""
+        start_time = time.perf_counter()
+        app = self.app
+        for getter in (app._get_downloader, app._get_cleaner, app._get_parser,
+                       app._get_analyzer, app._get_classifier):
+            getter()
+        app.services.get_http_session()
+        self.logger.info(f"常驻资源已加载，耗时 {time.perf_counter() - start_time:.2f}秒")
+
+    def start(self):
+        """启动任务接口、工作线程和调度线程"""
+        self.warm_up()
+        self._server = _JobServer((self.host, self.port), _JobRequestHandler)
+        self._server.pipeline_daemon = self
+        self.port = self._server.server_address[1]
+
+        self._spawn(self._server.serve_forever, 'daemon-server')
+        for index in range(self.max_jobs):
+            self._spawn(self._worker_loop, f'daemon-worker-{index + 1}')
+        if self.schedule or self.poll_interval:
+            self._spawn(self._scheduler_loop, 'daemon-scheduler')
+
+        self.logger.info(f"常驻服务已启动: {self.host}:{self.port}，最多同时运行 {self.max_jobs} 个任务")
+
+    def _spawn(self, target, name: str):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def wait(self):
+        """阻塞直到收到停止请求（Ctrl+C 或 shutdown 命令）"""
+        try:
+            while not self._stop.wait(1):
+                pass
+        except KeyboardInterrupt:
+            self.logger.info("收到中断信号")
+        self.stop()
+
+    def request_stop(self):
+        """请求停止服务（可在信号处理函数中调用）"""
+        self._stop.set()
+
+    def stop(self):
+        """停止接受新任务，等待正在运行的任务结束"""
+        self._stop.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for _ in range(self.max_jobs):
+            self._queue.put(None)
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join()
+        self._threads = []
+        self.logger.info("常驻服务已停止")
+
+    # ------------------------------------------------------------------
+    # 任务管理
+    # ------------------------------------------------------------------
+
+    def submit(self, dates: List[str], stages: Any = 'all', force: List[str] = None,
+               incremental: bool = False, source: str = SOURCE_SOCKET) -> DaemonJob:
+        """
+        提交流水线任务（已有相同内容的任务在排队时直接返回该任务）
+
+        Args:
+            dates: 日期列表
+            stages: 要执行的阶段
+            force: 强制重跑的阶段
+            incremental: 是否只处理新增论文
+            source: 任务来源
+
+        Returns:
+            DaemonJob实例
+        """
+        if not dates:
+            raise ValueError("没有指定日期")
+        for date in dates:
+            datetime.strptime(date, '%Y-%m-%d')
+        stages = resolve_stages(stages)
+        force = resolve_stages(force) if force else ()
+
+        key = (tuple(sorted(set(dates))), stages, tuple(sorted(force)), bool(incremental))
+        with self._lock:
+            for existing in self._jobs.values():
+                if existing.status == JOB_QUEUED and existing.key == key:
+                    self.logger.info(f"任务 #{existing.job_id} 已在排队，忽略重复提交")
+                    return existing
+            job = DaemonJob(next(self._job_ids), *key, source=source)
+            self._jobs[job.job_id] = job
+            self._prune_finished()
+
+        self._queue.put(job)
+        get_metrics().counter('daemon_jobs_total', '常驻服务接收的任务数').inc(source=source)
+        self.logger.info(f"任务 #{job.job_id} 已排队（{source}）: {', '.join(job.dates)} {','.join(job.stages)}")
+        return job
+
+    def _prune_finished(self):
+        """只保留最近的已结束任务"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished.is_set()]
+        for job_id in finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self._jobs[job_id]
+
+    def get_job(self, job_id: int) -> Optional[DaemonJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        获取服务状态
+
+        Returns:
+            状态字典（包含各任务状态和已加载的资源统计）
+        """
+        with self._lock:
+            jobs = [job.to_dict() for job in self._jobs.values()]
+        return {
+            'host': self.host,
+            'port': self.port,
+            'max_jobs': self.max_jobs,
+            'queued': sum(1 for job in jobs if job['status'] == JOB_QUEUED),
+            'running': sum(1 for job in jobs if job['status'] == JOB_RUNNING),
+            'jobs': jobs,
+            'services': self.app.services.get_stats(),
+        }
+
+    def _worker_loop(self):
+        """工作线程：依次取出任务执行"""
+        while not self._stop.is_set():
+            job = self._queue.get()
+            if job is None:
+                return
+            self._run_job(job)
+
+    def _date_locks_for(self, dates: Tuple[str, ...]) -> List[threading.Lock]:
+        with self._lock:
+            return [self._date_locks.setdefault(date, threading.Lock()) for date in sorted(dates)]
+
+    def _run_job(self, job: DaemonJob):
+        """执行任务（按日期顺序加锁，涉及相同日期的任务不会同时执行）"""
+        locks = self._date_locks_for(job.dates)
+        for lock in locks:
+            lock.acquire()
+        try:
+            job.status = JOB_RUNNING
+            job.started_at = datetime.now().isoformat()
+            self.logger.info(f"任务 #{job.job_id} 开始执行")
+            results = self.executor.run(job.dates, job.stages, set(job.force), silent=True,
+                                        incremental=job.incremental)
+            job.failed_nodes = [f"{date}/{stage}" for (date, stage), status in
+                                sorted(results.items()) if status in (STATUS_FAILED, STATUS_SKIPPED)]
+            job.status = JOB_FAILED if job.failed_nodes else JOB_DONE
+        except Exception as e:
+            job.status = JOB_FAILED
+            job.error = f"{type(e).__name__}: {e}"
+            self.logger.error(f"任务 #{job.job_id} 异常: {e}")
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+            job.finished_at = datetime.now().isoformat()
+            job.finished.set()
+            get_metrics().counter('daemon_jobs_finished_total', '常驻服务完成的任务数').inc(
+                source=job.source, status=job.status)
+            self.logger.info(f"任务 #{job.job_id} 结束: {job.status}"
+                             + (f"，失败: {', '.join(job.failed_nodes)}" if job.failed_nodes else ""))
+
+    # ------------------------------------------------------------------
+    # 定时运行与轮询
+    # ------------------------------------------------------------------
+
+    def _scheduler_loop(self):
+        """调度线程：启动时和之后每30秒检查一次定时任务和轮询时间"""
+        while True:
+            try:
+                self.check_schedule(datetime.now())
+                self.check_poll(datetime.now())
+            except Exception as e:
+                self.logger.error(f"调度检查异常: {e}")
+            if self._stop.wait(30):
+                return
+
+    def check_schedule(self, now: datetime) -> List[DaemonJob]:
+        """
+        提交已到时间且今天尚未运行的定时任务（服务在定时时间之后启动时当天会补跑一次）
+
+        Args:
+            now: 当前时间
+
+        Returns:
+            本次提交的任务
+        """
+        today = now.strftime('%Y-%m-%d')
+        submitted = []
+        for index, entry in enumerate(self.schedule):
+            if self._last_scheduled.get(index) == today:
+                continue
+            if now.strftime('%H:%M') < normalize_time(entry.get('time', '00:00')):
+                continue
+            self._last_scheduled[index] = today
+            submitted.append(self.submit([today], entry.get('stages', 'all'), source=SOURCE_SCHEDULE))
+        return submitted
+
+    def check_poll(self, now: datetime) -> Optional[DaemonJob]:
+        """
+        在轮询时段内按间隔检查HF论文列表，有新论文时提交增量任务
+
+        Args:
+            now: 当前时间
+
+        Returns:
+            提交的任务，没有更新时返回None
+        """
+        if not self.poll_interval or time.time() - self._last_poll < self.poll_interval:
+            return None
+        start, end = self.poll_window
+        if not start <= now.strftime('%H:%M') <= end:
+            return None
+
+        self._last_poll = time.time()
+        date = now.strftime('%Y-%m-%d')
+        new_ids = self.find_new_papers(date)
+        if not new_ids:
+            return None
+
+        self.logger.info(f"HF论文列表有更新: {date} 新增 {len(new_ids)} 篇")
+        return self.submit([date], 'all', force=['download'], incremental=True, source=SOURCE_POLL)
+
+    def find_new_papers(self, date: str) -> Set[str]:
+        """
+        对比HF当前列表和已保存的元数据
+
+        Args:
+            date: 日期
+
+        Returns:
+            新增的论文ID（请求失败或没有新增时为空集合）
+        """
+        downloader = self.app._get_downloader()
+        current = downloader.fetch_paper_ids(date)
+        if not current:
+            return set()
+        return current - downloader.load_saved_paper_ids(date)
+
+
+class _JobServer(socketserver.ThreadingTCPServer):
+    """任务接口（每个连接一行JSON请求、一行JSON响应）"""
+    allow_reuse_address = True
+    daemon_threads = True
+    pipeline_daemon: PipelineDaemon = None
+
+
+class _JobRequestHandler(socketserver.StreamRequestHandler):
+    """任务接口请求处理"""
+
+    def handle(self):
+        line = self.rfile.readline(1024 * 1024)
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("请求必须是JSON对象")
+            response = self.dispatch(request)
+        except (ValueError, KeyError, TypeError) as e:
+            response = {'ok': False, 'error': str(e)}
+        self.wfile.write((json.dumps(response, ensure_ascii=False) + '\n').encode('utf-8'))
+
+    def dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        daemon = self.server.pipeline_daemon
+        command = request.get('command')
+
+        if command == 'ping':
+            return {'ok': True}
+        if command == 'status':
+            return {'ok': True, **daemon.get_status()}
+        if command == 'job':
+            job = daemon.get_job(int(request['job_id']))
+            if not job:
+                return {'ok': False, 'error': f"任务不存在: {request['job_id']}"}
+            return {'ok': True, 'job': job.to_dict()}
+        if command == 'submit':
+            job = daemon.submit(request.get('dates') or [], request.get('stages', 'all'),
+                                request.get('force'), request.get('incremental', False))
+            if request.get('wait'):
+                job.finished.wait()
+            return {'ok': True, 'job': job.to_dict()}
+        if command == 'shutdown':
+            daemon.request_stop()
+            return {'ok': True}
+        return {'ok': False, 'error': f"未知命令: {command}"}
+
+
+def send_request(request: Dict[str, Any], host: str = '127.0.0.1', port: int = 8766,
+                 timeout: float = None) -> Dict[str, Any]:
+    """
+    便捷函数：向常驻服务发送请求
+
+    Args:
+        request: 请求字典（command 为 ping、status、job、submit 或 shutdown）
+        host: 服务地址
+        port: 服务端口
+        timeout: 超时秒数（None表示一直等待，用于等待任务完成）
+
+    Returns:
+        响应字典
+    """
+    import socket
+
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.sendall((json.dumps(request, ensure_ascii=False) + '\n').encode('utf-8'))
+        with sock.makefile('r', encoding='utf-8') as stream:
+            line = stream.readline()
+    if not line:
+        raise ConnectionError("常驻服务没有返回响应")
+    return json.loads(line)
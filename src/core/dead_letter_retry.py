@@ -0,0 +1,176 @@
+"""
+死信重试模块
+集中重试死信队列中的论文：按独立的并发数处理已到重试时间的记录，成功后写回报告或分类目录
+并更新阶段清单，失败则追加尝试记录、按指数退避推迟下次重试
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set
+
+from ..utils.console import ConsoleOutput
+from ..utils.logger import get_logger
+from ..utils.metrics import get_metrics
+from ..utils.dead_letter import (open_dead_letters, LETTER_PENDING, LETTER_EXHAUSTED, LETTER_RESOLVED,
+                                 SOURCE_RETRY)
+from .pipeline import PipelineExecutor, ADVANCED_STAGES
+
+
+class DeadLetterRetrier:
+    """死信队列重试器"""
+
+    def __init__(self, app, concurrency: int = 2):
+        """
+        初始化重试器
+
+        Args:
+            app: PaperAnalysisApp 实例
+            concurrency: 同时重试的论文数
+        """
+        self.app = app
+        self.concurrency = max(int(concurrency), 1)
+        self.console = ConsoleOutput()
+        self.logger = get_logger('dead_letter_retry')
+        self.dead_letters = open_dead_letters(app.app_config)
+        self._lock = threading.Lock()
+        self._papers: Dict[str, Dict[str, Any]] = {}
+        self._analysis_results: Dict[str, Dict[str, Any]] = {}
+
+    def select(self, stage: str = None, date: str = None, ignore_backoff: bool = False,
+               include_exhausted: bool = False) -> List[Dict[str, Any]]:
+        """
+        选出要重试的死信记录
+
+        Args:
+            stage: 只重试该阶段
+            date: 只重试该日期
+            ignore_backoff: 不等待重试时间
+            include_exhausted: 包括已用完重试次数的记录
+
+        Returns:
+            死信记录列表
+        """
+        statuses = (LETTER_PENDING, LETTER_EXHAUSTED) if include_exhausted else (LETTER_PENDING,)
+        return [letter for letter in self.dead_letters.letters(stage, date, due_only=not ignore_backoff)
+                if letter['status'] in statuses]
+
+    def run(self, letters: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        重试死信记录（分析阶段的记录先于分类阶段执行）
+
+        Args:
+            letters: 要重试的死信记录
+
+        Returns:
+            {'resolved': 成功数, 'failed': 失败数}
+        """
+        counts = {'resolved': 0, 'failed': 0}
+        touched: Dict[str, Set[str]] = {'analyze': set(), 'classify': set()}
+
+        for stage in ('analyze', 'classify'):
+            batch = [letter for letter in letters if letter['stage'] == stage]
+            if not batch:
+                continue
+            self.console.print_info(f"重试{'分析' if stage == 'analyze' else '分类'}失败的论文: "
+                                    f"{len(batch)} 篇，并发 {self.concurrency}")
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='retry') as pool:
+                for letter, success in zip(batch, pool.map(self._retry, batch)):
+                    counts['resolved' if success else 'failed'] += 1
+                    if success:
+                        touched[stage].add(letter['date'])
+
+        self._refresh_downstream(touched)
+        retries = get_metrics().counter('dead_letter_retries_total', '死信队列重试次数')
+        retries.inc(counts['resolved'], status='resolved')
+        retries.inc(counts['failed'], status='failed')
+        return counts
+
+    def _retry(self, letter: Dict[str, Any]) -> bool:
+        """重试单篇论文（异常也按失败记录）"""
+        stage, date, paper_id = letter['stage'], letter['date'], letter['paper_id']
+        try:
+            error = self._retry_analyze(date, paper_id) if stage == 'analyze' else self._retry_classify(date, paper_id)
+        except Exception as e:
+            error = (type(e).__name__, str(e))
+
+        if error is None:
+            self.dead_letters.resolve(stage, date, paper_id)
+            self.console.print_success(f"{stage} {date} {paper_id}")
+            return True
+
+        updated = self.dead_letters.add_failure(stage, date, paper_id, *error, source=SOURCE_RETRY)
+        note = '不再自动重试' if updated['status'] == LETTER_EXHAUSTED else f"下次重试: {updated['next_retry_at'][:16]}"
+        self.console.print_error(f"{stage} {date} {paper_id}: {error[0]}（{note}）")
+        return False
+
+    def _retry_analyze(self, date: str, paper_id: str) -> Optional[tuple]:
+        """重新分析论文，成功后合并到当日报告；返回失败原因，成功返回None"""
+        paper = self._find_paper(date, paper_id)
+        if paper is None:
+            return ('PaperNotFound', f"清洗数据中没有该论文: {paper_id}")
+
+        analyzer = self.app._get_analyzer()
+        result = analyzer.analyze_single(paper, silent=True, max_retries=1)
+        if not result:
+            return analyzer.pop_failure(paper_id)
+        with self._lock:
+            # 同一日期的报告由多个线程写入，合并时串行
+            if not analyzer.save_results([result], date):
+                return ('SaveFailed', f"保存分析结果失败: {paper_id}")
+        return None
+
+    def _retry_classify(self, date: str, paper_id: str) -> Optional[tuple]:
+        """重新分类论文并写入分类目录；返回失败原因，成功返回None"""
+        analysis_result = self._find_analysis_result(date, paper_id)
+        if analysis_result is None:
+            return ('PaperNotFound', f"分析报告中没有该论文: {paper_id}")
+
+        classifier = self.app._get_classifier()
+        result = classifier.classify_and_save_single_paper(analysis_result, date, silent=True)
+        if not result:
+            return classifier.pop_failure(paper_id)
+        return None
+
+    def _find_paper(self, date: str, paper_id: str):
+        with self._lock:
+            if date not in self._papers:
+                self._papers[date] = {paper.id: paper for paper in self.app.load_papers(date) or []}
+            return self._papers[date].get(paper_id)
+
+    def _find_analysis_result(self, date: str, paper_id: str):
+        with self._lock:
+            if date not in self._analysis_results:
+                self._analysis_results[date] = {result.paper_id: result
+                                                for result in self.app.load_analysis_results(date)}
+            return self._analysis_results[date].get(paper_id)
+
+    def _refresh_downstream(self, touched: Dict[str, Set[str]]):
+        """
+        更新受影响日期的阶段清单和后续阶段
+
+        补上的分析结果已写入报告，记录分析阶段清单；已做过进阶分析的日期增量执行进阶阶段
+        （只切分和分类新增的论文）；补上分类的日期记录分类阶段清单并重新生成汇总
+        """
+        if not touched['analyze'] and not touched['classify']:
+            return
+        executor = PipelineExecutor(self.app)
+        for date in sorted(touched['analyze']):
+            executor.record(date, 'analyze')
+            if executor.manifests.load(date, 'split') is not None:
+                executor.run([date], ADVANCED_STAGES, silent=True, incremental=True)
+        for date in sorted(touched['classify'] - touched['analyze']):
+            executor.record(date, 'classify')
+            executor.run([date], ['summary'], silent=True)
+
+    def print_letters(self, letters: List[Dict[str, Any]]):
+        """显示死信记录"""
+        if not letters:
+            self.console.print_info("死信队列为空")
+            return
+        for letter in letters:
+            attempts = letter['attempts']
+            retry_note = '' if letter['status'] == LETTER_RESOLVED else f"，下次重试 {letter['next_retry_at'][:16]}"
+            print(f"[{letter['status']}] {letter['stage']} {letter['date']} {letter['paper_id']}"
+                  f" - {letter['error_type']}: {letter['error'][:80]}（失败 {len(attempts)} 次{retry_note}）")
+            # 只显示最近几次尝试
+            for attempt in attempts[-4:]:
+                print(f"    {attempt['ts'][:19]} [{attempt['source']}] {attempt['error_type']}")
@@ -4,12 +4,15 @@
 """
 import os
 import json
-import requests
+import time
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Any, Dict, Optional, Set
 from ..utils.console import ConsoleOutput
 from ..utils.logger import get_logger
 from ..utils.file_utils import FileManager
+from ..utils.services import get_services
+from ..utils.metrics import get_metrics
+from ..utils.tracing import get_tracer
 
 
 class MetadataDownloader:
@@ -92,12 +95,20 @@ class MetadataDownloader:
         Returns:
             API响应数据，失败返回None
         """
+        # 延迟导入：只有下载阶段需要requests，避免拖慢其他命令的启动
+        import requests
+        
+        status = 'error'
+        start_time = time.perf_counter()
         try:
-            response = requests.get(
-                url,
-                proxies=self.proxies,
-                timeout=self.timeout
-            )
+            # 使用进程级共享的HTTP会话，多个日期的下载复用连接
+            with get_tracer().span("http_get", "io", url=url):
+                response = get_services().get_http_session().get(
+                    url,
+                    proxies=self.proxies,
+                    timeout=self.timeout
+                )
+            status = str(response.status_code)
             
             if response.status_code == 200:
                 self.logger.info(f"API请求成功，状态码: {response.status_code}")
@@ -108,6 +119,7 @@ class MetadataDownloader:
                 return None
                 
         except requests.exceptions.Timeout:
+            status = 'timeout'
             self.console.print_error(f"请求超时 (>{self.timeout}秒)")
             self.logger.error(f"API请求超时: {url}")
             return None
@@ -123,6 +135,11 @@ class MetadataDownloader:
             self.console.print_error(f"JSON解析失败: {e}")
             self.logger.error(f"JSON解析失败: {url}, 错误: {e}")
             return None
+        finally:
+            metrics = get_metrics()
+            metrics.counter('download_requests_total', '元数据下载请求数').inc(status=status)
+            metrics.histogram('download_duration_seconds', '元数据下载耗时（秒）').observe(
+                time.perf_counter() - start_time)
     
     def _save_metadata(self, date: str, data: Dict[str, Any]) -> bool:
         """
@@ -169,6 +186,44 @@ class MetadataDownloader:
         """
         return str(Path(self.output_dir) / 'metadata' / f"{date}.json")
     
+    def fetch_paper_ids(self, date: str) -> Optional[Set[str]]:
+        """
+        获取HF当前列出的指定日期论文ID（不保存元数据，用于检测列表是否有更新）
+        
+        Args:
+            date: 日期字符串
+            
+        Returns:
+            论文ID集合，请求失败返回None
+        """
+        response = self._fetch_from_api(f"{self.api_base_url}?date={date}")
+        if response is None:
+            return None
+        return self._extract_paper_ids(response)
+    
+    def load_saved_paper_ids(self, date: str) -> Set[str]:
+        """
+        获取已保存的元数据中的论文ID
+        
+        Args:
+            date: 日期字符串
+            
+        Returns:
+            论文ID集合（没有元数据时为空集合）
+        """
+        file_path = Path(self._get_metadata_file_path(date))
+        if not file_path.exists():
+            return set()
+        return self._extract_paper_ids(self.file_manager.load_json(file_path))
+    
+    @staticmethod
+    def _extract_paper_ids(data: Any) -> Set[str]:
+        """从HF daily_papers响应中提取论文ID"""
+        if not isinstance(data, list):
+            return set()
+        return {item['paper']['id'] for item in data
+                if isinstance(item, dict) and isinstance(item.get('paper'), dict) and item['paper'].get('id')}
+    
     def check_metadata_exists(self, date: str) -> bool:
         """
         检查元数据文件是否已存在
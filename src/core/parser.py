@@ -5,7 +5,23 @@
 import re
 from typing import Dict, List, Any, Optional
 from ..utils.logger import get_logger
-from ..models.paper import Paper, PaperCollection
+from ..models.paper import Paper, PaperCollection, CLEANED_DATA_SCHEMA_VERSION
+
+
+# 分析结果字段对应的中文标签
+ANALYSIS_FIELD_LABELS = {
+    'authors': '作者团队',
+    'publish_date': '发表日期',
+    'model_function': '模型功能'
+}
+
+# 视为缺失的占位内容
+PLACEHOLDER_PATTERNS = [
+    r'^\[.*\]$',                      # [作者姓名] 等模板占位
+    r'^(未提供|未提及|未知|不详|暂无|无|待补充|N/?A|none|unknown)[。.]?$',
+    r'未在.*中提供',
+    r'YYYY-MM-DD'
+]
 
 
 class ContentParser:
@@ -78,12 +94,46 @@ class ContentParser:
         
         return parsed_data
     
-    def parse_cleaned_data(self, clean_data: List[str]) -> List[Paper]:
+    def find_missing_analysis_fields(self, fields: Dict[str, str]) -> List[str]:
+        """
+        找出分析结果中缺失或仍为占位内容的字段
+        
+        Args:
+            fields: 分析字段字典（authors、publish_date、model_function）
+            
+        Returns:
+            缺失的字段名列表
+        """
+        missing = []
+        
+        for field in ANALYSIS_FIELD_LABELS:
+            value = (fields.get(field) or '').strip()
+            if not value or self._is_placeholder(value):
+                missing.append(field)
+        
+        return missing
+    
+    def _is_placeholder(self, value: str) -> bool:
+        """
+        判断字段值是否为占位内容
+        
+        Args:
+            value: 字段值
+            
+        Returns:
+            是否为占位内容
+        """
+        for pattern in PLACEHOLDER_PATTERNS:
+            if re.search(pattern, value, re.IGNORECASE):
+                return True
+        return False
+    
+    def parse_cleaned_data(self, clean_data: Any) -> List[Paper]:
         """
         解析清洗后的数据，提取论文信息
 
         Args:
-            clean_data: 清洗后的数据列表（字符串列表）
+            clean_data: 清洗后的数据（结构化格式为带schema_version的字典，旧格式为字符串列表）
 
         Returns:
             论文对象列表
@@ -94,7 +144,13 @@ class ContentParser:
             self.logger.info("清洗数据为空")
             return papers
 
-        # 处理字符串列表
+        # 结构化格式：直接转换记录，无需正则解析
+        if isinstance(clean_data, dict):
+            papers = self._parse_cleaned_records(clean_data)
+            self.logger.info(f"从清洗数据中解析出 {len(papers)} 篇论文")
+            return papers
+
+        # 旧格式：处理字符串列表
         for content in clean_data:
             if not content or not isinstance(content, str):
                 continue
@@ -110,7 +166,44 @@ class ContentParser:
         self.logger.info(f"从清洗数据中解析出 {len(papers)} 篇论文")
         return papers
 
-    
+    def _parse_cleaned_records(self, clean_data: Dict[str, Any]) -> List[Paper]:
+        """
+        解析结构化清洗数据中的论文记录
+
+        Args:
+            clean_data: 带schema_version的清洗数据字典
+
+        Returns:
+            论文对象列表
+        """
+        papers = []
+
+        schema_version = clean_data.get('schema_version', 0)
+        if schema_version > CLEANED_DATA_SCHEMA_VERSION:
+            self.logger.warning(
+                f"清洗数据版本 {schema_version} 高于当前支持的版本 {CLEANED_DATA_SCHEMA_VERSION}，尝试按当前版本解析"
+            )
+
+        for record in clean_data.get('papers', []):
+            try:
+                paper = Paper.from_dict(record)
+
+                # 验证论文ID格式
+                if not self._is_valid_arxiv_id(paper.id):
+                    self.logger.warning(f"无效的arXiv ID: {paper.id}")
+                    continue
+
+                if not paper.url:
+                    paper.url = f"https://arxiv.org/abs/{paper.id}"
+
+                papers.append(paper)
+
+            except Exception as e:
+                self.logger.error(f"解析论文记录失败: {e}")
+                continue
+
+        return papers
+
     def _is_empty_or_error_content(self, content: str) -> bool:
         """
         检查内容是否为空数据或错误信息
@@ -340,7 +433,7 @@ def parse_analysis_content(content: str) -> Dict[str, str]:
     parser = ContentParser()
     return parser.parse_analysis_content(content)
 
-def parse_cleaned_data(clean_data: List[str]) -> List[Paper]:
+def parse_cleaned_data(clean_data: Any) -> List[Paper]:
     """
     便捷函数：解析清洗后的数据
     
@@ -0,0 +1,733 @@
+"""
+流水线执行模块
+按依赖关系（DAG）调度各处理阶段。每个阶段声明输入和输出，阶段结果记录在清单中，
+清单键是输入文件内容、提示词模板、模型和知识库版本的哈希；只重跑失效的阶段，
+不同日期和互不依赖的阶段并行执行
+"""
+import json
+import time
+import shutil
+import inspect
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from ..utils.console import ConsoleOutput
+from ..utils.logger import get_logger
+from ..utils.file_utils import atomic_open
+from ..utils.events import get_events, EVENT_STAGE_END
+from ..models.paper import Paper, CLEANED_DATA_SCHEMA_VERSION
+
+
+# 清单格式版本（格式变化时所有阶段视为失效）
+MANIFEST_VERSION = 1
+
+# 阶段执行结果
+STATUS_FRESH = "fresh"      # 清单有效，未重跑
+STATUS_DONE = "done"        # 已执行成功
+STATUS_FAILED = "failed"    # 执行失败
+STATUS_SKIPPED = "skipped"  # 上游阶段失败，未执行
+
+STATUS_LABELS = {
+    STATUS_FRESH: "✅ 未变化",
+    STATUS_DONE: "🔄 已更新",
+    STATUS_FAILED: "❌ 失败",
+    STATUS_SKIPPED: "⏭️ 未执行",
+}
+
+# 阶段预设
+BASIC_STAGES = ('download', 'clean', 'analyze')
+ADVANCED_STAGES = ('split', 'classify', 'summary')
+
+STAGE_PRESETS = {
+    'basic': BASIC_STAGES,
+    'advanced': ADVANCED_STAGES,
+    'all': BASIC_STAGES + ADVANCED_STAGES,
+}
+
+SUMMARY_FILENAME = "模型分类汇总.md"
+
+
+def resolve_stages(value: Any) -> Tuple[str, ...]:
+    """
+    解析阶段参数
+
+    Args:
+        value: basic、advanced、all、逗号分隔的阶段名或阶段名列表
+
+    Returns:
+        阶段名称元组
+    """
+    if isinstance(value, str):
+        if value in STAGE_PRESETS:
+            return STAGE_PRESETS[value]
+        value = value.split(',')
+
+    stages = tuple(name.strip() for name in value or () if name.strip())
+    unknown = [name for name in stages if name not in STAGE_PRESETS['all']]
+    if unknown or not stages:
+        raise ValueError(f"未知的阶段: {', '.join(unknown) or value}")
+    return stages
+
+
+def hash_path(path: Path) -> Optional[str]:
+    """
+    计算文件或目录内容的哈希
+
+    Args:
+        path: 文件或目录路径
+
+    Returns:
+        sha256十六进制摘要，路径不存在时返回None
+    """
+    if path.is_file():
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    if path.is_dir():
+        digest = hashlib.sha256()
+        for child in sorted(p for p in path.rglob('*') if p.is_file()):
+            digest.update(str(child.relative_to(path)).encode('utf-8'))
+            digest.update(hash_path(child).encode('ascii'))
+        return digest.hexdigest()
+
+    return None
+
+
+def hash_source(*functions: Callable) -> str:
+    """
+    计算函数源码的哈希（提示词模板写在代码里，模板改动即改变哈希）
+
+    Args:
+        *functions: 函数或方法
+
+    Returns:
+        sha256十六进制摘要的前16位
+    """
+    digest = hashlib.sha256()
+    for function in functions:
+        digest.update(inspect.getsource(function).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+# 渲染提示词模板用的示例论文（字段用占位符，提示词的文字或结构变化才会改变哈希）
+SAMPLE_PAPER = Paper(
+    id="0000.00000", title="{title}", translation="{translation}", url="https://arxiv.org/abs/0000.00000",
+    authors="{authors}", publish_date="{publish_date}", summary="{summary}", ai_summary="{ai_summary}",
+    ai_keywords=["{keyword}"])
+SAMPLE_BARE_PAPER = Paper(id="0000.00000", title="{title}", translation="{translation}",
+                          url="https://arxiv.org/abs/0000.00000")
+
+
+def hash_prompts(component_class: type, render: Callable[[Any], List[str]]) -> str:
+    """
+    计算渲染后的提示词模板的哈希（只改动文档字符串、注释或代码格式时哈希不变）
+
+    Args:
+        component_class: 构建提示词的组件类（不执行初始化，不读取配置、不创建AI客户端）
+        render: 用组件实例渲染示例提示词的函数
+
+    Returns:
+        sha256十六进制摘要的前16位
+    """
+    component = component_class.__new__(component_class)
+    # 知识库内容作为阶段输入单独计算哈希，模板中只保留占位符
+    component._load_knowledge_base = lambda: "{knowledge_base}"
+    digest = hashlib.sha256()
+    for prompt in render(component):
+        digest.update(prompt.encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+@dataclass
+class StageSpec:
+    """
+    阶段声明
+
+    Attributes:
+        name: 阶段名称
+        run: 执行函数，参数为 (date, silent)，返回是否成功
+        inputs: 按日期返回输入路径
+        outputs: 按日期返回输出路径
+        deps: 依赖的上游阶段
+        fingerprint: 返回影响输出的参数（提示词模板、模型等）
+        uses_ai: 是否调用AI（受AI并发数限制）
+        clear_stale: 失效重跑前是否移走旧输出（阶段本身按文件存在跳过时需要）；AI阶段的旧输出移到备份目录，
+            重跑失败时恢复，其他阶段的输出可免费重新生成，直接删除
+        clear_on: 按日期返回会使旧输出作废的输入；不为None时只有这些输入或参数变化才移走旧输出，
+            其他输入变化时保留旧输出增量执行（只处理新增的论文）
+        digests: 按日期返回不对应单个文件的输入摘要（如论文集合中影响提示词的字段）
+        adopt_existing: 没有清单但输出已存在时直接记录清单，不重新执行
+    """
+    name: str
+    run: Callable[[str, bool], bool]
+    inputs: Callable[[str], List[Path]]
+    outputs: Callable[[str], List[Path]]
+    deps: Tuple[str, ...] = ()
+    fingerprint: Callable[[], Dict[str, Any]] = dict
+    uses_ai: bool = False
+    clear_stale: bool = False
+    clear_on: Optional[Callable[[str], List[Path]]] = None
+    digests: Optional[Callable[[str], Dict[str, Optional[str]]]] = None
+    adopt_existing: bool = False
+
+
+@dataclass
+class StageCheck:
+    """阶段是否需要执行的判断结果"""
+    needs_run: bool
+    reason: str
+    key: str = ""
+    inputs: Dict[str, Optional[str]] = field(default_factory=dict)
+    params: Dict[str, Any] = field(default_factory=dict)
+    has_manifest: bool = False
+    changed_inputs: List[str] = field(default_factory=list)
+    params_changed: bool = False
+    drifted_outputs: List[str] = field(default_factory=list)
+    missing_outputs: List[str] = field(default_factory=list)
+
+
+class ManifestStore:
+    """阶段清单存储（每个日期每个阶段一个JSON文件）"""
+
+    def __init__(self, root: str):
+        """
+        初始化清单存储
+
+        Args:
+            root: 清单根目录
+        """
+        self.root = Path(root)
+
+    def path(self, date: str, stage: str) -> Path:
+        return self.root / date / f"{stage}.json"
+
+    def load(self, date: str, stage: str) -> Optional[Dict[str, Any]]:
+        """
+        读取清单
+
+        Returns:
+            清单字典，不存在或损坏时返回None
+        """
+        path = self.path(date, stage)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def save(self, date: str, stage: str, manifest: Dict[str, Any]):
+        """写入清单（原子写入，避免留下半个清单）"""
+        path = self.path(date, stage)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_open(path) as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+
+class PipelineExecutor:
+    """
+    流水线执行器
+
+    节点为（日期，阶段），上游完成后才调度下游；阶段输入按内容哈希，
+    上游重跑但输出内容不变时下游仍然有效
+    """
+
+    def __init__(self, app, jobs: int = None, ai_concurrency: int = None, manifest_dir: str = None):
+        """
+        初始化流水线执行器
+
+        Args:
+            app: PaperAnalysisApp实例（提供配置和各阶段的执行方法）
+            jobs: 最大并行节点数
+            ai_concurrency: 同时执行的AI阶段数
+            manifest_dir: 清单目录
+        """
+        self.app = app
+        config = app.app_config
+        if jobs is None:
+            jobs = config.get('pipeline_jobs')
+        if ai_concurrency is None:
+            ai_concurrency = config.get('pipeline_ai_concurrency')
+        self.jobs = max(4 if jobs is None else jobs, 1)
+        self.ai_concurrency = max(1 if ai_concurrency is None else ai_concurrency, 1)
+        self.manifests = ManifestStore(manifest_dir or config.get('manifest_dir') or 'data/manifests')
+        self.backup_dir = Path(config.get('stage_backup_dir') or 'data/stage_backups')
+        self.console = ConsoleOutput()
+        self.logger = get_logger('pipeline')
+        self._ai_slots = threading.Semaphore(self.ai_concurrency)
+        self.stages: Dict[str, StageSpec] = {spec.name: spec for spec in self._build_stages()}
+
+    # ------------------------------------------------------------------
+    # 阶段声明
+    # ------------------------------------------------------------------
+
+    def _build_stages(self) -> List[StageSpec]:
+        """声明各阶段的输入、输出和影响输出的参数"""
+        app = self.app
+        output_dir = Path(app.app_config['output_dir'])
+        analysis_dir = Path(app.app_config['analysis_dir'])
+
+        metadata = lambda date: output_dir / 'metadata' / f"{date}.json"
+        cleaned = lambda date: output_dir / 'cleaned' / f"{date}_clean.json"
+        report = lambda date: output_dir / 'reports' / f"{date}_report.json"
+        date_dir = lambda date: analysis_dir / date
+        knowledge_file = Path(app.app_config.get('knowledge_file', '模型分类.md'))
+
+        def split_outputs(date):
+            if not date_dir(date).exists():
+                return []
+            return sorted(p for p in date_dir(date).glob('*.md') if p.name != SUMMARY_FILENAME)
+
+        def classify_outputs(date):
+            if not date_dir(date).exists():
+                return []
+            return sorted(p for p in date_dir(date).iterdir() if p.is_dir() and not p.name.startswith('.'))
+
+        def run_split(date, silent):
+            return app._split_to_md(date, app.load_analysis_results(date), silent)
+
+        def run_classify(date, silent):
+            return app._classify_papers(date, app.load_analysis_results(date), silent)
+
+        return [
+            # 已下载的元数据直接沿用（需要刷新时用 --rerun download）
+            StageSpec('download', app._download_metadata,
+                      inputs=lambda date: [], outputs=lambda date: [metadata(date)], adopt_existing=True),
+            StageSpec('clean', app._clean_data, deps=('download',),
+                      inputs=lambda date: [metadata(date)], outputs=lambda date: [cleaned(date)],
+                      fingerprint=self._clean_fingerprint, uses_ai=True),
+            # 输入按论文集合和提示词用到的字段计算，只更新点赞数的元数据不会使报告失效
+            StageSpec('analyze', app._analyze_papers, deps=('clean',),
+                      inputs=lambda date: [], digests=lambda date: {f"{cleaned(date)}#papers": self._papers_digest(date)},
+                      outputs=lambda date: [report(date)],
+                      fingerprint=self._analyze_fingerprint, uses_ai=True, clear_stale=True,
+                      clear_on=lambda date: []),
+            StageSpec('split', run_split, deps=('analyze',),
+                      inputs=lambda date: [report(date)], outputs=split_outputs,
+                      fingerprint=self._split_fingerprint, clear_stale=True),
+            StageSpec('classify', run_classify, deps=('analyze',),
+                      inputs=lambda date: [report(date), knowledge_file], outputs=classify_outputs,
+                      fingerprint=self._classify_fingerprint, uses_ai=True, clear_stale=True,
+                      clear_on=lambda date: [knowledge_file]),
+            StageSpec('summary', app._generate_summary, deps=('classify',),
+                      inputs=classify_outputs, outputs=lambda date: [date_dir(date) / SUMMARY_FILENAME],
+                      fingerprint=self._summary_fingerprint),
+        ]
+
+    def _model_fingerprint(self) -> Dict[str, Any]:
+        """
+        AI阶段使用的模型（提供商和默认模型）
+
+        是否启用AI和级联顺序不计入：临时关闭AI或开启级联不应使已付费生成的输出失效
+        """
+        provider = self.app.app_config.get('ai_model')
+        ai_config = self.app.config.get_ai_config(provider) or {}
+        return {'provider': provider, 'model': ai_config.get('default_model')}
+
+    def _papers_digest(self, date: str) -> Optional[str]:
+        """论文集合的摘要（论文ID和分析提示词用到的字段），没有清洗数据时返回None"""
+        papers = self.app.load_papers(date)
+        if papers is None:
+            return None
+        digest = hashlib.sha256()
+        for paper in sorted(papers, key=lambda paper: paper.id):
+            fields = [paper.id, paper.title, paper.translation, paper.authors, paper.publish_date,
+                      paper.ai_summary, paper.summary, list(paper.ai_keywords)]
+            digest.update(json.dumps(fields, ensure_ascii=False, default=str).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _clean_fingerprint(self) -> Dict[str, Any]:
+        from .cleaner import DataCleaner
+        record = {'id': SAMPLE_PAPER.id, 'title': SAMPLE_PAPER.title,
+                  'ai_summary': SAMPLE_PAPER.ai_summary, 'ai_keywords': SAMPLE_PAPER.ai_keywords}
+        return {
+            'schema': CLEANED_DATA_SCHEMA_VERSION,
+            'prompt_template': hash_prompts(DataCleaner, lambda cleaner: [cleaner._build_cleaning_prompt([record])]),
+            'ai_model': self._model_fingerprint()
+        }
+
+    def _analyze_fingerprint(self) -> Dict[str, Any]:
+        from .analyzer import PaperAnalyzer
+        return {
+            'mode': self.app.app_config.get('analysis_mode', 'ai'),
+            'prompt_template': hash_prompts(PaperAnalyzer, lambda analyzer: [
+                analyzer._build_analysis_prompt(SAMPLE_PAPER), analyzer._build_analysis_prompt(SAMPLE_BARE_PAPER)]),
+            'ai_model': self._model_fingerprint()
+        }
+
+    def _split_fingerprint(self) -> Dict[str, Any]:
+        from .classifier import PaperClassifier
+        return {'template': hash_source(PaperClassifier.split_to_md, PaperClassifier._get_md_filename)}
+
+    def _classify_fingerprint(self) -> Dict[str, Any]:
+        from .classifier import PaperClassifier
+        from ..models.report import AnalysisResult
+        sample = AnalysisResult(
+            paper_id=SAMPLE_PAPER.id, paper_url=SAMPLE_PAPER.url, title=SAMPLE_PAPER.title,
+            translation=SAMPLE_PAPER.translation, authors=SAMPLE_PAPER.authors,
+            publish_date=SAMPLE_PAPER.publish_date, model_function="{model_function}",
+            summary=SAMPLE_PAPER.summary, ai_keywords=list(SAMPLE_PAPER.ai_keywords))
+        bare = AnalysisResult(**{**sample.to_dict(), 'summary': '', 'ai_keywords': []})
+        return {
+            'prompt_template': hash_prompts(PaperClassifier, lambda classifier: [
+                classifier._build_classification_prompt(sample), classifier._build_classification_prompt(bare)]),
+            'ai_model': self._model_fingerprint()
+        }
+
+    def _summary_fingerprint(self) -> Dict[str, Any]:
+        from .classifier import PaperClassifier
+        return {'template': hash_source(PaperClassifier.generate_summary_report)}
+
+    # ------------------------------------------------------------------
+    # 失效判断
+    # ------------------------------------------------------------------
+
+    def check(self, date: str, stage: str, force: bool = False) -> StageCheck:
+        """
+        判断阶段是否需要执行
+
+        Args:
+            date: 日期
+            stage: 阶段名称
+            force: 是否强制重跑
+
+        Returns:
+            StageCheck（包含原因和当前清单键）
+        """
+        spec = self.stages[stage]
+        inputs = {str(path): hash_path(path) for path in spec.inputs(date)}
+        if spec.digests:
+            inputs.update(spec.digests(date))
+        params = spec.fingerprint()
+        key = hashlib.sha256(json.dumps(
+            {'version': MANIFEST_VERSION, 'stage': stage, 'inputs': inputs, 'params': params},
+            sort_keys=True, default=str
+        ).encode('utf-8')).hexdigest()
+
+        manifest = self.manifests.load(date, stage)
+        check = StageCheck(True, "", key, inputs, params, has_manifest=manifest is not None)
+
+        if force:
+            check.reason = "强制重跑"
+        elif manifest is None:
+            check.reason = "没有清单"
+        elif manifest.get('key') != key:
+            old_inputs = manifest.get('inputs', {})
+            check.changed_inputs = sorted(path for path in set(old_inputs) | set(inputs)
+                                          if old_inputs.get(path) != inputs.get(path))
+            # 只比较新旧清单都有的参数：清单版本或参数格式变化时增量执行，不作废已有输出
+            old_params = manifest.get('params', {})
+            check.params_changed = any(name in old_params and old_params[name] != value
+                                       for name, value in params.items())
+            check.reason = self._describe_change(manifest, inputs, params)
+        else:
+            for path, digest in manifest.get('outputs', {}).items():
+                current = hash_path(Path(path))
+                if current is None:
+                    check.missing_outputs.append(path)
+                elif current != digest:
+                    check.drifted_outputs.append(path)
+            if check.missing_outputs:
+                check.reason = f"输出缺失: {check.missing_outputs[0]}"
+            elif check.drifted_outputs:
+                # 输入和参数都没变，输出被其他命令更新过（如 run.py basic 追加了论文），重新记录即可
+                check.needs_run = False
+                check.reason = f"输出已被更新: {check.drifted_outputs[0]}"
+            else:
+                check.needs_run = False
+                check.reason = "未变化"
+        return check
+
+    @staticmethod
+    def _describe_change(manifest: Dict[str, Any], inputs: Dict[str, Optional[str]],
+                         params: Dict[str, Any]) -> str:
+        """说明清单键变化的原因"""
+        old_inputs = manifest.get('inputs', {})
+        changed = [path for path in set(old_inputs) | set(inputs) if old_inputs.get(path) != inputs.get(path)]
+        if changed:
+            return f"输入已变化: {', '.join(sorted(changed))}"
+        old_params = manifest.get('params', {})
+        changed = [name for name in set(old_params) | set(params) if old_params.get(name) != params.get(name)]
+        if changed:
+            return f"参数已变化: {', '.join(sorted(changed))}"
+        return "清单版本已变化"
+
+    def is_current(self, date: str, stage: str) -> bool:
+        """
+        阶段输出是否仍然有效（没有清单时按输出是否存在判断，兼容旧数据）
+
+        Args:
+            date: 日期
+            stage: 阶段名称
+
+        Returns:
+            是否有效
+        """
+        check = self.check(date, stage)
+        if not check.has_manifest:
+            outputs = self.stages[stage].outputs(date)
+            return bool(outputs) and all(path.exists() for path in outputs)
+        return not check.needs_run
+
+    # ------------------------------------------------------------------
+    # 调度执行
+    # ------------------------------------------------------------------
+
+    def run(self, dates: Iterable[str], stages: Iterable[str] = None, force: Set[str] = None,
+            silent: bool = False, dry_run: bool = False,
+            incremental: bool = False) -> Dict[Tuple[str, str], str]:
+        """
+        执行流水线
+
+        Args:
+            dates: 日期列表
+            stages: 要执行的阶段（默认全部），未选中的上游阶段只作为输入使用
+            force: 强制重跑的阶段
+            silent: 是否静默模式
+            dry_run: 只显示各阶段是否需要执行，不实际执行
+            incremental: 失效重跑时保留旧输出，只处理新增的论文（用于论文列表追加了新论文）
+
+        Returns:
+            {(日期, 阶段): 执行结果}
+        """
+        dates = list(dates)
+        selected = [name for name in self.stages if stages is None or name in stages]
+        force = set(force or ())
+        order = {name: index for index, name in enumerate(selected)}
+        nodes = [(date, name) for date in dates for name in selected]
+
+        if dry_run:
+            return self._plan(nodes, force)
+
+        results: Dict[Tuple[str, str], str] = {}
+        pending = list(nodes)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.jobs, thread_name_prefix='pipeline') as pool:
+            while pending or running:
+                for node in list(pending):
+                    date, name = node
+                    deps = [(date, dep) for dep in self.stages[name].deps if dep in order]
+                    if any(results.get(dep) in (STATUS_FAILED, STATUS_SKIPPED) for dep in deps):
+                        results[node] = STATUS_SKIPPED
+                        pending.remove(node)
+                    elif all(dep in results for dep in deps):
+                        running[pool.submit(self._execute, date, name, name in force, silent,
+                                            incremental)] = node
+                        pending.remove(node)
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = running.pop(future)
+                    try:
+                        results[node] = future.result()
+                    except Exception as e:
+                        self.logger.error(f"阶段 {node[1]} ({node[0]}) 异常: {e}")
+                        results[node] = STATUS_FAILED
+
+        if not silent:
+            self.print_results(dates, selected, results)
+        return results
+
+    def order_nodes(self, nodes: Iterable[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """
+        按日期和阶段顺序排列节点
+
+        Args:
+            nodes: (日期, 阶段) 节点
+
+        Returns:
+            排序后的节点列表
+        """
+        order = {name: index for index, name in enumerate(self.stages)}
+        return sorted(nodes, key=lambda node: (node[0], order.get(node[1], len(order))))
+
+    def _plan(self, nodes: List[Tuple[str, str]], force: Set[str]) -> Dict[Tuple[str, str], str]:
+        """按当前文件判断各节点是否需要执行（上游重跑后的变化无法预知）"""
+        plan = {}
+        for date, name in nodes:
+            check = self.check(date, name, name in force)
+            plan[(date, name)] = STATUS_DONE if check.needs_run else STATUS_FRESH
+            mark = "🔄 需要执行" if check.needs_run else "✅ 未变化"
+            missing = [path for path, digest in check.inputs.items() if digest is None]
+            reason = f"{check.reason}，当前缺少输入: {', '.join(missing)}" if missing else check.reason
+            self.console.print_info(f"{date} {name}: {mark}（{reason}）")
+        return plan
+
+    def _execute(self, date: str, stage: str, force: bool, silent: bool, incremental: bool = False) -> str:
+        """执行单个节点：清单有效时跳过，否则执行并写入新清单"""
+        spec = self.stages[stage]
+        check = self.check(date, stage, force)
+
+        if not check.needs_run:
+            if check.drifted_outputs:
+                self.logger.info(f"阶段 {stage} ({date}) 输出已被其他命令更新，重新记录清单")
+                self._record(date, spec, check, 0.0)
+                return STATUS_FRESH
+            self.logger.info(f"阶段 {stage} ({date}) 未变化，跳过")
+            get_events().emit(EVENT_STAGE_END, stage=stage, date=date, success=True, duration=0, cached=True)
+            return STATUS_FRESH
+
+        if spec.adopt_existing and not check.has_manifest and not force:
+            outputs = spec.outputs(date)
+            if outputs and all(path.exists() for path in outputs):
+                self.logger.info(f"阶段 {stage} ({date}) 沿用已有输出")
+                self._record(date, spec, check, 0.0)
+                return STATUS_FRESH
+
+        missing = [path for path, digest in check.inputs.items() if digest is None]
+        if missing:
+            self.logger.error(f"阶段 {stage} ({date}) 缺少输入: {', '.join(missing)}")
+            if not silent:
+                self.console.print_error(f"{date} {stage} 缺少输入: {', '.join(missing)}")
+            return STATUS_FAILED
+
+        self.logger.info(f"阶段 {stage} ({date}) 需要执行: {check.reason}")
+        moved = []
+        if (spec.clear_stale and check.has_manifest and not incremental
+                and self._outputs_stale(date, spec, check, force)):
+            if spec.uses_ai:
+                moved = self._move_outputs_aside(spec, date)
+            else:
+                self._clear_outputs(spec, date)
+
+        start_time = time.time()
+        try:
+            if spec.uses_ai:
+                with self._ai_slots:
+                    success = self.app._run_stage(stage, spec.run, date, silent)
+            else:
+                success = self.app._run_stage(stage, spec.run, date, silent)
+        except BaseException:
+            self._restore_outputs(moved)
+            raise
+
+        if not success:
+            self._restore_outputs(moved)
+            return STATUS_FAILED
+
+        self._record(date, spec, check, time.time() - start_time)
+        return STATUS_DONE
+
+    @staticmethod
+    def _outputs_stale(date: str, spec: StageSpec, check: StageCheck, force: bool) -> bool:
+        """
+        重跑前旧输出是否作废
+
+        只缺少部分输出时保留其余输出补齐缺失部分；声明了 clear_on 的阶段只在参数或这些输入变化时作废，
+        其他输入变化（如论文列表追加了新论文）保留已付费生成的输出
+        """
+        if force:
+            return True
+        if not check.changed_inputs and not check.params_changed:
+            return False
+        if spec.clear_on is None or check.params_changed:
+            return True
+        return bool(set(check.changed_inputs) & {str(path) for path in spec.clear_on(date)})
+
+    def record(self, date: str, stage: str):
+        """
+        为在执行器之外生成的输出写入阶段清单（如多个worker分别分析论文后合并的报告）
+
+        Args:
+            date: 日期
+            stage: 阶段名称
+        """
+        self._record(date, self.stages[stage], self.check(date, stage, False), 0.0)
+
+    def _record(self, date: str, spec: StageSpec, check: StageCheck, duration: float):
+        """写入阶段清单（输出按执行后的内容计算哈希）"""
+        self.manifests.save(date, spec.name, {
+            'version': MANIFEST_VERSION,
+            'stage': spec.name,
+            'date': date,
+            'key': check.key,
+            'inputs': check.inputs,
+            'params': check.params,
+            'outputs': {str(path): hash_path(path) for path in spec.outputs(date)},
+            'completed_at': datetime.now().isoformat(),
+            'duration': round(duration, 3)
+        })
+
+    def _clear_outputs(self, spec: StageSpec, date: str):
+        """删除失效的旧输出（只用于不调用AI、可免费重新生成的阶段）"""
+        for path in spec.outputs(date):
+            if path.is_dir():
+                shutil.rmtree(path)
+            elif path.exists():
+                path.unlink()
+            self.logger.info(f"删除失效输出: {path}")
+
+    def _move_outputs_aside(self, spec: StageSpec, date: str) -> List[Tuple[Path, Path]]:
+        """
+        把失效的旧输出移到备份目录（阶段按文件存在跳过已处理的论文，不移走就不会重新处理）
+
+        旧输出是付费生成的，从不直接删除：重跑失败时恢复，成功后仍保留在备份目录中
+
+        Returns:
+            (原路径, 备份路径) 列表
+        """
+        outputs = [path for path in spec.outputs(date) if path.exists()]
+        if not outputs:
+            return []
+        backup = self.backup_dir / date / f"{spec.name}-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}"
+        backup.mkdir(parents=True, exist_ok=True)
+        moved = []
+        for path in outputs:
+            target = backup / path.name
+            shutil.move(str(path), str(target))
+            moved.append((path, target))
+        self.logger.info(f"阶段 {spec.name} ({date}) 的旧输出已移到: {backup}")
+        return moved
+
+    def _restore_outputs(self, moved: List[Tuple[Path, Path]]):
+        """
+        重跑失败时恢复旧输出
+
+        重跑已写出的部分新输出：目录中没有的旧文件移回，同名文件保留新输出；
+        单个文件以旧输出为准，部分新输出改名后留在备份目录
+        """
+        for path, saved in moved:
+            if not path.exists():
+                shutil.move(str(saved), str(path))
+            elif saved.is_dir():
+                for old_file in sorted(p for p in saved.rglob('*') if p.is_file()):
+                    target = path / old_file.relative_to(saved)
+                    if not target.exists():
+                        target.parent.mkdir(parents=True, exist_ok=True)
+                        shutil.move(str(old_file), str(target))
+            else:
+                shutil.move(str(path), str(saved.with_name(f"{saved.name}.failed")))
+                shutil.move(str(saved), str(path))
+            self.logger.info(f"重跑失败，已恢复旧输出: {path}")
+        if moved:
+            backup = moved[0][1].parent
+            if not any(backup.rglob('*')) or all(p.is_dir() for p in backup.rglob('*')):
+                # 旧输出已全部移回，只剩空目录
+                shutil.rmtree(backup)
+
+    def print_results(self, dates: List[str], stages: List[str], results: Dict[Tuple[str, str], str]):
+        """
+        显示各日期各阶段的执行结果
+
+        Args:
+            dates: 日期列表
+            stages: 阶段列表
+            results: 执行结果
+        """
+        self.console.print_separator()
+        for date in dates:
+            parts = [f"{stage} {STATUS_LABELS.get(results.get((date, stage)), '-')}" for stage in stages]
+            self.console.print_info(f"{date}: {' | '.join(parts)}")
@@ -0,0 +1,502 @@
+"""
+结果查询接口模块
+基于已有输出（分析报告、切分MD和分类目录）建立内存索引，提供只读的本地HTTP接口：
+日期、分类、论文、汇总和搜索；响应带ETag，渲染结果按LRU缓存
+"""
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from ..utils.logger import get_logger
+from ..utils.metrics import get_metrics
+from .pipeline import SUMMARY_FILENAME
+
+
+DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+# 切分MD中的字段（与 PaperClassifier.split_to_md 的模板一致）
+MD_FIELDS = {
+    '论文标题': 'title',
+    '中文标题': 'translation',
+    '论文地址': 'paper_url',
+    '作者团队': 'authors',
+    '发表日期': 'publish_date',
+    '模型功能': 'model_function',
+}
+MD_FIELD_PATTERN = re.compile(r'^\*\*(' + '|'.join(MD_FIELDS) + r')\*\*：(.*)$', re.MULTILINE)
+
+# 搜索匹配的字段
+SEARCH_FIELDS = ('paper_id', 'title', 'translation', 'authors', 'model_function')
+
+
+@dataclass
+class DateEntry:
+    """单个日期的索引"""
+    date: str
+    signature: Tuple
+    papers: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    has_summary: bool = False
+
+    def category_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for paper in self.papers.values():
+            if paper.get('category'):
+                counts[paper['category']] = counts.get(paper['category'], 0) + 1
+        return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+
+class ResultsIndex:
+    """
+    结果索引
+
+    按日期建立论文索引（报告JSON提供论文信息，切分MD补充报告中没有的论文，分类目录提供分类）；
+    每个日期记录目录和报告文件的修改时间，刷新时只重建有变化的日期
+    """
+
+    def __init__(self, analysis_dir: str, reports_dir: str, refresh_interval: float = 2.0):
+        """
+        初始化结果索引
+
+        Args:
+            analysis_dir: 分析结果目录（data/analysis_results）
+            reports_dir: 分析报告目录（data/daily_reports/reports）
+            refresh_interval: 两次检查文件变化的最小间隔（秒）
+        """
+        self.analysis_dir = Path(analysis_dir)
+        self.reports_dir = Path(reports_dir)
+        self.refresh_interval = refresh_interval
+        self.logger = get_logger('results_api')
+        self.generation = 0
+        self._dates: Dict[str, DateEntry] = {}
+        self._lock = threading.Lock()
+        self._last_refresh = 0.0
+
+    def _list_dates(self) -> List[str]:
+        dates = set()
+        if self.analysis_dir.exists():
+            dates.update(p.name for p in self.analysis_dir.iterdir() if p.is_dir() and DATE_PATTERN.match(p.name))
+        if self.reports_dir.exists():
+            for report in self.reports_dir.glob('*_report.json'):
+                date = report.name[:-len('_report.json')]
+                if DATE_PATTERN.match(date):
+                    dates.add(date)
+        return sorted(dates, reverse=True)
+
+    def _signature(self, date: str) -> Tuple:
+        """日期目录、各分类目录和报告文件的修改时间（原子写入替换文件时目录修改时间会变化）"""
+        parts = []
+        date_dir = self.analysis_dir / date
+        if date_dir.exists():
+            parts.append(date_dir.stat().st_mtime_ns)
+            parts.extend((p.name, p.stat().st_mtime_ns) for p in sorted(date_dir.iterdir()) if p.is_dir())
+        report = self.reports_dir / f"{date}_report.json"
+        if report.exists():
+            stat = report.stat()
+            parts.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(parts)
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        检查文件变化并重建有变化的日期
+
+        Args:
+            force: 忽略检查间隔
+
+        Returns:
+            索引是否有变化
+        """
+        with self._lock:
+            if not force and time.time() - self._last_refresh < self.refresh_interval:
+                return False
+            self._last_refresh = time.time()
+
+            changed = False
+            try:
+                dates = self._list_dates()
+            except OSError as e:
+                self.logger.warning(f"列出结果目录失败，保留现有索引: {e}")
+                return False
+            for date in set(self._dates) - set(dates):
+                del self._dates[date]
+                changed = True
+            for date in dates:
+                # 文件可能正在被其他进程替换或删除：该日期保留原索引，下次刷新时重试
+                try:
+                    signature = self._signature(date)
+                    entry = self._dates.get(date)
+                    if entry is None or entry.signature != signature:
+                        self._dates[date] = self._build_date(date, signature)
+                        changed = True
+                except OSError as e:
+                    self.logger.warning(f"读取 {date} 的结果失败，保留原索引: {e}")
+
+            if changed:
+                self.generation += 1
+                self.logger.info(f"结果索引已更新: {len(self._dates)} 个日期，版本 {self.generation}")
+            return changed
+
+    def _build_date(self, date: str, signature: Tuple) -> DateEntry:
+        """建立单个日期的索引"""
+        entry = DateEntry(date, signature)
+        date_dir = self.analysis_dir / date
+
+        # 分类目录：文件名 -> 分类
+        categories: Dict[str, str] = {}
+        if date_dir.exists():
+            for category_dir in date_dir.iterdir():
+                if category_dir.is_dir() and not category_dir.name.startswith('.'):
+                    for md_file in category_dir.glob('*.md'):
+                        categories[md_file.name] = category_dir.name
+            entry.has_summary = (date_dir / SUMMARY_FILENAME).exists()
+
+        for item in self._load_report(date):
+            paper_id = item.get('paper_id') or item.get('id')
+            if paper_id:
+                entry.papers[paper_id] = {
+                    'paper_id': paper_id,
+                    **{key: item.get(key, '') for key in MD_FIELDS.values()},
+                    'md_file': None,
+                    'category': None,
+                }
+
+        # 切分MD：确定每篇论文的MD文件名（报告中没有的论文也从这里补充）
+        if date_dir.exists():
+            for md_file in date_dir.glob('*.md'):
+                if md_file.name == SUMMARY_FILENAME:
+                    continue
+                fields = self._parse_split_md(md_file)
+                paper_id = fields.get('paper_url', '').rstrip('/').split('/')[-1]
+                if not paper_id:
+                    continue
+                paper = entry.papers.setdefault(paper_id, {'paper_id': paper_id, **fields})
+                paper['md_file'] = md_file.name
+                paper['category'] = categories.get(md_file.name)
+
+        return entry
+
+    def _load_report(self, date: str) -> List[Dict[str, Any]]:
+        report = self.reports_dir / f"{date}_report.json"
+        if not report.exists():
+            return []
+        try:
+            with open(report, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.warning(f"读取报告失败: {report} - {e}")
+            return []
+        if isinstance(data, dict):
+            data = data.get('analysis_results', [])
+        return [item for item in data if isinstance(item, dict)] if isinstance(data, list) else []
+
+    @staticmethod
+    def _parse_split_md(md_file: Path) -> Dict[str, str]:
+        try:
+            content = md_file.read_text(encoding='utf-8')
+        except OSError:
+            return {}
+        return {MD_FIELDS[label]: value.strip() for label, value in MD_FIELD_PATTERN.findall(content)}
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def list_dates(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = sorted(self._dates.values(), key=lambda e: e.date, reverse=True)
+        return [{'date': e.date, 'papers': len(e.papers), 'categories': e.category_counts(),
+                 'has_summary': e.has_summary} for e in entries]
+
+    def get_date(self, date: str) -> Optional[DateEntry]:
+        with self._lock:
+            return self._dates.get(date)
+
+    def list_categories(self) -> Dict[str, int]:
+        totals: Dict[str, int] = {}
+        with self._lock:
+            entries = list(self._dates.values())
+        for entry in entries:
+            for category, count in entry.category_counts().items():
+                totals[category] = totals.get(category, 0) + count
+        return dict(sorted(totals.items(), key=lambda item: (-item[1], item[0])))
+
+    def search(self, query: str, date: str = None, category: str = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        搜索论文（所有关键词都出现在标题、中文标题、作者、功能描述或ID中）
+
+        Args:
+            query: 关键词（空格分隔）
+            date: 只搜索该日期
+            category: 只搜索该分类
+            limit: 最多返回的条数
+
+        Returns:
+            论文列表（按日期倒序）
+        """
+        terms = [term.lower() for term in query.split() if term]
+        with self._lock:
+            entries = sorted(self._dates.values(), key=lambda e: e.date, reverse=True)
+
+        matches = []
+        for entry in entries:
+            if date and entry.date != date:
+                continue
+            for paper in entry.papers.values():
+                if category and paper.get('category') != category:
+                    continue
+                text = ' '.join(str(paper.get(name) or '') for name in SEARCH_FIELDS).lower()
+                if all(term in text for term in terms):
+                    matches.append({'date': entry.date, **paper})
+                    if len(matches) >= limit:
+                        return matches
+        return matches
+
+    def read_paper_md(self, date: str, paper: Dict[str, Any]) -> Optional[str]:
+        """读取论文的分类MD（未分类时读取切分MD）"""
+        if not paper.get('md_file'):
+            return None
+        date_dir = self.analysis_dir / date
+        path = date_dir / paper['category'] / paper['md_file'] if paper.get('category') else date_dir / paper['md_file']
+        try:
+            return path.read_text(encoding='utf-8')
+        except OSError:
+            return None
+
+    def read_summary(self, date: str) -> Optional[str]:
+        try:
+            return (self.analysis_dir / date / SUMMARY_FILENAME).read_text(encoding='utf-8')
+        except OSError:
+            return None
+
+
+class ResponseCache:
+    """渲染结果的LRU缓存（键包含索引版本，索引更新后旧条目自然淘汰）"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Tuple[int, str, bytes, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Optional[Tuple[int, str, bytes, str]]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Tuple, value: Tuple[int, str, bytes, str]):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class ResultsAPI:
+    """
+    结果查询接口
+
+    路由（均为GET）：
+      /api/dates                                     日期列表及各分类数量
+      /api/dates/{date}                              该日期按分类分组的论文
+      /api/dates/{date}/categories/{category}        该分类的论文
+      /api/dates/{date}/papers/{paper_id}            论文详情（含MD内容）
+      /api/dates/{date}/summary                      分类汇总（Markdown）
+      /api/categories                                各分类的论文总数
+      /api/search?q=关键词&date=&category=&limit=     搜索
+      /healthz                                       服务状态
+    """
+
+    def __init__(self, index: ResultsIndex, cache_size: int = 256):
+        """
+        初始化查询接口
+
+        Args:
+            index: 结果索引
+            cache_size: 渲染结果缓存条数
+        """
+        self.index = index
+        self.cache = ResponseCache(cache_size)
+
+    def handle(self, target: str) -> Tuple[int, str, bytes, str]:
+        """
+        处理请求
+
+        Args:
+            target: 请求路径（含查询参数）
+
+        Returns:
+            (状态码, Content-Type, 响应体, ETag)
+        """
+        self.index.refresh()
+        key = (self.index.generation, target)
+        cached = self.cache.get(key)
+        metrics = get_metrics()
+        if cached is not None:
+            metrics.counter('api_cache_total', '查询接口缓存命中情况').inc(result='hit')
+            return cached
+
+        metrics.counter('api_cache_total', '查询接口缓存命中情况').inc(result='miss')
+        status, content_type, body = self._render(target)
+        etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        response = (status, content_type, body, etag)
+        if status == 200:
+            self.cache.put(key, response)
+        return response
+
+    def _render(self, target: str) -> Tuple[int, str, bytes]:
+        parts = urlsplit(target)
+        segments = [unquote(segment) for segment in parts.path.strip('/').split('/') if segment]
+        query = {name: values[-1] for name, values in parse_qs(parts.query).items()}
+
+        if segments == ['healthz']:
+            return self._json(200, {'status': 'ok', 'dates': len(self.index.list_dates()),
+                                    'generation': self.index.generation})
+        if segments[:1] != ['api']:
+            return self._json(404, {'error': '未找到'})
+        segments = segments[1:]
+
+        if segments == ['dates']:
+            return self._json(200, {'dates': self.index.list_dates()})
+        if segments == ['categories']:
+            return self._json(200, {'categories': self.index.list_categories()})
+        if segments == ['search']:
+            try:
+                limit = min(max(int(query.get('limit', 50)), 1), 500)
+            except ValueError:
+                return self._json(400, {'error': 'limit必须是整数'})
+            results = self.index.search(query.get('q', ''), query.get('date'), query.get('category'), limit)
+            return self._json(200, {'query': query.get('q', ''), 'count': len(results), 'papers': results})
+
+        if len(segments) >= 2 and segments[0] == 'dates':
+            entry = self.index.get_date(segments[1])
+            if entry is None:
+                return self._json(404, {'error': f"没有该日期的结果: {segments[1]}"})
+            return self._render_date(entry, segments[2:])
+
+        return self._json(404, {'error': '未找到'})
+
+    def _render_date(self, entry: DateEntry, segments: List[str]) -> Tuple[int, str, bytes]:
+        if not segments:
+            grouped: Dict[str, List[Dict[str, Any]]] = {}
+            for paper in entry.papers.values():
+                grouped.setdefault(paper.get('category') or '未分类', []).append(paper)
+            return self._json(200, {'date': entry.date, 'papers': len(entry.papers),
+                                    'has_summary': entry.has_summary, 'categories': grouped})
+
+        if segments == ['summary']:
+            content = self.index.read_summary(entry.date)
+            if content is None:
+                return self._json(404, {'error': '该日期还没有分类汇总'})
+            return 200, 'text/markdown; charset=utf-8', content.encode('utf-8')
+
+        if len(segments) == 2 and segments[0] == 'categories':
+            papers = [p for p in entry.papers.values() if p.get('category') == segments[1]]
+            if not papers:
+                return self._json(404, {'error': f"该日期没有分类: {segments[1]}"})
+            return self._json(200, {'date': entry.date, 'category': segments[1], 'papers': papers})
+
+        if len(segments) == 2 and segments[0] == 'papers':
+            paper = entry.papers.get(segments[1])
+            if paper is None:
+                return self._json(404, {'error': f"没有该论文: {segments[1]}"})
+            return self._json(200, {'date': entry.date, **paper,
+                                    'md_content': self.index.read_paper_md(entry.date, paper)})
+
+        return self._json(404, {'error': '未找到'})
+
+    @staticmethod
+    def _json(status: int, data: Any) -> Tuple[int, str, bytes]:
+        return status, 'application/json; charset=utf-8', json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+
+def start_results_server(api: ResultsAPI, port: int, host: str = "127.0.0.1"):
+    """
+    便捷函数：在后台线程启动只读的结果查询HTTP服务
+
+    Args:
+        api: 查询接口
+        port: 监听端口
+        host: 监听地址
+
+    Returns:
+        HTTP服务实例（调用 shutdown() 停止）
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    logger = get_logger('results_api')
+
+    class ResultsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self._respond(include_body=True)
+
+        def do_HEAD(self):
+            self._respond(include_body=False)
+
+        def _respond(self, include_body: bool):
+            status, content_type, body, etag = api.handle(self.path)
+            if status == 200 and etag in self._if_none_match():
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            if include_body:
+                self.wfile.write(body)
+
+        def _if_none_match(self) -> List[str]:
+            header = self.headers.get('If-None-Match', '')
+            values = [value.strip() for value in header.split(',') if value.strip()]
+            return [value[2:] if value.startswith('W/') else value for value in values]
+
+        def _reject(self):
+            body = json.dumps({'error': '只读接口，仅支持GET和HEAD'}, ensure_ascii=False).encode('utf-8')
+            self.send_response(405)
+            self.send_header('Allow', 'GET, HEAD')
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_POST = do_PUT = do_DELETE = do_PATCH = _reject
+
+        def log_message(self, format, *args):
+            logger.debug(f"查询请求: {format % args}")
+
+    server = ThreadingHTTPServer((host, port), ResultsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name='results-api', daemon=True)
+    thread.start()
+    logger.info(f"结果查询服务已启动: http://{host}:{server.server_address[1]}/api/dates")
+    return server
+
+
+def create_results_api(app_config: Dict[str, Any], cache_size: int = 256,
+                       refresh_interval: float = 2.0) -> ResultsAPI:
+    """
+    便捷函数：按应用配置创建查询接口并建立索引
+
+    Args:
+        app_config: 应用配置（使用 analysis_dir 和 output_dir）
+        cache_size: 渲染结果缓存条数
+        refresh_interval: 检查文件变化的最小间隔（秒）
+
+    Returns:
+        ResultsAPI实例
+    """
+    index = ResultsIndex(app_config['analysis_dir'], Path(app_config['output_dir']) / 'reports',
+                         refresh_interval)
+    index.refresh(force=True)
+    return ResultsAPI(index, cache_size)
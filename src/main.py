@@ -7,34 +7,24 @@ import sys
 import argparse
 import re
 import os
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Optional
-
-# 设置控制台编码为UTF-8，解决Windows下的Unicode字符显示问题
-if sys.platform.startswith('win'):
-    try:
-        # 设置控制台代码页为UTF-8
-        os.system('chcp 65001 > nul')
-        # 重新配置stdout和stderr的编码
-        sys.stdout.reconfigure(encoding='utf-8', errors='replace')
-        sys.stderr.reconfigure(encoding='utf-8', errors='replace')
-    except Exception:
-        # 如果设置失败，使用替换模式处理不支持的字符
-        import io
-        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+from typing import TYPE_CHECKING, List, Optional
 
 from .utils.config import get_config
 from .utils.console import ConsoleOutput
 from .utils.logger import get_logger
-from .utils.progress import ProgressManager
-from .core.downloader import MetadataDownloader
-from .core.cleaner import DataCleaner
-from .core.analyzer import PaperAnalyzer
-from .core.classifier import PaperClassifier
-from .core.parser import ContentParser
-from .models.report import AnalysisResult, DailyReport
+from .utils.services import get_services
+from .utils.metrics import get_metrics
+from .utils.tracing import get_tracer
+from .utils.events import get_events, EVENT_RUN_START, EVENT_STAGE_START, EVENT_STAGE_END, EVENT_RESULT
+
+# 各处理阶段的模块（及其依赖的requests、AI SDK等）和数据模型（依赖 dataclasses）在用到时才导入，
+# 保证 --help、status 等命令快速启动
+if TYPE_CHECKING:
+    from .models.paper import Paper
+    from .models.report import AnalysisResult
 
 
 class PaperAnalysisApp:
@@ -53,6 +43,19 @@ class PaperAnalysisApp:
         self.console = ConsoleOutput()
         self.logger = get_logger('main_app')
         
+        # 进程级服务容器：各阶段复用同一批组件、HTTP连接池和AI客户端
+        self.services = get_services()
+        
+        # 阶段剖析器（--profile 时启用）
+        self.profiler = None
+        
+        # 无人值守模式（--headless）：只输出一行紧凑的进度
+        self.headless = False
+        self._stage_status: List[str] = []
+        
+        # 最近一次失败的阶段（写入结果事件，供批处理工具判断失败原因）
+        self.failed_stage: Optional[str] = None
+        
         # 显示启动信息
         self.logger.info("论文分析系统启动")
         
@@ -63,7 +66,24 @@ class PaperAnalysisApp:
             'ai_model': self.config.get_default_provider(),
             'use_ai': self.config.get_app_config('enable_ai'),
             'batch_size': self.config.get_app_config('batch_size'),
-            'api_delay': self.config.get_app_config('api_request_delay')
+            'api_delay': self.config.get_app_config('api_request_delay'),
+            'translation_cache_file': self.config.get_app_config('translation_cache_file') or 'data/cache/translations.json',
+            'model_cascade': bool(self.config.get_app_config('enable_model_cascade')),
+            'pack_prompts': bool(self.config.get_app_config('enable_prompt_packing')),
+            'pack_token_budget': self.config.get_app_config('pack_token_budget', 6000),
+            'pack_max_papers': self.config.get_app_config('pack_max_papers', 8),
+            'metrics_dir': self.config.get_app_config('metrics_dir') or 'logs/metrics',
+            'manifest_dir': self.config.get_app_config('manifest_dir') or 'data/manifests',
+            'stage_backup_dir': self.config.get_app_config('stage_backup_dir') or 'data/stage_backups',
+            'pipeline_jobs': self.config.get_app_config('pipeline_jobs', 4),
+            'pipeline_ai_concurrency': self.config.get_app_config('pipeline_ai_concurrency', 1),
+            'journal_dir': self.config.get_app_config('journal_dir') or 'data/journal',
+            'resume': False,
+            'dead_letter_file': self.config.get_app_config('dead_letter_file'),
+            'dead_letter_backoff': self.config.get_app_config('dead_letter_backoff', 300),
+            'dead_letter_backoff_max': self.config.get_app_config('dead_letter_backoff_max', 21600),
+            'dead_letter_max_attempts': self.config.get_app_config('dead_letter_max_attempts', 5),
+            'inline_retries': self.config.get_app_config('inline_retries', 1)
         }
         
         self.logger.info(f"应用配置: {self.app_config}")
@@ -91,15 +111,15 @@ class PaperAnalysisApp:
         
         try:
             # 步骤1: 下载元数据
-            if not self._download_metadata(date, silent):
+            if not self._run_stage('download', self._download_metadata, date, silent):
                 return False
             
             # 步骤2: 清洗数据
-            if not self._clean_data(date, silent):
+            if not self._run_stage('clean', self._clean_data, date, silent):
                 return False
             
             # 步骤3: AI分析
-            if not self._analyze_papers(date, silent):
+            if not self._run_stage('analyze', self._analyze_papers, date, silent):
                 return False
             
             if not silent:
@@ -114,7 +134,7 @@ class PaperAnalysisApp:
             self.logger.error(f"日常分析异常: {e}")
             return False
     
-    def run_advanced_analysis(self, date: str, analysis_results: List[AnalysisResult] = None, 
+    def run_advanced_analysis(self, date: str, analysis_results: List['AnalysisResult'] = None, 
                             silent: bool = False) -> bool:
         """
         运行高级分析流程（分类和汇总）
@@ -142,6 +162,7 @@ class PaperAnalysisApp:
             if analysis_results is None:
                 analysis_results = self.load_analysis_results(date)
                 if not analysis_results:
+                    self.failed_stage = 'load'
                     if not silent:
                         self.console.print_error(f"未找到 {date} 的分析结果")
                     return False
@@ -152,7 +173,7 @@ class PaperAnalysisApp:
                 self.console.print_header("✂️ 步骤1：MD切分", 1)
                 self.console.print_separator()
 
-            if not self._split_to_md(date, analysis_results, silent):
+            if not self._run_stage('split', self._split_to_md, date, analysis_results, silent):
                 return False
 
             # 步骤2: 智能分类
@@ -161,7 +182,7 @@ class PaperAnalysisApp:
                 self.console.print_header("🏷️ 步骤2：智能分类与总结", 1)
                 self.console.print_separator()
 
-            if not self._classify_papers(date, analysis_results, silent):
+            if not self._run_stage('classify', self._classify_papers, date, analysis_results, silent):
                 return False
 
             # 步骤3: 生成汇总报告
@@ -170,7 +191,7 @@ class PaperAnalysisApp:
                 self.console.print_header("📊 步骤3：生成分类汇总", 1)
                 self.console.print_separator()
 
-            if not self._generate_summary(date, silent):
+            if not self._run_stage('summary', self._generate_summary, date, silent):
                 return False
             
             if not silent:
@@ -185,42 +206,191 @@ class PaperAnalysisApp:
             self.logger.error(f"高级分析异常: {e}")
             return False
     
+    def _run_stage(self, stage: str, func, *args) -> bool:
+        """
+        执行单个处理阶段并记录阶段指标
+        
+        Args:
+            stage: 阶段名称
+            func: 阶段函数
+            *args: 传给阶段函数的参数
+            
+        Returns:
+            阶段是否成功
+        """
+        metrics = get_metrics()
+        events = get_events()
+        date = args[0] if args else None
+        success = False
+        error = None
+        events.emit(EVENT_STAGE_START, stage=stage, date=date)
+        start_time = time.perf_counter()
+        try:
+            with get_tracer().span(stage, "stage", date=date):
+                if self.profiler:
+                    with self.profiler.profile(stage):
+                        success = func(*args)
+                else:
+                    success = func(*args)
+            return success
+        except Exception as e:
+            error = {'type': type(e).__name__, 'message': str(e)}
+            raise
+        finally:
+            duration = time.perf_counter() - start_time
+            if not success:
+                self.failed_stage = stage
+            events.emit(EVENT_STAGE_END, stage=stage, date=date, success=bool(success),
+                        duration=round(duration, 3), error=error)
+            metrics.counter('stage_runs_total', '处理阶段执行次数').inc(
+                stage=stage, status='success' if success else 'failed')
+            metrics.histogram('stage_duration_seconds', '处理阶段耗时（秒）').observe(duration, stage=stage)
+            self.logger.log_performance(f"阶段 {stage}", duration)
+            if self.headless:
+                self._report_stage(stage, success, duration)
+    
+    def enable_headless(self):
+        """
+        启用无人值守模式（定时任务、批处理）
+        
+        各阶段静默运行，不启动进度动画线程，去掉展示用的等待，控制台只保留警告和错误
+        """
+        from .utils.logger import set_console_log_level
+        
+        self.headless = True
+        self.app_config['headless'] = True
+        set_console_log_level('WARNING')
+    
+    def _report_stage(self, stage: str, success: bool, duration: float):
+        """更新无人值守模式的进度行（终端中原地刷新）"""
+        self._stage_status.append(f"{stage} {'✓' if success else '✗'} {duration:.1f}s")
+        if sys.stdout.isatty():
+            sys.stdout.write('\r' + ' | '.join(self._stage_status))
+            sys.stdout.flush()
+    
+    def finish_status_line(self, command: str, date: str, success: bool):
+        """
+        输出无人值守模式的最终进度行
+        
+        Args:
+            command: 执行的命令
+            date: 处理日期
+            success: 是否成功
+        """
+        if not self.headless:
+            return
+        
+        line = f"[{command} {date}] {' | '.join(self._stage_status) or '-'} => {'成功' if success else '失败'}"
+        prefix = '\r' if sys.stdout.isatty() else ''
+        sys.stdout.write(prefix + line + '\n')
+        sys.stdout.flush()
+        self._stage_status = []
+    
+    def save_metrics_snapshot(self, date: str, command: str) -> Optional[Path]:
+        """
+        保存本次运行的指标快照
+        
+        Args:
+            date: 处理日期
+            command: 执行的命令（basic 或 advanced）
+            
+        Returns:
+            快照文件路径，保存失败返回None
+        """
+        snapshot_file = (Path(self.app_config['metrics_dir']) / date /
+                         f"{command}_{datetime.now().strftime('%H%M%S')}.json")
+        try:
+            get_metrics().save_snapshot(snapshot_file)
+            self.logger.info(f"指标快照已保存: {snapshot_file}")
+            return snapshot_file
+        except Exception as e:
+            self.logger.warning(f"指标快照保存失败: {e}")
+            return None
+    
+    def _get_downloader(self):
+        """获取下载器（按进程缓存）"""
+        from .core.downloader import MetadataDownloader
+        return self.services.get_component('downloader', MetadataDownloader, self.app_config)
+    
+    def _get_cleaner(self):
+        """获取清洗器（按进程缓存）"""
+        from .core.cleaner import DataCleaner
+        return self.services.get_component('cleaner', DataCleaner, self.app_config)
+    
+    def _get_parser(self):
+        """获取内容解析器（按进程缓存）"""
+        from .core.parser import ContentParser
+        return self.services.get_component('parser', lambda config: ContentParser(), {})
+    
+    def _get_analyzer(self):
+        """获取分析器（按进程缓存）"""
+        from .core.analyzer import PaperAnalyzer
+        return self.services.get_component('analyzer', PaperAnalyzer, self.app_config)
+    
+    def _get_classifier(self):
+        """获取分类器（按进程缓存，输出到分析目录）"""
+        from .core.classifier import PaperClassifier
+        return self.services.get_component('classifier', PaperClassifier, {
+            **self.app_config,
+            'output_dir': self.app_config['analysis_dir']
+        })
+    
     def _download_metadata(self, date: str, silent: bool) -> bool:
         """下载元数据"""
-        downloader = MetadataDownloader(self.app_config)
+        downloader = self._get_downloader()
         return downloader.download(date, silent)
     
     def _clean_data(self, date: str, silent: bool) -> bool:
         """清洗数据"""
-        cleaner = DataCleaner(self.app_config)
+        cleaner = self._get_cleaner()
         return cleaner.clean(date, silent)
     
-    def _analyze_papers(self, date: str, silent: bool) -> bool:
-        """分析论文"""
-        # 加载清洗后的数据
-        parser = ContentParser()
-        cleaner = DataCleaner(self.app_config)
+    def load_papers(self, date: str, silent: bool = True) -> Optional[List['Paper']]:
+        """
+        加载清洗后的论文
+        
+        Args:
+            date: 日期
+            silent: 是否静默模式
+            
+        Returns:
+            论文列表，没有清洗数据时返回None
+        """
+        parser = self._get_parser()
+        cleaner = self._get_cleaner()
         
         cleaned_data = cleaner.load_cleaned_data(date)
         if not cleaned_data:
             if not silent:
                 self.console.print_error(f"未找到 {date} 的清洗数据")
-            return False
+            return None
         
         # 解析为论文对象
         papers = parser.parse_cleaned_data(cleaned_data)
         if not papers:
             if not silent:
                 self.console.print_warning(f"{date} 没有有效的论文数据")
+            return []
+        
+        # 从元数据补充优先级信号（旧格式清洗数据不含点赞数、GitHub仓库等字段）
+        cleaner.enrich_papers(papers, date)
+        return papers
+    
+    def _analyze_papers(self, date: str, silent: bool) -> bool:
+        """分析论文"""
+        papers = self.load_papers(date, silent)
+        if papers is None:
+            return False
+        if not papers:
             return True  # 空数据不算失败
         
         # AI分析
-        analyzer = PaperAnalyzer(self.app_config)
+        analyzer = self._get_analyzer()
         results = analyzer.analyze_batch(papers, date, silent)
         
         return len(results) > 0 or len(papers) == 0
     
-    def _classify_papers(self, date: str, analysis_results: List[AnalysisResult], 
+    def _classify_papers(self, date: str, analysis_results: List['AnalysisResult'], 
                         silent: bool) -> bool:
         """分类论文"""
         if not analysis_results:
@@ -228,10 +398,10 @@ class PaperAnalysisApp:
                 self.console.print_warning("没有分析结果需要分类")
             return True
         
-        classifier = PaperClassifier({
-            **self.app_config,
-            'output_dir': self.app_config['analysis_dir']
-        })
+        # 旧报告中没有摘要时从元数据补充，供分类提示词使用
+        self._get_cleaner().enrich_analysis_results(analysis_results, date)
+        
+        classifier = self._get_classifier()
         
         # 分类论文
         classification_results = classifier.classify_papers(analysis_results, date, silent)
@@ -250,10 +420,7 @@ class PaperAnalysisApp:
         """生成汇总报告"""
         try:
             # 加载分类结果
-            classifier = PaperClassifier({
-                **self.app_config,
-                'output_dir': self.app_config['analysis_dir']
-            })
+            classifier = self._get_classifier()
 
             # 生成汇总报告
             success = classifier.generate_summary_report(date, silent)
@@ -271,7 +438,7 @@ class PaperAnalysisApp:
             self.logger.error(f"汇总报告生成异常: {e}")
             return False
     
-    def load_analysis_results(self, date: str) -> List[AnalysisResult]:
+    def load_analysis_results(self, date: str) -> List['AnalysisResult']:
         """
         加载分析结果（支持直接从JSON文件加载）
 
@@ -320,7 +487,7 @@ class PaperAnalysisApp:
             self.logger.error(f"加载分析结果失败: {e}")
             return []
 
-    def _convert_dict_to_analysis_result(self, item: dict) -> Optional[AnalysisResult]:
+    def _convert_dict_to_analysis_result(self, item: dict) -> Optional['AnalysisResult']:
         """
         将字典转换为AnalysisResult对象
 
@@ -330,6 +497,8 @@ class PaperAnalysisApp:
         Returns:
             AnalysisResult对象或None
         """
+        from .models.report import AnalysisResult
+        
         try:
             # 提取必需字段
             paper_id = item.get('paper_id', item.get('id', ''))
@@ -347,19 +516,18 @@ class PaperAnalysisApp:
                 authors=item.get('authors', ''),
                 publish_date=item.get('publish_date', ''),
                 model_function=item.get('model_function', ''),
-                page_content=item.get('page_content', '')
+                page_content=item.get('page_content', ''),
+                summary=item.get('summary', '') or '',
+                ai_keywords=list(item.get('ai_keywords') or [])
             )
         except Exception as e:
             self.logger.warning(f"转换分析结果失败: {e}")
             return None
 
-    def _split_to_md(self, date: str, analysis_results: List[AnalysisResult], silent: bool) -> bool:
+    def _split_to_md(self, date: str, analysis_results: List['AnalysisResult'], silent: bool) -> bool:
         """MD切分步骤"""
         try:
-            classifier = PaperClassifier({
-                **self.app_config,
-                'output_dir': self.app_config['analysis_dir']
-            })
+            classifier = self._get_classifier()
 
             # 执行MD切分
             success = classifier.split_to_md(analysis_results, date, silent)
@@ -425,11 +593,38 @@ def create_argument_parser() -> argparse.ArgumentParser:
   python run.py basic                     # 分析今天的论文
   python run.py basic 2024-05-15         # 分析指定日期的论文
   python run.py basic 2024-05-15 --silent # 静默模式运行
+  python run.py basic --top-k 10          # 只分析点赞最多的10篇论文
+  python run.py basic --deadline 600      # 10分钟内按优先级尽量多分析
+  python run.py basic --metadata-only     # 仅用HF元数据生成报告（不调用AI分析）
+  python run.py basic 2024-05-15 --resume # 从上次中断处继续（不重复请求AI）
 
 🔹 进阶分析 (Advanced):
   python run.py advanced                 # 分析今天的论文（需要先运行basic）
   python run.py advanced 2024-05-15      # 分析指定日期的论文
   python run.py advanced --silent        # 静默模式运行
+  python run.py advanced --headless      # 无人值守模式（定时任务）：无展示等待，只输出一行进度
+  python run.py advanced --cassette data/cassettes/2024-05.jsonl --cassette-mode replay
+                                         # 离线回放已录制的AI响应（调试解析和MD输出）
+  python run.py basic --metrics-port 9108  # 运行期间提供 /metrics 接口（快照保存在 logs/metrics/）
+  python run.py basic --trace logs/trace.json  # 导出每个阶段、每篇论文的耗时追踪（chrome://tracing）
+  python run.py advanced --profile=cpu   # 剖析每个阶段，结果保存在 logs/profile/{日期}/
+
+🔹 增量流水线 (Pipeline):
+  python run.py pipeline 2024-05-15                       # 只重跑失效的阶段
+  python run.py pipeline 2024-05-01 --end 2024-05-07      # 多个日期并行处理
+  python run.py pipeline 2024-05-15 --rerun classify      # 重新分类（汇总按结果是否变化决定）
+  python run.py pipeline 2024-05-15 --dry-run             # 只查看哪些阶段需要执行
+
+🔹 常驻服务 (Serve):
+  python run.py serve --headless                          # 常驻运行（定时任务 + 轮询HF更新）
+  python run.py submit 2024-05-15 --stages advanced --wait  # 向常驻服务提交任务并等待结束
+  python run.py submit --status                           # 查看排队和运行中的任务
+  python run.py api                                       # 只读查询接口 http://127.0.0.1:8767/api/dates
+
+🔹 失败论文重试 (Retry):
+  python run.py retry-failed --list                       # 查看死信队列中的失败论文
+  python run.py retry-failed                              # 重试已到重试时间的论文
+  python run.py retry-failed --date 2024-05-15 --now      # 立即重试某天的失败论文
 
 🔹 系统状态:
   python run.py status                   # 查看系统配置和状态
@@ -505,6 +700,40 @@ def create_argument_parser() -> argparse.ArgumentParser:
         action='store_true',
         help='静默模式，减少输出信息'
     )
+    basic_parser.add_argument(
+        '--metadata-only',
+        action='store_true',
+        help='直接使用HF元数据填充作者、日期和功能描述，不调用AI分析'
+    )
+    basic_parser.add_argument(
+        '--priority',
+        action='store_true',
+        help='按优先级（点赞数、GitHub仓库）顺序分析论文'
+    )
+    basic_parser.add_argument(
+        '--top-k',
+        type=int,
+        metavar='K',
+        help='只分析优先级最高的前K篇论文（隐含 --priority）'
+    )
+    basic_parser.add_argument(
+        '--deadline',
+        type=float,
+        metavar='SECONDS',
+        help='分析阶段的时间预算（秒），到时停止并保留已完成结果（隐含 --priority）'
+    )
+    add_cassette_arguments(basic_parser)
+    add_resume_argument(basic_parser)
+    add_headless_argument(basic_parser)
+    add_events_argument(basic_parser)
+    add_metrics_arguments(basic_parser)
+    add_trace_arguments(basic_parser)
+    add_profile_arguments(basic_parser)
+    basic_parser.add_argument(
+        '--pack',
+        action='store_true',
+        help='按token预算把多篇论文打包进同一个AI请求，减少请求次数'
+    )
 
     # 高级分析命令
     advanced_parser = subparsers.add_parser(
@@ -544,6 +773,262 @@ def create_argument_parser() -> argparse.ArgumentParser:
         action='store_true',
         help='静默模式，减少输出信息'
     )
+    add_cassette_arguments(advanced_parser)
+    add_resume_argument(advanced_parser)
+    add_headless_argument(advanced_parser)
+    add_events_argument(advanced_parser)
+    add_metrics_arguments(advanced_parser)
+    add_trace_arguments(advanced_parser)
+    add_profile_arguments(advanced_parser)
+    advanced_parser.add_argument(
+        '--pack',
+        action='store_true',
+        help='按token预算把多篇论文打包进同一个分类请求，知识库每个请求只发送一次'
+    )
+
+    # 流水线命令
+    pipeline_parser = subparsers.add_parser(
+        'pipeline',
+        help='🧩 按依赖关系增量执行各阶段 (使用 pipeline --help 查看详细说明)',
+        description="""
+🧩 流水线 (Pipeline)
+
+功能说明:
+  • 把下载、清洗、分析、拆分、分类、汇总作为有依赖关系的阶段调度
+  • 每个阶段的结果记录在清单中（data/manifests/{日期}/{阶段}.json），
+    清单键是输入文件内容、提示词模板、模型和知识库的哈希
+  • 只重跑失效的阶段：修改知识库只重跑分类和汇总，报告内容不变时下游不重跑
+  • 多个日期、互不依赖的阶段（拆分和分类）并行执行，AI阶段按并发上限排队
+
+阶段:
+  basic    = download, clean, analyze
+  advanced = split, classify, summary
+        """,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    pipeline_parser.add_argument(
+        'date',
+        nargs='?',
+        help='处理日期 (YYYY-MM-DD格式)，默认为今天；配合 --end 处理一个日期范围'
+    )
+    pipeline_parser.add_argument(
+        '--end',
+        metavar='DATE',
+        help='日期范围的结束日期（包含）'
+    )
+    pipeline_parser.add_argument(
+        '--stages',
+        default='all',
+        help='要执行的阶段：basic、advanced、all 或逗号分隔的阶段名，默认all'
+    )
+    pipeline_parser.add_argument(
+        '--rerun',
+        nargs='+',
+        metavar='STAGE',
+        default=[],
+        help='强制重跑指定阶段（下游阶段按输出内容是否变化决定是否重跑）'
+    )
+    pipeline_parser.add_argument(
+        '--force',
+        action='store_true',
+        help='忽略清单，强制重跑所有选中的阶段'
+    )
+    pipeline_parser.add_argument(
+        '--jobs',
+        type=int,
+        metavar='N',
+        help='最大并行阶段数，默认取配置 pipeline_jobs（4）'
+    )
+    pipeline_parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='只显示各阶段是否需要执行及原因，不实际执行'
+    )
+    pipeline_parser.add_argument(
+        '--silent',
+        action='store_true',
+        help='静默模式，减少输出信息'
+    )
+    add_cassette_arguments(pipeline_parser)
+    add_resume_argument(pipeline_parser)
+    add_headless_argument(pipeline_parser)
+    add_events_argument(pipeline_parser)
+    add_metrics_arguments(pipeline_parser)
+    add_trace_arguments(pipeline_parser)
+
+    # 常驻服务命令
+    serve_parser = subparsers.add_parser(
+        'serve',
+        help='🛰️ 以常驻服务运行：定时运行、轮询HF更新、接受临时任务 (使用 serve --help 查看详细说明)',
+        description="""
+🛰️ 常驻服务 (Serve)
+
+功能说明:
+  • 进程常驻，AI客户端、HTTP连接池、知识库和翻译缓存只初始化一次
+  • 按 daemon_schedule 配置的时间每天运行流水线（替代cron）
+  • 在 daemon_poll_window 时段内按 daemon_poll_interval 轮询HF论文列表，
+    有新论文时只处理新增部分
+  • 在本地端口接受临时任务（python run.py submit），
+    同时运行的任务数由 daemon_max_jobs 决定，涉及相同日期的任务依次执行
+        """,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    serve_parser.add_argument(
+        '--port',
+        type=int,
+        help='任务接口端口，默认取配置 daemon_port（8766）'
+    )
+    serve_parser.add_argument(
+        '--no-schedule',
+        action='store_true',
+        help='不按时间表定时运行，只接受临时任务'
+    )
+    serve_parser.add_argument(
+        '--no-poll',
+        action='store_true',
+        help='不轮询HF论文列表'
+    )
+    add_cassette_arguments(serve_parser)
+    add_headless_argument(serve_parser)
+    add_metrics_arguments(serve_parser)
+
+    # 临时任务提交命令
+    submit_parser = subparsers.add_parser(
+        'submit',
+        help='📮 向常驻服务提交流水线任务或查看服务状态',
+        description="""
+📮 提交任务 (Submit)
+
+功能说明:
+  • 向 run.py serve 启动的常驻服务提交流水线任务，不必重新启动进程
+  • --status 查看排队和运行中的任务，--shutdown 停止服务（等待运行中的任务结束）
+        """,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    submit_parser.add_argument(
+        'date',
+        nargs='?',
+        help='处理日期 (YYYY-MM-DD格式)，默认为今天；配合 --end 处理一个日期范围'
+    )
+    submit_parser.add_argument(
+        '--end',
+        metavar='DATE',
+        help='日期范围的结束日期（包含）'
+    )
+    submit_parser.add_argument(
+        '--stages',
+        default='all',
+        help='要执行的阶段：basic、advanced、all 或逗号分隔的阶段名，默认all'
+    )
+    submit_parser.add_argument(
+        '--rerun',
+        nargs='+',
+        metavar='STAGE',
+        default=[],
+        help='强制重跑指定阶段'
+    )
+    submit_parser.add_argument(
+        '--wait',
+        action='store_true',
+        help='等待任务结束，任务失败时退出码为1'
+    )
+    submit_parser.add_argument(
+        '--status',
+        action='store_true',
+        help='查看常驻服务状态'
+    )
+    submit_parser.add_argument(
+        '--shutdown',
+        action='store_true',
+        help='停止常驻服务'
+    )
+    submit_parser.add_argument(
+        '--port',
+        type=int,
+        help='常驻服务端口，默认取配置 daemon_port（8766）'
+    )
+
+    # 失败论文重试命令
+    retry_parser = subparsers.add_parser(
+        'retry-failed',
+        help='♻️ 重试死信队列中分析或分类失败的论文 (使用 retry-failed --help 查看详细说明)',
+        description="""
+♻️ 失败论文重试 (Retry Failed)
+
+功能说明:
+  • 分析和分类失败的论文记入死信队列（dead_letter_file），之后的 basic/advanced 运行在退避时间内跳过这些论文，
+    到重试时间后重新处理
+  • 本命令按 dead_letter_concurrency 并发重试已到重试时间的论文；
+    每失败一次，下次重试的等待时间翻倍（dead_letter_backoff，上限 dead_letter_backoff_max）
+  • 累计失败 dead_letter_max_attempts 次后不再自动重试（--exhausted 可强制重试）
+  • 补上的分析结果写入当日报告，已做过进阶分析的日期随后增量分类并更新汇总
+        """,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    retry_parser.add_argument(
+        '--stage',
+        choices=['analyze', 'classify'],
+        help='只重试该阶段的失败论文'
+    )
+    retry_parser.add_argument(
+        '--date',
+        help='只重试该日期的失败论文 (YYYY-MM-DD格式)'
+    )
+    retry_parser.add_argument(
+        '--concurrency',
+        type=int,
+        help='同时重试的论文数，默认取配置 dead_letter_concurrency（2）'
+    )
+    retry_parser.add_argument(
+        '--now',
+        action='store_true',
+        help='不等待重试时间，立即重试'
+    )
+    retry_parser.add_argument(
+        '--exhausted',
+        action='store_true',
+        help='同时重试已用完重试次数的论文'
+    )
+    retry_parser.add_argument(
+        '--list',
+        action='store_true',
+        help='只列出死信队列中的论文，不重试'
+    )
+    retry_parser.add_argument(
+        '--purge',
+        action='store_true',
+        help='删除已重试成功的记录'
+    )
+    add_cassette_arguments(retry_parser)
+    add_headless_argument(retry_parser)
+    add_metrics_arguments(retry_parser)
+
+    # 结果查询接口命令
+    api_parser = subparsers.add_parser(
+        'api',
+        help='🔎 启动只读的结果查询HTTP接口 (使用 api --help 查看详细说明)',
+        description="""
+🔎 结果查询接口 (API)
+
+功能说明:
+  • 基于已有的分析报告、切分MD和分类目录提供只读JSON接口，不调用AI
+  • /api/dates、/api/dates/{日期}、/api/dates/{日期}/categories/{分类}、
+    /api/dates/{日期}/papers/{论文ID}、/api/dates/{日期}/summary、
+    /api/categories、/api/search?q=关键词
+  • 新结果写入后自动更新索引（检查间隔 api_refresh_interval 秒），
+    响应带ETag，支持 If-None-Match 返回304
+        """,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    api_parser.add_argument(
+        '--host',
+        help='监听地址，默认取配置 api_host（127.0.0.1）'
+    )
+    api_parser.add_argument(
+        '--port',
+        type=int,
+        help='监听端口，默认取配置 api_port（8767）'
+    )
 
     # 状态查看命令
     status_parser = subparsers.add_parser(
@@ -569,6 +1054,496 @@ def create_argument_parser() -> argparse.ArgumentParser:
     
     return parser
 
+def add_cassette_arguments(subparser: argparse.ArgumentParser):
+    """
+    为子命令添加AI调用录制回放参数
+    
+    Args:
+        subparser: 子命令解析器
+    """
+    subparser.add_argument(
+        '--cassette',
+        metavar='FILE',
+        help='AI调用录制文件（JSONL），启用请求/响应录制与回放'
+    )
+    subparser.add_argument(
+        '--cassette-mode',
+        choices=['record', 'replay', 'auto'],
+        help='录制回放模式：record（始终调用并录制）、replay（只回放，不调用AI）、auto（命中回放，未命中录制），默认auto'
+    )
+    subparser.add_argument(
+        '--replay-latency',
+        type=float,
+        metavar='SCALE',
+        help='回放时模拟的耗时倍数（0为立即返回，1为按录制耗时等待），默认0'
+    )
+
+def add_resume_argument(subparser: argparse.ArgumentParser):
+    """
+    为子命令添加断点续跑参数
+    
+    Args:
+        subparser: 子命令解析器
+    """
+    subparser.add_argument(
+        '--resume',
+        action='store_true',
+        help='从上次中断处继续：按运行日志（data/journal/）跳过已完成的论文，已得到AI结果的论文不再重复请求'
+    )
+
+def setup_resume(app: 'PaperAnalysisApp', args: argparse.Namespace):
+    """
+    根据命令行参数启用断点续跑，并清理中断的写入留下的临时文件
+    
+    Args:
+        app: 应用实例
+        args: 命令行参数
+    """
+    if not getattr(args, 'resume', False):
+        return
+    
+    from .utils.file_utils import cleanup_temp_files
+    app.app_config['resume'] = True
+    removed = sum(cleanup_temp_files(app.app_config[key]) for key in ('output_dir', 'analysis_dir'))
+    if removed:
+        app.logger.info(f"已清理中断写入留下的临时文件: {removed} 个")
+
+def add_headless_argument(subparser: argparse.ArgumentParser):
+    """
+    为子命令添加无人值守模式参数
+    
+    Args:
+        subparser: 子命令解析器
+    """
+    subparser.add_argument(
+        '--headless',
+        action='store_true',
+        help='无人值守模式（适合定时任务和批处理）：不显示动画和逐篇输出，去掉展示用的等待，只输出一行进度'
+    )
+
+def add_events_argument(subparser: argparse.ArgumentParser):
+    """
+    为子命令添加进度事件输出参数
+    
+    Args:
+        subparser: 子命令解析器
+    """
+    subparser.add_argument(
+        '--events-fd',
+        metavar='FD',
+        help='向该文件描述符（Windows下为继承的句柄）输出NDJSON格式的进度和结果事件，供GUI和批处理工具读取'
+    )
+
+def setup_events(args: argparse.Namespace):
+    """
+    根据命令行参数打开进度事件输出
+    
+    Args:
+        args: 命令行参数
+    """
+    target = getattr(args, 'events_fd', None)
+    if not target:
+        return
+    
+    try:
+        get_events().open(target)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ 无法打开事件输出 {target}: {e}")
+
+def emit_result(app: 'PaperAnalysisApp', command: str, date: str, success: bool):
+    """
+    输出运行结果事件
+    
+    Args:
+        app: 应用实例
+        command: 执行的命令
+        date: 处理日期
+        success: 是否成功
+    """
+    get_events().emit(EVENT_RESULT, command=command, date=date, success=success,
+                      exit_code=0 if success else 1,
+                      failed_stage=None if success else app.failed_stage)
+
+def add_metrics_arguments(subparser: argparse.ArgumentParser):
+    """
+    为子命令添加指标参数
+    
+    Args:
+        subparser: 子命令解析器
+    """
+    subparser.add_argument(
+        '--metrics-port',
+        type=int,
+        metavar='PORT',
+        help='运行期间在该端口提供Prometheus格式的 /metrics 接口'
+    )
+
+def setup_metrics(app: 'PaperAnalysisApp', args: argparse.Namespace):
+    """
+    根据命令行参数和配置启动指标HTTP服务
+    
+    Args:
+        app: 应用实例
+        args: 命令行参数
+    """
+    port = getattr(args, 'metrics_port', None) or app.config.get_app_config('metrics_port')
+    if not port:
+        return
+    
+    from .utils.metrics import start_metrics_server
+    try:
+        start_metrics_server(int(port))
+    except OSError as e:
+        app.logger.warning(f"指标服务启动失败: {e}")
+
+def add_trace_arguments(subparser: argparse.ArgumentParser):
+    """
+    为子命令添加追踪参数
+    
+    Args:
+        subparser: 子命令解析器
+    """
+    subparser.add_argument(
+        '--trace',
+        metavar='FILE',
+        help='记录各阶段、每篇论文和每次AI调用的耗时区间，结束时写入该文件'
+    )
+    subparser.add_argument(
+        '--trace-format',
+        choices=['chrome', 'folded'],
+        default='chrome',
+        help='追踪导出格式：chrome（trace-event JSON，可用 chrome://tracing 或 Perfetto 打开）、folded（火焰图折叠栈），默认chrome'
+    )
+
+def export_trace(app: 'PaperAnalysisApp', args: argparse.Namespace):
+    """
+    导出本次运行的追踪记录（未启用追踪时不做任何事）
+    
+    Args:
+        app: 应用实例
+        args: 命令行参数
+    """
+    trace_file = getattr(args, 'trace', None)
+    if not trace_file:
+        return
+    
+    try:
+        path = get_tracer().export(trace_file, args.trace_format)
+        app.logger.info(f"追踪记录已导出: {path}")
+        if not args.silent:
+            app.console.print_info(f"🧭 追踪记录已导出: {path}")
+    except Exception as e:
+        app.logger.warning(f"追踪记录导出失败: {e}")
+
+def add_profile_arguments(subparser: argparse.ArgumentParser):
+    """
+    为子命令添加剖析参数
+    
+    Args:
+        subparser: 子命令解析器
+    """
+    subparser.add_argument(
+        '--profile',
+        nargs='?',
+        const='all',
+        choices=['cpu', 'mem', 'all'],
+        help='用cProfile/tracemalloc剖析每个阶段，结果保存在 logs/profile/{日期}/（不带值时同时剖析CPU和内存）'
+    )
+
+def setup_profiler(app: 'PaperAnalysisApp', args: argparse.Namespace, date: str):
+    """
+    根据命令行参数启用阶段剖析
+    
+    Args:
+        app: 应用实例
+        args: 命令行参数
+        date: 处理日期
+    """
+    if not getattr(args, 'profile', None):
+        return
+    
+    from .utils.profiling import StageProfiler
+    app.profiler = StageProfiler(Path('logs/profile') / date, args.profile)
+
+def print_profile_summary(app: 'PaperAnalysisApp'):
+    """
+    显示各阶段的剖析热点摘要
+    
+    Args:
+        app: 应用实例
+    """
+    if not app.profiler or not app.profiler.summaries:
+        return
+    
+    app.console.print_header("性能剖析热点", 0)
+    for line in app.profiler.format_summary():
+        print(line)
+    app.console.print_info(f"剖析结果目录: {app.profiler.output_dir}（可用 python -m pstats 或 snakeviz 查看 .pstats 文件）")
+
+def setup_cassette(app: 'PaperAnalysisApp', args: argparse.Namespace):
+    """
+    根据命令行参数和配置启用AI调用录制回放
+    
+    Args:
+        app: 应用实例
+        args: 命令行参数
+    """
+    cassette_file = getattr(args, 'cassette', None) or app.config.get_app_config('cassette_file')
+    if not cassette_file:
+        return
+    
+    mode = getattr(args, 'cassette_mode', None) or app.config.get_app_config('cassette_mode') or 'auto'
+    replay_latency = getattr(args, 'replay_latency', None)
+    if replay_latency is None:
+        replay_latency = app.config.get_app_config('replay_latency') or 0.0
+    
+    from .utils.ai_client import configure_cassette
+    cassette = configure_cassette(cassette_file, mode, replay_latency)
+    
+    # 退出时记录命中统计
+    import atexit
+    atexit.register(lambda: app.logger.info(f"录制回放统计: {cassette.get_stats()}"))
+
+def run_pipeline(app: 'PaperAnalysisApp', args: argparse.Namespace) -> int:
+    """
+    执行 pipeline 命令
+    
+    Args:
+        app: 应用实例
+        args: 命令行参数
+        
+    Returns:
+        退出码（有阶段失败或未执行时为1）
+    """
+    from .core.pipeline import PipelineExecutor, resolve_stages, STATUS_FAILED, STATUS_SKIPPED
+    
+    try:
+        dates = parse_date_range(args.date, args.end)
+    except ValueError as e:
+        app.console.print_error(str(e))
+        return 1
+    start, end = dates[0], dates[-1]
+    
+    try:
+        stages = resolve_stages(args.stages)
+        executor = PipelineExecutor(app, jobs=args.jobs)
+        force = set(stages) if args.force else set(resolve_stages(args.rerun)) if args.rerun else set()
+    except ValueError as e:
+        app.console.print_error(str(e))
+        return 1
+    
+    get_events().emit(EVENT_RUN_START, command=args.command, date=start, dates=dates, stages=stages)
+    with get_tracer().span("run_pipeline", "run", date=start):
+        results = executor.run(dates, stages, force, args.silent, args.dry_run)
+    
+    success = all(status not in (STATUS_FAILED, STATUS_SKIPPED) for status in results.values())
+    if not app.failed_stage:
+        # 缺少输入的阶段不会进入 _run_stage，按执行顺序取第一个失败的阶段
+        failed = [node for node in executor.order_nodes(results) if results[node] == STATUS_FAILED]
+        app.failed_stage = failed[0][1] if failed else None
+    emit_result(app, args.command, start if len(dates) == 1 else f"{start}~{end}", success)
+    app.finish_status_line(args.command, start, success)
+    if not args.dry_run:
+        app.save_metrics_snapshot(start, args.command)
+    export_trace(app, args)
+    return 0 if success else 1
+
+def parse_date_range(start: Optional[str], end: Optional[str]) -> List[str]:
+    """
+    生成日期范围（包含首尾）
+    
+    Args:
+        start: 开始日期，默认为今天
+        end: 结束日期，默认与开始日期相同
+        
+    Returns:
+        日期列表
+        
+    Raises:
+        ValueError: 日期格式错误、结束日期早于开始日期或范围超过一年
+    """
+    start = start or datetime.now().strftime('%Y-%m-%d')
+    end = end or start
+    for value in (start, end):
+        if not validate_date_format(value):
+            raise ValueError(f"日期格式错误: {value}，应为 YYYY-MM-DD")
+    
+    start_date = datetime.strptime(start, '%Y-%m-%d')
+    end_date = datetime.strptime(end, '%Y-%m-%d')
+    if end_date < start_date:
+        raise ValueError("结束日期不能早于开始日期")
+    if (end_date - start_date).days > 365:
+        raise ValueError("日期范围不能超过一年")
+    return [(start_date + timedelta(days=offset)).strftime('%Y-%m-%d')
+            for offset in range((end_date - start_date).days + 1)]
+
+def run_serve(app: 'PaperAnalysisApp', args: argparse.Namespace) -> int:
+    """
+    执行 serve 命令（阻塞直到收到停止请求）
+    
+    Args:
+        app: 应用实例
+        args: 命令行参数
+        
+    Returns:
+        退出码
+    """
+    import signal
+    from .core.daemon import PipelineDaemon
+    
+    daemon = PipelineDaemon(app, port=args.port, schedule=not args.no_schedule, poll=not args.no_poll)
+    try:
+        daemon.start()
+    except OSError as e:
+        app.console.print_error(f"常驻服务启动失败: {e}")
+        return 1
+    
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, lambda signum, frame: daemon.request_stop())
+    app.console.print_success(f"🛰️ 常驻服务已启动: {daemon.host}:{daemon.port}（Ctrl+C 停止）")
+    daemon.wait()
+    return 0
+
+def run_submit(args: argparse.Namespace) -> int:
+    """
+    执行 submit 命令
+    
+    Args:
+        args: 命令行参数
+        
+    Returns:
+        退出码
+    """
+    import json
+    from .core.daemon import send_request, JOB_FAILED
+    
+    config = get_config()
+    console = ConsoleOutput()
+    host = config.get_app_config('daemon_host') or '127.0.0.1'
+    port = args.port or config.get_app_config('daemon_port') or 8766
+    
+    if args.status:
+        request = {'command': 'status'}
+    elif args.shutdown:
+        request = {'command': 'shutdown'}
+    else:
+        try:
+            dates = parse_date_range(args.date, args.end)
+        except ValueError as e:
+            console.print_error(str(e))
+            return 1
+        request = {'command': 'submit', 'dates': dates, 'stages': args.stages,
+                   'force': args.rerun, 'wait': args.wait}
+    
+    try:
+        response = send_request(request, host, port)
+    except OSError as e:
+        console.print_error(f"无法连接常驻服务 {host}:{port}: {e}（请先运行 python run.py serve）")
+        return 1
+    
+    if not response.get('ok'):
+        console.print_error(f"请求失败: {response.get('error')}")
+        return 1
+    
+    print(json.dumps({key: value for key, value in response.items() if key != 'ok'},
+                     ensure_ascii=False, indent=2))
+    job = response.get('job')
+    return 1 if job and job['status'] == JOB_FAILED else 0
+
+def run_retry_failed(app: 'PaperAnalysisApp', args: argparse.Namespace) -> int:
+    """
+    执行 retry-failed 命令
+    
+    Args:
+        app: 应用实例
+        args: 命令行参数
+        
+    Returns:
+        退出码（仍有论文重试失败时为1）
+    """
+    from .core.dead_letter_retry import DeadLetterRetrier
+    
+    if not app.app_config.get('dead_letter_file'):
+        app.console.print_error("未配置 dead_letter_file，死信队列未启用")
+        return 1
+    
+    concurrency = args.concurrency
+    if concurrency is None:
+        concurrency = app.config.get_app_config('dead_letter_concurrency', 2)
+    retrier = DeadLetterRetrier(app, concurrency)
+    if args.purge:
+        app.console.print_info(f"已删除 {retrier.dead_letters.purge_resolved()} 条重试成功的记录")
+        return 0
+    if args.list:
+        retrier.print_letters(retrier.dead_letters.letters(args.stage, args.date))
+        return 0
+    
+    letters = retrier.select(args.stage, args.date, ignore_backoff=args.now, include_exhausted=args.exhausted)
+    if not letters:
+        app.console.print_info("没有需要重试的论文（未到重试时间的论文可用 --now 立即重试）")
+        return 0
+    
+    app.console.print_header("重试失败的论文", 0)
+    counts = retrier.run(letters)
+    app.console.print_summary("重试完成统计", {"重试成功": counts['resolved'], "仍然失败": counts['failed']})
+    return 1 if counts['failed'] else 0
+
+def run_api(args: argparse.Namespace) -> int:
+    """
+    执行 api 命令（阻塞直到 Ctrl+C）
+    
+    Args:
+        args: 命令行参数
+        
+    Returns:
+        退出码
+    """
+    from .core.results_api import create_results_api, start_results_server
+    
+    config = get_config()
+    console = ConsoleOutput()
+    host = args.host or config.get_app_config('api_host') or '127.0.0.1'
+    port = args.port if args.port is not None else (config.get_app_config('api_port') or 8767)
+    
+    api = create_results_api(
+        {'output_dir': config.get_app_config('default_output_dir'),
+         'analysis_dir': config.get_app_config('default_analysis_dir')},
+        cache_size=config.get_app_config('api_cache_size') or 256,
+        refresh_interval=config.get_app_config('api_refresh_interval', 2.0)
+    )
+    try:
+        server = start_results_server(api, port, host)
+    except OSError as e:
+        console.print_error(f"查询接口启动失败: {e}")
+        return 1
+    
+    console.print_success(f"🔎 结果查询接口已启动: http://{host}:{server.server_address[1]}/api/dates（Ctrl+C 停止）")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+    return 0
+
+def setup_console_encoding():
+    """设置控制台编码为UTF-8，解决Windows下的Unicode字符显示问题"""
+    if not sys.platform.startswith('win'):
+        return
+    
+    try:
+        # 设置控制台代码页为UTF-8
+        os.system('chcp 65001 > nul')
+        # 重新配置stdout和stderr的编码
+        sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+        sys.stderr.reconfigure(encoding='utf-8', errors='replace')
+    except Exception:
+        # 如果设置失败，使用替换模式处理不支持的字符
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
 def validate_date_format(date_str: str) -> bool:
     """
     验证日期格式
@@ -596,6 +1571,8 @@ def main() -> int:
     Returns:
         退出码
     """
+    setup_console_encoding()
+    
     try:
         # 解析命令行参数
         parser = create_argument_parser()
@@ -605,24 +1582,78 @@ def main() -> int:
             parser.print_help()
             return 1
         
+        # 提交任务和查询接口不需要AI组件，不创建应用实例
+        if args.command == 'submit':
+            return run_submit(args)
+        # 查询接口只读取已有结果
+        if args.command == 'api':
+            return run_api(args)
+        
         # 创建应用实例
         app = PaperAnalysisApp()
         
+        # AI调用录制回放（需在创建各阶段组件之前启用）
+        setup_cassette(app, args)
+        setup_metrics(app, args)
+        setup_events(args)
+        setup_resume(app, args)
+        if getattr(args, 'headless', False):
+            app.enable_headless()
+            args.silent = True
+        if getattr(args, 'trace', None):
+            get_tracer().enable()
+        
         # 执行相应命令
         if args.command == 'basic':
             # 如果没有提供日期，使用今天的日期
             date = args.date or datetime.now().strftime('%Y-%m-%d')
-            success = app.run_daily_analysis(date, args.silent)
+            # 优先级/截止时间模式
+            app.app_config.update({
+                'prioritize': args.priority,
+                'analysis_top_k': args.top_k,
+                'analysis_deadline': args.deadline,
+                'analysis_mode': 'metadata' if args.metadata_only else 'ai'
+            })
+            if args.pack:
+                app.app_config['pack_prompts'] = True
+            setup_profiler(app, args, date)
+            get_events().emit(EVENT_RUN_START, command=args.command, date=date)
+            with get_tracer().span("run_daily_analysis", "run", date=date):
+                success = app.run_daily_analysis(date, args.silent)
+            emit_result(app, args.command, date, success)
+            app.finish_status_line(args.command, date, success)
+            app.save_metrics_snapshot(date, args.command)
+            export_trace(app, args)
+            print_profile_summary(app)
             return 0 if success else 1
 
         elif args.command == 'advanced':
             # 如果没有提供日期，使用今天的日期
             date = args.date or datetime.now().strftime('%Y-%m-%d')
+            if args.pack:
+                app.app_config['pack_prompts'] = True
+            setup_profiler(app, args, date)
+            get_events().emit(EVENT_RUN_START, command=args.command, date=date)
             # 先加载分析结果
-            analysis_results = app.load_analysis_results(date)
-            success = app.run_advanced_analysis(date, analysis_results, args.silent)
+            with get_tracer().span("run_advanced_analysis", "run", date=date):
+                analysis_results = app.load_analysis_results(date)
+                success = app.run_advanced_analysis(date, analysis_results, args.silent)
+            emit_result(app, args.command, date, success)
+            app.finish_status_line(args.command, date, success)
+            app.save_metrics_snapshot(date, args.command)
+            export_trace(app, args)
+            print_profile_summary(app)
             return 0 if success else 1
             
+        elif args.command == 'pipeline':
+            return run_pipeline(app, args)
+            
+        elif args.command == 'serve':
+            return run_serve(app, args)
+            
+        elif args.command == 'retry-failed':
+            return run_retry_failed(app, args)
+            
         elif args.command == 'status':
             status = app.get_system_status()
             console = ConsoleOutput()
@@ -637,10 +1668,16 @@ def main() -> int:
             
     except KeyboardInterrupt:
         print("\n用户中断操作")
+        get_events().emit(EVENT_RESULT, success=False, exit_code=130,
+                          error={'type': 'KeyboardInterrupt', 'message': '用户中断操作'})
         return 130
     except Exception as e:
         print(f"程序异常: {e}")
+        get_events().emit(EVENT_RESULT, success=False, exit_code=1,
+                          error={'type': type(e).__name__, 'message': str(e)})
         return 1
+    finally:
+        get_events().close()
 
 if __name__ == '__main__':
     sys.exit(main())
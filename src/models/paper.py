@@ -2,11 +2,15 @@
 论文数据模型
 定义论文相关的数据结构
 """
-from dataclasses import dataclass, asdict
-from typing import Dict, Any, Optional
+from dataclasses import dataclass, asdict, field
+from typing import Dict, Any, List, Optional
 import re
 
 
+# 清洗数据文件的结构版本（1为旧的文本格式，2为结构化记录）
+CLEANED_DATA_SCHEMA_VERSION = 2
+
+
 @dataclass
 class Paper:
     """
@@ -20,6 +24,11 @@ class Paper:
         authors: 作者团队信息
         publish_date: 发表日期
         model_function: 模型功能描述
+        upvotes: HF点赞数（来自元数据）
+        github_repo: GitHub仓库地址（来自元数据）
+        summary: 论文摘要（来自元数据）
+        ai_summary: HF生成的简短摘要（来自元数据）
+        ai_keywords: HF生成的关键词（来自元数据）
     """
     id: str
     title: str
@@ -28,6 +37,11 @@ class Paper:
     authors: str = ""
     publish_date: str = ""
     model_function: str = ""
+    upvotes: int = 0
+    github_repo: str = ""
+    summary: str = ""
+    ai_summary: str = ""
+    ai_keywords: List[str] = field(default_factory=list)
     
     def __post_init__(self):
         """初始化后处理"""
@@ -40,6 +54,8 @@ class Paper:
         self.translation = self.translation.strip()
         self.authors = self.authors.strip()
         self.model_function = self.model_function.strip()
+        self.summary = self.summary.strip()
+        self.ai_summary = self.ai_summary.strip()
     
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -74,7 +90,12 @@ class Paper:
             url=data['url'],
             authors=data.get('authors', ''),
             publish_date=data.get('publish_date', ''),
-            model_function=data.get('model_function', '')
+            model_function=data.get('model_function', ''),
+            upvotes=data.get('upvotes', 0) or 0,
+            github_repo=data.get('github_repo', '') or '',
+            summary=data.get('summary', '') or '',
+            ai_summary=data.get('ai_summary', '') or '',
+            ai_keywords=list(data.get('ai_keywords') or [])
         )
     
     @classmethod
@@ -106,7 +127,12 @@ class Paper:
             url=url,
             authors=data.get('authors', ''),
             publish_date=data.get('publish_date', ''),
-            model_function=data.get('model_function', '')
+            model_function=data.get('model_function', ''),
+            upvotes=data.get('upvotes', 0) or 0,
+            github_repo=data.get('github_repo', '') or '',
+            summary=data.get('summary', '') or '',
+            ai_summary=data.get('ai_summary', '') or '',
+            ai_keywords=list(data.get('ai_keywords') or [])
         )
     
     def get_arxiv_id(self) -> str:
@@ -141,6 +167,30 @@ class Paper:
         """
         return bool(self.authors and self.publish_date and self.model_function)
     
+    def has_metadata(self) -> bool:
+        """
+        检查是否包含元数据摘要信息（可直接用于提示词，无需访问链接）
+        
+        Returns:
+            是否包含摘要信息
+        """
+        return bool(self.summary or self.ai_summary)
+    
+    def get_priority_score(self, github_bonus: float = 10.0) -> float:
+        """
+        计算论文优先级分数（用于优先处理高价值论文）
+        
+        Args:
+            github_bonus: 有GitHub仓库时的加分
+            
+        Returns:
+            优先级分数，越大越优先
+        """
+        score = float(self.upvotes or 0)
+        if self.github_repo:
+            score += github_bonus
+        return score
+    
     def validate(self) -> bool:
         """
         验证数据完整性
@@ -23,6 +23,8 @@ class AnalysisResult:
         model_function: 模型功能
         page_content: 原始分析内容
         analysis_time: 分析时间
+        summary: 论文摘要（来自元数据，用于分类提示词）
+        ai_keywords: 关键词（来自元数据）
     """
     paper_id: str
     paper_url: str
@@ -33,6 +35,8 @@ class AnalysisResult:
     model_function: str
     page_content: str = ""
     analysis_time: str = field(default_factory=lambda: datetime.now().isoformat())
+    summary: str = ""
+    ai_keywords: List[str] = field(default_factory=list)
     
     def __post_init__(self):
         """初始化后处理"""
@@ -42,6 +46,7 @@ class AnalysisResult:
         self.authors = self.authors.strip()
         self.model_function = self.model_function.strip()
         self.page_content = self.page_content.strip()
+        self.summary = self.summary.strip()
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
@@ -59,7 +64,9 @@ class AnalysisResult:
             publish_date=data.get('publish_date', ''),
             model_function=data.get('model_function', ''),
             page_content=data.get('page_content', ''),
-            analysis_time=data.get('analysis_time', datetime.now().isoformat())
+            analysis_time=data.get('analysis_time', datetime.now().isoformat()),
+            summary=data.get('summary', '') or '',
+            ai_keywords=list(data.get('ai_keywords') or [])
         )
     
     @classmethod
@@ -82,7 +89,9 @@ class AnalysisResult:
             publish_date=data.get('publish_date', ''),
             model_function=data.get('model_function', ''),
             page_content=data.get('page_content', ''),
-            analysis_time=data.get('analysis_time', datetime.now().isoformat())
+            analysis_time=data.get('analysis_time', datetime.now().isoformat()),
+            summary=data.get('summary', '') or '',
+            ai_keywords=list(data.get('ai_keywords') or [])
         )
     
     def get_short_summary(self, max_length: int = 100) -> str:
@@ -112,12 +121,14 @@ class ClassificationResult:
         confidence: 置信度
         md_content: 生成的MD内容
         classification_time: 分类时间
+        skipped: 论文此前已分类，本次跳过（md_content为空）
     """
     paper_id: str
     category: str
     confidence: float
     md_content: str
     classification_time: str = field(default_factory=lambda: datetime.now().isoformat())
+    skipped: bool = False
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
@@ -131,7 +142,8 @@ class ClassificationResult:
             category=data.get('category', ''),
             confidence=data.get('confidence', 0.0),
             md_content=data.get('md_content', ''),
-            classification_time=data.get('classification_time', datetime.now().isoformat())
+            classification_time=data.get('classification_time', datetime.now().isoformat()),
+            skipped=bool(data.get('skipped', False))
         )
     
     def is_high_confidence(self, threshold: float = 0.8) -> bool:
@@ -230,9 +242,10 @@ class DailyReport:
         }
     
     def save_to_file(self, file_path: str) -> bool:
-        """保存到文件"""
+        """保存到文件（原子写入）"""
+        from ..utils.file_utils import atomic_open
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
+            with atomic_open(file_path) as f:
                 json.dump(self.to_dict(), f, ensure_ascii=False, indent=4)
             return True
         except Exception:
@@ -4,14 +4,22 @@ AI客户端封装模块
 """
 import os
 import time
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Tuple
 from .logger import get_logger
+from .cassette import Cassette, MODE_AUTO, MODE_RECORD, MODE_REPLAY
+from .single_flight import get_single_flight
+from .metrics import get_metrics
+from .tracing import get_tracer
 
 
 class AIClient(ABC):
     """AI客户端抽象基类"""
     
+    # 提供商名称（用于指标标签）
+    provider = "unknown"
+    
     def __init__(self, api_key: str, model_name: str):
         """
         初始化AI客户端
@@ -46,11 +54,33 @@ class AIClient(ABC):
             duration
         )
         self.logger.debug(f"请求消息数: {len(messages)}, 响应长度: {len(response)}")
+    
+    def _record_metrics(self, status: str, duration: float, response: Any = None):
+        """
+        记录调用指标（请求数、耗时、token用量）
+        
+        Args:
+            status: 调用结果（success 或 error）
+            duration: 耗时（秒）
+            response: SDK返回的响应对象，用于读取token用量
+        """
+        metrics = get_metrics()
+        labels = {'provider': self.provider, 'model': self.model_name}
+        metrics.counter('ai_requests_total', 'AI请求数').inc(status=status, **labels)
+        metrics.histogram('ai_request_duration_seconds', 'AI请求耗时（秒）').observe(duration, **labels)
+        
+        usage = getattr(response, 'usage', None)
+        if usage is not None:
+            tokens = metrics.counter('ai_tokens_total', 'AI token用量')
+            tokens.inc(getattr(usage, 'prompt_tokens', 0) or 0, kind='prompt', **labels)
+            tokens.inc(getattr(usage, 'completion_tokens', 0) or 0, kind='completion', **labels)
 
 
 class ZhipuClient(AIClient):
     """智谱AI客户端"""
     
+    provider = "zhipu"
+    
     def __init__(self, api_key: str, model_name: str = "GLM-4.5-Air"):
         """初始化智谱AI客户端"""
         super().__init__(api_key, model_name)
@@ -85,17 +115,21 @@ class ZhipuClient(AIClient):
             duration = time.time() - start_time
             
             self._log_api_call(messages, content, duration)
+            self._record_metrics('success', duration, response)
             return content
             
         except Exception as e:
             duration = time.time() - start_time
             self.logger.error(f"智谱AI调用失败: {e}, 耗时: {duration:.2f}秒")
+            self._record_metrics('error', duration)
             raise
 
 
 class DoubaoClient(AIClient):
     """豆包AI客户端"""
     
+    provider = "doubao"
+    
     def __init__(self, api_key: str, model_name: str = "doubao-1-5-pro-32k-250115"):
         """初始化豆包AI客户端"""
         super().__init__(api_key, model_name)
@@ -133,17 +167,43 @@ class DoubaoClient(AIClient):
             duration = time.time() - start_time
             
             self._log_api_call(messages, content, duration)
+            self._record_metrics('success', duration, response)
             return content
             
         except Exception as e:
             duration = time.time() - start_time
             self.logger.error(f"豆包AI调用失败: {e}, 耗时: {duration:.2f}秒")
+            self._record_metrics('error', duration)
             raise
 
 
+class ReplayOnlyClient(AIClient):
+    """
+    回放专用客户端
+    
+    仅回放模式下使用，不加载SDK也不需要API密钥，所有请求都应由录制文件响应
+    """
+    
+    provider = "replay"
+    
+    def __init__(self, model_name: str):
+        """初始化回放专用客户端"""
+        super().__init__("", model_name)
+    
+    def chat(self, messages: List[Dict[str, Any]], **kwargs) -> str:
+        """回放模式下不允许发起真实请求"""
+        raise RuntimeError("回放模式下录制文件未命中，不会发起真实AI请求")
+
+
 class AIClientFactory:
     """AI客户端工厂类"""
     
+    # 各提供商的默认模型
+    DEFAULT_MODELS = {
+        'zhipu': "GLM-4.5-Air",
+        'doubao': "doubao-1-5-pro-32k-250115"
+    }
+    
     @staticmethod
     def create_client(model_type: str, api_key: str = None, model_name: str = None) -> AIClient:
         """
@@ -162,7 +222,7 @@ class AIClientFactory:
             if not api_key:
                 raise ValueError("请设置环境变量 ZHIPUAI_API_KEY 或提供api_key参数")
             
-            model_name = model_name or "GLM-4.5-Air"
+            model_name = model_name or AIClientFactory.DEFAULT_MODELS['zhipu']
             return ZhipuClient(api_key, model_name)
             
         elif model_type.lower() == 'doubao':
@@ -170,7 +230,7 @@ class AIClientFactory:
             if not api_key:
                 raise ValueError("请设置环境变量 ARK_API_KEY 或提供api_key参数")
             
-            model_name = model_name or "doubao-1-5-pro-32k-250115"
+            model_name = model_name or AIClientFactory.DEFAULT_MODELS['doubao']
             return DoubaoClient(api_key, model_name)
             
         else:
@@ -186,9 +246,11 @@ class AIClientFactory:
 
 
 class RetryableAIClient:
-    """带重试功能的AI客户端包装器"""
+    """带重试功能的AI客户端包装器（支持请求录制与回放）"""
     
-    def __init__(self, client: AIClient, max_retries: int = 3, retry_delay: float = 2.0):
+    def __init__(self, client: AIClient, max_retries: int = 3, retry_delay: float = 2.0,
+                 cassette: Cassette = None, replay_latency: float = 0.0, coalesce: bool = True,
+                 call_timeout: float = 90.0):
         """
         初始化重试客户端
         
@@ -196,16 +258,95 @@ class RetryableAIClient:
             client: AI客户端实例
             max_retries: 最大重试次数
             retry_delay: 重试延迟（秒）
+            cassette: 录制文件，为None时不录制也不回放
+            replay_latency: 回放时模拟的耗时倍数（0表示立即返回，1表示按录制耗时等待）
+            coalesce: 是否合并同一时刻的相同请求（进程内共享一次上游调用）
+            call_timeout: 单次上游调用的超时（秒），用于计算合并等待上限
         """
         self.client = client
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.call_timeout = call_timeout
+        self.cassette = cassette
+        self.replay_latency = replay_latency
+        self.single_flight = get_single_flight() if coalesce else None
         self.logger = get_logger("retryable_ai_client")
     
-    def chat(self, messages: List[Dict[str, Any]], **kwargs) -> Optional[str]:
+    @property
+    def model_name(self) -> str:
+        """底层客户端的模型名称"""
+        return self.client.model_name
+    
+    @property
+    def coalesce_timeout(self) -> float:
+        """默认的合并等待上限：全部重试的调用超时加上各次退避等待（秒）"""
+        backoff = sum(self.retry_delay * (2 ** attempt) for attempt in range(max(self.max_retries - 1, 0)))
+        return self.call_timeout * max(self.max_retries, 1) + backoff
+    
+    def chat(self, messages: List[Dict[str, Any]], wait_timeout: float = None, **kwargs) -> Optional[str]:
         """
         带重试的聊天请求
         
+        Args:
+            messages: 消息列表
+            wait_timeout: 调用方的超时（秒），合并相同请求时最多等待这么久，默认为 coalesce_timeout
+            **kwargs: 其他参数
+            
+        Returns:
+            AI回复内容，失败返回None
+        """
+        if self.cassette is None and self.single_flight is None:
+            return self._chat_with_retry(messages, **kwargs)
+        
+        key = Cassette.make_key(self.model_name, messages, kwargs)
+        
+        # 相同请求正在进行时等待其结果，而不是重复调用上游
+        if self.single_flight is not None:
+            return self.single_flight.do(key, lambda: self._chat_with_cassette(key, messages, **kwargs),
+                                         timeout=wait_timeout or self.coalesce_timeout)
+        return self._chat_with_cassette(key, messages, **kwargs)
+    
+    def _chat_with_cassette(self, key: str, messages: List[Dict[str, Any]], **kwargs) -> Optional[str]:
+        """
+        经过录制文件的请求（未启用录制回放时直接请求）
+        
+        Args:
+            key: 请求键
+            messages: 消息列表
+            **kwargs: 其他参数
+            
+        Returns:
+            AI回复内容，失败返回None
+        """
+        if self.cassette is None:
+            return self._chat_with_retry(messages, **kwargs)
+        
+        # 回放：命中录制记录时直接返回
+        if self.cassette.mode != MODE_RECORD:
+            entry = self.cassette.lookup(key)
+            get_metrics().counter('cassette_lookups_total', '录制文件查询次数').inc(
+                result='hit' if entry is not None else 'miss')
+            if entry is not None:
+                if self.replay_latency > 0:
+                    get_tracer().sleep(entry.get('duration', 0) * self.replay_latency, "replay_latency",
+                                       model=self.model_name)
+                return entry.get('response')
+            
+            if self.cassette.mode == MODE_REPLAY:
+                self.logger.warning(f"录制文件中未找到该请求，返回空响应: {key[:12]}")
+                return None
+        
+        # 录制：调用AI并保存请求和响应
+        start_time = time.time()
+        response = self._chat_with_retry(messages, **kwargs)
+        if response:
+            self.cassette.record(key, self.model_name, messages, kwargs, response, time.time() - start_time)
+        return response
+    
+    def _chat_with_retry(self, messages: List[Dict[str, Any]], **kwargs) -> Optional[str]:
+        """
+        带指数退避重试的实际请求
+        
         Args:
             messages: 消息列表
             **kwargs: 其他参数
@@ -213,17 +354,20 @@ class RetryableAIClient:
         Returns:
             AI回复内容，失败返回None
         """
+        tracer = get_tracer()
         for attempt in range(self.max_retries):
             try:
-                return self.client.chat(messages, **kwargs)
+                with tracer.span("ai_attempt", "ai", model=self.model_name, attempt=attempt + 1):
+                    return self.client.chat(messages, **kwargs)
                 
             except Exception as e:
                 self.logger.warning(f"第{attempt + 1}次尝试失败: {e}")
                 
                 if attempt < self.max_retries - 1:
+                    get_metrics().counter('ai_retries_total', 'AI请求重试次数').inc(model=self.model_name)
                     delay = self.retry_delay * (2 ** attempt)  # 指数退避
                     self.logger.info(f"等待{delay}秒后重试...")
-                    time.sleep(delay)
+                    tracer.sleep(delay, "retry_sleep", model=self.model_name, attempt=attempt + 1)
                 else:
                     self.logger.error(f"所有重试都失败了，放弃请求")
                     return None
@@ -231,6 +375,201 @@ class RetryableAIClient:
         return None
 
 
+# 进程级录制回放设置（由命令行或配置启用，对之后创建的所有重试客户端生效）
+_default_cassette: Optional[Cassette] = None
+_default_replay_latency = 0.0
+
+
+def configure_cassette(path: str, mode: str = MODE_AUTO, replay_latency: float = 0.0) -> Cassette:
+    """
+    启用进程级的AI调用录制回放
+    
+    Args:
+        path: 录制文件路径（JSONL）
+        mode: 录制回放模式（record、replay 或 auto）
+        replay_latency: 回放时模拟的耗时倍数
+        
+    Returns:
+        Cassette实例
+    """
+    global _default_cassette, _default_replay_latency
+    _default_cassette = Cassette(path, mode)
+    _default_replay_latency = replay_latency
+    # 已共享的客户端没有挂载新的录制文件，需要重新创建
+    clear_shared_clients()
+    get_logger("ai_client_factory").info(f"已启用AI调用录制回放: {path}（模式: {mode}）")
+    return _default_cassette
+
+
+def get_coalescing_stats() -> Dict[str, int]:
+    """
+    获取进程级请求合并统计
+    
+    Returns:
+        实际调用数、被合并的调用数和当前进行中的请求数
+    """
+    return get_single_flight().get_stats()
+
+
+def is_replay_only() -> bool:
+    """
+    是否为纯回放模式（未命中录制记录时返回空响应，不代表请求真的失败）
+    
+    Returns:
+        是否为纯回放模式
+    """
+    return _default_cassette is not None and _default_cassette.mode == MODE_REPLAY
+
+
+def get_default_cassette() -> Optional[Cassette]:
+    """
+    获取进程级录制文件
+    
+    Returns:
+        Cassette实例，未启用时返回None
+    """
+    return _default_cassette
+
+
+class CascadeAIClient:
+    """
+    模型级联客户端
+    
+    按顺序调用从便宜快速到能力更强的模型，输出通过校验即返回，
+    校验失败时才升级到下一级模型，并记录各级调用次数、升级率和耗时
+    """
+    
+    def __init__(self, tiers: List[Tuple[str, Any]],
+                 validator: Callable[[str], bool] = None):
+        """
+        初始化级联客户端
+        
+        Args:
+            tiers: (模型名称, 客户端) 列表，按升级顺序排列
+            validator: 默认的输出校验函数，返回True表示输出合格
+        """
+        if not tiers:
+            raise ValueError("级联客户端至少需要一个模型")
+        
+        self.tiers = tiers
+        self.validator = validator
+        self.logger = get_logger("cascade_ai_client")
+        
+        # 超时被放弃的调用仍在后台线程中执行，统计数据需要加锁
+        self._stats_lock = threading.Lock()
+        self.total_requests = 0
+        self.escalations = 0          # 升级的级数（一次请求可能升级多级）
+        self.escalated_requests = 0   # 至少升级过一次的请求数
+        self.tier_stats = {
+            name: {'calls': 0, 'accepted': 0, 'rejected': 0, 'failed': 0, 'total_time': 0.0}
+            for name, _ in tiers
+        }
+    
+    @property
+    def model_name(self) -> str:
+        """首选（最便宜）模型名称"""
+        return self.tiers[0][0]
+    
+    def chat(self, messages: List[Dict[str, Any]],
+             validator: Callable[[str], bool] = None, **kwargs) -> Optional[str]:
+        """
+        级联聊天请求
+        
+        Args:
+            messages: 消息列表
+            validator: 本次请求的输出校验函数，为None时使用默认校验函数
+            **kwargs: 其他参数
+            
+        Returns:
+            第一个通过校验的回复；都未通过时返回最后一个非空回复，全部失败返回None
+        """
+        check = validator or self.validator
+        with self._stats_lock:
+            self.total_requests += 1
+        last_response = None
+        escalated = False
+        
+        for index, (name, client) in enumerate(self.tiers):
+            stats = self.tier_stats[name]
+            start_time = time.time()
+            
+            try:
+                response = client.chat(messages, **kwargs)
+            except Exception as e:
+                self.logger.warning(f"级联模型 {name} 调用异常: {e}")
+                response = None
+            
+            if not response:
+                outcome = 'failed'
+            elif check is None or check(response):
+                outcome = 'accepted'
+            else:
+                outcome = 'rejected'
+                last_response = response
+            
+            with self._stats_lock:
+                stats['calls'] += 1
+                stats['total_time'] += time.time() - start_time
+                stats[outcome] += 1
+                if outcome != 'accepted' and index < len(self.tiers) - 1:
+                    self.escalations += 1
+                    if not escalated:
+                        self.escalated_requests += 1
+                        escalated = True
+            
+            if outcome == 'accepted':
+                return response
+            
+            if index < len(self.tiers) - 1:
+                next_name = self.tiers[index + 1][0]
+                self.logger.info(f"模型 {name} 输出未通过校验，升级到 {next_name}")
+        
+        self.logger.warning("所有级联模型的输出均未通过校验")
+        return last_response
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取级联统计信息
+        
+        Returns:
+            包含升级率（升级过的请求占比）和各级模型调用统计的字典
+        """
+        with self._stats_lock:
+            tier_stats = {name: dict(stats) for name, stats in self.tier_stats.items()}
+            total_requests, escalations = self.total_requests, self.escalations
+            escalated_requests = self.escalated_requests
+        
+        tiers = {}
+        for name, stats in tier_stats.items():
+            calls = stats['calls']
+            tiers[name] = {
+                **stats,
+                'avg_time': stats['total_time'] / calls if calls else 0.0,
+                'accept_rate': stats['accepted'] / calls if calls else 0.0
+            }
+        
+        return {
+            'total_requests': total_requests,
+            'escalations': escalations,
+            'escalated_requests': escalated_requests,
+            'escalation_rate': escalated_requests / total_requests if total_requests else 0.0,
+            'tiers': tiers
+        }
+    
+    def log_stats(self):
+        """将级联统计信息写入日志"""
+        stats = self.get_stats()
+        self.logger.info(
+            f"级联统计: 请求 {stats['total_requests']} 次, 其中 {stats['escalated_requests']} 次升级"
+            f"（共升级 {stats['escalations']} 级）, 升级率 {stats['escalation_rate']:.1%}"
+        )
+        for name, tier in stats['tiers'].items():
+            self.logger.info(
+                f"  {name}: 调用 {tier['calls']} 次, 通过 {tier['accepted']}, 未通过 {tier['rejected']}, "
+                f"失败 {tier['failed']}, 平均耗时 {tier['avg_time']:.2f}秒"
+            )
+
+
 # 便捷函数
 def create_ai_client(model_type: str, api_key: str = None, model_name: str = None) -> AIClient:
     """便捷函数：创建AI客户端"""
@@ -238,9 +577,99 @@ def create_ai_client(model_type: str, api_key: str = None, model_name: str = Non
 
 def create_retryable_client(model_type: str, max_retries: int = 3,
                           api_key: str = None, model_name: str = None) -> RetryableAIClient:
-    """便捷函数：创建带重试的AI客户端"""
-    client = create_ai_client(model_type, api_key, model_name)
-    return RetryableAIClient(client, max_retries)
+    """便捷函数：创建带重试的AI客户端（启用录制回放时自动挂载录制文件）"""
+    if _default_cassette is not None and _default_cassette.mode == MODE_REPLAY:
+        # 纯回放模式不需要SDK和API密钥
+        model_name = model_name or AIClientFactory.DEFAULT_MODELS.get(model_type.lower(), model_type)
+        client = ReplayOnlyClient(model_name)
+    else:
+        client = create_ai_client(model_type, api_key, model_name)
+    return RetryableAIClient(client, max_retries, cassette=_default_cassette,
+                             replay_latency=_default_replay_latency)
+
+def create_cascade_client(model_type: str, model_names: List[str], max_retries: int = 3,
+                          api_key: str = None,
+                          validator: Callable[[str], bool] = None) -> CascadeAIClient:
+    """
+    便捷函数：创建模型级联客户端（每一级都带重试）
+    
+    Args:
+        model_type: 模型类型
+        model_names: 按升级顺序排列的模型名称列表
+        max_retries: 每级模型的最大重试次数
+        api_key: API密钥
+        validator: 默认的输出校验函数
+        
+    Returns:
+        CascadeAIClient实例
+    """
+    tiers = [
+        (name, create_retryable_client(model_type, max_retries, api_key, name))
+        for name in model_names
+    ]
+    return CascadeAIClient(tiers, validator)
+
+def create_stage_client(model_type: str, stage: str, use_cascade: bool = False,
+                        max_retries: int = 3):
+    """
+    便捷函数：为处理阶段创建AI客户端
+    
+    启用级联且该阶段配置了多个模型时返回级联客户端，否则返回带重试的单模型客户端
+    
+    Args:
+        model_type: 模型类型
+        stage: 处理阶段名称（如 analysis、classification）
+        use_cascade: 是否启用模型级联
+        max_retries: 最大重试次数
+        
+    Returns:
+        CascadeAIClient 或 RetryableAIClient 实例
+    """
+    if use_cascade:
+        from .config import get_config
+        cascade_models = get_config().get_stage_cascade(stage, model_type)
+        if len(cascade_models) > 1:
+            get_logger("ai_client_factory").info(f"{stage} 阶段启用模型级联: {' -> '.join(cascade_models)}")
+            return create_cascade_client(model_type, cascade_models, max_retries)
+    
+    return create_retryable_client(model_type, max_retries=max_retries)
+
+
+# 进程级共享的阶段客户端（同一次运行中各组件复用，首次使用时才创建）
+_shared_clients: Dict[Tuple[str, str, bool, int], Any] = {}
+_shared_clients_lock = threading.Lock()
+
+
+def get_shared_stage_client(model_type: str, stage: str, use_cascade: bool = False,
+                            max_retries: int = 3):
+    """
+    便捷函数：获取进程级共享的阶段客户端
+    
+    相同配置的组件（如多次创建的分类器）复用同一个客户端，SDK只在第一次调用时导入；
+    未启用级联时各阶段使用的是同一个单模型客户端
+    
+    Args:
+        model_type: 模型类型
+        stage: 处理阶段名称
+        use_cascade: 是否启用模型级联
+        max_retries: 最大重试次数
+        
+    Returns:
+        CascadeAIClient 或 RetryableAIClient 实例
+    """
+    key = (model_type, stage if use_cascade else '', bool(use_cascade), max_retries)
+    with _shared_clients_lock:
+        client = _shared_clients.get(key)
+        if client is None:
+            # 创建失败时直接抛出，不缓存
+            client = create_stage_client(model_type, stage, use_cascade, max_retries)
+            _shared_clients[key] = client
+        return client
+
+def clear_shared_clients():
+    """便捷函数：清空共享的阶段客户端（之后的调用会重新创建）"""
+    with _shared_clients_lock:
+        _shared_clients.clear()
 
 
 class EnhancedAIClientFactory:
@@ -306,7 +735,9 @@ class EnhancedAIClientFactory:
             retryable_client = RetryableAIClient(
                 client,
                 max_retries=max_retries,
-                retry_delay=ai_config.get('retry_delay', 2.0)
+                retry_delay=ai_config.get('retry_delay', 2.0),
+                cassette=_default_cassette,
+                replay_latency=_default_replay_latency
             )
 
             self.logger.info(f"成功创建AI客户端: {provider}/{final_model_name}")
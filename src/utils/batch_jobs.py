@@ -0,0 +1,392 @@
+"""
+批量任务接口模块
+提供与提供商无关的离线批量任务（Batch API）提交、轮询和结果读取接口
+"""
+import json
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+from .logger import get_logger
+from .file_utils import atomic_open
+
+
+# 批量任务状态
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+
+# 批量请求的接口路径（智谱与OpenAI格式一致）
+CHAT_COMPLETIONS_ENDPOINT = "/v4/chat/completions"
+
+
+def build_batch_request(custom_id: str, model: str, messages: List[Dict[str, Any]],
+                        **params) -> Dict[str, Any]:
+    """
+    构建单条批量请求记录
+
+    Args:
+        custom_id: 自定义请求ID（用于把结果对应回论文）
+        model: 模型名称
+        messages: 消息列表
+        **params: 其他请求参数（如temperature）
+
+    Returns:
+        批量请求记录字典
+    """
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": CHAT_COMPLETIONS_ENDPOINT,
+        "body": {"model": model, "messages": messages, **params}
+    }
+
+
+def write_batch_requests(requests: List[Dict[str, Any]], path: Union[str, Path]) -> Path:
+    """
+    将批量请求写入JSONL任务文件
+
+    Args:
+        requests: 批量请求记录列表
+        path: 任务文件路径
+
+    Returns:
+        任务文件路径
+    """
+    file_path = Path(path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(file_path, 'w', encoding='utf-8') as f:
+        for request in requests:
+            f.write(json.dumps(request, ensure_ascii=False) + '\n')
+    return file_path
+
+
+def read_batch_results(path: Union[str, Path]) -> Dict[str, Optional[str]]:
+    """
+    读取批量任务的结果文件
+
+    Args:
+        path: 结果文件路径（JSONL）
+
+    Returns:
+        自定义请求ID到回复内容的映射，失败的请求对应None
+    """
+    results = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+            custom_id = record.get('custom_id')
+            if not custom_id:
+                continue
+
+            content = None
+            try:
+                body = (record.get('response') or {}).get('body') or {}
+                content = body['choices'][0]['message']['content']
+            except (KeyError, IndexError, TypeError):
+                content = None
+            results[custom_id] = content
+
+    return results
+
+
+class BatchJobBackend(ABC):
+    """批量任务后端抽象基类"""
+
+    def __init__(self):
+        """初始化批量任务后端"""
+        self.logger = get_logger(f"batch_job_{self.name}")
+
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        """后端名称"""
+        pass
+
+    @abstractmethod
+    def submit(self, job_file: Union[str, Path], description: str = "") -> str:
+        """
+        提交批量任务
+
+        Args:
+            job_file: JSONL任务文件路径
+            description: 任务描述
+
+        Returns:
+            任务ID
+        """
+        pass
+
+    @abstractmethod
+    def get_status(self, job_id: str) -> str:
+        """
+        查询任务状态
+
+        Args:
+            job_id: 任务ID
+
+        Returns:
+            任务状态（running、completed 或 failed）
+        """
+        pass
+
+    @abstractmethod
+    def download_results(self, job_id: str, output_file: Union[str, Path]) -> Path:
+        """
+        下载任务结果
+
+        Args:
+            job_id: 任务ID
+            output_file: 结果文件保存路径
+
+        Returns:
+            结果文件路径
+        """
+        pass
+
+    def wait(self, job_id: str, poll_interval: float = 60, timeout: float = None) -> str:
+        """
+        轮询等待任务结束
+
+        Args:
+            job_id: 任务ID
+            poll_interval: 轮询间隔（秒）
+            timeout: 最长等待时间（秒），None表示一直等待
+
+        Returns:
+            最终任务状态，超时返回running
+        """
+        start_time = time.time()
+        while True:
+            status = self.get_status(job_id)
+            if status != STATUS_RUNNING:
+                self.logger.info(f"批量任务结束: {job_id} - {status}")
+                return status
+
+            if timeout is not None and time.time() - start_time >= timeout:
+                self.logger.warning(f"等待批量任务超时: {job_id}")
+                return status
+
+            self.logger.debug(f"批量任务进行中: {job_id}，{poll_interval}秒后再次查询")
+            time.sleep(poll_interval)
+
+
+class LocalBatchJobBackend(BatchJobBackend):
+    """
+    本地文件批量任务后端
+
+    在本地逐条调用AI客户端执行任务文件中的请求，结果文件格式与远程Batch API一致，
+    用于测试以及没有Batch API的提供商
+    """
+
+    name = "local"
+
+    def __init__(self, client: Any = None, jobs_dir: Union[str, Path] = "data/batch_jobs/local"):
+        """
+        初始化本地批量任务后端
+
+        Args:
+            client: 带chat(messages)方法的AI客户端，为None时首次执行任务时按默认提供商创建
+            jobs_dir: 本地任务目录
+        """
+        super().__init__()
+        self.client = client
+        self.jobs_dir = Path(jobs_dir)
+
+    def _job_dir(self, job_id: str) -> Path:
+        return self.jobs_dir / job_id
+
+    def submit(self, job_file: Union[str, Path], description: str = "") -> str:
+        job_id = f"local-{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        job_dir = self._job_dir(job_id)
+        job_dir.mkdir(parents=True, exist_ok=True)
+
+        (job_dir / 'input.jsonl').write_bytes(Path(job_file).read_bytes())
+        self._write_state(job_id, {'status': STATUS_RUNNING, 'description': description})
+
+        self.logger.info(f"本地批量任务已提交: {job_id}")
+        return job_id
+
+    def get_status(self, job_id: str) -> str:
+        state = self._read_state(job_id)
+        if state.get('status') == STATUS_RUNNING:
+            # 本地后端在首次查询时同步执行任务
+            self._run(job_id)
+            state = self._read_state(job_id)
+        return state.get('status', STATUS_FAILED)
+
+    def download_results(self, job_id: str, output_file: Union[str, Path]) -> Path:
+        output_path = Path(output_file)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_bytes((self._job_dir(job_id) / 'output.jsonl').read_bytes())
+        return output_path
+
+    def _read_output(self, output_file: Path) -> Dict[str, bool]:
+        """读取已写入的结果（中断时最后一行可能只写了一半，跳过），返回 {custom_id: 是否成功}"""
+        done: Dict[str, bool] = {}
+        if not output_file.exists():
+            return done
+        with open(output_file, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(record, dict) and record.get('custom_id') is not None:
+                    done[record['custom_id']] = 'response' in record
+        return done
+
+    def _run(self, job_id: str):
+        """逐条执行任务文件中的请求（每条结果写入后立即落盘，中断后再次查询时跳过已有结果的请求）"""
+        if self.client is None:
+            from .ai_client import create_retryable_client
+            from .config import get_config
+            self.client = create_retryable_client(get_config().get_default_provider())
+
+        job_dir = self._job_dir(job_id)
+        output_file = job_dir / 'output.jsonl'
+        done = self._read_output(output_file)
+        completed = sum(1 for success in done.values() if success)
+        failed = len(done) - completed
+        if done:
+            self.logger.info(f"继续本地批量任务: {job_id}，已有 {len(done)} 条结果")
+
+        with open(job_dir / 'input.jsonl', 'r', encoding='utf-8') as fin, \
+             open(output_file, 'a', encoding='utf-8') as fout:
+            if fout.tell() and not output_file.read_bytes().endswith(b'\n'):
+                # 上次中断时最后一行只写了一半
+                fout.write('\n')
+            for line in fin:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                if request.get('custom_id') in done:
+                    continue
+                record = {'custom_id': request.get('custom_id')}
+
+                try:
+                    content = self.client.chat(request['body']['messages'])
+                except Exception as e:
+                    self.logger.warning(f"本地批量请求失败: {request.get('custom_id')} - {e}")
+                    content = None
+
+                if content:
+                    record['response'] = {
+                        'status_code': 200,
+                        'body': {'choices': [{'message': {'role': 'assistant', 'content': content}}]}
+                    }
+                    completed += 1
+                else:
+                    record['error'] = {'message': 'empty response'}
+                    failed += 1
+
+                fout.write(json.dumps(record, ensure_ascii=False) + '\n')
+                fout.flush()
+
+        self._write_state(job_id, {'status': STATUS_COMPLETED, 'completed': completed, 'failed': failed})
+        self.logger.info(f"本地批量任务完成: {job_id}，成功 {completed}，失败 {failed}")
+
+    def _read_state(self, job_id: str) -> Dict[str, Any]:
+        state_file = self._job_dir(job_id) / 'state.json'
+        if not state_file.exists():
+            return {}
+        with open(state_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_state(self, job_id: str, state: Dict[str, Any]):
+        with atomic_open(self._job_dir(job_id) / 'state.json') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+
+
+class ZhipuBatchJobBackend(BatchJobBackend):
+    """智谱AI Batch API后端"""
+
+    name = "zhipu"
+
+    # 远程状态到统一状态的映射
+    _STATUS_MAP = {
+        'validating': STATUS_RUNNING,
+        'in_progress': STATUS_RUNNING,
+        'finalizing': STATUS_RUNNING,
+        'completed': STATUS_COMPLETED,
+        'failed': STATUS_FAILED,
+        'expired': STATUS_FAILED,
+        'cancelling': STATUS_FAILED,
+        'cancelled': STATUS_FAILED
+    }
+
+    def __init__(self, api_key: str = None):
+        """
+        初始化智谱批量任务后端
+
+        Args:
+            api_key: API密钥，如果为None则从配置/环境变量获取
+        """
+        super().__init__()
+        if api_key is None:
+            from .config import get_config
+            api_key = get_config().get_api_key('zhipu')
+        if not api_key:
+            raise ValueError("请设置环境变量 ZHIPUAI_API_KEY 或提供api_key参数")
+
+        try:
+            from zhipuai import ZhipuAI
+            self.client = ZhipuAI(api_key=api_key)
+        except ImportError:
+            raise ImportError("请安装zhipuai库: pip install zhipuai")
+
+    def submit(self, job_file: Union[str, Path], description: str = "") -> str:
+        with open(job_file, 'rb') as f:
+            uploaded = self.client.files.create(file=f, purpose="batch")
+
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=CHAT_COMPLETIONS_ENDPOINT,
+            auto_delete_input_file=True,
+            metadata={"description": description} if description else None
+        )
+        self.logger.info(f"智谱批量任务已提交: {batch.id}")
+        return batch.id
+
+    def get_status(self, job_id: str) -> str:
+        batch = self.client.batches.retrieve(job_id)
+        return self._STATUS_MAP.get(batch.status, STATUS_RUNNING)
+
+    def download_results(self, job_id: str, output_file: Union[str, Path]) -> Path:
+        batch = self.client.batches.retrieve(job_id)
+        if not batch.output_file_id:
+            raise RuntimeError(f"批量任务没有结果文件: {job_id}")
+
+        output_path = Path(output_file)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        self.client.files.content(batch.output_file_id).write_to_file(str(output_path))
+        return output_path
+
+
+def create_batch_backend(backend: str, **kwargs) -> BatchJobBackend:
+    """
+    便捷函数：创建批量任务后端
+
+    Args:
+        backend: 后端名称（local 或 zhipu）
+        **kwargs: 传给后端构造函数的参数
+
+    Returns:
+        BatchJobBackend实例
+    """
+    backends = {
+        'local': LocalBatchJobBackend,
+        'zhipu': ZhipuBatchJobBackend
+    }
+    if backend not in backends:
+        raise ValueError(f"不支持的批量任务后端: {backend}")
+    return backends[backend](**kwargs)
@@ -0,0 +1,150 @@
+"""
+AI调用录制回放模块
+把AI请求和响应（含耗时）录制到JSONL文件，之后可离线、确定性地回放
+"""
+import json
+import hashlib
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+from .logger import get_logger
+
+
+# 录制回放模式
+MODE_RECORD = "record"    # 始终调用AI并录制
+MODE_REPLAY = "replay"    # 只从录制文件回放，未命中返回空
+MODE_AUTO = "auto"        # 命中时回放，未命中时调用AI并录制
+CASSETTE_MODES = (MODE_RECORD, MODE_REPLAY, MODE_AUTO)
+
+
+class Cassette:
+    """
+    AI调用录制文件
+
+    每行一条记录：{"key", "model", "messages", "params", "response", "duration", "recorded_at"}，
+    同一请求多次录制时以最后一条为准
+    """
+
+    def __init__(self, path: Union[str, Path], mode: str = MODE_AUTO):
+        """
+        初始化录制文件
+
+        Args:
+            path: 录制文件路径（JSONL）
+            mode: 录制回放模式（record、replay 或 auto）
+        """
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"不支持的录制回放模式: {mode}")
+
+        self.path = Path(path)
+        self.mode = mode
+        self.logger = get_logger('cassette')
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self._load()
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, Any]], params: Dict[str, Any] = None) -> str:
+        """
+        生成请求的唯一键
+
+        Args:
+            model: 模型名称
+            messages: 消息列表
+            params: 其他请求参数
+
+        Returns:
+            请求键（SHA256十六进制）
+        """
+        payload = json.dumps(
+            {'model': model, 'messages': messages, 'params': params or {}},
+            ensure_ascii=False, sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _load(self):
+        """加载已录制的记录"""
+        if not self.path.exists():
+            return
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                    self._entries[entry['key']] = entry
+                except (json.JSONDecodeError, KeyError):
+                    continue
+
+        self.logger.info(f"录制文件加载完成: {self.path}（{len(self._entries)} 条）")
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        查找录制记录
+
+        Args:
+            key: 请求键
+
+        Returns:
+            录制记录，未命中返回None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def record(self, key: str, model: str, messages: List[Dict[str, Any]],
+               params: Dict[str, Any], response: str, duration: float):
+        """
+        录制一次请求和响应（追加写入）
+
+        Args:
+            key: 请求键
+            model: 模型名称
+            messages: 消息列表
+            params: 其他请求参数
+            response: AI响应内容
+            duration: 调用耗时（秒）
+        """
+        entry = {
+            'key': key,
+            'model': model,
+            'messages': messages,
+            'params': params,
+            'response': response,
+            'duration': round(duration, 3),
+            'recorded_at': datetime.now().isoformat()
+        }
+
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+            self._entries[key] = entry
+            self.recorded += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        获取录制回放统计
+
+        Returns:
+            命中、未命中、新录制和总记录数
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'recorded': self.recorded,
+            'entries': len(self._entries)
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -3,11 +3,9 @@
 提供统一的配置管理功能，支持多种AI模型配置
 """
 import os
-import yaml
-import logging.config
 from pathlib import Path
 from typing import Dict, Any, Optional, List
-from .logger import get_logger
+from .logger import get_logger, use_queue_logging
 
 
 class ConfigManager:
@@ -51,14 +49,17 @@ class ConfigManager:
     
     def _load_models_config(self):
         """加载AI模型配置"""
+        import yaml
+        
         models_file = self.config_dir / "models.yaml"
         
         if not models_file.exists():
             raise FileNotFoundError(f"模型配置文件不存在: {models_file}")
         
         try:
+            # 安装了libyaml时使用C实现的解析器，加载速度快得多
             with open(models_file, 'r', encoding='utf-8') as f:
-                self._models_config = yaml.safe_load(f)
+                self._models_config = yaml.load(f, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
             
             self.logger.info(f"模型配置加载成功: {models_file}")
             
@@ -68,6 +69,9 @@ class ConfigManager:
     
     def _load_logging_config(self):
         """加载日志配置"""
+        import yaml
+        import logging.config
+        
         logging_file = self.config_dir / "logging.yaml"
         
         if not logging_file.exists():
@@ -76,7 +80,7 @@ class ConfigManager:
         
         try:
             with open(logging_file, 'r', encoding='utf-8') as f:
-                self._logging_config = yaml.safe_load(f)
+                self._logging_config = yaml.load(f, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
             
             # 确保日志目录存在
             self._ensure_log_directories()
@@ -84,6 +88,11 @@ class ConfigManager:
             # 应用日志配置
             logging.config.dictConfig(self._logging_config)
             
+            # 日志的格式化和文件I/O交给后台线程
+            use_queue_logging(logging.getLogger())
+            for name in (self._logging_config.get('loggers') or {}):
+                use_queue_logging(logging.getLogger(name))
+            
             self.logger.info(f"日志配置加载成功: {logging_file}")
             
         except Exception as e:
@@ -179,25 +188,54 @@ class ConfigManager:
         
         return list(ai_config.get('models', {}).keys())
     
-    def get_app_config(self, key: str = None) -> Any:
+    def get_stage_cascade(self, stage: str, provider: str = None) -> List[str]:
+        """
+        获取指定处理阶段的模型级联顺序（从便宜快速到能力更强）
+        
+        Args:
+            stage: 处理阶段名称（如 analysis、classification）
+            provider: AI提供商名称，如果为None则使用默认提供商
+            
+        Returns:
+            模型名称列表，未配置级联时返回空列表
+        """
+        provider = provider or self.get_default_provider()
+        ai_config = self.get_ai_config(provider)
+        if not ai_config:
+            return []
+        
+        cascade = ai_config.get('cascade', {}) or {}
+        models = cascade.get(stage, []) or []
+        available = self.get_available_models(provider)
+        
+        # 过滤掉未在模型列表中配置的模型
+        valid_models = [model for model in models if model in available]
+        if len(valid_models) < len(models):
+            self.logger.warning(f"{provider} 的 {stage} 级联配置中存在未知模型，已忽略")
+        
+        return valid_models
+    
+    def get_app_config(self, key: str = None, default: Any = None) -> Any:
         """
         获取应用配置
         
         Args:
             key: 配置键名，如果为None则返回所有应用配置
+            default: 配置项不存在或为空（null）时的默认值（显式配置的0和false保持原值）
             
         Returns:
             配置值或配置字典
         """
         if not self._models_config:
-            return None
+            return default if key is not None else None
         
         app_config = self._models_config.get('app_config', {})
         
         if key is None:
             return app_config
         else:
-            return app_config.get(key)
+            value = app_config.get(key)
+            return default if value is None else value
     
     def get_proxy_config(self) -> Dict[str, Any]:
         """
@@ -0,0 +1,239 @@
+"""
+死信队列模块
+记录分析和分类阶段失败的论文（错误类型和每次尝试的记录），主流程在退避时间内跳过这些论文，
+到重试时间后由主流程或 run.py retry-failed（独立的并发数）重试
+"""
+import json
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Union
+from .logger import get_logger
+from .file_utils import atomic_open, file_lock
+
+
+# 死信状态
+LETTER_PENDING = "pending"      # 等待重试
+LETTER_RESOLVED = "resolved"    # 重试成功
+LETTER_EXHAUSTED = "exhausted"  # 已用完重试次数，需要人工处理
+
+# 主流程中失败时的来源标记
+SOURCE_MAIN = "main"
+SOURCE_RETRY = "retry"
+
+
+class DeadLetterQueue:
+    """
+    持久化的死信队列（JSON文件，键为 阶段:日期:论文ID）
+
+    修改时持有跨进程文件锁，在锁内重新读取文件、修改后原子写入，serve、retry-failed 和多个worker
+    同时写入时不会互相覆盖记录（多台机器共享时文件系统需支持文件锁）
+    """
+
+    def __init__(self, path: Union[str, Path], backoff: float = 300, backoff_max: float = 21600,
+                 max_attempts: int = 5):
+        """
+        打开死信队列
+
+        Args:
+            path: 死信文件路径
+            backoff: 第一次失败后的等待时间（秒），之后每失败一次翻倍
+            backoff_max: 等待时间上限（秒）
+            max_attempts: 累计失败达到该次数后标记为 exhausted，不再自动重试
+        """
+        self.path = Path(path)
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.max_attempts = max_attempts
+        self.logger = get_logger('dead_letter')
+        self._lock = threading.Lock()
+        self._letters: Dict[str, Dict[str, Any]] = self._load()
+
+    @staticmethod
+    def make_key(stage: str, date: str, paper_id: str) -> str:
+        return f"{stage}:{date}:{paper_id}"
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.warning(f"读取死信文件失败，按空队列处理: {self.path} - {e}")
+            return {}
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_open(self.path) as f:
+            json.dump(self._letters, f, ensure_ascii=False, indent=2)
+
+    def add_failure(self, stage: str, date: str, paper_id: str, error_type: str, error: str,
+                    source: str = SOURCE_MAIN) -> Dict[str, Any]:
+        """
+        记录一次失败（已有记录时追加尝试记录并推迟下次重试时间）
+
+        Args:
+            stage: 阶段名称（analyze / classify）
+            date: 日期
+            paper_id: 论文ID
+            error_type: 错误类型（异常类名或 EmptyResponse 等）
+            error: 错误说明
+            source: 失败来源（main：主流程，retry：retry-failed）
+
+        Returns:
+            更新后的死信记录
+        """
+        key = self.make_key(stage, date, paper_id)
+        now = datetime.now()
+        with self._lock, file_lock(self.path):
+            self._letters = self._load()
+            letter = self._letters.get(key)
+            if letter is None or letter['status'] == LETTER_RESOLVED:
+                letter = {'stage': stage, 'date': date, 'paper_id': paper_id,
+                          'first_failed_at': now.isoformat(), 'attempts': []}
+                self._letters[key] = letter
+
+            letter['attempts'].append({'ts': now.isoformat(), 'source': source,
+                                       'error_type': error_type, 'error': error[:500]})
+            failures = len(letter['attempts'])
+            delay = min(self.backoff * (2 ** (failures - 1)), self.backoff_max)
+            letter.update({
+                'status': LETTER_EXHAUSTED if failures >= self.max_attempts else LETTER_PENDING,
+                'error_type': error_type,
+                'error': error[:500],
+                'last_failed_at': now.isoformat(),
+                'next_retry_at': (now + timedelta(seconds=delay)).isoformat(),
+            })
+            self._save()
+
+        if letter['status'] == LETTER_EXHAUSTED:
+            self.logger.warning(f"论文 {paper_id} ({stage} {date}) 已失败 {failures} 次，不再自动重试")
+        else:
+            self.logger.info(f"论文 {paper_id} ({stage} {date}) 已加入死信队列: {error_type}")
+        return letter
+
+    def resolve(self, stage: str, date: str, paper_id: str) -> bool:
+        """
+        标记重试成功
+
+        Returns:
+            是否存在对应的死信记录
+        """
+        key = self.make_key(stage, date, paper_id)
+        with self._lock, file_lock(self.path):
+            self._letters = self._load()
+            letter = self._letters.get(key)
+            if letter is None:
+                return False
+            letter['status'] = LETTER_RESOLVED
+            letter['resolved_at'] = datetime.now().isoformat()
+            self._save()
+        self.logger.info(f"死信论文重试成功: {paper_id} ({stage} {date})")
+        return True
+
+    def pending_ids(self, stage: str, date: str) -> Set[str]:
+        """
+        获取还在退避时间内或已用完重试次数的论文ID，主流程据此跳过这些论文
+
+        Args:
+            stage: 阶段名称
+            date: 日期
+
+        Returns:
+            论文ID集合
+        """
+        due_ids = self.due_ids(stage, date)
+        return {letter['paper_id'] for letter in self.letters(stage, date)
+                if letter['status'] != LETTER_RESOLVED and letter['paper_id'] not in due_ids}
+
+    def due_ids(self, stage: str, date: str) -> Set[str]:
+        """
+        获取已到重试时间的论文ID，主流程会重新处理这些论文，成功后调用 resolve
+
+        Args:
+            stage: 阶段名称
+            date: 日期
+
+        Returns:
+            论文ID集合
+        """
+        return {letter['paper_id'] for letter in self.letters(stage, date, status=LETTER_PENDING, due_only=True)}
+
+    def letters(self, stage: str = None, date: str = None, status: str = None,
+                due_only: bool = False) -> List[Dict[str, Any]]:
+        """
+        查询死信记录
+
+        Args:
+            stage: 只返回该阶段
+            date: 只返回该日期
+            status: 只返回该状态
+            due_only: 只返回已到重试时间的记录
+
+        Returns:
+            死信记录列表（按日期、阶段排序）
+        """
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._letters = self._load()
+            letters = [dict(letter) for letter in self._letters.values()
+                       if (stage is None or letter['stage'] == stage)
+                       and (date is None or letter['date'] == date)
+                       and (status is None or letter['status'] == status)
+                       and (not due_only or letter.get('next_retry_at', '') <= now)]
+        return sorted(letters, key=lambda letter: (letter['date'], letter['stage'], letter['paper_id']))
+
+    def purge_resolved(self) -> int:
+        """删除已重试成功的记录，返回删除的数量"""
+        with self._lock, file_lock(self.path):
+            self._letters = self._load()
+            resolved = [key for key, letter in self._letters.items() if letter['status'] == LETTER_RESOLVED]
+            for key in resolved:
+                del self._letters[key]
+            if resolved:
+                self._save()
+        return len(resolved)
+
+
+# 进程内按文件路径共享的死信队列（分析器和分类器写同一个文件）
+_queues: Dict[str, DeadLetterQueue] = {}
+_queues_lock = threading.Lock()
+
+
+def get_dead_letters(path: Union[str, Path], **options) -> DeadLetterQueue:
+    """
+    便捷函数：获取进程内共享的死信队列
+
+    Args:
+        path: 死信文件路径
+        **options: 首次创建时传给 DeadLetterQueue 的退避参数
+
+    Returns:
+        DeadLetterQueue实例
+    """
+    key = str(Path(path).resolve())
+    with _queues_lock:
+        queue = _queues.get(key)
+        if queue is None:
+            queue = _queues[key] = DeadLetterQueue(path, **options)
+        return queue
+
+
+def open_dead_letters(config: Dict[str, Any]) -> Optional[DeadLetterQueue]:
+    """
+    便捷函数：按组件配置打开死信队列
+
+    Args:
+        config: 组件配置（dead_letter_file 为空时不启用死信队列）
+
+    Returns:
+        DeadLetterQueue实例，未启用时返回None
+    """
+    path = config.get('dead_letter_file')
+    if not path:
+        return None
+    return get_dead_letters(path, backoff=config.get('dead_letter_backoff', 300),
+                            backoff_max=config.get('dead_letter_backoff_max', 21600),
+                            max_attempts=config.get('dead_letter_max_attempts', 5))
@@ -0,0 +1,141 @@
+"""
+进度事件模块
+以NDJSON（每行一个JSON对象）向单独的文件描述符输出运行、阶段和论文级事件，
+供GUI和批处理工具读取，不必再解析控制台输出
+"""
+import os
+import sys
+import json
+import time
+import threading
+from typing import Any, Dict, Iterator, Tuple
+
+
+# 事件类型
+EVENT_RUN_START = "run_start"
+EVENT_STAGE_START = "stage_start"
+EVENT_STAGE_END = "stage_end"
+EVENT_PAPER = "paper"
+EVENT_RESULT = "result"
+
+
+class EventStream:
+    """
+    NDJSON事件输出流
+
+    未打开时 emit() 直接返回；写入失败（如读取端已关闭）后自动停用，不影响主流程
+    """
+
+    def __init__(self):
+        """初始化事件输出流"""
+        self._lock = threading.Lock()
+        self._stream = None
+
+    @property
+    def enabled(self) -> bool:
+        """是否已打开输出"""
+        return self._stream is not None
+
+    def open(self, target: str):
+        """
+        打开事件输出
+
+        Args:
+            target: 文件描述符编号（Windows下为继承的句柄值）
+        """
+        fd = int(target)
+        if sys.platform.startswith('win'):
+            import msvcrt
+            fd = msvcrt.open_osfhandle(fd, os.O_WRONLY)
+
+        stream = os.fdopen(fd, 'w', encoding='utf-8', buffering=1)
+        with self._lock:
+            self._stream = stream
+
+    def emit(self, event: str, **fields):
+        """
+        输出一条事件
+
+        Args:
+            event: 事件类型
+            **fields: 事件字段（需可JSON序列化，其他类型转为字符串）
+        """
+        if self._stream is None:
+            return
+
+        record = {'event': event, 'ts': round(time.time(), 3), **fields}
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._stream is None:
+                return
+            try:
+                self._stream.write(line + '\n')
+                self._stream.flush()
+            except (OSError, ValueError):
+                self._stream = None
+
+    def close(self):
+        """关闭事件输出"""
+        with self._lock:
+            stream, self._stream = self._stream, None
+        if stream is not None:
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+
+# 进程级共享的事件输出流
+_events = EventStream()
+
+
+def get_events() -> EventStream:
+    """
+    便捷函数：获取进程级共享的事件输出流
+
+    Returns:
+        EventStream实例
+    """
+    return _events
+
+
+def open_event_pipe() -> Tuple[int, int, str, Dict[str, Any]]:
+    """
+    便捷函数：为子进程创建事件管道
+
+    用法：把返回的参数值传给子进程的 --events-fd，popen_kwargs 传给 subprocess.Popen，
+    子进程启动后在父进程关闭写入端，再从读取端读取事件
+
+    Returns:
+        (读取端fd, 写入端fd, 传给子进程的参数值, Popen额外参数)
+    """
+    read_fd, write_fd = os.pipe()
+    if sys.platform.startswith('win'):
+        import msvcrt
+        handle = msvcrt.get_osfhandle(write_fd)
+        os.set_handle_inheritable(handle, True)
+        return read_fd, write_fd, str(handle), {'close_fds': False}
+    return read_fd, write_fd, str(write_fd), {'pass_fds': (write_fd,)}
+
+
+def read_events(read_fd: int) -> Iterator[Dict[str, Any]]:
+    """
+    便捷函数：逐条读取事件管道中的事件（读到管道关闭为止）
+
+    Args:
+        read_fd: 事件管道读取端
+
+    Yields:
+        事件字典（无法解析的行会被跳过）
+    """
+    with os.fdopen(read_fd, 'r', encoding='utf-8', errors='replace') as stream:
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(event, dict):
+                yield event
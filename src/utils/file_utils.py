@@ -4,10 +4,156 @@
 """
 import os
 import json
+import time
 import shutil
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Union
 from .logger import get_logger
+from .metrics import get_metrics
+from .tracing import get_tracer
+
+
+# 原子写入使用的临时文件后缀（临时文件以"."开头，与目标文件在同一目录）
+TEMP_SUFFIX = ".tmp"
+
+# 清理中断写入的临时文件时，只删除超过该时长未修改的文件（秒）
+TEMP_FILE_MIN_AGE = 3600
+
+
+def pid_alive(pid: int) -> bool:
+    """
+    本机上指定进程是否仍在运行
+
+    Args:
+        pid: 进程号
+
+    Returns:
+        是否仍在运行
+    """
+    if pid <= 0:
+        return False
+    if os.name == 'nt':
+        # Windows 上 os.kill 会结束进程，改为查询进程退出码
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        exit_code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        kernel32.CloseHandle(handle)
+        return exit_code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+@contextmanager
+def atomic_open(path: Union[str, Path], encoding: str = 'utf-8'):
+    """
+    原子写入文本文件：先写同目录下的临时文件并落盘，成功后再替换目标文件，
+    进程中途退出时目标文件保持原样，不会留下写了一半的文件
+
+    Args:
+        path: 目标文件路径
+        encoding: 文件编码
+
+    Yields:
+        临时文件对象
+    """
+    file_path = Path(path)
+    temp_path = file_path.with_name(f".{file_path.name}.{os.getpid()}{TEMP_SUFFIX}")
+    try:
+        with open(temp_path, 'w', encoding=encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            temp_path.unlink()
+        except OSError:
+            pass
+        raise
+
+
+@contextmanager
+def file_lock(path: Union[str, Path]):
+    """
+    跨进程文件锁：在目标文件旁的 .lock 文件上加排他锁，用于"读取-修改-写入"共享文件期间
+    阻止其他进程同时修改（同一进程内的多个线程仍需自行加线程锁）
+
+    Args:
+        path: 要保护的文件路径
+
+    Yields:
+        None
+    """
+    lock_path = Path(path).with_name(f"{Path(path).name}.lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, 'a+b') as f:
+        if os.name == 'nt':
+            import msvcrt
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK 重试约10秒后仍失败时抛出异常，继续等待
+                    continue
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def cleanup_temp_files(directory: Union[str, Path]) -> int:
+    """
+    删除目录（含子目录）中中断的原子写入留下的临时文件
+
+    临时文件名中带有写入进程的进程号（.{文件名}.{进程号}.tmp），只删除写入进程已退出、
+    且超过 TEMP_FILE_MIN_AGE 未修改的文件，不影响 serve、worker 等进程正在进行的写入
+
+    Args:
+        directory: 目录路径
+
+    Returns:
+        删除的文件数
+    """
+    root = Path(directory)
+    if not root.exists():
+        return 0
+
+    removed = 0
+    now = time.time()
+    for temp_path in root.rglob(f".*{TEMP_SUFFIX}"):
+        pid = temp_path.name[:-len(TEMP_SUFFIX)].rsplit('.', 1)[-1]
+        try:
+            if pid.isdigit() and pid_alive(int(pid)):
+                continue
+            if now - temp_path.stat().st_mtime < TEMP_FILE_MIN_AGE:
+                continue
+            temp_path.unlink()
+            removed += 1
+        except OSError:
+            pass
+    return removed
 
 
 class FileManager:
@@ -17,6 +163,16 @@ class FileManager:
         """初始化文件管理器"""
         self.logger = get_logger(logger_name)
     
+    def _record_metrics(self, operation: str, status: str, duration: float = None, size: int = None):
+        """记录文件操作指标（次数、耗时、写入字节数）"""
+        metrics = get_metrics()
+        metrics.counter('file_operations_total', '文件操作次数').inc(operation=operation, status=status)
+        if duration is not None:
+            metrics.histogram('file_operation_duration_seconds', '文件操作耗时（秒）').observe(
+                duration, operation=operation)
+        if size:
+            metrics.counter('file_bytes_written_total', '写入文件的字节数').inc(size, operation=operation)
+    
     def ensure_dir(self, path: Union[str, Path]) -> bool:
         """
         确保目录存在，如果不存在则创建
@@ -50,12 +206,17 @@ class FileManager:
             file_path = Path(path)
             self.ensure_dir(file_path.parent)
             
-            with open(file_path, 'w', encoding='utf-8') as f:
+            start_time = time.perf_counter()
+            with get_tracer().span("file_write", "io", path=str(file_path)), \
+                    atomic_open(file_path) as f:
                 json.dump(data, f, ensure_ascii=False, indent=indent)
+                size = f.tell()
+            self._record_metrics('save_json', 'success', time.perf_counter() - start_time, size)
             
             self.logger.info(f"JSON文件保存成功: {path}")
             return True
         except Exception as e:
+            self._record_metrics('save_json', 'error')
             self.logger.error(f"JSON文件保存失败: {path}, 错误: {e}")
             return False
     
@@ -70,15 +231,19 @@ class FileManager:
             加载的数据，失败返回None
         """
         try:
+            start_time = time.perf_counter()
             with open(path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
+            self._record_metrics('load_json', 'success', time.perf_counter() - start_time)
             
             self.logger.debug(f"JSON文件加载成功: {path}")
             return data
         except FileNotFoundError:
+            self._record_metrics('load_json', 'not_found')
             self.logger.warning(f"JSON文件不存在: {path}")
             return None
         except Exception as e:
+            self._record_metrics('load_json', 'error')
             self.logger.error(f"JSON文件加载失败: {path}, 错误: {e}")
             return None
     
@@ -97,12 +262,17 @@ class FileManager:
             file_path = Path(path)
             self.ensure_dir(file_path.parent)
             
-            with open(file_path, 'w', encoding='utf-8') as f:
+            start_time = time.perf_counter()
+            with get_tracer().span("file_write", "io", path=str(file_path)), \
+                    atomic_open(file_path) as f:
                 f.write(content)
+                size = f.tell()
+            self._record_metrics('save_md', 'success', time.perf_counter() - start_time, size)
             
             self.logger.info(f"MD文件保存成功: {path}")
             return True
         except Exception as e:
+            self._record_metrics('save_md', 'error')
             self.logger.error(f"MD文件保存失败: {path}, 错误: {e}")
             return False
     
@@ -144,12 +314,17 @@ class FileManager:
             file_path = Path(path)
             self.ensure_dir(file_path.parent)
             
-            with open(file_path, 'w', encoding='utf-8') as f:
+            start_time = time.perf_counter()
+            with get_tracer().span("file_write", "io", path=str(file_path)), \
+                    atomic_open(file_path) as f:
                 f.write(content)
+                size = f.tell()
+            self._record_metrics('save_text', 'success', time.perf_counter() - start_time, size)
             
             self.logger.info(f"文本文件保存成功: {path}")
             return True
         except Exception as e:
+            self._record_metrics('save_text', 'error')
             self.logger.error(f"文本文件保存失败: {path}, 错误: {e}")
             return False
     
@@ -0,0 +1,171 @@
+"""
+运行日志模块（预写日志）
+逐篇记录论文在各阶段的状态转换和AI结果，进程中断后可用 --resume 从中断处继续：
+已得到AI结果的论文直接用日志中的结果写出，不会重复调用AI
+"""
+import os
+import json
+import socket
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+from .logger import get_logger
+from .file_utils import pid_alive
+
+
+# 论文状态
+STATE_STARTED = "started"   # 已开始处理（AI请求可能已发出）
+STATE_RESULT = "result"     # 已得到AI结果，输出尚未写完
+STATE_DONE = "done"         # 输出已写入
+STATE_FAILED = "failed"     # 处理失败
+
+
+class RunJournal:
+    """
+    单个日期单个阶段的运行日志（JSONL，每条记录写入后立即落盘）
+
+    每次运行写入自己的日志文件（{阶段}.{开始时间}.{主机名}.{进程号}.jsonl），多个进程同时处理
+    同一日期时互不截断、互不交错；新运行删除本机已退出进程留下的旧日志，resume 时按时间顺序
+    读取所有旧日志恢复各论文的最新状态
+    """
+
+    def __init__(self, directory: Union[str, Path], stage: str, resume: bool = False):
+        """
+        打开运行日志
+
+        Args:
+            directory: 日期的日志目录
+            stage: 阶段名称
+            resume: 是否继续上次的运行（否则删除已退出进程留下的旧日志）
+        """
+        self.directory = Path(directory)
+        self.stage = stage
+        self.resume = resume
+        self.logger = get_logger('journal')
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        previous = self._previous_journals()
+        if resume:
+            for path in previous:
+                self._replay(path)
+        else:
+            self._remove_finished(previous)
+
+        run_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.{socket.gethostname()}.{os.getpid()}"
+        self.path = self.directory / f"{stage}.{run_id}.jsonl"
+        self._file = open(self.path, 'x', encoding='utf-8')
+        self._append({'type': 'run', 'resume': resume, 'pid': os.getpid(),
+                      'started_at': datetime.now().isoformat()})
+
+    def _previous_journals(self) -> List[Path]:
+        """该阶段已有的运行日志（按开始时间排序，旧版本的 {阶段}.jsonl 排在最前）"""
+        legacy = self.directory / f"{self.stage}.jsonl"
+        journals = sorted(self.directory.glob(f"{self.stage}.*.jsonl"))
+        return ([legacy] if legacy.exists() else []) + journals
+
+    def _remove_finished(self, journals: List[Path]):
+        """删除本机已退出进程的旧日志（其他主机或仍在运行的进程的日志保留）"""
+        hostname = socket.gethostname()
+        for path in journals:
+            parts = path.name[:-len('.jsonl')].split('.')
+            if len(parts) >= 4:
+                host, pid = '.'.join(parts[2:-1]), parts[-1]
+                if host != hostname or not pid.isdigit() or pid_alive(int(pid)):
+                    continue
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def _replay(self, path: Path):
+        """读取旧日志，保留每篇论文的最新状态（无法解析的残行跳过）"""
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                paper_id = record.get('paper_id') if isinstance(record, dict) else None
+                if not paper_id:
+                    continue
+                entry = self._entries.setdefault(paper_id, {})
+                if 'result' in record:
+                    entry['result'] = record['result']
+                entry['state'] = record.get('state')
+
+        done = sum(1 for entry in self._entries.values() if entry['state'] == STATE_DONE)
+        self.logger.info(f"读取运行日志: {path}，已完成 {done} 篇，共 {len(self._entries)} 篇有记录")
+
+    def _append(self, record: Dict[str, Any]):
+        """追加一条记录并落盘"""
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(line + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def record(self, paper_id: str, state: str, **fields):
+        """
+        记录论文的状态转换
+
+        Args:
+            paper_id: 论文ID
+            state: 新状态
+            **fields: 附加信息（STATE_RESULT 时用 result 字段保存AI结果）
+        """
+        self._append({'paper_id': paper_id, 'state': state, 'ts': datetime.now().isoformat(), **fields})
+        with self._lock:
+            entry = self._entries.setdefault(paper_id, {})
+            if 'result' in fields:
+                entry['result'] = fields['result']
+            entry['state'] = state
+
+    def state(self, paper_id: str) -> Optional[str]:
+        """获取论文的最新状态，没有记录时返回None"""
+        with self._lock:
+            entry = self._entries.get(paper_id)
+            return entry['state'] if entry else None
+
+    def recorded_result(self, paper_id: str) -> Optional[Dict[str, Any]]:
+        """
+        获取已记录的AI结果（状态为 result 或 done 时）
+
+        Args:
+            paper_id: 论文ID
+
+        Returns:
+            结果字典，没有可用结果时返回None
+        """
+        with self._lock:
+            entry = self._entries.get(paper_id)
+            if entry and entry['state'] in (STATE_RESULT, STATE_DONE):
+                return entry.get('result')
+            return None
+
+    def close(self):
+        """关闭日志文件"""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def open_journal(journal_dir: Union[str, Path], date: str, stage: str,
+                 resume: bool = False) -> RunJournal:
+    """
+    便捷函数：打开指定日期和阶段的运行日志
+
+    Args:
+        journal_dir: 日志根目录
+        date: 日期
+        stage: 阶段名称
+        resume: 是否继续上次的运行
+
+    Returns:
+        RunJournal实例
+    """
+    return RunJournal(Path(journal_dir) / date, stage, resume)
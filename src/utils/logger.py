@@ -3,11 +3,224 @@
 提供统一的日志管理功能
 """
 import os
+import re
+import gzip
+import queue
+import atexit
+import shutil
 import logging
 import logging.handlers
+import time
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Tuple, Union
+
+
+# 按日期命名的日志文件（如 2025-07-29.log）
+_DATED_LOG_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}\.log$')
+
+# 最近修改过的往日日志不压缩（跨天运行的 serve 常驻服务和批处理worker可能仍在写入）
+LOG_COMPRESS_MIN_AGE = 24 * 3600
+
+
+def _open_files() -> set:
+    """
+    获取所有进程打开的文件路径（通过 /proc 获取，没有 /proc 的系统返回空集合）
+    
+    Returns:
+        文件路径集合
+    """
+    proc = Path('/proc')
+    if not proc.is_dir():
+        return set()
+    
+    paths = set()
+    for fd_dir in proc.glob('[0-9]*/fd'):
+        try:
+            for fd in fd_dir.iterdir():
+                paths.add(os.readlink(fd))
+        except OSError:
+            # 进程已退出或无权限查看
+            continue
+    return paths
+
+
+def compress_old_logs(log_dir: str, keep_date: str):
+    """
+    压缩目录中往日的按日期命名的日志文件
+    
+    跳过最近修改过的和仍被其他进程打开的文件，避免压缩后删除其他进程正在写入的日志
+    
+    Args:
+        log_dir: 日志目录
+        keep_date: 当前日期，该日期的日志文件保持不压缩
+    """
+    directory = Path(log_dir)
+    if not directory.exists():
+        return
+    
+    now = time.time()
+    candidates = []
+    for log_file in directory.iterdir():
+        if not _DATED_LOG_PATTERN.match(log_file.name) or log_file.name.startswith(keep_date):
+            continue
+        try:
+            if now - log_file.stat().st_mtime < LOG_COMPRESS_MIN_AGE:
+                continue
+        except OSError:
+            continue
+        candidates.append(log_file)
+    
+    open_files = _open_files() if candidates else set()
+    for log_file in candidates:
+        if str(log_file.resolve()) in open_files:
+            continue
+        
+        target = log_file.with_name(log_file.name + '.gz')
+        temp = log_file.with_name(log_file.name + '.gz.tmp')
+        try:
+            with open(log_file, 'rb') as f_in, gzip.open(temp, 'wb') as f_out:
+                shutil.copyfileobj(f_in, f_out)
+            os.replace(temp, target)
+            os.remove(log_file)
+        except OSError:
+            # 文件被其他进程占用等情况，下次启动时再压缩
+            if temp.exists():
+                temp.unlink()
+
+
+class _AsyncQueueHandler(logging.handlers.QueueHandler):
+    """
+    队列日志处理器
+    
+    调用线程只把日志记录放入队列，格式化和文件I/O由后台监听线程完成；
+    后台线程停止后（如进程退出阶段）改为同步处理，避免丢失日志
+    """
+    
+    def __init__(self, log_queue, listener: logging.handlers.QueueListener):
+        super().__init__(log_queue)
+        self.listener = listener
+        self.stopped = False
+    
+    def prepare(self, record):
+        # 同一进程内的队列不需要序列化，消息格式化留给后台线程
+        return record
+    
+    def emit(self, record):
+        if self.stopped:
+            self.listener.handle(record)
+        else:
+            super().emit(record)
+
+
+# 进程级队列日志：每组目标处理器共用一个队列和一个后台线程
+_queue_lock = threading.Lock()
+_queue_handlers: Dict[Tuple[int, ...], _AsyncQueueHandler] = {}
+_target_handlers: Dict[Tuple[str, int], List[logging.Handler]] = {}
+_compressed_dirs = set()
+
+# 控制台输出的最低级别（None表示使用各日志器自己的级别）
+_console_level: Optional[int] = None
+
+
+def get_queue_handler(handlers: List[logging.Handler]) -> logging.Handler:
+    """
+    获取把日志转发给指定处理器的队列处理器
+    
+    Args:
+        handlers: 实际执行输出的处理器列表
+        
+    Returns:
+        队列处理器（相同的处理器组合共享同一个）
+    """
+    key = tuple(id(handler) for handler in handlers)
+    with _queue_lock:
+        queue_handler = _queue_handlers.get(key)
+        if queue_handler is None:
+            if not _queue_handlers:
+                atexit.register(stop_queue_logging)
+            
+            log_queue = queue.SimpleQueue()
+            listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+            listener.start()
+            queue_handler = _AsyncQueueHandler(log_queue, listener)
+            _queue_handlers[key] = queue_handler
+        return queue_handler
+
+
+def use_queue_logging(logger: logging.Logger):
+    """
+    把日志器现有的处理器移到后台线程执行
+    
+    Args:
+        logger: 标准库日志器
+    """
+    handlers = [h for h in logger.handlers if not isinstance(h, logging.handlers.QueueHandler)]
+    if not handlers:
+        return
+    
+    for handler in handlers:
+        logger.removeHandler(handler)
+    logger.addHandler(get_queue_handler(handlers))
+
+
+def set_console_log_level(level: Union[int, str]):
+    """
+    调整所有控制台日志输出的级别（文件日志不受影响）
+    
+    无人值守运行时可提高到WARNING，只在控制台保留警告和错误
+    
+    Args:
+        level: 日志级别（如 logging.WARNING 或 "WARNING"）
+    """
+    global _console_level
+    if isinstance(level, str):
+        level = getattr(logging, level.upper(), logging.INFO)
+    
+    with _queue_lock:
+        _console_level = level
+        queue_handlers = list(_queue_handlers.values())
+    
+    for queue_handler in queue_handlers:
+        for handler in queue_handler.listener.handlers:
+            if _is_console_handler(handler):
+                handler.setLevel(level)
+
+
+def replace_console_stream(old_stream, new_stream):
+    """
+    把写到指定流的控制台日志处理器切换到新的流
+    
+    进度面板接管终端时用它让控制台日志经过面板输出，避免日志行和进度区互相覆盖
+    
+    Args:
+        old_stream: 原来的输出流（如 sys.stdout）
+        new_stream: 新的输出流
+    """
+    with _queue_lock:
+        queue_handlers = list(_queue_handlers.values())
+    
+    for queue_handler in queue_handlers:
+        for handler in queue_handler.listener.handlers:
+            if _is_console_handler(handler) and handler.stream is old_stream:
+                handler.setStream(new_stream)
+
+
+def _is_console_handler(handler: logging.Handler) -> bool:
+    """是否为输出到控制台的处理器"""
+    return isinstance(handler, logging.StreamHandler) and not isinstance(handler, logging.FileHandler)
+
+
+def stop_queue_logging():
+    """停止后台日志线程并写出队列中剩余的日志"""
+    with _queue_lock:
+        queue_handlers = list(_queue_handlers.values())
+    
+    for queue_handler in queue_handlers:
+        if not queue_handler.stopped:
+            queue_handler.listener.stop()
+            queue_handler.stopped = True
 
 
 class Logger:
@@ -32,43 +245,58 @@ class Logger:
             self._setup_logger()
     
     def _setup_logger(self):
-        """配置日志器"""
+        """配置日志器（输出由后台线程完成）"""
         self.logger.setLevel(self.log_level)
-        
-        # 控制台输出处理器
-        console_handler = logging.StreamHandler()
-        console_formatter = logging.Formatter(
-            '%(asctime)s [%(levelname)s] %(message)s',
-            datefmt='%H:%M:%S'
-        )
-        console_handler.setFormatter(console_formatter)
-        console_handler.setLevel(self.log_level)
-        
-        # 文件输出处理器
-        log_dir = Path("logs/daily")
-        log_dir.mkdir(parents=True, exist_ok=True)
-        
-        log_file = log_dir / f"{self.date}.log"
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
-        file_formatter = logging.Formatter(
-            '%(asctime)s [%(levelname)s] %(name)s: %(message)s'
-        )
-        file_handler.setFormatter(file_formatter)
-        file_handler.setLevel(logging.DEBUG)  # 文件记录所有级别
-        
-        # 错误日志处理器
-        error_dir = Path("logs/error")
-        error_dir.mkdir(parents=True, exist_ok=True)
-        
-        error_file = error_dir / f"{self.date}_error.log"
-        error_handler = logging.FileHandler(error_file, encoding='utf-8')
-        error_handler.setFormatter(file_formatter)
-        error_handler.setLevel(logging.ERROR)
-        
-        # 添加处理器
-        self.logger.addHandler(console_handler)
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(error_handler)
+        self.logger.addHandler(get_queue_handler(self._get_target_handlers()))
+    
+    def _get_target_handlers(self) -> List[logging.Handler]:
+        """获取（同一日期和级别共用的）控制台、日志文件和错误日志处理器"""
+        key = (self.date, self.log_level)
+        with _queue_lock:
+            if key in _target_handlers:
+                return _target_handlers[key]
+            
+            # 控制台输出处理器
+            console_handler = logging.StreamHandler()
+            console_formatter = logging.Formatter(
+                '%(asctime)s [%(levelname)s] %(message)s',
+                datefmt='%H:%M:%S'
+            )
+            console_handler.setFormatter(console_formatter)
+            console_handler.setLevel(self.log_level if _console_level is None else _console_level)
+            
+            # 文件输出处理器（多个进程同时追加写入同一日志文件，不按大小轮转）
+            log_dir = Path("logs/daily")
+            log_dir.mkdir(parents=True, exist_ok=True)
+            
+            log_file = log_dir / f"{self.date}.log"
+            file_handler = logging.FileHandler(log_file, encoding='utf-8', delay=True)
+            file_formatter = logging.Formatter(
+                '%(asctime)s [%(levelname)s] %(name)s: %(message)s'
+            )
+            file_handler.setFormatter(file_formatter)
+            file_handler.setLevel(logging.DEBUG)  # 文件记录所有级别
+            
+            # 错误日志处理器
+            error_dir = Path("logs/error")
+            error_dir.mkdir(parents=True, exist_ok=True)
+            
+            error_file = error_dir / f"{self.date}_error.log"
+            error_handler = logging.FileHandler(error_file, encoding='utf-8', delay=True)
+            error_handler.setFormatter(file_formatter)
+            error_handler.setLevel(logging.ERROR)
+            
+            handlers = [console_handler, file_handler, error_handler]
+            _target_handlers[key] = handlers
+            
+            # 往日的日志在后台压缩，每个目录每个进程只处理一次
+            if str(log_dir) not in _compressed_dirs:
+                _compressed_dirs.add(str(log_dir))
+                threading.Thread(
+                    target=compress_old_logs, args=(str(log_dir), self.date), daemon=True
+                ).start()
+            
+            return handlers
     
     def debug(self, message: str):
         """记录调试信息"""
@@ -0,0 +1,400 @@
+"""
+运行指标模块
+提供计数器、直方图和仪表三类指标，支持导出JSON快照和Prometheus文本格式（/metrics）
+"""
+import json
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from .logger import get_logger
+
+
+# 直方图默认分桶（秒），覆盖文件操作到长耗时AI调用
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    """把标签字典转换为可哈希的键"""
+    return tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Dict[str, str] = None) -> str:
+    """格式化为Prometheus标签文本"""
+    items = list(key) + list((extra or {}).items())
+    if not items:
+        return ''
+    escaped = []
+    for name, value in items:
+        value = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{name}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value: float) -> str:
+    """格式化指标数值"""
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """指标基类"""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, help_text: str, lock: threading.Lock):
+        self.name = name
+        self.help = help_text
+        self._lock = lock
+
+    def render(self) -> List[str]:
+        """渲染为Prometheus文本行"""
+        raise NotImplementedError
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """导出为JSON样本列表"""
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """计数器（只增不减）"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str, lock: threading.Lock):
+        super().__init__(name, help_text, lock)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, value: float = 1, **labels):
+        """
+        增加计数
+
+        Args:
+            value: 增加的数值
+            **labels: 标签
+        """
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def get(self, **labels) -> float:
+        """获取指定标签的当前值"""
+        with self._lock:
+            return self._values.get(_label_key(labels), 0)
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(key)} {_format_value(value)}"
+                for key, value in sorted(self._values.items())]
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [{'labels': dict(key), 'value': value} for key, value in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    """仪表（可任意设置的当前值）"""
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels):
+        """
+        设置当前值
+
+        Args:
+            value: 数值
+            **labels: 标签
+        """
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+
+class Histogram(_Metric):
+    """直方图（按分桶统计分布，用于耗时等）"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, lock: threading.Lock,
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, lock)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._series: Dict[LabelKey, Dict[str, Any]] = {}
+
+    def observe(self, value: float, **labels):
+        """
+        记录一次观测值
+
+        Args:
+            value: 观测值
+            **labels: 标签
+        """
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+                self._series[key] = series
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][index] += 1
+                    break
+            series['sum'] += value
+            series['count'] += 1
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """
+        按分桶线性插值估算分位数
+
+        Args:
+            q: 分位（0-1）
+            **labels: 标签
+
+        Returns:
+            估算值，没有观测时返回None
+        """
+        with self._lock:
+            series = self._series.get(_label_key(labels))
+            if not series or not series['count']:
+                return None
+            return self._estimate_quantile(series, q)
+
+    def mean(self, **labels) -> Optional[float]:
+        """
+        获取平均值（总和除以次数，不受分桶精度影响）
+
+        Args:
+            **labels: 标签
+
+        Returns:
+            平均值，没有观测时返回None
+        """
+        with self._lock:
+            series = self._series.get(_label_key(labels))
+            if not series or not series['count']:
+                return None
+            return series['sum'] / series['count']
+
+    def _estimate_quantile(self, series: Dict[str, Any], q: float) -> float:
+        rank = q * series['count']
+        cumulative = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, series['counts']):
+            if count and cumulative + count >= rank:
+                if bound == float('inf'):
+                    return lower
+                return lower + (bound - lower) * (rank - cumulative) / count
+            cumulative += count
+            if bound != float('inf'):
+                lower = bound
+        return lower
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series['counts']):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key, {'le': _format_value(bound)})} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(series['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {series['count']}")
+        return lines
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        samples = []
+        for key, series in sorted(self._series.items()):
+            samples.append({
+                'labels': dict(key),
+                'count': series['count'],
+                'sum': round(series['sum'], 6),
+                'p50': round(self._estimate_quantile(series, 0.5), 6),
+                'p95': round(self._estimate_quantile(series, 0.95), 6)
+            })
+        return samples
+
+
+class MetricsRegistry:
+    """
+    指标注册表
+
+    同名指标只注册一次，之后按名称取回同一个实例
+    """
+
+    def __init__(self):
+        """初始化指标注册表"""
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self.started_at = datetime.now()
+
+    def _get_or_create(self, cls, name: str, help_text: str, **kwargs) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, help_text, threading.Lock(), **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"指标 {name} 已注册为 {metric.type_name}")
+            return metric
+
+    def counter(self, name: str, help_text: str = "") -> Counter:
+        """获取（或注册）计数器"""
+        return self._get_or_create(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str = "") -> Gauge:
+        """获取（或注册）仪表"""
+        return self._get_or_create(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str = "",
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """获取（或注册）直方图"""
+        return self._get_or_create(Histogram, name, help_text, buckets=buckets)
+
+    @contextmanager
+    def timer(self, name: str, help_text: str = "", **labels):
+        """
+        计时上下文管理器，把耗时（秒）记录到直方图
+
+        Args:
+            name: 直方图名称
+            help_text: 说明
+            **labels: 标签
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histogram(name, help_text).observe(time.perf_counter() - start_time, **labels)
+
+    def render_prometheus(self) -> str:
+        """
+        渲染为Prometheus文本格式
+
+        Returns:
+            指标文本
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in sorted(metrics, key=lambda m: m.name):
+            with metric._lock:
+                samples = metric.render()
+            if metric.help:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        导出所有指标的快照
+
+        Returns:
+            快照字典
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        result = {}
+        for metric in sorted(metrics, key=lambda m: m.name):
+            with metric._lock:
+                samples = metric.snapshot()
+            result[metric.name] = {'type': metric.type_name, 'help': metric.help, 'samples': samples}
+
+        return {
+            'started_at': self.started_at.isoformat(),
+            'generated_at': datetime.now().isoformat(),
+            'metrics': result
+        }
+
+    def save_snapshot(self, path: Union[str, Path]) -> Path:
+        """
+        保存JSON快照
+
+        Args:
+            path: 快照文件路径
+
+        Returns:
+            快照文件路径
+        """
+        from .file_utils import atomic_open  # file_utils 依赖本模块，延迟导入
+
+        file_path = Path(path)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_open(file_path) as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        return file_path
+
+    def reset(self):
+        """清空所有指标"""
+        with self._lock:
+            self._metrics.clear()
+            self.started_at = datetime.now()
+
+
+# 进程级共享的指标注册表
+_metrics = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """
+    便捷函数：获取进程级共享的指标注册表
+
+    Returns:
+        MetricsRegistry实例
+    """
+    return _metrics
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1",
+                         registry: MetricsRegistry = None):
+    """
+    便捷函数：在后台线程启动指标HTTP服务
+
+    /metrics 返回Prometheus文本格式，/metrics.json 返回JSON快照
+
+    Args:
+        port: 监听端口
+        host: 监听地址
+        registry: 指标注册表，默认使用进程级注册表
+
+    Returns:
+        HTTP服务实例（调用 shutdown() 停止）
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    registry = registry or get_metrics()
+    logger = get_logger('metrics')
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split('?', 1)[0]
+            if path == '/metrics':
+                body = registry.render_prometheus().encode('utf-8')
+                content_type = 'text/plain; version=0.0.4; charset=utf-8'
+            elif path == '/metrics.json':
+                body = json.dumps(registry.snapshot(), ensure_ascii=False).encode('utf-8')
+                content_type = 'application/json; charset=utf-8'
+            else:
+                self.send_error(404)
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(f"指标请求: {format % args}")
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True)
+    thread.start()
+    logger.info(f"指标服务已启动: http://{host}:{server.server_address[1]}/metrics")
+    return server
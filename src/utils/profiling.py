@@ -0,0 +1,172 @@
+"""
+性能剖析模块
+用cProfile和tracemalloc包裹各处理阶段，输出每阶段的 .pstats 文件和内存分配报告
+"""
+import io
+import pstats
+import cProfile
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Union
+from .logger import get_logger
+
+
+# 剖析模式
+PROFILE_CPU = "cpu"
+PROFILE_MEM = "mem"
+PROFILE_ALL = "all"
+PROFILE_MODES = (PROFILE_CPU, PROFILE_MEM, PROFILE_ALL)
+
+
+class StageProfiler:
+    """
+    阶段剖析器
+
+    每个阶段单独生成 {stage}.pstats（CPU）和 {stage}_alloc.txt（内存分配），
+    并保留每阶段的热点摘要供运行结束时显示
+    """
+
+    def __init__(self, output_dir: Union[str, Path], mode: str = PROFILE_ALL, top_n: int = 20):
+        """
+        初始化阶段剖析器
+
+        Args:
+            output_dir: 剖析结果目录
+            mode: 剖析模式（cpu、mem 或 all）
+            top_n: 报告中保留的热点条目数
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"不支持的剖析模式: {mode}")
+
+        self.output_dir = Path(output_dir)
+        self.mode = mode
+        self.top_n = top_n
+        self.logger = get_logger('profiler')
+        self.summaries: List[Dict[str, Any]] = []
+
+    @property
+    def cpu_enabled(self) -> bool:
+        return self.mode in (PROFILE_CPU, PROFILE_ALL)
+
+    @property
+    def mem_enabled(self) -> bool:
+        return self.mode in (PROFILE_MEM, PROFILE_ALL)
+
+    @contextmanager
+    def profile(self, stage: str):
+        """
+        剖析一个处理阶段
+
+        Args:
+            stage: 阶段名称（用作文件名）
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        summary = {'stage': stage}
+
+        profiler = cProfile.Profile() if self.cpu_enabled else None
+        started_tracemalloc = False
+        baseline = None
+        if self.mem_enabled:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(10)
+                started_tracemalloc = True
+            elif hasattr(tracemalloc, 'reset_peak'):
+                # Python 3.8 没有 reset_peak，外层已在跟踪时峰值从外层开始跟踪时算起（偏大）
+                tracemalloc.reset_peak()
+            baseline = tracemalloc.take_snapshot()
+
+        if profiler:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+                summary.update(self._save_cpu_profile(stage, profiler))
+
+            if baseline is not None:
+                summary.update(self._save_memory_report(stage, baseline))
+                if started_tracemalloc:
+                    tracemalloc.stop()
+
+            self.summaries.append(summary)
+
+    def _save_cpu_profile(self, stage: str, profiler: cProfile.Profile) -> Dict[str, Any]:
+        """保存 .pstats 文件并提取按自身耗时排序的热点函数"""
+        stats_file = self.output_dir / f"{stage}.pstats"
+        profiler.dump_stats(str(stats_file))
+
+        stats = pstats.Stats(profiler, stream=io.StringIO())
+        hotspots = []
+        for (filename, lineno, func_name), (_, calls, self_time, cum_time, _) in stats.stats.items():
+            hotspots.append({
+                'function': f"{Path(filename).name}:{lineno}({func_name})",
+                'calls': calls,
+                'self_time': self_time,
+                'cum_time': cum_time
+            })
+        hotspots.sort(key=lambda item: item['self_time'], reverse=True)
+
+        self.logger.info(f"CPU剖析已保存: {stats_file}")
+        return {
+            'pstats_file': str(stats_file),
+            'total_time': stats.total_tt,
+            'cpu_hotspots': hotspots[:self.top_n]
+        }
+
+    def _save_memory_report(self, stage: str, baseline: tracemalloc.Snapshot) -> Dict[str, Any]:
+        """保存相对阶段开始时的内存分配增量报告"""
+        snapshot = tracemalloc.take_snapshot()
+        # 排除剖析工具自身的分配
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, cProfile.__file__),
+            tracemalloc.Filter(False, pstats.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")
+        ])
+        differences = snapshot.compare_to(baseline, 'lineno')
+        _, peak = tracemalloc.get_traced_memory()
+
+        report_file = self.output_dir / f"{stage}_alloc.txt"
+        with open(report_file, 'w', encoding='utf-8') as f:
+            f.write(f"阶段: {stage}\n")
+            f.write(f"峰值内存: {peak / 1024 / 1024:.1f} MB\n\n")
+            for index, stat in enumerate(differences[:self.top_n], 1):
+                f.write(f"#{index} {stat}\n")
+                for line in stat.traceback.format()[-6:]:
+                    f.write(f"    {line}\n")
+
+        self.logger.info(f"内存分配报告已保存: {report_file}")
+        return {
+            'alloc_file': str(report_file),
+            'peak_memory_mb': round(peak / 1024 / 1024, 1),
+            'mem_hotspots': [str(stat) for stat in differences[:self.top_n]]
+        }
+
+    def format_summary(self, top: int = 3) -> List[str]:
+        """
+        生成各阶段的热点摘要
+
+        Args:
+            top: 每个阶段显示的热点条目数
+
+        Returns:
+            摘要文本行
+        """
+        lines = []
+        for summary in self.summaries:
+            parts = []
+            if 'total_time' in summary:
+                parts.append(f"耗时 {summary['total_time']:.2f}秒")
+            if 'peak_memory_mb' in summary:
+                parts.append(f"峰值内存 {summary['peak_memory_mb']} MB")
+            lines.append(f"[{summary['stage']}] {'，'.join(parts)}")
+
+            for hotspot in summary.get('cpu_hotspots', [])[:top]:
+                lines.append(f"  {hotspot['self_time']:.3f}s  {hotspot['calls']}次  {hotspot['function']}")
+            for hotspot in summary.get('mem_hotspots', [])[:top]:
+                lines.append(f"  {hotspot}")
+
+        return lines
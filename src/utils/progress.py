@@ -1,12 +1,22 @@
 """
 进度管理模块
-提供详细的进度显示和统计功能
+提供详细的进度显示和统计功能；ProgressDashboard 用一个渲染线程同时显示多个并发任务
 """
+import sys
 import time
-from typing import Optional
+import shutil
+import threading
+import unicodedata
+from typing import Any, Dict, List, Optional
 from .console import ConsoleOutput
 
 
+# 单篇论文处理耗时直方图，按阶段（analyze、classify）记录，用于估算剩余时间
+ITEM_DURATION_METRIC = "paper_duration_seconds"
+
+SPINNER_FRAMES = ['⠋', '⠙', '⠹', '⠸', '⠼', '⠴', '⠦', '⠧', '⠇', '⠏']
+
+
 class ProgressManager:
     """进度管理器，提供详细的进度信息"""
     
@@ -120,6 +130,409 @@ class SimpleProgress:
         ConsoleOutput.print_success(f"{self.desc} 完成！")
 
 
+def observe_item_duration(stage: str, seconds: float):
+    """
+    记录一篇论文在某阶段的实际处理耗时（剩余时间估算的数据来源）
+    
+    Args:
+        stage: 阶段名称
+        seconds: 耗时（秒）
+    """
+    from .metrics import get_metrics
+    get_metrics().histogram(ITEM_DURATION_METRIC, "单篇论文处理耗时（秒）").observe(seconds, stage=stage)
+
+
+def estimate_item_seconds(stage: str) -> Optional[float]:
+    """
+    按已测得的耗时估算某阶段处理一篇论文所需时间
+    
+    Args:
+        stage: 阶段名称
+    
+    Returns:
+        平均耗时（秒），还没有测量数据时返回None
+    """
+    from .metrics import get_metrics
+    return get_metrics().histogram(ITEM_DURATION_METRIC, "单篇论文处理耗时（秒）").mean(stage=stage)
+
+
+def render_bar(current: int, total: int, width: int = 30) -> str:
+    """
+    生成进度条文本
+    
+    Args:
+        current: 当前进度
+        total: 总数
+        width: 进度条宽度
+    
+    Returns:
+        进度条字符串
+    """
+    filled = int(width * current / total) if total else 0
+    filled = min(max(filled, 0), width)
+    return "[" + "█" * filled + "░" * (width - filled) + "]"
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    """把秒数格式化为 mm:ss 或 h:mm:ss，未知时返回“估算中”"""
+    if seconds is None:
+        return "估算中"
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes:02d}:{secs:02d}"
+
+
+def _display_width(text: str) -> int:
+    """计算文本在终端中的显示宽度（中文等全角字符占两列）"""
+    return sum(2 if unicodedata.east_asian_width(ch) in ('W', 'F') else 1 for ch in text)
+
+
+def _truncate(text: str, width: int) -> str:
+    """按显示宽度截断文本"""
+    if _display_width(text) <= width:
+        return text
+    used = 0
+    for index, ch in enumerate(text):
+        used += 2 if unicodedata.east_asian_width(ch) in ('W', 'F') else 1
+        if used > width - 1:
+            return text[:index] + "…"
+    return text
+
+
+class ProgressTask:
+    """
+    进度面板中的一个任务
+    
+    有总数的任务显示进度条和剩余时间；没有总数的任务（如一次AI调用）显示动画和已耗时
+    """
+    
+    def __init__(self, dashboard: 'ProgressDashboard', desc: str, total: Optional[int] = None,
+                 stage: Optional[str] = None, workers: int = 1, slow_after: Optional[float] = None):
+        """
+        初始化任务
+        
+        Args:
+            dashboard: 所属进度面板
+            desc: 任务描述
+            total: 总数，None表示单个进行中的操作
+            stage: 阶段名称，用于按测得的单篇耗时估算剩余时间
+            workers: 并发处理数
+            slow_after: 超过该秒数后提示响应较慢
+        """
+        self.dashboard = dashboard
+        self.desc = desc
+        self.total = total
+        self.stage = stage
+        self.workers = max(workers, 1)
+        self.slow_after = slow_after
+        self.completed = 0
+        self.counts: Dict[str, int] = {'success': 0, 'fail': 0, 'skip': 0}
+        self.start_time = time.time()
+        self.finished = False
+    
+    def advance(self, status: str = 'success', count: int = 1):
+        """
+        推进进度
+        
+        Args:
+            status: 结果状态（success、fail、skip）
+            count: 推进数量
+        """
+        with self.dashboard._lock:
+            self.completed += count
+            self.counts[status] = self.counts.get(status, 0) + count
+        self.dashboard._on_advance(self)
+    
+    def eta(self) -> Optional[float]:
+        """
+        估算剩余时间
+        
+        Returns:
+            剩余秒数，无法估算时返回None
+        """
+        if self.total is None:
+            return None
+        remaining = self.total - self.completed
+        if remaining <= 0:
+            return 0.0
+        per_item = estimate_item_seconds(self.stage) if self.stage else None
+        if per_item is None:
+            return None
+        return remaining * per_item / self.workers
+    
+    def render(self, frame: int = 0) -> str:
+        """
+        生成任务的显示文本
+        
+        Args:
+            frame: 动画帧序号
+        
+        Returns:
+            显示文本
+        """
+        elapsed = time.time() - self.start_time
+        if self.total is None:
+            text = f"{SPINNER_FRAMES[frame % len(SPINNER_FRAMES)]} {self.desc} 已耗时: {format_duration(elapsed)}"
+            if self.slow_after and elapsed >= self.slow_after:
+                text += " ⚠️ 响应较慢..."
+            return text
+        
+        return (f"📊 {self.desc}: {render_bar(self.completed, self.total)} {self.completed}/{self.total} "
+                f"(成功:{self.counts['success']}, 失败:{self.counts['fail']}, 跳过:{self.counts['skip']}) "
+                f"预计剩余: {format_duration(self.eta())}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        elapsed = time.time() - self.start_time
+        processed = self.counts['success'] + self.counts['fail']
+        return {
+            "总任务数": self.total,
+            "已完成": self.completed,
+            "成功数": self.counts['success'],
+            "失败数": self.counts['fail'],
+            "跳过数": self.counts['skip'],
+            "成功率": f"{self.counts['success']/max(processed, 1)*100:.1f}%",
+            "耗时": f"{elapsed:.1f}秒"
+        }
+    
+    def finish(self, show_summary: bool = True):
+        """
+        结束任务并从面板移除
+        
+        Args:
+            show_summary: 是否显示完成统计（仅对有总数的任务）
+        """
+        if self.finished:
+            return
+        self.finished = True
+        self.dashboard._remove(self)
+        if show_summary and self.total is not None:
+            ConsoleOutput.print_summary(f"{self.desc} 完成统计", self.get_stats())
+
+
+class _DashboardStream:
+    """面板接管终端期间替代 sys.stdout / sys.stderr 的输出流，写入前先清除进度区"""
+    
+    def __init__(self, dashboard: 'ProgressDashboard', target):
+        self._dashboard = dashboard
+        self._target = target
+    
+    def write(self, text: str) -> int:
+        return self._dashboard._write_through(self._target, text)
+    
+    def flush(self):
+        self._target.flush()
+    
+    def isatty(self) -> bool:
+        return self._target.isatty()
+    
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+
+class ProgressDashboard:
+    """
+    多任务进度面板
+    
+    所有并发任务（各日期、各阶段、各工作线程）由同一个渲染线程按固定间隔重绘，
+    终端中进度区固定在输出底部，其他输出经面板转发后显示在进度区上方；
+    输出不是终端时不启动渲染线程，只按间隔打印一行进度
+    """
+    
+    def __init__(self, interval: float = 0.1, plain_interval: float = 10.0):
+        """
+        初始化进度面板
+        
+        Args:
+            interval: 终端重绘间隔（秒）
+            plain_interval: 非终端输出时打印进度的最小间隔（秒）
+        """
+        self.interval = interval
+        self.plain_interval = plain_interval
+        self._lock = threading.RLock()
+        self._tasks: List[ProgressTask] = []
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event: Optional[threading.Event] = None
+        self._streams: Dict[str, Any] = {}
+        self._drawn_lines = 0
+        self._at_line_start = True
+        self._last_plain: Dict[int, float] = {}
+        self._frame = 0
+    
+    @property
+    def live(self) -> bool:
+        """是否正在终端中实时渲染"""
+        return self._thread is not None
+    
+    def add_task(self, desc: str, total: Optional[int] = None, stage: Optional[str] = None,
+                 workers: int = 1, slow_after: Optional[float] = None) -> ProgressTask:
+        """
+        添加任务
+        
+        Args:
+            desc: 任务描述
+            total: 总数，None表示单个进行中的操作
+            stage: 阶段名称，用于估算剩余时间
+            workers: 并发处理数
+            slow_after: 超过该秒数后提示响应较慢
+        
+        Returns:
+            ProgressTask实例（处理完成后调用 finish()）
+        """
+        task = ProgressTask(self, desc, total, stage, workers, slow_after)
+        with self._lock:
+            self._tasks.append(task)
+            start = len(self._tasks) == 1
+        if start:
+            self._start()
+        return task
+    
+    def start_activity(self, desc: str, slow_after: Optional[float] = None) -> ProgressTask:
+        """
+        显示一个进行中的操作（动画和已耗时），替代每次调用单独启动的动画线程
+        
+        Args:
+            desc: 操作描述
+            slow_after: 超过该秒数后提示响应较慢
+        
+        Returns:
+            ProgressTask实例（操作结束后调用 finish()）
+        """
+        return self.add_task(desc, slow_after=slow_after)
+    
+    def render_lines(self) -> List[str]:
+        """
+        生成进度区的所有行
+        
+        Returns:
+            显示文本列表（按终端宽度截断）
+        """
+        width = max(shutil.get_terminal_size().columns - 1, 20)
+        with self._lock:
+            tasks = list(self._tasks)
+            frame = self._frame
+        return [_truncate(task.render(frame), width) for task in tasks]
+    
+    def _start(self):
+        """输出为终端时接管 stdout/stderr 并启动渲染线程"""
+        with self._lock:
+            if self._thread is not None or not sys.stdout.isatty():
+                return
+            
+            from .logger import replace_console_stream
+            
+            # 上一次停止还没恢复输出流时直接沿用
+            for name in ('stdout', 'stderr') if not self._streams else ():
+                original = getattr(sys, name)
+                wrapper = _DashboardStream(self, original)
+                self._streams[name] = original
+                setattr(sys, name, wrapper)
+                replace_console_stream(original, wrapper)
+            
+            self._stop_event = threading.Event()
+            self._thread = threading.Thread(target=self._render_loop, args=(self._stop_event,),
+                                            name='progress-dashboard', daemon=True)
+            self._thread.start()
+    
+    def _stop(self):
+        """停止渲染线程，清除进度区并恢复 stdout/stderr"""
+        with self._lock:
+            thread, stop_event = self._thread, self._stop_event
+            self._thread = None
+        if thread is None:
+            return
+        
+        stop_event.set()
+        if thread is not threading.current_thread():
+            thread.join()
+        
+        from .logger import replace_console_stream
+        
+        with self._lock:
+            if self._thread is not None:
+                return  # 等待期间又有新任务启动了渲染
+            self._clear()
+            for name, original in self._streams.items():
+                wrapper = getattr(sys, name)
+                setattr(sys, name, original)
+                replace_console_stream(wrapper, original)
+            self._streams = {}
+    
+    def _remove(self, task: ProgressTask):
+        with self._lock:
+            if task in self._tasks:
+                self._tasks.remove(task)
+            self._last_plain.pop(id(task), None)
+            empty = not self._tasks
+        if empty:
+            self._stop()
+    
+    def _on_advance(self, task: ProgressTask):
+        """非终端输出时按间隔打印一行进度（终端由渲染线程负责）"""
+        if self.live or task.total is None:
+            return
+        now = time.time()
+        done = task.completed >= task.total
+        if not done and now - self._last_plain.get(id(task), task.start_time) < self.plain_interval:
+            return
+        self._last_plain[id(task)] = now
+        sys.stdout.write(task.render() + '\n')
+        sys.stdout.flush()
+    
+    def _render_loop(self, stop_event: threading.Event):
+        while not stop_event.wait(self.interval):
+            self._redraw()
+    
+    def _redraw(self):
+        lines = self.render_lines()
+        with self._lock:
+            self._frame += 1
+            # 其他输出写到一半（还没换行）时不重绘，避免插进别人的行里
+            if not self._at_line_start or 'stdout' not in self._streams:
+                return
+            self._clear()
+            if lines:
+                stream = self._streams['stdout']
+                stream.write('\n'.join(lines))
+                stream.flush()
+            self._drawn_lines = len(lines)
+    
+    def _clear(self):
+        """清除已绘制的进度区，光标回到进度区第一行行首"""
+        if not self._drawn_lines:
+            return
+        stream = self._streams.get('stdout')
+        if stream is not None:
+            up = f"\x1b[{self._drawn_lines - 1}A" if self._drawn_lines > 1 else ""
+            stream.write(f"{up}\r\x1b[J")
+            stream.flush()
+        self._drawn_lines = 0
+    
+    def _write_through(self, target, text: str) -> int:
+        """转发其他输出：先清除进度区，由渲染线程在下一帧重绘"""
+        with self._lock:
+            if text:
+                self._clear()
+                self._at_line_start = text.endswith('\n')
+            return target.write(text)
+
+
+# 进程级共享的进度面板
+_dashboard = ProgressDashboard()
+
+
+def get_dashboard() -> ProgressDashboard:
+    """
+    便捷函数：获取进程级共享的进度面板
+    
+    Returns:
+        ProgressDashboard实例
+    """
+    return _dashboard
+
+
 # 便捷函数
 def create_progress(total: int, desc: str) -> ProgressManager:
     """创建进度管理器"""
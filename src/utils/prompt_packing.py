@@ -0,0 +1,114 @@
+"""
+提示词打包工具模块
+将多篇论文打包进同一个提示词，并把AI响应按论文ID切分回各篇结果
+"""
+import re
+from typing import Any, Callable, Dict, List, Sequence
+
+
+# 每篇论文分段的起止标记
+SECTION_START = "=== PAPER {id} ==="
+SECTION_END = "=== END {id} ==="
+
+_SECTION_PATTERN = re.compile(r'^\s*=+\s*PAPER\s+([^\s=]+)\s*=+\s*$', re.MULTILINE | re.IGNORECASE)
+_END_PATTERN = re.compile(r'^\s*=+\s*END\s+([^\s=]+)\s*=+\s*$', re.MULTILINE | re.IGNORECASE)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算文本的token数
+
+    中日韩字符按每字约1个token计算，其余字符按每4个字符约1个token计算
+
+    Args:
+        text: 文本内容
+
+    Returns:
+        估算的token数
+    """
+    if not text:
+        return 0
+
+    cjk_count = len(re.findall(r'[\u3000-\u9fff\uac00-\ud7af\uff00-\uffef]', text))
+    other_count = len(text) - cjk_count
+    return cjk_count + (other_count + 3) // 4
+
+
+def plan_pack(items: Sequence[Any], cost_fn: Callable[[Any], int], token_budget: int,
+              overhead_tokens: int = 0, max_items: int = 10) -> List[Any]:
+    """
+    从列表开头选取能放进token预算的一组条目
+
+    Args:
+        items: 候选条目（按处理顺序）
+        cost_fn: 计算单个条目token成本的函数（含该条目的输出预留）
+        token_budget: 单个请求的token预算
+        overhead_tokens: 固定开销（指令、知识库等）
+        max_items: 每个请求最多包含的条目数
+
+    Returns:
+        选中的条目列表（至少包含一个条目）
+    """
+    pack = []
+    used = overhead_tokens
+
+    for item in items:
+        if len(pack) >= max_items:
+            break
+        cost = cost_fn(item)
+        if pack and used + cost > token_budget:
+            break
+        pack.append(item)
+        used += cost
+
+    return pack
+
+
+def format_section(section_id: str, body: str) -> str:
+    """
+    用起止标记包裹单篇论文的内容
+
+    Args:
+        section_id: 论文ID
+        body: 分段内容
+
+    Returns:
+        带标记的分段文本
+    """
+    return f"{SECTION_START.format(id=section_id)}\n{body.strip()}\n{SECTION_END.format(id=section_id)}"
+
+
+def split_sections(response: str, expected_ids: Sequence[str]) -> Dict[str, str]:
+    """
+    按论文ID切分打包请求的AI响应
+
+    Args:
+        response: AI响应文本
+        expected_ids: 请求中包含的论文ID
+
+    Returns:
+        论文ID到分段内容的映射，缺失或为空的分段不包含在结果中
+    """
+    sections = {}
+    if not response:
+        return sections
+
+    expected = set(expected_ids)
+    headers = list(_SECTION_PATTERN.finditer(response))
+
+    for index, header in enumerate(headers):
+        section_id = header.group(1).strip()
+        start = header.end()
+        stop = headers[index + 1].start() if index + 1 < len(headers) else len(response)
+        body = response[start:stop]
+
+        # 截断到结束标记
+        end_match = _END_PATTERN.search(body)
+        if end_match:
+            body = body[:end_match.start()]
+
+        body = body.strip()
+        if section_id in expected and body and section_id not in sections:
+            sections[section_id] = body
+
+    return sections
@@ -0,0 +1,164 @@
+"""
+服务容器模块
+按进程缓存各处理阶段共用的组件和资源（处理组件、HTTP连接池、知识库、AI客户端），
+使初始化开销每个进程只付出一次
+"""
+import os
+import json
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+from .logger import get_logger
+
+
+class ServiceContainer:
+    """
+    进程级服务容器
+
+    组件按名称和配置内容缓存：配置相同时返回同一个实例，配置变化（如命令行开启打包请求）时创建新实例
+    """
+
+    def __init__(self, http_pool_size: int = 10):
+        """
+        初始化服务容器
+
+        Args:
+            http_pool_size: HTTP连接池大小
+        """
+        self.logger = get_logger('services')
+        self.http_pool_size = http_pool_size
+        self._lock = threading.RLock()
+        self._components: Dict[Tuple[str, str], Any] = {}
+        self._knowledge_bases: Dict[str, Tuple[float, str]] = {}
+        self._http_session = None
+
+    @staticmethod
+    def _config_key(config: Dict[str, Any]) -> str:
+        """生成配置的缓存键"""
+        return json.dumps(config or {}, sort_keys=True, default=str)
+
+    def get_component(self, name: str, factory: Callable[[Dict[str, Any]], Any],
+                      config: Dict[str, Any]) -> Any:
+        """
+        获取（或创建）处理组件
+
+        Args:
+            name: 组件名称（如 cleaner、analyzer、classifier）
+            factory: 组件构造函数，接收配置字典
+            config: 组件配置
+
+        Returns:
+            组件实例
+        """
+        key = (name, self._config_key(config))
+        with self._lock:
+            component = self._components.get(key)
+            if component is None:
+                component = factory(dict(config))
+                self._components[key] = component
+                self.logger.debug(f"创建组件: {name}")
+            return component
+
+    def get_http_session(self):
+        """
+        获取共享的HTTP会话（带连接池，各阶段复用连接）
+
+        Returns:
+            requests.Session实例
+        """
+        with self._lock:
+            if self._http_session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.http_pool_size,
+                                      pool_maxsize=self.http_pool_size)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._http_session = session
+            return self._http_session
+
+    def get_knowledge_base(self, path: str) -> Optional[str]:
+        """
+        获取知识库文件内容（文件修改后自动重新读取）
+
+        Args:
+            path: 知识库文件路径
+
+        Returns:
+            知识库内容，文件不存在时返回None
+        """
+        if not os.path.exists(path):
+            return None
+
+        mtime = os.path.getmtime(path)
+        key = os.path.abspath(path)
+        with self._lock:
+            cached = self._knowledge_bases.get(key)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            self._knowledge_bases[key] = (mtime, content)
+            self.logger.info(f"成功加载知识库: {path}")
+            return content
+
+    def get_ai_client(self, model_type: str, stage: str, use_cascade: bool = False,
+                      max_retries: int = 3):
+        """
+        获取共享的阶段AI客户端
+
+        Args:
+            model_type: 模型类型
+            stage: 处理阶段名称
+            use_cascade: 是否启用模型级联
+            max_retries: 最大重试次数
+
+        Returns:
+            CascadeAIClient 或 RetryableAIClient 实例
+        """
+        from .ai_client import get_shared_stage_client
+        return get_shared_stage_client(model_type, stage, use_cascade, max_retries)
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        获取容器统计
+
+        Returns:
+            已缓存的组件数和知识库数
+        """
+        with self._lock:
+            return {
+                'components': len(self._components),
+                'knowledge_bases': len(self._knowledge_bases),
+                'http_session': 1 if self._http_session is not None else 0
+            }
+
+    def reset(self):
+        """释放所有缓存的组件和资源"""
+        with self._lock:
+            if self._http_session is not None:
+                self._http_session.close()
+                self._http_session = None
+            self._components.clear()
+            self._knowledge_bases.clear()
+
+
+# 进程级共享的服务容器
+_services: Optional[ServiceContainer] = None
+_services_lock = threading.Lock()
+
+
+def get_services() -> ServiceContainer:
+    """
+    便捷函数：获取进程级共享的服务容器
+
+    Returns:
+        ServiceContainer实例
+    """
+    global _services
+    with _services_lock:
+        if _services is None:
+            _services = ServiceContainer()
+        return _services
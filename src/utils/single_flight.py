@@ -0,0 +1,124 @@
+"""
+请求合并模块
+同一时刻的相同请求只向上游发起一次调用，其余调用方等待并共享结果
+"""
+import time
+import threading
+from typing import Any, Callable, Dict
+
+
+class _InFlightCall:
+    """进行中的调用"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.started_at = time.monotonic()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    请求合并器（single-flight）
+
+    以请求键区分调用：首个调用方执行实际请求，执行期间到达的相同请求直接等待其结果。
+    等待有上限：调用方超时放弃后工作线程可能仍在等待上游，超过等待上限的调用不再被合并，
+    重试请求会重新发起实际调用
+    """
+
+    def __init__(self, timeout: float = 300.0):
+        """
+        初始化请求合并器
+
+        Args:
+            timeout: 默认的合并等待上限（秒），进行中的调用超过该时长后视为已被放弃；
+                调用方一般按自己的超时和重试次数传入 do 的 timeout
+        """
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _InFlightCall] = {}
+        self.leader_calls = 0
+        self.coalesced_calls = 0
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: float = None) -> Any:
+        """
+        执行（或合并）一次调用
+
+        Args:
+            key: 请求键
+            fn: 实际执行请求的函数
+            timeout: 合并等待上限（秒），默认使用初始化时的设置
+
+        Returns:
+            请求结果；实际请求抛出异常时所有等待方都会收到同一异常
+        """
+        timeout = self.timeout if timeout is None else timeout
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                age = time.monotonic() - call.started_at if call is not None else 0.0
+                if call is not None and age < timeout:
+                    is_leader = False
+                else:
+                    # 没有进行中的调用，或进行中的调用已超过等待上限（原调用方已放弃）
+                    call = _InFlightCall()
+                    self._calls[key] = call
+                    self.leader_calls += 1
+                    is_leader = True
+
+            if is_leader:
+                break
+            if call.event.wait(timeout - age):
+                # 只统计实际共享到结果的调用（等待超时后自己发起调用的只计为实际调用）
+                with self._lock:
+                    self.coalesced_calls += 1
+                if call.error is not None:
+                    raise call.error
+                return call.result
+            # 等待超时：下一轮由本调用方重新发起实际调用
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                # 超时后已被新的调用替换时不移除新调用
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.event.set()
+
+        return call.result
+
+    def in_flight(self) -> int:
+        """当前进行中的不同请求数"""
+        with self._lock:
+            return len(self._calls)
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        获取请求合并统计
+
+        Returns:
+            实际调用数、被合并的调用数和当前进行中的请求数
+        """
+        return {
+            'leader_calls': self.leader_calls,
+            'coalesced_calls': self.coalesced_calls,
+            'in_flight': self.in_flight()
+        }
+
+
+# 进程级共享的请求合并器
+_single_flight = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    """
+    获取进程级共享的请求合并器
+
+    Returns:
+        SingleFlight实例
+    """
+    return _single_flight
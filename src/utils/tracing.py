@@ -0,0 +1,240 @@
+"""
+追踪模块
+记录各处理阶段、每篇论文、每次AI调用（含重试和等待）的耗时区间（span），
+可导出为Chrome trace-event JSON（chrome://tracing、Perfetto）或火焰图折叠栈格式
+"""
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+
+# 导出格式
+FORMAT_CHROME = "chrome"
+FORMAT_FOLDED = "folded"
+TRACE_FORMATS = (FORMAT_CHROME, FORMAT_FOLDED)
+
+
+class _Span:
+    """单个追踪区间"""
+
+    __slots__ = ('span_id', 'parent_id', 'name', 'category', 'args', 'thread_id', 'thread_name',
+                 'start', 'end', 'stack')
+
+    def __init__(self, span_id: int, parent: Optional['_Span'], name: str, category: str,
+                 args: Dict[str, Any]):
+        self.span_id = span_id
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.category = category
+        self.args = args
+        thread = threading.current_thread()
+        self.thread_id = thread.ident
+        self.thread_name = thread.name
+        self.stack = (parent.stack if parent else ()) + (name,)
+        self.start = time.perf_counter()
+        self.end = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+
+class Tracer:
+    """
+    追踪器
+
+    未启用时 span() 直接返回，几乎没有开销；启用后按线程维护当前区间栈，
+    通过 bind() 提交到其他线程的函数会挂在提交时的区间下
+    """
+
+    def __init__(self):
+        """初始化追踪器"""
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._spans: List[_Span] = []
+        self._next_id = 0
+        self._origin = time.perf_counter()
+
+    def enable(self):
+        """启用追踪并清空已有记录"""
+        with self._lock:
+            self._spans = []
+            self._next_id = 0
+            self._origin = time.perf_counter()
+        self.enabled = True
+
+    def disable(self):
+        """停止追踪（已有记录保留，可继续导出）"""
+        self.enabled = False
+
+    def _current(self) -> Optional[_Span]:
+        stack = getattr(self._local, 'stack', None)
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def span(self, name: str, category: str = "pipeline", **args):
+        """
+        记录一个追踪区间
+
+        Args:
+            name: 区间名称（如 analyze、ai_attempt）
+            category: 分类（stage、paper、ai、io 等）
+            **args: 附加信息（如 paper_id、attempt）
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        with self._lock:
+            self._next_id += 1
+            span_id = self._next_id
+
+        span = _Span(span_id, self._current(), name, category, args)
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(span)
+        try:
+            yield span
+        finally:
+            span.end = time.perf_counter()
+            stack.pop()
+            with self._lock:
+                self._spans.append(span)
+
+    def sleep(self, seconds: float, name: str = "sleep", **args):
+        """
+        等待指定时间，并把等待记录为区间
+
+        Args:
+            seconds: 等待秒数
+            name: 区间名称
+            **args: 附加信息
+        """
+        with self.span(name, "sleep", seconds=seconds, **args):
+            time.sleep(seconds)
+
+    def bind(self, func: Callable) -> Callable:
+        """
+        包装要在其他线程执行的函数，使其中的区间挂在当前区间下
+
+        Args:
+            func: 要包装的函数
+
+        Returns:
+            包装后的函数（未启用追踪时原样返回）
+        """
+        if not self.enabled:
+            return func
+
+        parent = self._current()
+
+        def bound(*args, **kwargs):
+            previous = getattr(self._local, 'stack', None)
+            self._local.stack = [parent] if parent else []
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._local.stack = previous
+
+        return bound
+
+    def get_spans(self) -> List[_Span]:
+        """获取已结束的区间（按开始时间排序）"""
+        with self._lock:
+            return sorted(self._spans, key=lambda s: s.start)
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """
+        转换为Chrome trace-event格式
+
+        Returns:
+            trace-event字典
+        """
+        pid = os.getpid()
+        events = []
+        thread_names = {}
+
+        for span in self.get_spans():
+            thread_names[span.thread_id] = span.thread_name
+            args = {key: value if isinstance(value, (int, float, bool, str)) or value is None else str(value)
+                    for key, value in span.args.items()}
+            events.append({
+                'name': span.name,
+                'cat': span.category,
+                'ph': 'X',
+                'ts': round((span.start - self._origin) * 1e6, 1),
+                'dur': round(span.duration * 1e6, 1),
+                'pid': pid,
+                'tid': span.thread_id,
+                'args': args
+            })
+
+        for thread_id, thread_name in thread_names.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread_id,
+                           'args': {'name': thread_name}})
+
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def to_folded(self) -> str:
+        """
+        转换为火焰图折叠栈格式（每行：栈;帧 自身耗时微秒）
+
+        Returns:
+            折叠栈文本
+        """
+        spans = self.get_spans()
+        child_time: Dict[int, float] = {}
+        for span in spans:
+            if span.parent_id is not None:
+                child_time[span.parent_id] = child_time.get(span.parent_id, 0.0) + span.duration
+
+        totals: Dict[str, int] = {}
+        for span in spans:
+            self_time = max(span.duration - child_time.get(span.span_id, 0.0), 0.0)
+            key = ';'.join(frame.replace(';', ',').replace(' ', '_') for frame in span.stack)
+            totals[key] = totals.get(key, 0) + int(self_time * 1e6)
+
+        return ''.join(f"{stack} {value}\n" for stack, value in sorted(totals.items()) if value > 0)
+
+    def export(self, path: Union[str, Path], trace_format: str = FORMAT_CHROME) -> Path:
+        """
+        导出追踪记录
+
+        Args:
+            path: 输出文件路径
+            trace_format: 导出格式（chrome 或 folded）
+
+        Returns:
+            输出文件路径
+        """
+        if trace_format not in TRACE_FORMATS:
+            raise ValueError(f"不支持的追踪导出格式: {trace_format}")
+
+        file_path = Path(path)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(file_path, 'w', encoding='utf-8') as f:
+            if trace_format == FORMAT_CHROME:
+                json.dump(self.to_chrome_trace(), f, ensure_ascii=False)
+            else:
+                f.write(self.to_folded())
+        return file_path
+
+
+# 进程级共享的追踪器
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """
+    便捷函数：获取进程级共享的追踪器
+
+    Returns:
+        Tracer实例
+    """
+    return _tracer
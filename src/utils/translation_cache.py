@@ -0,0 +1,205 @@
+"""
+标题翻译缓存模块
+持久化保存论文英文标题到中文翻译的映射，跨日期、跨阶段复用
+"""
+import json
+import hashlib
+import re
+import threading
+import unicodedata
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+from .logger import get_logger
+from .metrics import get_metrics
+from .file_utils import atomic_open, file_lock
+
+
+class TranslationCache:
+    """
+    标题翻译缓存
+
+    以规范化英文标题的哈希为键，保证同一论文在不同日期、重跑时得到相同的翻译
+    """
+
+    def __init__(self, cache_file: Union[str, Path] = "data/cache/translations.json"):
+        """
+        初始化翻译缓存
+
+        Args:
+            cache_file: 缓存文件路径
+        """
+        self.cache_file = Path(cache_file)
+        self.logger = get_logger('translation_cache')
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, str]] = {}
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    @staticmethod
+    def normalize_title(title: str) -> str:
+        """
+        规范化英文标题（统一大小写、空白和Unicode形式）
+
+        Args:
+            title: 英文标题
+
+        Returns:
+            规范化后的标题
+        """
+        text = unicodedata.normalize('NFKC', title or '')
+        text = re.sub(r'\s+', ' ', text).strip().lower()
+        return text.rstrip('.')
+
+    @classmethod
+    def make_key(cls, title: str) -> str:
+        """
+        生成标题的缓存键
+
+        Args:
+            title: 英文标题
+
+        Returns:
+            缓存键（SHA1十六进制）
+        """
+        return hashlib.sha1(cls.normalize_title(title).encode('utf-8')).hexdigest()
+
+    def _load(self):
+        """从文件加载缓存"""
+        self._entries = self._read_entries()
+        if self._entries:
+            self.logger.debug(f"翻译缓存加载成功: {len(self._entries)} 条")
+
+    def _read_entries(self) -> Dict[str, Dict[str, str]]:
+        """读取缓存文件中的条目（文件不存在或损坏时返回空字典）"""
+        if not self.cache_file.exists():
+            return {}
+
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data.get('entries', {}) if isinstance(data, dict) else {}
+        except Exception as e:
+            self.logger.warning(f"翻译缓存加载失败，将重新建立: {e}")
+            return {}
+
+    def get(self, title: str) -> Optional[str]:
+        """
+        查询单个标题的翻译
+
+        Args:
+            title: 英文标题
+
+        Returns:
+            中文翻译，未命中返回None
+        """
+        return self.get_many([title]).get(title)
+
+    def get_many(self, titles: Iterable[str]) -> Dict[str, str]:
+        """
+        批量查询标题翻译
+
+        Args:
+            titles: 英文标题列表
+
+        Returns:
+            命中的标题到翻译的映射
+        """
+        found = {}
+        misses = 0
+        with self._lock:
+            for title in titles:
+                entry = self._entries.get(self.make_key(title))
+                if entry and entry.get('translation'):
+                    found[title] = entry['translation']
+                    self.hits += 1
+                else:
+                    misses += 1
+            self.misses += misses
+
+        lookups = get_metrics().counter('translation_cache_lookups_total', '翻译缓存查询次数')
+        lookups.inc(len(found), result='hit')
+        lookups.inc(misses, result='miss')
+        return found
+
+    def put_many(self, translations: Dict[str, str]) -> int:
+        """
+        批量写入标题翻译（已存在的翻译不会被覆盖，保证结果稳定）
+
+        Args:
+            translations: 英文标题到中文翻译的映射
+
+        Returns:
+            新增的条目数
+        """
+        added = 0
+        today = datetime.now().strftime('%Y-%m-%d')
+        with self._lock:
+            for title, translation in translations.items():
+                if not title or not translation or translation == title:
+                    continue
+                key = self.make_key(title)
+                if key in self._entries:
+                    continue
+                self._entries[key] = {
+                    'title': title,
+                    'translation': translation,
+                    'created': today
+                }
+                added += 1
+            if added:
+                self._dirty = True
+        return added
+
+    def save(self) -> bool:
+        """
+        将缓存写回文件（仅在有新增条目时写入）
+
+        持有跨进程文件锁，先合并其他进程（serve 常驻服务、批处理worker）已写入的条目再原子替换，
+        同一标题以文件中已有的翻译为准
+
+        Returns:
+            bool: 是否成功
+        """
+        with self._lock:
+            if not self._dirty:
+                return True
+            try:
+                self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+                with file_lock(self.cache_file):
+                    self._entries = {**self._entries, **self._read_entries()}
+                    with atomic_open(self.cache_file) as f:
+                        json.dump({'version': 1, 'entries': self._entries}, f, ensure_ascii=False, indent=2)
+                self._dirty = False
+                self.logger.info(f"翻译缓存已保存: {self.cache_file} ({len(self._entries)} 条)")
+                return True
+            except Exception as e:
+                self.logger.error(f"翻译缓存保存失败: {e}")
+                return False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# 按文件路径共享的缓存实例，使同一进程内各阶段使用同一份缓存
+_cache_instances: Dict[str, TranslationCache] = {}
+_cache_instances_lock = threading.Lock()
+
+
+def get_translation_cache(cache_file: Union[str, Path] = "data/cache/translations.json") -> TranslationCache:
+    """
+    便捷函数：获取共享的翻译缓存实例
+
+    Args:
+        cache_file: 缓存文件路径
+
+    Returns:
+        TranslationCache实例
+    """
+    key = str(Path(cache_file).resolve())
+    with _cache_instances_lock:
+        if key not in _cache_instances:
+            _cache_instances[key] = TranslationCache(cache_file)
+        return _cache_instances[key]
@@ -0,0 +1,402 @@
+"""
+分布式工作队列模块
+基于共享目录中的SQLite数据库实现租约式工作队列：多个批处理worker领取日期级和论文级工作项，
+领取后定期续约，worker中断后租约到期的工作项会被其他worker重新领取，超过重试次数后标记为失败
+"""
+import os
+import json
+import time
+import socket
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from .logger import get_logger
+
+
+# 工作项类型
+KIND_DATE = "date"
+KIND_PAPER = "paper"
+
+# 工作项状态
+ITEM_PENDING = "pending"
+ITEM_LEASED = "leased"
+ITEM_DONE = "done"
+ITEM_FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS work_items (
+    queue TEXT NOT NULL,
+    key TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    date TEXT NOT NULL,
+    paper_id TEXT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    blocked_by TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    history TEXT NOT NULL DEFAULT '[]',
+    result TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (queue, key)
+);
+CREATE INDEX IF NOT EXISTS idx_work_items_claim ON work_items (queue, status, priority, date);
+"""
+
+
+@dataclass
+class WorkItem:
+    """已领取的工作项"""
+    queue: str
+    key: str
+    kind: str
+    stage: str
+    date: str
+    paper_id: Optional[str]
+    owner: str
+    attempts: int
+    max_attempts: int
+    lease_expires: float
+    history: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def default_worker_id() -> str:
+    """默认worker标识（主机名:进程号），多台机器共享队列时可区分"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkQueue:
+    """
+    租约式工作队列
+
+    领取时在 BEGIN IMMEDIATE 事务中选择并更新工作项，同一时刻只有一个worker能领取到；
+    blocked_by 用于日期级收尾工作项：同一日期指定阶段的论文级工作项全部结束前不会被领取
+    """
+
+    def __init__(self, path: Union[str, Path], lease_seconds: float = 300, max_attempts: int = 3):
+        """
+        打开工作队列（数据库不存在时创建）
+
+        Args:
+            path: 数据库文件路径（多台机器共享时放在共享目录，文件系统需支持文件锁）
+            lease_seconds: 租约时长（秒），worker需在到期前续约
+            max_attempts: 每个工作项最多尝试的次数
+        """
+        self.path = Path(path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.logger = get_logger('work_queue')
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """每次操作使用独立连接（续约线程和主线程可同时访问）"""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """写事务（BEGIN IMMEDIATE 立即获取写锁，避免两个worker领取同一工作项）"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def enqueue(self, queue: str, items: Iterable[Dict[str, Any]]) -> int:
+        """
+        添加工作项（键已存在的工作项保持原状，多个worker重复添加同一批工作项是安全的）
+
+        Args:
+            queue: 队列名称
+            items: 工作项列表，每项包含 key、kind、stage、date，可选 paper_id、priority、blocked_by
+
+        Returns:
+            新添加的工作项数量
+        """
+        now = time.time()
+        rows = [(queue, item['key'], item['kind'], item['stage'], item['date'], item.get('paper_id'),
+                 item.get('priority', 0), item.get('blocked_by'), self.max_attempts, now, now)
+                for item in items]
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO work_items (queue, key, kind, stage, date, paper_id, priority,"
+                " blocked_by, max_attempts, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows)
+            return conn.total_changes - before
+
+    def claim(self, queue: str, owner: str) -> Optional[WorkItem]:
+        """
+        领取一个工作项（优先级数值小的优先，其次按日期）
+
+        待处理的工作项和租约已到期的工作项都可以领取；租约到期且已用完重试次数的工作项标记为失败
+
+        Args:
+            queue: 队列名称
+            owner: worker标识
+
+        Returns:
+            领取到的工作项，没有可领取的工作项时返回None
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            expired = conn.execute(
+                "UPDATE work_items SET status = ?, owner = NULL, updated_at = ?,"
+                " history = json_insert(history, '$[#]', json_object('owner', owner, 'error', 'LeaseExpired', 'ts', ?))"
+                " WHERE queue = ? AND status = ? AND lease_expires < ? AND attempts >= max_attempts",
+                (ITEM_FAILED, now, now, queue, ITEM_LEASED, now)).rowcount
+            if expired:
+                self.logger.warning(f"{expired} 个工作项租约到期且已用完重试次数，标记为失败")
+
+            row = conn.execute(
+                "SELECT * FROM work_items AS w WHERE queue = ?"
+                " AND (status = ? OR (status = ? AND lease_expires < ?))"
+                " AND (blocked_by IS NULL OR NOT EXISTS ("
+                "   SELECT 1 FROM work_items AS b WHERE b.queue = w.queue AND b.date = w.date"
+                "   AND b.stage = w.blocked_by AND b.status IN (?, ?)))"
+                " ORDER BY priority, date, key LIMIT 1",
+                (queue, ITEM_PENDING, ITEM_LEASED, now, ITEM_PENDING, ITEM_LEASED)).fetchone()
+            if row is None:
+                return None
+
+            history = json.loads(row['history'])
+            if row['status'] == ITEM_LEASED:
+                # 原worker已中断（或长时间未续约），记为一次失败
+                history.append({'owner': row['owner'], 'error': 'LeaseExpired', 'ts': now})
+                self.logger.warning(f"工作项租约已到期，重新领取: {row['key']}（原worker: {row['owner']}）")
+            lease_expires = now + self.lease_seconds
+            conn.execute(
+                "UPDATE work_items SET status = ?, owner = ?, lease_expires = ?, attempts = attempts + 1,"
+                " history = ?, updated_at = ? WHERE queue = ? AND key = ?",
+                (ITEM_LEASED, owner, lease_expires, json.dumps(history, ensure_ascii=False), now,
+                 queue, row['key']))
+
+        return WorkItem(queue=queue, key=row['key'], kind=row['kind'], stage=row['stage'], date=row['date'],
+                        paper_id=row['paper_id'], owner=owner, attempts=row['attempts'] + 1,
+                        max_attempts=row['max_attempts'], lease_expires=lease_expires, history=history)
+
+    def heartbeat(self, item: WorkItem) -> bool:
+        """
+        续约
+
+        Args:
+            item: 已领取的工作项
+
+        Returns:
+            是否续约成功（租约已被其他worker接管时返回False）
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            updated = conn.execute(
+                "UPDATE work_items SET lease_expires = ?, updated_at = ?"
+                " WHERE queue = ? AND key = ? AND status = ? AND owner = ?",
+                (now + self.lease_seconds, now, item.queue, item.key, ITEM_LEASED, item.owner)).rowcount
+        if updated:
+            item.lease_expires = now + self.lease_seconds
+        return bool(updated)
+
+    def complete(self, item: WorkItem, result: Any = None) -> bool:
+        """
+        标记工作项完成
+
+        Args:
+            item: 已领取的工作项
+            result: 工作项结果（需可JSON序列化，论文级工作项用于保存分析结果）
+
+        Returns:
+            是否成功（租约已被其他worker接管时返回False，结果不会写入）
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            updated = conn.execute(
+                "UPDATE work_items SET status = ?, owner = NULL, lease_expires = NULL, result = ?, updated_at = ?"
+                " WHERE queue = ? AND key = ? AND status = ? AND owner = ?",
+                (ITEM_DONE, json.dumps(result, ensure_ascii=False) if result is not None else None, now,
+                 item.queue, item.key, ITEM_LEASED, item.owner)).rowcount
+        if not updated:
+            self.logger.warning(f"工作项租约已失效，结果未写入: {item.key}")
+        return bool(updated)
+
+    def fail(self, item: WorkItem, error: str) -> str:
+        """
+        记录工作项失败（未用完重试次数时放回队列）
+
+        Args:
+            item: 已领取的工作项
+            error: 错误说明
+
+        Returns:
+            工作项的新状态
+        """
+        now = time.time()
+        status = ITEM_PENDING if item.attempts < item.max_attempts else ITEM_FAILED
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE work_items SET status = ?, owner = NULL, lease_expires = NULL, updated_at = ?,"
+                " history = json_insert(history, '$[#]', json_object('owner', ?, 'error', ?, 'ts', ?))"
+                " WHERE queue = ? AND key = ? AND status = ? AND owner = ?",
+                (status, now, item.owner, error, now, item.queue, item.key, ITEM_LEASED, item.owner))
+        return status
+
+    def release(self, item: WorkItem):
+        """归还工作项（worker正常退出时调用，不计入重试次数）"""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE work_items SET status = ?, owner = NULL, lease_expires = NULL,"
+                " attempts = MAX(attempts - 1, 0), updated_at = ?"
+                " WHERE queue = ? AND key = ? AND status = ? AND owner = ?",
+                (ITEM_PENDING, time.time(), item.queue, item.key, ITEM_LEASED, item.owner))
+
+    def results(self, queue: str, date: str, stage: str) -> Dict[str, Any]:
+        """
+        获取指定日期和阶段已完成的论文级工作项结果
+
+        Args:
+            queue: 队列名称
+            date: 日期
+            stage: 阶段名称
+
+        Returns:
+            {论文ID: 结果}
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT paper_id, result FROM work_items WHERE queue = ? AND date = ? AND stage = ?"
+                " AND status = ? AND result IS NOT NULL",
+                (queue, date, stage, ITEM_DONE)).fetchall()
+        return {row['paper_id']: json.loads(row['result']) for row in rows}
+
+    def reset(self, queue: str, dates: Iterable[str]) -> int:
+        """
+        删除指定日期的全部工作项（强制重新处理时使用）
+
+        Returns:
+            删除的工作项数量
+        """
+        dates = list(dates)
+        with self._transaction() as conn:
+            return conn.executemany("DELETE FROM work_items WHERE queue = ? AND date = ?",
+                                    [(queue, date) for date in dates]).rowcount
+
+    def rearm(self, queue: str, dates: Iterable[str], restart: bool = False) -> int:
+        """
+        上一轮处理已结束（这些日期没有待处理和处理中的工作项）时开始新一轮处理
+
+        检查和修改在同一事务中完成，多个worker同时启动时只有第一个会开始新一轮；
+        上一轮还在进行时不做修改，新启动的worker加入上一轮
+
+        Args:
+            queue: 队列名称
+            dates: 日期列表
+            restart: 是否删除这些日期的全部工作项从头开始（强制重新处理时使用），
+                否则把失败的工作项放回队列，并重新执行有失败论文的日期的收尾工作项
+
+        Returns:
+            删除或放回队列的工作项数量
+        """
+        dates = list(dates)
+        if not dates:
+            return 0
+        placeholders = ', '.join('?' * len(dates))
+        now = time.time()
+        with self._transaction() as conn:
+            active = conn.execute(
+                f"SELECT COUNT(*) FROM work_items WHERE queue = ? AND date IN ({placeholders})"
+                " AND status IN (?, ?)", (queue, *dates, ITEM_PENDING, ITEM_LEASED)).fetchone()[0]
+            if active:
+                return 0
+            if restart:
+                return conn.execute(f"DELETE FROM work_items WHERE queue = ? AND date IN ({placeholders})",
+                                    (queue, *dates)).rowcount
+            failed_dates = [row[0] for row in conn.execute(
+                f"SELECT DISTINCT date FROM work_items WHERE queue = ? AND date IN ({placeholders})"
+                " AND status = ?", (queue, *dates, ITEM_FAILED))]
+            if not failed_dates:
+                return 0
+            failed_placeholders = ', '.join('?' * len(failed_dates))
+            return conn.execute(
+                "UPDATE work_items SET status = ?, owner = NULL, lease_expires = NULL, attempts = 0, updated_at = ?"
+                f" WHERE queue = ? AND date IN ({failed_placeholders})"
+                " AND (status = ? OR (stage = 'finish' AND status = ?))",
+                (ITEM_PENDING, now, queue, *failed_dates, ITEM_FAILED, ITEM_DONE)).rowcount
+
+    def stats(self, queue: str) -> Dict[Tuple[str, str], int]:
+        """
+        统计各阶段各状态的工作项数量
+
+        Returns:
+            {(阶段, 状态): 数量}
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT stage, status, COUNT(*) AS count FROM work_items WHERE queue = ? GROUP BY stage, status",
+                (queue,)).fetchall()
+        return {(row['stage'], row['status']): row['count'] for row in rows}
+
+    def is_drained(self, queue: str) -> bool:
+        """队列中是否已没有待处理和处理中的工作项"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT COUNT(*) FROM work_items WHERE queue = ? AND status IN (?, ?)",
+                               (queue, ITEM_PENDING, ITEM_LEASED)).fetchone()
+        return row[0] == 0
+
+    def failed_items(self, queue: str) -> List[Dict[str, Any]]:
+        """获取已用完重试次数的工作项及其失败记录"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT key, attempts, history FROM work_items WHERE queue = ? AND status = ? ORDER BY date, key",
+                (queue, ITEM_FAILED)).fetchall()
+        return [{'key': row['key'], 'attempts': row['attempts'], 'history': json.loads(row['history'])}
+                for row in rows]
+
+
+class LeaseKeeper:
+    """
+    后台续约线程（处理工作项期间每隔租约时长的三分之一续约一次）
+
+    用法：with LeaseKeeper(queue, item) as keeper: ...，处理结束后 keeper.lost 表示租约是否已被接管
+    """
+
+    def __init__(self, queue: WorkQueue, item: WorkItem):
+        self.queue = queue
+        self.item = item
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lease-{item.key}", daemon=True)
+
+    def _run(self):
+        interval = max(self.queue.lease_seconds / 3, 1)
+        while not self._stop.wait(interval):
+            try:
+                if not self.queue.heartbeat(self.item):
+                    self.lost = True
+                    self.queue.logger.warning(f"工作项租约已被其他worker接管: {self.item.key}")
+                    return
+            except sqlite3.Error as e:
+                self.queue.logger.warning(f"续约失败，稍后重试: {self.item.key} - {e}")
+
+    def __enter__(self) -> 'LeaseKeeper':
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        return False
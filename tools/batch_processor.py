@@ -8,14 +8,111 @@ import sys
 import subprocess
 import argparse
 import re
+import threading
 from datetime import datetime, timedelta
 from pathlib import Path
 
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.utils.events import get_events, open_event_pipe, read_events
+
+# 失败阶段对应的原因说明（来自 run.py 的结果事件）
+STAGE_FAILURE_REASONS = {
+    'download': '元数据下载失败（该日期可能没有HF数据）',
+    'clean': '数据清洗失败',
+    'analyze': 'AI分析失败',
+    'load': '未找到分析结果',
+    'split': 'MD切分失败',
+    'classify': '论文分类失败',
+    'summary': '汇总报告生成失败',
+}
+
 class BatchProcessor:
     def __init__(self):
         self.success_count = 0
         self.failed_dates = []
         self.skipped_dates = []
+        self.events = get_events()
+        self._pipeline = None
+        self._paper_cache = {}
+    
+    def get_pipeline(self):
+        """懒加载流水线执行器（用于按阶段清单判断结果是否仍然有效）"""
+        if self._pipeline is None:
+            from src.main import PaperAnalysisApp
+            from src.core.pipeline import PipelineExecutor
+            self._pipeline = PipelineExecutor(PaperAnalysisApp())
+        return self._pipeline
+    
+    def run_command(self, cmd, date):
+        """
+        运行 run.py 子命令，通过事件管道获取结果
+        
+        子进程的事件会加上日期转发到本工具自己的事件输出（如果已打开）
+        
+        Returns:
+            (退出码, 标准错误输出, 结果事件)
+        """
+        read_fd, write_fd, events_arg, popen_kwargs = open_event_pipe()
+        try:
+            process = subprocess.Popen(
+                cmd + ['--events-fd', events_arg],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                encoding='utf-8',
+                errors='replace',
+                **popen_kwargs
+            )
+        except Exception:
+            os.close(read_fd)
+            raise
+        finally:
+            os.close(write_fd)
+        
+        result_event = {}
+        
+        def collect_events():
+            nonlocal result_event
+            for event in read_events(read_fd):
+                if event.get('event') == 'result':
+                    result_event = event
+                fields = {'date': date, **event}
+                self.events.emit(fields.pop('event', 'unknown'), **fields)
+        
+        reader = threading.Thread(target=collect_events, daemon=True)
+        reader.start()
+        _, stderr = process.communicate()
+        reader.join()
+        return process.returncode, stderr, result_event
+    
+    def emit_date_result(self, mode, date, success, index, total, duration):
+        """输出单个日期的处理结果事件"""
+        if not success:
+            status = 'fail'
+        elif date in self.skipped_dates:
+            status = 'skip'
+        else:
+            status = 'success'
+        self.events.emit('date_end', mode=mode, date=date, status=status,
+                         index=index, total=total, duration=round(duration, 1))
+    
+    def print_failure_reason(self, stderr, result_event):
+        """根据结果事件显示失败原因"""
+        error = result_event.get('error')
+        stage = result_event.get('failed_stage')
+        if stage in STAGE_FAILURE_REASONS:
+            print(f"💡 原因: {STAGE_FAILURE_REASONS[stage]}")
+        elif error:
+            print(f"💡 错误: {error.get('type')}: {error.get('message')}")
+        elif stderr:
+            # 显示关键错误信息
+            error_lines = stderr.strip().split('\n')
+            for line in error_lines[-3:]:  # 显示最后3行错误
+                if line.strip():
+                    print(f"💡 错误: {line.strip()}")
         
     def generate_date_range(self, start_date, end_date):
         """生成日期范围"""
@@ -66,15 +163,20 @@ class BatchProcessor:
         return sorted(dates)
     
     def check_daily_completed(self, date):
-        """检查daily是否已完成"""
+        """检查daily是否已完成（报告存在且输入、提示词和模型都未变化）"""
         report_file = Path(f"data/daily_reports/reports/{date}_report.json")
-        return report_file.exists()
+        if not report_file.exists():
+            return False
+        return self.get_pipeline().is_current(date, 'analyze')
     
     def check_advanced_completed(self, date):
-        """检查advanced是否已完成"""
+        """检查advanced是否已完成（汇总存在且分类结果未失效）"""
         analysis_dir = Path(f"data/analysis_results/{date}")
         summary_file = analysis_dir / "模型分类汇总.md"
-        return summary_file.exists()
+        if not summary_file.exists():
+            return False
+        pipeline = self.get_pipeline()
+        return all(pipeline.is_current(date, stage) for stage in ('split', 'classify', 'summary'))
     
     def run_daily(self, date, skip_existing=True):
         """运行daily处理"""
@@ -84,32 +186,22 @@ class BatchProcessor:
             return True
         
         try:
-            cmd = [sys.executable, "run.py", "basic", date]
+            # 通过流水线执行：只重跑失效的阶段并更新阶段清单
+            cmd = [sys.executable, "run.py", "pipeline", date, "--stages", "basic"]
+            if not skip_existing:
+                cmd.append("--force")
             print(f"🔄 执行命令: {' '.join(cmd)}")
 
             # 正常执行，不设置超时限制
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            returncode, stderr, result_event = self.run_command(cmd, date)
 
-            if result.returncode == 0:
+            if returncode == 0:
                 print(f"✅ Daily {date} 处理成功")
                 self.success_count += 1
                 return True
             else:
                 print(f"❌ Daily {date} 处理失败")
-
-                # 检查输出中的错误信息
-                output = result.stdout + result.stderr
-                if "未找到对应的HF数据" in output:
-                    print(f"💡 原因: 该日期没有HF数据")
-                elif "API调用失败" in output:
-                    print(f"💡 原因: AI API调用失败")
-                elif result.stderr:
-                    # 显示关键错误信息
-                    error_lines = result.stderr.strip().split('\n')
-                    for line in error_lines[-3:]:  # 显示最后3行错误
-                        if line.strip():
-                            print(f"💡 错误: {line.strip()}")
-
+                self.print_failure_reason(stderr, result_event)
                 self.failed_dates.append(date)
                 return False
 
@@ -132,34 +224,21 @@ class BatchProcessor:
             return True
         
         try:
-            cmd = [sys.executable, "run.py", "advanced", date]
+            cmd = [sys.executable, "run.py", "pipeline", date, "--stages", "advanced"]
+            if not skip_existing:
+                cmd.append("--force")
             print(f"🔄 执行命令: {' '.join(cmd)}")
 
             # 正常执行，不设置超时限制
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            returncode, stderr, result_event = self.run_command(cmd, date)
 
-            if result.returncode == 0:
+            if returncode == 0:
                 print(f"✅ Advanced {date} 处理成功")
                 self.success_count += 1
                 return True
             else:
                 print(f"❌ Advanced {date} 处理失败")
-
-                # 检查输出中的错误信息
-                output = result.stdout + result.stderr
-                if "汇总报告生成失败" in output:
-                    print(f"💡 原因: 汇总报告生成失败")
-                elif "分类失败" in output:
-                    print(f"💡 原因: 论文分类失败")
-                elif "API调用失败" in output:
-                    print(f"💡 原因: AI API调用失败")
-                elif result.stderr:
-                    # 显示关键错误信息
-                    error_lines = result.stderr.strip().split('\n')
-                    for line in error_lines[-3:]:  # 显示最后3行错误
-                        if line.strip():
-                            print(f"💡 错误: {line.strip()}")
-
+                self.print_failure_reason(stderr, result_event)
                 self.failed_dates.append(date)
                 return False
 
@@ -186,6 +265,7 @@ class BatchProcessor:
             date_start = time.time()
             success = self.run_daily(date, skip_existing)
             date_end = time.time()
+            self.emit_date_result('daily', date, success, i, len(dates), date_end - date_start)
 
             if success:
                 print(f"⏱️  耗时: {date_end - date_start:.1f}秒")
@@ -218,6 +298,7 @@ class BatchProcessor:
             date_start = time.time()
             success = self.run_advanced(date, skip_existing)
             date_end = time.time()
+            self.emit_date_result('advanced', date, success, i, len(dates), date_end - date_start)
 
             if success:
                 print(f"⏱️  耗时: {date_end - date_start:.1f}秒")
@@ -237,12 +318,16 @@ class BatchProcessor:
         print(f"🎯 开始批量流水线处理")
         print(f"📅 日期范围: {len(dates)} 个日期")
         print(f"📋 日期列表: {dates}")
-        
+
+        import time
+
         for i, date in enumerate(dates, 1):
             print(f"\n{'='*60}")
             print(f"📅 流水线处理 [{i}/{len(dates)}]: {date}")
             print(f"{'='*60}")
             
+            date_start = time.time()
+
             # 先执行Daily
             print(f"🔄 步骤1: Daily处理")
             daily_success = self.run_daily(date, skip_existing)
@@ -250,12 +335,241 @@ class BatchProcessor:
             if daily_success:
                 # 再执行Advanced
                 print(f"🔄 步骤2: Advanced处理")
-                self.run_advanced(date, skip_existing)
+                success = self.run_advanced(date, skip_existing)
             else:
+                success = False
                 print(f"❌ Daily失败，跳过Advanced处理")
+
+            self.emit_date_result('pipeline', date, success, i, len(dates), time.time() - date_start)
         
         self.print_summary("Pipeline")
     
+    def batch_backfill(self, dates, stage, backend='zhipu', poll_interval=60, timeout=None, job_dir=None):
+        """离线批量任务回填（所有日期的提示词作为一个批量任务提交）"""
+        # 直接调用核心模块，而不是逐日期启动run.py子进程
+        project_root = Path(__file__).resolve().parent.parent
+        if str(project_root) not in sys.path:
+            sys.path.insert(0, str(project_root))
+
+        from src.main import PaperAnalysisApp
+        from src.core.backfill import BatchBackfill
+        from src.core.pipeline import PipelineExecutor
+        from src.utils.batch_jobs import create_batch_backend
+
+        app = PaperAnalysisApp()
+        backfill = BatchBackfill(app.app_config, create_batch_backend(backend),
+                                 executor=PipelineExecutor(app))
+
+        if job_dir:
+            # 继续已提交的任务
+            job_dir = Path(job_dir)
+            print(f"🔄 继续批量任务: {job_dir}")
+        else:
+            print(f"🎯 开始批量回填: {stage}")
+            print(f"📅 日期范围: {len(dates)} 个日期")
+            print(f"⚙️  批量任务后端: {backend}")
+
+            if stage == 'analysis':
+                # 先准备清洗数据（下载和清洗不走批量任务）
+                ready_dates = []
+                for date in dates:
+                    if app._download_metadata(date, True) and app._clean_data(date, True):
+                        ready_dates.append(date)
+                    else:
+                        print(f"❌ {date} 数据准备失败，跳过")
+                        self.failed_dates.append(date)
+                dates = ready_dates
+            else:
+                dates = [date for date in dates if self.check_daily_completed(date)]
+
+            if not dates:
+                print("❌ 没有可回填的日期")
+                return
+
+            job_dir = backfill.prepare(dates, stage)
+            if not job_dir:
+                return
+            backfill.submit(job_dir)
+
+        if backfill.wait_and_ingest(job_dir, poll_interval=poll_interval, timeout=timeout):
+            print(f"✅ 批量回填完成: {job_dir}")
+            self.success_count += 1
+        else:
+            print(f"💡 可稍后继续: python tools/batch_processor.py backfill --job {job_dir}")
+
+    def batch_worker(self, dates, mode='daily', skip_existing=True, queue_file=None, worker_id=None,
+                     reset=False, poll_interval=5):
+        """
+        分布式worker：多台机器共享 data/ 目录时，各自运行同样的命令即可协作处理一个日期范围
+        
+        工作项分三类：prepare（日期级，下载和清洗）、analyze（论文级，AI分析，结果暂存在队列中）、
+        finish（日期级，该日期的论文全部结束后合并结果，执行剩余阶段并更新阶段清单）
+        """
+        import time
+        from src.utils.work_queue import WorkQueue, LeaseKeeper, default_worker_id, KIND_DATE, ITEM_FAILED
+        
+        app = self.get_pipeline().app
+        config = app.config
+        queue_name = f"{mode}{'_force' if not skip_existing else ''}"
+        work_queue = WorkQueue(
+            queue_file or config.get_app_config('work_queue_file') or 'data/queue/work_queue.db',
+            lease_seconds=config.get_app_config('work_queue_lease') or 300,
+            max_attempts=config.get_app_config('work_queue_max_attempts') or 3
+        )
+        worker_id = worker_id or default_worker_id()
+        
+        if reset:
+            removed = work_queue.reset(queue_name, dates)
+            print(f"🧹 已清除队列中这些日期的 {removed} 个工作项")
+        else:
+            # 上一轮已处理完：强制运行从头开始，普通运行重试失败的工作项
+            rearmed = work_queue.rearm(queue_name, dates, restart=not skip_existing)
+            if rearmed:
+                print(f"🔁 上一轮已处理完，{'清除' if not skip_existing else '重新排队'} {rearmed} 个工作项")
+        added = work_queue.enqueue(queue_name, [
+            {'key': f"prepare:{date}", 'kind': KIND_DATE, 'stage': 'prepare', 'date': date, 'priority': 2}
+            for date in dates
+        ])
+        
+        print(f"🎯 启动分布式worker: {worker_id}")
+        print(f"📦 队列: {work_queue.path}（{queue_name}），新增 {added} 个日期")
+        
+        start_time = time.time()
+        processed = 0
+        while True:
+            item = work_queue.claim(queue_name, worker_id)
+            if item is None:
+                if work_queue.is_drained(queue_name):
+                    break
+                # 其他worker正在处理，或收尾工作项在等待论文级工作项结束
+                time.sleep(poll_interval)
+                continue
+            
+            processed += 1
+            item_start = time.time()
+            print(f"\n🔄 [{worker_id}] 领取 {item.key}（第 {item.attempts}/{item.max_attempts} 次）")
+            try:
+                with LeaseKeeper(work_queue, item) as keeper:
+                    result = self.process_work_item(app, work_queue, item, mode, skip_existing)
+                if keeper.lost:
+                    print(f"⚠️  {item.key} 租约已被接管，丢弃本次结果")
+                elif result is False:
+                    status = work_queue.fail(item, '处理失败')
+                    print(f"❌ {item.key} 处理失败（{'稍后重试' if status != ITEM_FAILED else '已用完重试次数'}）")
+                else:
+                    work_queue.complete(item, None if result is True else result)
+                    print(f"✅ {item.key} 完成，耗时 {time.time() - item_start:.1f}秒")
+            except KeyboardInterrupt:
+                work_queue.release(item)
+                print(f"\n⏹️  已归还 {item.key}，worker退出")
+                raise
+            except Exception as e:
+                status = work_queue.fail(item, f"{type(e).__name__}: {e}")
+                print(f"❌ {item.key} 处理异常: {e}（{'稍后重试' if status != ITEM_FAILED else '已用完重试次数'}）")
+            self.events.emit('work_item', key=item.key, stage=item.stage, date=item.date,
+                             worker=worker_id, duration=round(time.time() - item_start, 1))
+        
+        print(f"\n⏱️  本worker处理 {processed} 个工作项，总耗时 {(time.time() - start_time)/60:.1f}分钟")
+        self.print_queue_status(work_queue, queue_name)
+    
+    def process_work_item(self, app, work_queue, item, mode, skip_existing):
+        """
+        处理单个工作项
+        
+        Returns:
+            True/False 表示成功或失败；论文级工作项成功时返回分析结果字典
+        """
+        from src.core.pipeline import ADVANCED_STAGES, STATUS_FAILED, STATUS_SKIPPED
+        from src.models.report import AnalysisResult
+        from src.utils.work_queue import KIND_DATE, KIND_PAPER
+        
+        executor = self.get_pipeline()
+        
+        def run_stages(stages, force=(), incremental=False):
+            results = executor.run([item.date], stages, set(force), silent=True, incremental=incremental)
+            return not any(status in (STATUS_FAILED, STATUS_SKIPPED) for status in results.values())
+        
+        if item.stage == 'prepare':
+            done = self.check_daily_completed(item.date) and (
+                mode == 'daily' or self.check_advanced_completed(item.date))
+            if skip_existing and done:
+                print(f"⏭️  跳过已完成的日期: {item.date}")
+                self.skipped_dates.append(item.date)
+                return True
+            if not run_stages(['download', 'clean'], () if skip_existing else ('download', 'clean')):
+                return False
+            
+            papers = app.load_papers(item.date) or []
+            report_file = Path(app.app_config['output_dir']) / 'reports' / f"{item.date}_report.json"
+            existing_ids = set()
+            if skip_existing and report_file.exists():
+                analyzer = app._get_analyzer()
+                existing_ids = {analyzer._extract_paper_id_from_result(r)
+                                for r in analyzer._load_existing_results(report_file)}
+            pending = [paper for paper in papers if paper.id not in existing_ids]
+            # 论文级工作项和收尾工作项在同一事务中添加，收尾工作项不会在论文工作项添加前被领取
+            work_queue.enqueue(item.queue, [
+                {'key': f"analyze:{item.date}:{paper.id}", 'kind': KIND_PAPER, 'stage': 'analyze',
+                 'date': item.date, 'paper_id': paper.id, 'priority': 1}
+                for paper in pending
+            ] + [{'key': f"finish:{item.date}", 'kind': KIND_DATE, 'stage': 'finish', 'date': item.date,
+                  'priority': 0, 'blocked_by': 'analyze'}])
+            print(f"📋 {item.date}: {len(papers)} 篇论文，{len(pending)} 篇待分析")
+            return True
+        
+        if item.stage == 'analyze':
+            paper = self._find_paper(app, item.date, item.paper_id)
+            if paper is None:
+                print(f"❌ 清洗数据中没有论文: {item.paper_id}")
+                return False
+            result = app._get_analyzer().analyze_single(paper, silent=True)
+            return result.to_dict() if result else False
+        
+        if item.stage == 'finish':
+            results = work_queue.results(item.queue, item.date, 'analyze')
+            analysis_results = [AnalysisResult.from_dict(data) for data in results.values()]
+            if not app._get_analyzer().save_results(analysis_results, item.date):
+                return False
+            failed_papers = [entry['key'] for entry in work_queue.failed_items(item.queue)
+                             if entry['key'].startswith(f"analyze:{item.date}:")]
+            if failed_papers:
+                print(f"⚠️  {item.date} 有 {len(failed_papers)} 篇论文分析失败，"
+                      f"队列处理完后重新运行同样的worker命令会重试（或加 --reset 从头开始）")
+            report_file = Path(app.app_config['output_dir']) / 'reports' / f"{item.date}_report.json"
+            if not report_file.exists():
+                self.failed_dates.append(item.date)
+                return False
+            # 合并后的报告与单机分析的输出相同，直接记录阶段清单
+            executor.record(item.date, 'analyze')
+            if mode == 'pipeline' and not run_stages(ADVANCED_STAGES, () if skip_existing else ADVANCED_STAGES):
+                self.failed_dates.append(item.date)
+                return False
+            self.success_count += 1
+            return True
+        
+        print(f"❌ 未知的工作项: {item.key}")
+        return False
+    
+    def _find_paper(self, app, date, paper_id):
+        """从清洗数据中查找论文（按日期缓存）"""
+        if date not in self._paper_cache:
+            self._paper_cache[date] = {paper.id: paper for paper in app.load_papers(date) or []}
+        return self._paper_cache[date].get(paper_id)
+    
+    def print_queue_status(self, work_queue, queue_name):
+        """打印队列中各阶段的工作项统计和失败记录"""
+        stats = work_queue.stats(queue_name)
+        print(f"\n{'='*60}")
+        print(f"📊 队列状态: {queue_name}")
+        print(f"{'='*60}")
+        for stage in ('prepare', 'analyze', 'finish'):
+            counts = {status: count for (name, status), count in stats.items() if name == stage}
+            if counts:
+                print(f"  {stage:<8} " + "  ".join(f"{status}: {count}" for status, count in sorted(counts.items())))
+        for failed in work_queue.failed_items(queue_name):
+            last_error = failed['history'][-1]['error'] if failed['history'] else '未知'
+            print(f"❌ {failed['key']}: 尝试 {failed['attempts']} 次，最后错误: {last_error}")
+    
     def print_summary(self, task_type):
         """打印汇总结果"""
         total = self.success_count + len(self.failed_dates) + len(self.skipped_dates)
@@ -306,6 +620,15 @@ def main():
 🔹 完整流水线处理:
   python tools/batch_processor.py pipeline --start 2024-05-15 --end 2024-05-20
 
+🔹 离线批量任务回填 (Batch API):
+  python tools/batch_processor.py backfill --start 2024-05-01 --end 2024-05-31 --stage analysis
+  python tools/batch_processor.py backfill --start 2024-05-01 --end 2024-05-31 --stage classification
+  python tools/batch_processor.py backfill --job data/batch_jobs/analysis_2024-05-01_2024-05-31_120000
+
+🔹 多机协作处理 (共享 data/ 目录，每台机器运行同样的命令):
+  python tools/batch_processor.py worker --start 2024-05-01 --end 2024-05-31 --mode pipeline
+  python tools/batch_processor.py worker --start 2024-05-01 --end 2024-05-31 --status
+
 ⚙️  参数说明:
   • --start: 开始日期 (YYYY-MM-DD格式)
   • --end: 结束日期 (YYYY-MM-DD格式)
@@ -328,6 +651,8 @@ def main():
   • 遇到网络问题可重新运行 (自动跳过已完成)
         """
     )
+    parser.add_argument('--events-fd', metavar='FD',
+                        help='向该文件描述符输出NDJSON格式的进度事件（供GUI读取）')
     subparsers = parser.add_subparsers(
         dest='command',
         help='处理类型 (使用 MODE --help 查看详细说明)',
@@ -367,6 +692,40 @@ def main():
     pipeline_parser.add_argument('--end', required=True, help='结束日期 (YYYY-MM-DD格式)')
     pipeline_parser.add_argument('--force', action='store_true', help='强制重新处理已完成的日期')
     
+    # Backfill子命令
+    backfill_parser = subparsers.add_parser(
+        'backfill',
+        help='📦 离线批量任务回填 (使用 backfill --help 查看详细说明)',
+        description='把日期范围内的分析或分类提示词写成一个批量任务提交，完成后导入结果，适合大规模历史回填'
+    )
+    backfill_parser.add_argument('--start', help='开始日期 (YYYY-MM-DD格式)')
+    backfill_parser.add_argument('--end', help='结束日期 (YYYY-MM-DD格式)')
+    backfill_parser.add_argument('--stage', choices=['analysis', 'classification'], default='analysis',
+                                 help='回填阶段：analysis（基础分析）或 classification（智能分类）')
+    backfill_parser.add_argument('--backend', choices=['zhipu', 'local'], default='zhipu',
+                                 help='批量任务后端：zhipu（Batch API）或 local（本地逐条执行）')
+    backfill_parser.add_argument('--poll-interval', type=float, default=60, help='任务状态轮询间隔（秒）')
+    backfill_parser.add_argument('--timeout', type=float, help='最长等待时间（秒），超时后可用 --job 继续')
+    backfill_parser.add_argument('--job', help='继续已提交的任务目录（data/batch_jobs/...）')
+
+    # Worker子命令
+    worker_parser = subparsers.add_parser(
+        'worker',
+        help='🤝 多机协作处理 (使用 worker --help 查看详细说明)',
+        description='从共享的工作队列领取日期级和论文级工作项，多个worker（可在不同机器上）同时运行时互不重复，'
+                    'worker中断后其租约到期的工作项由其他worker接管'
+    )
+    worker_parser.add_argument('--start', required=True, help='开始日期 (YYYY-MM-DD格式)')
+    worker_parser.add_argument('--end', required=True, help='结束日期 (YYYY-MM-DD格式)')
+    worker_parser.add_argument('--mode', choices=['daily', 'pipeline'], default='daily',
+                               help='daily（基础日报）或 pipeline（基础日报 + 进阶分析）')
+    worker_parser.add_argument('--force', action='store_true', help='强制重新处理已完成的日期')
+    worker_parser.add_argument('--queue', help='工作队列数据库，默认取配置 work_queue_file')
+    worker_parser.add_argument('--worker-id', help='worker标识，默认为 主机名:进程号')
+    worker_parser.add_argument('--reset', action='store_true',
+                               help='清除队列中这些日期的工作项后重新开始（只在一个worker上使用）')
+    worker_parser.add_argument('--status', action='store_true', help='只查看队列状态')
+
     args = parser.parse_args()
     
     if not args.command:
@@ -374,6 +733,8 @@ def main():
         return
     
     processor = BatchProcessor()
+    if args.events_fd:
+        processor.events.open(args.events_fd)
     
     if args.command == 'daily':
         dates = processor.generate_date_range(args.start, args.end)
@@ -401,5 +762,31 @@ def main():
         if dates:
             processor.batch_pipeline(dates, skip_existing=not args.force)
 
+    elif args.command == 'worker':
+        dates = processor.generate_date_range(args.start, args.end)
+        if not dates:
+            return
+        if args.status:
+            from src.utils.work_queue import WorkQueue
+            from src.utils.config import get_config
+            queue_name = f"{args.mode}{'_force' if args.force else ''}"
+            work_queue = WorkQueue(args.queue or get_config().get_app_config('work_queue_file')
+                                   or 'data/queue/work_queue.db')
+            processor.print_queue_status(work_queue, queue_name)
+            return
+        processor.batch_worker(dates, args.mode, skip_existing=not args.force, queue_file=args.queue,
+                               worker_id=args.worker_id, reset=args.reset)
+
+    elif args.command == 'backfill':
+        if args.job:
+            processor.batch_backfill([], args.stage, args.backend, args.poll_interval, args.timeout, args.job)
+            return
+        if not args.start or not args.end:
+            print("❌ 请指定 --start 和 --end，或使用 --job 继续已提交的任务")
+            return
+        dates = processor.generate_date_range(args.start, args.end)
+        if dates:
+            processor.batch_backfill(dates, args.stage, args.backend, args.poll_interval, args.timeout)
+
 if __name__ == '__main__':
     main()
@@ -13,6 +13,31 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import queue
 
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.utils.events import open_event_pipe, read_events
+
+# 输出区最多保留的行数，超出后删除最早的行
+MAX_LOG_LINES = 5000
+
+# 每次刷新界面最多处理的消息数（其余留到下一次刷新）
+MAX_MESSAGES_PER_TICK = 1000
+
+# 界面刷新间隔（毫秒）
+QUEUE_POLL_MS = 100
+
+# 各处理阶段的显示名称
+STAGE_LABELS = {
+    'download': '下载元数据',
+    'clean': '清洗数据',
+    'analyze': 'AI分析',
+    'split': 'MD切分',
+    'classify': '智能分类',
+    'summary': '生成汇总',
+}
+
 # 尝试导入日期选择器，如果没有则使用普通输入框
 try:
     from tkcalendar import DateEntry
@@ -337,33 +362,38 @@ class BatchProcessorGUI:
                 # Windows下设置UTF-8编码
                 env['PYTHONIOENCODING'] = 'utf-8'
 
-            self.current_process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                universal_newlines=True,
-                encoding='utf-8',
-                errors='replace',  # 遇到无法解码的字符时替换而不是报错
-                env=env
-            )
+            # 批处理进度通过单独的事件管道（NDJSON）传回，--events-fd 需放在处理类型之前
+            read_fd, write_fd, events_arg, popen_kwargs = open_event_pipe()
+            try:
+                self.current_process = subprocess.Popen(
+                    cmd[:2] + ['--events-fd', events_arg] + cmd[2:],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                    bufsize=1,
+                    encoding='utf-8',
+                    errors='replace',  # 遇到无法解码的字符时替换而不是报错
+                    env=env,
+                    **popen_kwargs
+                )
+            except Exception:
+                os.close(read_fd)
+                raise
+            finally:
+                os.close(write_fd)
+
+            event_thread = threading.Thread(target=self.read_process_events, args=(read_fd,))
+            event_thread.daemon = True
+            event_thread.start()
 
             # 实时读取输出
             for line in iter(self.current_process.stdout.readline, ''):
                 if not self.is_running:
                     break
-                # 确保输出的字符串能够正确处理
-                try:
-                    # 尝试处理可能的编码问题
-                    clean_line = line.encode('utf-8', errors='replace').decode('utf-8')
-                    self.output_queue.put(('output', clean_line))
-                except Exception as encoding_error:
-                    # 如果还是有编码问题，使用安全的替换方式
-                    safe_line = repr(line)[1:-1]  # 移除引号
-                    self.output_queue.put(('output', f"[编码处理] {safe_line}\n"))
+                self.output_queue.put(('output', line))
 
             self.current_process.wait()
+            event_thread.join(timeout=1)
 
             if self.is_running:
                 if self.current_process.returncode == 0:
@@ -379,6 +409,27 @@ class BatchProcessorGUI:
         finally:
             self.output_queue.put(('finished', None))
     
+    def read_process_events(self, read_fd):
+        """在后台线程中读取批处理进度事件"""
+        for event in read_events(read_fd):
+            self.output_queue.put(('event', event))
+
+    def handle_event(self, event):
+        """根据进度事件更新进度条和状态栏"""
+        event_type = event.get('event')
+        date = event.get('date', '')
+
+        if event_type == 'date_end' and event.get('total'):
+            self.progress.stop()
+            self.progress.config(mode='determinate', maximum=event['total'], value=event.get('index', 0))
+            self.status_var.set(f"已完成 {event.get('index', 0)}/{event['total']} 个日期")
+        elif event_type == 'stage_start':
+            stage = STAGE_LABELS.get(event.get('stage'), event.get('stage'))
+            self.status_var.set(f"{date} {stage}中...")
+        elif event_type == 'paper' and event.get('total'):
+            stage = STAGE_LABELS.get(event.get('stage'), event.get('stage'))
+            self.status_var.set(f"{date} {stage}中... {event.get('index', 0)}/{event['total']}")
+
     def stop_processing(self):
         """停止处理"""
         self.is_running = False
@@ -388,19 +439,30 @@ class BatchProcessorGUI:
         self.output_queue.put(('output', '\n⏹️ 处理已停止\n'))
     
     def log_output(self, text):
-        """输出日志到文本框"""
+        """输出日志到文本框（超过最大行数时删除最早的行）"""
         self.output_text.insert(tk.END, text)
+        line_count = int(self.output_text.index('end-1c').split('.')[0])
+        if line_count > MAX_LOG_LINES:
+            self.output_text.delete('1.0', f'{line_count - MAX_LOG_LINES + 1}.0')
         self.output_text.see(tk.END)
-        self.root.update_idletasks()
     
     def check_queue(self):
-        """检查队列中的消息"""
+        """检查队列中的消息（每次刷新合并输出，只写一次文本框）"""
+        output_chunks = []
+        date_event = None
+        last_event = None
         try:
-            while True:
+            for _ in range(MAX_MESSAGES_PER_TICK):
                 msg_type, data = self.output_queue.get_nowait()
                 
                 if msg_type == 'output':
-                    self.log_output(data)
+                    output_chunks.append(data)
+                elif msg_type == 'event':
+                    # 只按最新状态更新界面：日期进度和当前日期内的进度分别保留最新一条
+                    if data.get('event') == 'date_end':
+                        date_event = data
+                    else:
+                        last_event = data
                 elif msg_type == 'status':
                     self.status_var.set(data)
                 elif msg_type == 'finished':
@@ -409,13 +471,22 @@ class BatchProcessorGUI:
                     self.start_button.config(state=tk.NORMAL)
                     self.stop_button.config(state=tk.DISABLED)
                     self.progress.stop()
+                    self.progress.config(mode='indeterminate', value=0)
+                    date_event = last_event = None
                     break
                     
         except queue.Empty:
             pass
         
+        if output_chunks:
+            self.log_output(''.join(output_chunks))
+        if date_event:
+            self.handle_event(date_event)
+        if last_event:
+            self.handle_event(last_event)
+        
         # 继续检查队列
-        self.root.after(100, self.check_queue)
+        self.root.after(QUEUE_POLL_MS, self.check_queue)
     
     def open_logs(self):
         """打开日志目录"""
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+启动耗时检查工具
+功能：检查不调用AI的命令（--help、status）的启动耗时和导入的模块，防止启动变慢
+"""
+import sys
+import json
+import time
+import argparse
+import subprocess
+from pathlib import Path
+
+# 不需要AI的命令不应导入的模块
+FORBIDDEN_MODULES = [
+    'zhipuai',
+    'volcenginesdkarkruntime',
+    'requests',
+    'src.core.downloader',
+    'src.core.cleaner',
+    'src.core.analyzer',
+    'src.core.classifier',
+    'src.models.paper',
+    'src.models.report',
+]
+
+# 需要检查的命令
+COMMANDS = [
+    ['--help'],
+    ['status'],
+]
+
+
+def measure_command(project_root, command_args, runs):
+    """多次运行命令，返回最短耗时（毫秒）"""
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, 'run.py'] + command_args,
+            cwd=project_root,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def find_forbidden_imports(project_root):
+    """导入主程序后，返回已加载的禁用模块"""
+    code = (
+        "import sys, json\n"
+        "import src.main\n"
+        f"forbidden = {FORBIDDEN_MODULES!r}\n"
+        "print(json.dumps([m for m in forbidden if m in sys.modules]))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=project_root,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"导入主程序失败: {result.stderr.strip()}")
+
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="检查CLI启动耗时是否在预算内")
+    parser.add_argument('--budget', type=float, default=200, help='单个命令的耗时预算（毫秒），默认200')
+    parser.add_argument('--runs', type=int, default=5, help='每个命令运行次数（取最短耗时），默认5')
+    args = parser.parse_args()
+
+    project_root = Path(__file__).parent.parent
+    failed = False
+
+    print("🔍 检查启动时导入的模块...")
+    loaded = find_forbidden_imports(project_root)
+    if loaded:
+        print(f"❌ 导入主程序时加载了不应导入的模块: {', '.join(loaded)}")
+        failed = True
+    else:
+        print("✅ 没有提前导入处理阶段模块和AI SDK")
+
+    print(f"⏱️  检查启动耗时（预算 {args.budget:.0f}ms，每个命令运行 {args.runs} 次）...")
+    for command_args in COMMANDS:
+        elapsed = measure_command(project_root, command_args, args.runs)
+        label = 'run.py ' + ' '.join(command_args)
+        if elapsed > args.budget:
+            print(f"❌ {label}: {elapsed:.0f}ms（超出预算）")
+            failed = True
+        else:
+            print(f"✅ {label}: {elapsed:.0f}ms")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()